@@ -1,6 +1,6 @@
 import re
 from time import sleep
-from typing import Callable, Dict
+from typing import Callable, Dict, Iterator
 
 import awswrangler as wr
 import boto3
@@ -14,6 +14,7 @@ from api.common.config.aws import (
     OUTPUT_QUERY_BUCKET,
     AWS_REGION,
 )
+from api.common.config.constants import QUERY_RESULT_CHUNK_ROWS
 from api.common.custom_exceptions import AWSServiceError, QueryExecutionError, UserError
 from api.common.logger import AppLogger
 from api.domain.dataset_metadata import DatasetMetadata
@@ -46,6 +47,24 @@ class AthenaAdapter:
         return self.query_sql(query.to_sql(table_name))
 
     def query_sql(self, query_string: str) -> DataFrame:
+        return self._read_sql_query(query_string)
+
+    def query_chunks(
+        self,
+        dataset: DatasetMetadata,
+        query: Query,
+    ) -> Iterator[DataFrame]:
+        table_name = dataset.glue_table_name()
+        return self.query_sql_chunks(query.to_sql(table_name))
+
+    def query_sql_chunks(self, query_string: str) -> Iterator[DataFrame]:
+        """
+        :return: The result of the query in chunks of rows, each of them is only read from the
+        query result in S3 when it is iterated
+        """
+        return self._read_sql_query(query_string, chunksize=QUERY_RESULT_CHUNK_ROWS)
+
+    def _read_sql_query(self, query_string: str, **kwargs):
         try:
             return self.__athena_read_sql_query(
                 sql=query_string,
@@ -53,6 +72,7 @@ class AthenaAdapter:
                 ctas_approach=False,
                 workgroup=self.__workgroup,
                 s3_output=self.__s3_output,
+                **kwargs,
             )
         except QueryFailed as error:
             self._handle_query_error(error)
@@ -1,8 +1,9 @@
+import random
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from functools import reduce
-from typing import Any, Callable, Dict, List, Optional, Type
+from typing import Any, Callable, Dict, List, Optional, Set, Type
 
 import boto3
 from boto3.dynamodb.conditions import Attr, Key, Or
@@ -17,14 +18,23 @@ from api.common.config.auth import (
 from api.common.config.aws import (
     AWS_REGION,
     DYNAMO_PERMISSIONS_TABLE_NAME,
+    DYNAMO_TRANSACTION_ATTEMPTS,
+    DYNAMO_TRANSACTION_BACKOFF_SECONDS,
     SCHEMA_TABLE_NAME,
     SERVICE_TABLE_NAME,
 )
-from api.common.custom_exceptions import AWSServiceError, UserError
+from api.common.custom_exceptions import (
+    AWSServiceError,
+    ConflictError,
+    JobAlreadyExistsError,
+    UserError,
+)
 from api.common.logger import AppLogger
 from api.domain.dataset_filters import DatasetFilters
+from api.domain.dataset_lease import DatasetLease, QueuedLeaseHolder
 from api.domain.dataset_metadata import DatasetMetadata
-from api.domain.Jobs.Job import Job
+from api.domain.dataset_statistics import DatasetStatistics
+from api.domain.Jobs.Job import Job, JobStatus
 from api.domain.Jobs.QueryJob import QueryJob
 from api.domain.Jobs.UploadJob import UploadJob
 from api.domain.permission_item import PermissionItem
@@ -85,7 +95,9 @@ class DatabaseAdapter(ABC):
         pass
 
     @abstractmethod
-    def get_latest_successful_upload_job(self, dataset: Type[DatasetMetadata]) -> Optional[Dict]:
+    def get_latest_successful_upload_job(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Optional[Dict]:
         pass
 
     @abstractmethod
@@ -108,6 +120,78 @@ class DatabaseAdapter(ABC):
     def deprecate_schema(self, metadata: Type[DatasetMetadata]) -> None:
         pass
 
+    @abstractmethod
+    def get_dataset_lease(self, lease_key: str) -> DatasetLease:
+        pass
+
+    @abstractmethod
+    def store_dataset_lease(self, lease: DatasetLease) -> bool:
+        pass
+
+    @abstractmethod
+    def get_data_version(self, dataset: Type[DatasetMetadata]) -> int:
+        pass
+
+    @abstractmethod
+    def increment_data_version(self, dataset: Type[DatasetMetadata]) -> None:
+        pass
+
+    @abstractmethod
+    def get_dataset_statistics(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Optional[DatasetStatistics]:
+        pass
+
+    @abstractmethod
+    def list_upload_statistics(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Dict[str, DatasetStatistics]:
+        pass
+
+    @abstractmethod
+    def add_dataset_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        raw_file_identifier: str,
+        statistics: DatasetStatistics,
+        job: Optional[UploadJob] = None,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def remove_upload_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        raw_file_identifier: str,
+        statistics: DatasetStatistics,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def add_dataset_partitions(
+        self, dataset: Type[DatasetMetadata], partitions: Set[str]
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def remove_dataset_partitions(
+        self, dataset: Type[DatasetMetadata], partitions: Set[str]
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def store_dataset_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        statistics: DatasetStatistics,
+        upload_statistics: Dict[str, DatasetStatistics],
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def delete_dataset_statistics(self, dataset: Type[DatasetMetadata]) -> None:
+        pass
+
 
 @dataclass
 class ExpressionAttribute:
@@ -338,10 +422,26 @@ class DynamoDBAdapter(DatabaseAdapter):
             "Domain": upload_job.domain,
             "Dataset": upload_job.dataset,
             "Version": upload_job.version,
+            "RawFilename": upload_job.raw_filename,
+            "CommittedChunks": upload_job.committed_chunks,
+            "CompletedSteps": upload_job.completed_steps,
+            "AcceptedRows": upload_job.accepted_rows,
+            "QuarantinedRows": upload_job.quarantined_rows,
             "CreatedAt": upload_job.created_at,
             "TTL": upload_job.expiry_time,
         }
-        self._store_job(item_config)
+        # The job id of an upload can be given by the client, e.g.: the id of a presigned upload, so
+        # a job is never stored over one with the same id
+        try:
+            self.service_table.put_item(
+                Item=item_config, ConditionExpression=Attr("SK").not_exists()
+            )
+        except ClientError as error:
+            if self._failed_conditions(error):
+                raise JobAlreadyExistsError(
+                    f"The job with id {upload_job.job_id} already exists"
+                )
+            self._handle_client_error("Error storing the upload job", error)
 
     def store_query_job(self, query_job: QueryJob) -> None:
         item_config = {
@@ -389,7 +489,9 @@ class DynamoDBAdapter(DatabaseAdapter):
         except ClientError as error:
             self._handle_client_error("Error fetching job from the database", error)
 
-    def get_latest_successful_upload_job(self, dataset: Type[DatasetMetadata]) -> Optional[Dict]:
+    def get_latest_successful_upload_job(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Optional[Dict]:
         """
         Get the most recent successful upload job for a specific dataset.
         Returns the job details including subject_id (uploader) or None if no successful upload exists.
@@ -404,13 +506,15 @@ class DynamoDBAdapter(DatabaseAdapter):
                     & Attr("Layer").eq(dataset.layer)
                     & Attr("Domain").eq(dataset.domain)
                     & Attr("Dataset").eq(dataset.dataset)
-                )
+                ),
             )
 
             if not jobs:
                 return None
 
-            sorted_jobs = sorted(jobs, key=lambda x: x.get("CreatedAt", 0), reverse=True)
+            sorted_jobs = sorted(
+                jobs, key=lambda x: x.get("CreatedAt", 0), reverse=True
+            )
             return self._map_job(sorted_jobs[0])
         except ClientError as error:
             AppLogger.warning(f"Error fetching latest upload job for dataset: {error}")
@@ -520,6 +624,102 @@ class DynamoDBAdapter(DatabaseAdapter):
         except ClientError as error:
             self._handle_client_error("There was an error updating job status", error)
 
+    def update_upload_job(self, job: UploadJob) -> None:
+        try:
+            self.service_table.update_item(
+                Key={
+                    "PK": "JOB",
+                    "SK": job.job_id,
+                },
+                ConditionExpression="SK = :jid",
+                UpdateExpression="set #A = :a, #B = :b, #C = :c, #D = :d, #E = :e, #F = :f, #G = :g, #H = :h",
+                ExpressionAttributeNames={
+                    "#A": "Step",
+                    "#B": "Status",
+                    "#C": "Errors",
+                    "#D": "RawFilename",
+                    "#E": "CommittedChunks",
+                    "#F": "CompletedSteps",
+                    "#G": "AcceptedRows",
+                    "#H": "QuarantinedRows",
+                },
+                ExpressionAttributeValues={
+                    ":a": job.step,
+                    ":b": job.status,
+                    ":c": job.errors if job.errors else None,
+                    ":d": job.raw_filename,
+                    ":e": job.committed_chunks,
+                    ":f": job.completed_steps,
+                    ":g": job.accepted_rows,
+                    ":h": job.quarantined_rows,
+                    ":jid": job.job_id,
+                },
+            )
+        except ClientError as error:
+            self._handle_client_error("There was an error updating job status", error)
+
+    def retry_upload_job(self, job: UploadJob) -> None:
+        """
+        Sets the failed job in progress again, clearing its errors and any cancellation requested
+        before it failed. Only one of concurrent retries of the job finds it failed.
+        """
+        try:
+            self.service_table.update_item(
+                Key={
+                    "PK": "JOB",
+                    "SK": job.job_id,
+                },
+                ConditionExpression="#B = :failed",
+                UpdateExpression="set #B = :b, #C = :c remove #D",
+                ExpressionAttributeNames={
+                    "#B": "Status",
+                    "#C": "Errors",
+                    "#D": "CancelRequested",
+                },
+                ExpressionAttributeValues={
+                    ":b": job.status,
+                    ":c": job.errors if job.errors else None,
+                    ":failed": JobStatus.FAILED,
+                },
+            )
+        except ClientError as error:
+            if self._failed_conditions(error):
+                raise ConflictError(
+                    f"The job with id {job.job_id} is no longer failed and cannot be retried"
+                )
+            self._handle_client_error("There was an error retrying the job", error)
+
+    def request_job_cancellation(self, job_id: str) -> None:
+        """
+        Flags the job for cancellation if it is still in progress. The flag is held apart from the
+        status of the job, so that it is not overwritten by the updates of the upload.
+        """
+        try:
+            self.service_table.update_item(
+                Key={
+                    "PK": "JOB",
+                    "SK": job_id,
+                },
+                ConditionExpression="#B = :b",
+                UpdateExpression="set #A = :a",
+                ExpressionAttributeNames={
+                    "#A": "CancelRequested",
+                    "#B": "Status",
+                },
+                ExpressionAttributeValues={
+                    ":a": True,
+                    ":b": JobStatus.IN_PROGRESS,
+                },
+            )
+        except ClientError as error:
+            if self._failed_conditions(error):
+                raise UserError(
+                    f"The job with id {job_id} has already finished and cannot be cancelled"
+                )
+            self._handle_client_error(
+                "There was an error requesting the job cancellation", error
+            )
+
     def update_query_job(self, job: QueryJob) -> None:
         try:
             self.service_table.update_item(
@@ -546,11 +746,480 @@ class DynamoDBAdapter(DatabaseAdapter):
         except ClientError as error:
             self._handle_client_error("There was an error updating job status", error)
 
+    def get_dataset_lease(self, lease_key: str) -> DatasetLease:
+        try:
+            item = self.service_table.get_item(
+                Key={"PK": ServiceTableItem.LEASE, "SK": lease_key}
+            ).get("Item")
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error fetching the write lease for {lease_key}", error
+            )
+        if not item:
+            return DatasetLease(key=lease_key)
+        return DatasetLease(
+            key=lease_key,
+            mode=item.get("Mode"),
+            holders={
+                holder_id: int(expiry) for holder_id, expiry in item["Holders"].items()
+            },
+            queue=[
+                QueuedLeaseHolder(holder_id=queued["Id"], expiry=int(queued["Expiry"]))
+                for queued in item["Queue"]
+            ],
+            version=int(item["Version"]),
+        )
+
+    def store_dataset_lease(self, lease: DatasetLease) -> bool:
+        """
+        Stores the lease if it has not been changed since it was read, returning whether it was stored
+        """
+        try:
+            self.service_table.put_item(
+                Item={
+                    "PK": ServiceTableItem.LEASE,
+                    "SK": lease.key,
+                    "Mode": lease.mode,
+                    "Holders": lease.holders,
+                    "Queue": [
+                        {"Id": queued.holder_id, "Expiry": queued.expiry}
+                        for queued in lease.queue
+                    ],
+                    "Version": lease.version + 1,
+                    "TTL": lease.expiry_time(),
+                },
+                ConditionExpression=(
+                    Attr("Version").eq(lease.version)
+                    if lease.version
+                    else Attr("SK").not_exists()
+                ),
+            )
+        except ClientError as error:
+            if self._failed_conditions(error):
+                return False
+            self._handle_client_error(
+                f"Error storing the write lease for {lease.key}", error
+            )
+        lease.version += 1
+        return True
+
+    def get_data_version(self, dataset: Type[DatasetMetadata]) -> int:
+        """
+        :return: The version of the data of the dataset, across all of its versions, that is
+        incremented every time its data changes
+        """
+        try:
+            item = self.service_table.get_item(
+                Key={
+                    "PK": ServiceTableItem.DATA_VERSION,
+                    "SK": dataset.dataset_identifier(with_version=False),
+                }
+            ).get("Item")
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error fetching the data version of {dataset.string_representation()}",
+                error,
+            )
+        return int(item["Version"]) if item else 0
+
+    def increment_data_version(self, dataset: Type[DatasetMetadata]) -> None:
+        try:
+            self.service_table.update_item(
+                Key={
+                    "PK": ServiceTableItem.DATA_VERSION,
+                    "SK": dataset.dataset_identifier(with_version=False),
+                },
+                UpdateExpression="ADD #A :a",
+                ExpressionAttributeNames={"#A": "Version"},
+                ExpressionAttributeValues={":a": 1},
+            )
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error incrementing the data version of {dataset.string_representation()}",
+                error,
+            )
+
+    def get_dataset_statistics(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Optional[DatasetStatistics]:
+        try:
+            item = self.service_table.get_item(
+                Key=self._dataset_statistics_key(dataset)
+            ).get("Item")
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error fetching the statistics of {dataset.string_representation()}",
+                error,
+            )
+        return self._map_dataset_statistics(item) if item else None
+
+    def list_upload_statistics(
+        self, dataset: Type[DatasetMetadata]
+    ) -> Dict[str, DatasetStatistics]:
+        """
+        :return: The statistics of the data written by each upload to the dataset, by the raw file
+        identifier of the upload
+        """
+        prefix = self._upload_statistics_key(dataset, "")["SK"]
+        items = self._query_dataset_statistics(dataset, prefix)
+        return {
+            item["SK"].removeprefix(prefix): self._map_dataset_statistics(item)
+            for item in items
+        }
+
+    def add_dataset_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        raw_file_identifier: str,
+        statistics: DatasetStatistics,
+        job: Optional[UploadJob] = None,
+    ) -> None:
+        """
+        Adds the statistics of data written by the upload to the statistics of the dataset and of the
+        upload. The committed chunks of the job are checkpointed in the same transaction, so that a
+        chunk written again by a resumed upload is only counted once.
+        """
+        # The partitions of the dataset are items of their own, written by add_dataset_partitions
+        dataset_statistics = statistics.model_copy(update={"partitions": set()})
+        updates = [
+            self._statistics_update(
+                self._dataset_statistics_key(dataset), dataset_statistics
+            ),
+            self._statistics_update(
+                self._upload_statistics_key(dataset, raw_file_identifier), statistics
+            ),
+        ]
+        if job is not None:
+            updates.append(
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {"PK": ServiceTableItem.JOB, "SK": job.job_id},
+                        "UpdateExpression": "set #A = :a",
+                        "ExpressionAttributeNames": {"#A": "CommittedChunks"},
+                        "ExpressionAttributeValues": {":a": job.committed_chunks},
+                    }
+                }
+            )
+        try:
+            self._transact_write_items(updates)
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error updating the statistics of {dataset.string_representation()}",
+                error,
+            )
+
+    def remove_upload_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        raw_file_identifier: str,
+        statistics: DatasetStatistics,
+    ) -> bool:
+        """
+        Removes the statistics of the upload and subtracts them from the statistics of the dataset,
+        in a transaction that only succeeds while the upload has statistics, so that they are never
+        subtracted twice
+
+        :return: Whether the statistics of the upload were removed
+        """
+        subtracted = DatasetStatistics(
+            size_bytes=-statistics.size_bytes,
+            files=-statistics.files,
+            rows=-statistics.rows,
+        )
+        try:
+            self._transact_write_items(
+                [
+                    {
+                        "Delete": {
+                            "TableName": SERVICE_TABLE_NAME,
+                            "Key": self._upload_statistics_key(
+                                dataset, raw_file_identifier
+                            ),
+                            "ConditionExpression": "attribute_exists(SK)",
+                        }
+                    },
+                    self._statistics_update(
+                        self._dataset_statistics_key(dataset), subtracted
+                    ),
+                ]
+            )
+        except ClientError as error:
+            if self._cancelled_by_failed_conditions(error):
+                return False
+            self._handle_client_error(
+                f"Error updating the statistics of {dataset.string_representation()}",
+                error,
+            )
+        return True
+
+    def add_dataset_partitions(
+        self, dataset: Type[DatasetMetadata], partitions: Set[str]
+    ) -> None:
+        """
+        Records the partitions written to the dataset, each as an item of its own so that the statistics
+        of the dataset do not grow with its partitions. A partition that the dataset did not have is
+        counted in the statistics of the dataset in the same transaction that records it, which only
+        one of concurrent uploads that write to the new partition succeeds in.
+        """
+        try:
+            new_partitions = partitions - self._find_dataset_partitions(
+                dataset, partitions
+            )
+            for partition in sorted(new_partitions):
+                self._transact_partition_count(
+                    dataset,
+                    {
+                        "Put": {
+                            "TableName": SERVICE_TABLE_NAME,
+                            "Item": self._partition_key(dataset, partition),
+                            "ConditionExpression": "attribute_not_exists(SK)",
+                        }
+                    },
+                    1,
+                )
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error updating the partitions of {dataset.string_representation()}",
+                error,
+            )
+
+    def remove_dataset_partitions(
+        self, dataset: Type[DatasetMetadata], partitions: Set[str]
+    ) -> None:
+        """Removes the partitions that no upload to the dataset writes to any more from its count"""
+        try:
+            for partition in sorted(partitions):
+                self._transact_partition_count(
+                    dataset,
+                    {
+                        "Delete": {
+                            "TableName": SERVICE_TABLE_NAME,
+                            "Key": self._partition_key(dataset, partition),
+                            "ConditionExpression": "attribute_exists(SK)",
+                        }
+                    },
+                    -1,
+                )
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error updating the partitions of {dataset.string_representation()}",
+                error,
+            )
+
+    def store_dataset_statistics(
+        self,
+        dataset: Type[DatasetMetadata],
+        statistics: DatasetStatistics,
+        upload_statistics: Dict[str, DatasetStatistics],
+    ) -> None:
+        """
+        Replaces the statistics of the dataset and of each of its uploads with the statistics rebuilt
+        from its files
+        """
+        partition_prefix = self._partition_key(dataset, "")["SK"]
+        try:
+            with self.service_table.batch_writer() as batch:
+                for raw_file_identifier in self.list_upload_statistics(dataset):
+                    if raw_file_identifier not in upload_statistics:
+                        batch.delete_item(
+                            Key=self._upload_statistics_key(
+                                dataset, raw_file_identifier
+                            )
+                        )
+                for raw_file_identifier, upload in upload_statistics.items():
+                    batch.put_item(
+                        Item={
+                            **self._upload_statistics_key(dataset, raw_file_identifier),
+                            **self._statistics_attributes(upload),
+                        }
+                    )
+                for item in self._query_dataset_statistics(dataset, partition_prefix):
+                    if item["SK"].removeprefix(partition_prefix) not in (
+                        statistics.partitions
+                    ):
+                        batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+                for partition in statistics.partitions:
+                    batch.put_item(Item=self._partition_key(dataset, partition))
+                batch.put_item(
+                    Item={
+                        **self._dataset_statistics_key(dataset),
+                        "SizeBytes": statistics.size_bytes,
+                        "Files": statistics.files,
+                        "Rows": statistics.rows,
+                        "PartitionCount": len(statistics.partitions),
+                        "Complete": True,
+                    }
+                )
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error storing the statistics of {dataset.string_representation()}",
+                error,
+            )
+
+    def delete_dataset_statistics(self, dataset: Type[DatasetMetadata]) -> None:
+        """Deletes the statistics of every version of the dataset"""
+        items = self._query_dataset_statistics(
+            dataset, f"{dataset.dataset_identifier(with_version=False)}/"
+        )
+        try:
+            with self.service_table.batch_writer() as batch:
+                for item in items:
+                    batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error deleting the statistics of {dataset.string_representation()}",
+                error,
+            )
+
+    def _query_dataset_statistics(
+        self, dataset: Type[DatasetMetadata], prefix: str
+    ) -> List[Dict]:
+        try:
+            return self.collect_all_items(
+                self.service_table.query,
+                KeyConditionExpression=Key("PK").eq(ServiceTableItem.DATASET_STATISTICS)
+                & Key("SK").begins_with(prefix),
+            )
+        except ClientError as error:
+            self._handle_client_error(
+                f"Error fetching the statistics of {dataset.string_representation()}",
+                error,
+            )
+
+    @staticmethod
+    def _dataset_statistics_key(dataset: Type[DatasetMetadata]) -> Dict:
+        return {
+            "PK": ServiceTableItem.DATASET_STATISTICS,
+            "SK": dataset.dataset_identifier(),
+        }
+
+    @staticmethod
+    def _upload_statistics_key(
+        dataset: Type[DatasetMetadata], raw_file_identifier: str
+    ) -> Dict:
+        return {
+            "PK": ServiceTableItem.DATASET_STATISTICS,
+            "SK": f"{dataset.dataset_identifier()}/{raw_file_identifier}",
+        }
+
+    def _find_dataset_partitions(
+        self, dataset: Type[DatasetMetadata], partitions: Set[str]
+    ) -> Set[str]:
+        """:return: The partitions that the dataset already has, out of the given ones"""
+        prefix = self._partition_key(dataset, "")["SK"]
+        keys = [self._partition_key(dataset, partition) for partition in partitions]
+        found = set()
+        # Items are read at most 100 at a time
+        for start in range(0, len(keys), 100):
+            end = start + 100
+            request = {
+                SERVICE_TABLE_NAME: {
+                    "Keys": keys[start:end],
+                    "ProjectionExpression": "SK",
+                }
+            }
+            while request:
+                response = self.service_table.meta.client.batch_get_item(
+                    RequestItems=request
+                )
+                found.update(
+                    item["SK"].removeprefix(prefix)
+                    for item in response["Responses"].get(SERVICE_TABLE_NAME, [])
+                )
+                request = response.get("UnprocessedKeys")
+        return found
+
+    def _transact_partition_count(
+        self, dataset: Type[DatasetMetadata], partition_write: Dict, change: int
+    ) -> None:
+        try:
+            self._transact_write_items(
+                [
+                    partition_write,
+                    {
+                        "Update": {
+                            "TableName": SERVICE_TABLE_NAME,
+                            "Key": self._dataset_statistics_key(dataset),
+                            "UpdateExpression": "ADD #A :a",
+                            "ExpressionAttributeNames": {"#A": "PartitionCount"},
+                            "ExpressionAttributeValues": {":a": change},
+                        }
+                    },
+                ]
+            )
+        except ClientError as error:
+            # The partition was already added or removed by a concurrent upload
+            if not self._cancelled_by_failed_conditions(error):
+                raise
+
+    @staticmethod
+    def _partition_key(dataset: Type[DatasetMetadata], partition: str) -> Dict:
+        # Kept apart from the statistics of the uploads, which are keyed by {dataset}/{raw file identifier}
+        return {
+            "PK": ServiceTableItem.DATASET_STATISTICS,
+            "SK": f"{dataset.dataset_identifier()}#{partition}",
+        }
+
+    @staticmethod
+    def _statistics_update(key: Dict, statistics: DatasetStatistics) -> Dict:
+        update_expression = "ADD #A :a, #B :b, #C :c"
+        names = {"#A": "SizeBytes", "#B": "Files", "#C": "Rows"}
+        values = {
+            ":a": statistics.size_bytes,
+            ":b": statistics.files,
+            ":c": statistics.rows,
+        }
+        # Sets cannot be empty in DynamoDB, so partitions are only added when there are any
+        if statistics.partitions:
+            update_expression += ", #D :d"
+            names["#D"] = "Partitions"
+            values[":d"] = statistics.partitions
+        return {
+            "Update": {
+                "TableName": SERVICE_TABLE_NAME,
+                "Key": key,
+                "UpdateExpression": update_expression,
+                "ExpressionAttributeNames": names,
+                "ExpressionAttributeValues": values,
+            }
+        }
+
+    @staticmethod
+    def _statistics_attributes(statistics: DatasetStatistics) -> Dict:
+        attributes = {
+            "SizeBytes": statistics.size_bytes,
+            "Files": statistics.files,
+            "Rows": statistics.rows,
+        }
+        if statistics.partitions:
+            attributes["Partitions"] = statistics.partitions
+        return attributes
+
+    @staticmethod
+    def _map_dataset_statistics(item: Dict) -> DatasetStatistics:
+        return DatasetStatistics(
+            size_bytes=int(item.get("SizeBytes", 0)),
+            files=int(item.get("Files", 0)),
+            rows=int(item.get("Rows", 0)),
+            partitions=set(item.get("Partitions") or []),
+            partition_count=int(
+                item.get("PartitionCount", len(item.get("Partitions") or []))
+            ),
+            complete=bool(item.get("Complete", False)),
+        )
+
     def _map_job(self, job: Dict) -> Dict:
         name_map = {
             "SK": "job_id",
             "RawFileIdentifier": "raw_file_identifier",
             "ResultsURL": "result_url",
+            "RawFilename": "raw_filename",
+            "CommittedChunks": "committed_chunks",
+            "CompletedSteps": "completed_steps",
+            "AcceptedRows": "accepted_rows",
+            "QuarantinedRows": "quarantined_rows",
+            "CancelRequested": "cancel_requested",
         }
         return {
             name_map.get(key, key.lower()): value
@@ -575,6 +1244,42 @@ class DynamoDBAdapter(DatabaseAdapter):
                 "Error fetching permissions from the database", error
             )
 
+    def _transact_write_items(self, items: List[Dict]) -> None:
+        """
+        Writes the items in a transaction, which DynamoDB cancels when a concurrent transaction writes
+        to any of the same items. Cancelled transactions are retried with exponential backoff and jitter,
+        so that concurrent uploads to a dataset all add to its statistics.
+        """
+        for attempt in range(1, DYNAMO_TRANSACTION_ATTEMPTS + 1):
+            try:
+                self.service_table.meta.client.transact_write_items(TransactItems=items)
+                return
+            except ClientError as error:
+                if (
+                    not self._cancelled_by_conflict(error)
+                    or attempt == DYNAMO_TRANSACTION_ATTEMPTS
+                ):
+                    raise
+                AppLogger.info(
+                    f"Retrying a transaction that conflicted with another, attempt {attempt}"
+                )
+                time.sleep(
+                    random.uniform(0, DYNAMO_TRANSACTION_BACKOFF_SECONDS * 2**attempt)
+                )
+
+    @staticmethod
+    def _cancellation_reasons(error: ClientError) -> List[str]:
+        return [
+            reason.get("Code")
+            for reason in error.response.get("CancellationReasons", [])
+        ]
+
+    def _cancelled_by_conflict(self, error: ClientError) -> bool:
+        return "TransactionConflict" in self._cancellation_reasons(error)
+
+    def _cancelled_by_failed_conditions(self, error: ClientError) -> bool:
+        return "ConditionalCheckFailed" in self._cancellation_reasons(error)
+
     def _failed_conditions(self, error):
         return (
             error.response.get("Error").get("Code") == "ConditionalCheckFailedException"
@@ -57,6 +57,11 @@ class GlueAdapter:
                         "typeOfData": "file",
                         "compressionType": "none",
                         "EXTERNAL": "TRUE",
+                        **(
+                            schema.get_partition_projection_parameters()
+                            if schema.has_partition_projection()
+                            else {}
+                        ),
                     },
                 },
                 PartitionIndexes=[
@@ -0,0 +1,32 @@
+from threading import Lock
+from typing import Dict
+
+from api.domain.dataset_lease import DatasetLease
+
+
+class InMemoryLeaseAdapter:
+    """
+    Local stand-in for the storage of dataset write leases in DynamoDB, with the same conditional
+    write behaviour, so that the coordination of uploads can be run without AWS.
+    Leases are only shared by the uploads of a single process.
+    """
+
+    def __init__(self):
+        self._leases: Dict[str, DatasetLease] = {}
+        self._lock = Lock()
+
+    def get_dataset_lease(self, lease_key: str) -> DatasetLease:
+        with self._lock:
+            lease = self._leases.get(lease_key)
+            if lease is None:
+                return DatasetLease(key=lease_key)
+            return lease.model_copy(deep=True)
+
+    def store_dataset_lease(self, lease: DatasetLease) -> bool:
+        with self._lock:
+            stored_lease = self._leases.get(lease.key)
+            if (stored_lease.version if stored_lease else 0) != lease.version:
+                return False
+            lease.version += 1
+            self._leases[lease.key] = lease.model_copy(deep=True)
+            return True
@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+
+class LocalAppendLogAdapter:
+    """
+    Local stand-in for the storage of the append log in S3, so that appends can be buffered without AWS.
+    Segments are synced to disk before they are acknowledged, but are only durable on a single node.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def store_append_log_segment(self, key: str, content: bytes) -> None:
+        file_path = self.directory / key
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a temporary name first, so that a partially written segment is never listed
+        temporary_path = file_path.with_name(f".{file_path.name}.tmp")
+        with open(temporary_path, "wb") as segment_file:
+            segment_file.write(content)
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        os.replace(temporary_path, file_path)
+
+    def list_append_log_segments(self, location: str) -> List[str]:
+        location_path = self.directory / location
+        if not location_path.is_dir():
+            return []
+        return sorted(
+            file_path.relative_to(self.directory).as_posix()
+            for file_path in location_path.rglob("*")
+            if file_path.is_file() and not file_path.name.startswith(".")
+        )
+
+    def retrieve_append_log_segment(self, key: str) -> bytes:
+        return (self.directory / key).read_bytes()
+
+    def delete_append_log_segments(self, keys: List[str]) -> None:
+        for key in keys:
+            (self.directory / key).unlink(missing_ok=True)
+
+    def store_append_flush(self, key: str, content: bytes) -> None:
+        self.store_append_log_segment(key, content)
+
+    def retrieve_append_flush(self, key: str) -> Optional[bytes]:
+        file_path = self.directory / key
+        return file_path.read_bytes() if file_path.is_file() else None
+
+    def delete_append_flush(self, key: str) -> None:
+        (self.directory / key).unlink(missing_ok=True)
@@ -1,12 +1,19 @@
+import math
 import os
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, List, Optional, Type, Union
 
 import boto3
+import pyarrow.parquet as pq
 from botocore.exceptions import ClientError
 from botocore.response import StreamingBody
 
-from api.application.services.partitioning_service import Partition
+from api.application.services.partitioning_service import (
+    EncodedPartition,
+    Partition,
+    encode_partitions,
+)
 from api.common.config.aws import (
     AWS_REGION,
     DATA_BUCKET,
@@ -14,11 +21,21 @@ from api.common.config.aws import (
 )
 from api.common.config.constants import (
     CONTENT_ENCODING,
+    PARQUET_FOOTER_READ_BYTES,
+    PRESIGNED_UPLOAD_EXPIRY_SECONDS,
+    PRESIGNED_UPLOAD_MAX_PARTS,
+    PRESIGNED_UPLOAD_PART_SIZE,
     QUERY_RESULTS_LINK_EXPIRY_SECONDS,
 )
 from api.common.custom_exceptions import AWSServiceError, UserError
+from api.common.data_handlers import (
+    get_raw_filename,
+    open_compressed_raw_file,
+    requires_raw_file_compression,
+)
 from api.common.logger import AppLogger
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.presigned_upload import UploadPart
 from api.domain.schema_metadata import SchemaMetadata
 from api.domain.schema import Schema
 
@@ -47,6 +64,18 @@ class S3Adapter:
         response: Dict = self.__s3_client.get_object(Bucket=self.__s3_bucket, Key=key)
         return response.get("Body")
 
+    def retrieve_parquet_metadata(self, key: str) -> pq.FileMetaData:
+        """
+        Reads the footer of the parquet file with ranged requests, so that its statistics can be
+        checked without downloading the data
+        """
+        tail = self._retrieve_tail(key, PARQUET_FOOTER_READ_BYTES)
+        # The footer is followed by its length as a 4 byte integer and the 4 byte magic number
+        footer_length = int.from_bytes(tail[-8:-4], "little") + 8
+        if footer_length > len(tail):
+            tail = self._retrieve_tail(key, footer_length)
+        return pq.read_metadata(BytesIO(tail))
+
     def find_raw_file(self, dataset: DatasetMetadata, filename: str):
         try:
             self.retrieve_data(dataset.raw_data_path(filename))
@@ -60,14 +89,21 @@ class S3Adapter:
         filename: str,
         partitions: List[Partition],
     ):
-        for partition in partitions:
+        self.upload_encoded_partitions(
+            schema, filename, encode_partitions(schema, partitions)
+        )
+
+    def upload_encoded_partitions(
+        self,
+        schema: Schema,
+        filename: str,
+        encoded_partitions: List[EncodedPartition],
+    ):
+        for partition in encoded_partitions:
             upload_path = self._construct_partitioned_data_path(
                 partition.path, filename, schema.metadata
             )
-            data_content = partition.df.to_parquet(
-                compression="gzip", index=False, schema=schema.generate_storage_schema()
-            )
-            self.store_data(upload_path, data_content)
+            self.store_data(upload_path, partition.content)
 
     def upload_raw_data(
         self, schema_metadata: SchemaMetadata, file_path: Path, raw_file_identifier: str
@@ -75,19 +111,60 @@ class S3Adapter:
         AppLogger.info(
             f"Raw data upload for {schema_metadata.raw_data_location()} started"
         )
-        filename = f"{raw_file_identifier}.csv"
+        filename = get_raw_filename(raw_file_identifier, file_path)
         raw_data_path = schema_metadata.raw_data_path(filename)
-        self.__s3_client.upload_file(
-            Filename=file_path.name, Bucket=self.__s3_bucket, Key=raw_data_path
-        )
+        if requires_raw_file_compression(file_path):
+            with open_compressed_raw_file(file_path) as compressed_file:
+                self.__s3_client.upload_fileobj(
+                    Fileobj=compressed_file, Bucket=self.__s3_bucket, Key=raw_data_path
+                )
+        else:
+            self.__s3_client.upload_file(
+                Filename=file_path.as_posix(),
+                Bucket=self.__s3_bucket,
+                Key=raw_data_path,
+            )
         AppLogger.info(
             f"Raw data upload for {schema_metadata.glue_table_name()} completed"
         )
 
+    def get_raw_file_size(self, dataset: DatasetMetadata, filename: str) -> int:
+        try:
+            return self.__s3_client.head_object(
+                Bucket=self.__s3_bucket, Key=dataset.raw_data_path(filename)
+            )["ContentLength"]
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise UserError(f"The file [{filename}] does not exist")
+            raise AWSServiceError("Unable to retrieve the raw file")
+
+    def download_raw_file(
+        self, dataset: DatasetMetadata, filename: str, file_path: Path
+    ) -> None:
+        self.__s3_client.download_file(
+            Bucket=self.__s3_bucket,
+            Key=dataset.raw_data_path(filename),
+            Filename=file_path.as_posix(),
+        )
+        AppLogger.info(f"Raw file [{filename}] downloaded")
+
     def list_raw_files(self, dataset: DatasetMetadata) -> List[str]:
         object_list = self.list_files_from_path(dataset.raw_data_location())
         return self._map_object_list_to_filename(object_list)
 
+    def list_raw_files_in_upload_order(self, dataset: DatasetMetadata) -> List[str]:
+        # Raw files are not changed once archived, so they were last modified when they were uploaded
+        paginator = self.__s3_client.get_paginator("list_objects_v2")
+        page_iterator = paginator.paginate(
+            Bucket=self.__s3_bucket, Prefix=f"{dataset.raw_data_location()}/"
+        )
+        items = [item for page in page_iterator for item in page.get("Contents", [])]
+        return [
+            self._extract_filename(item["Key"])
+            for item in sorted(items, key=lambda item: item["LastModified"])
+            if self._extract_filename(item["Key"])
+        ]
+
     def list_dataset_files(self, dataset: DatasetMetadata) -> List[Dict]:
         return [
             *self.list_files_from_path(
@@ -96,6 +173,20 @@ class S3Adapter:
             *self.list_files_from_path(dataset.dataset_location(with_version=False)),
         ]
 
+    def list_dataset_file_sizes(self, dataset: DatasetMetadata) -> Dict[str, int]:
+        """
+        :return: The size in bytes of each data file of the dataset version, by key
+        """
+        paginator = self.__s3_client.get_paginator("list_objects_v2")
+        page_iterator = paginator.paginate(
+            Bucket=self.__s3_bucket, Prefix=f"{dataset.dataset_location()}/"
+        )
+        return {
+            item["Key"]: item["Size"]
+            for page in page_iterator
+            for item in page.get("Contents", [])
+        }
+
     def get_last_updated_time(self, file_path: str) -> Optional[str]:
         """
         :return: Returns the last updated time for the dataset
@@ -150,14 +241,21 @@ class S3Adapter:
     def delete_previous_dataset_files(
         self, dataset: Type[DatasetMetadata], raw_file_identifier: str
     ):
+        for file in self.list_previous_dataset_files(dataset, raw_file_identifier):
+            self._delete_data(file)
+
+    def list_previous_dataset_files(
+        self, dataset: Type[DatasetMetadata], raw_file_identifier: str
+    ) -> List[str]:
+        """
+        Lists the data files of the dataset that were not written by the upload of the raw file
+        """
         files = self.list_files_from_path(dataset.dataset_location())
-        files_to_delete = [
+        return [
             file
             for file in files
             if not self._extract_filename(file).startswith(raw_file_identifier)
         ]
-        for file in files_to_delete:
-            self._delete_data(file)
 
     def delete_dataset_files_using_key(self, keys: List[str], filename: str):
         files_to_delete = [{"Key": key} for key in keys]
@@ -172,6 +270,37 @@ class S3Adapter:
 
         self._delete_objects(files_to_delete, raw_data_filename)
 
+    def store_append_log_segment(self, key: str, content: bytes) -> None:
+        self.store_data(key, content)
+
+    def list_append_log_segments(self, location: str) -> List[str]:
+        return self.list_files_from_path(f"{location}/")
+
+    def retrieve_append_log_segment(self, key: str) -> bytes:
+        return self.retrieve_data(key).read()
+
+    def delete_append_log_segments(self, keys: List[str]) -> None:
+        # S3 deletes at most 1000 objects per request
+        for start in range(0, len(keys), 1000):
+            end = start + 1000
+            self._delete_objects(
+                [{"Key": key} for key in keys[start:end]], "append log segments"
+            )
+
+    def store_append_flush(self, key: str, content: bytes) -> None:
+        self.store_data(key, content)
+
+    def retrieve_append_flush(self, key: str) -> Optional[bytes]:
+        try:
+            return self.retrieve_data(key).read()
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise AWSServiceError("Unable to retrieve the append log flush")
+
+    def delete_append_flush(self, key: str) -> None:
+        self._delete_objects([{"Key": key}], "append log flush")
+
     def generate_query_result_download_url(self, query_execution_id: str) -> str:
         try:
             return self.__s3_client.generate_presigned_url(
@@ -189,6 +318,88 @@ class S3Adapter:
             )
             raise AWSServiceError("Unable to generate download URL")
 
+    def generate_landing_upload_urls(self, key: str, size: Optional[int]) -> Dict:
+        """
+        :return: Returns a presigned PUT url, or a presigned url per part of a multipart upload for large files
+        """
+        try:
+            if size is None or size <= PRESIGNED_UPLOAD_PART_SIZE:
+                return {"url": self._generate_presigned_url("put_object", Key=key)}
+            part_count = math.ceil(size / PRESIGNED_UPLOAD_PART_SIZE)
+            if part_count > PRESIGNED_UPLOAD_MAX_PARTS:
+                raise UserError(
+                    f"The file is too large, the maximum size is {PRESIGNED_UPLOAD_MAX_PARTS * PRESIGNED_UPLOAD_PART_SIZE} bytes"
+                )
+            multipart_upload_id = self.__s3_client.create_multipart_upload(
+                Bucket=self.__s3_bucket, Key=key
+            )["UploadId"]
+            return {
+                "multipart_upload_id": multipart_upload_id,
+                "part_size": PRESIGNED_UPLOAD_PART_SIZE,
+                "parts": [
+                    {
+                        "part_number": part_number,
+                        "url": self._generate_presigned_url(
+                            "upload_part",
+                            Key=key,
+                            UploadId=multipart_upload_id,
+                            PartNumber=part_number,
+                        ),
+                    }
+                    for part_number in range(1, part_count + 1)
+                ],
+            }
+        except ClientError as error:
+            AppLogger.error(f"Unable to generate upload URLs for [{key}]: {error}")
+            raise AWSServiceError("Unable to generate upload URL")
+
+    def complete_landing_multipart_upload(
+        self, key: str, multipart_upload_id: str, parts: List[UploadPart]
+    ) -> None:
+        try:
+            self.__s3_client.complete_multipart_upload(
+                Bucket=self.__s3_bucket,
+                Key=key,
+                UploadId=multipart_upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": part.part_number, "ETag": part.etag}
+                        for part in sorted(parts, key=lambda part: part.part_number)
+                    ]
+                },
+            )
+        except ClientError as error:
+            AppLogger.error(f"Unable to complete multipart upload [{key}]: {error}")
+            raise UserError(f"The multipart upload could not be completed: {error}")
+
+    def get_landing_file_size(self, key: str) -> int:
+        try:
+            return self.__s3_client.head_object(Bucket=self.__s3_bucket, Key=key)[
+                "ContentLength"
+            ]
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise UserError(
+                    f"The file [{self._extract_filename(key)}] has not been uploaded"
+                )
+            raise AWSServiceError("Unable to retrieve the uploaded file")
+
+    def download_landing_file(self, key: str, file_path: Path) -> None:
+        self.__s3_client.download_file(
+            Bucket=self.__s3_bucket, Key=key, Filename=file_path.as_posix()
+        )
+        AppLogger.info(f"Landed file [{key}] downloaded")
+
+    def delete_landing_file(self, key: str) -> None:
+        self._delete_data(key)
+
+    def _generate_presigned_url(self, client_method: str, **params) -> str:
+        return self.__s3_client.generate_presigned_url(
+            ClientMethod=client_method,
+            Params={"Bucket": self.__s3_bucket, **params},
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRY_SECONDS,
+        )
+
     def _clean_filename(self, file_key: str) -> str:
         return file_key.rsplit("/", 1)[-1].split(".")[0]
 
@@ -237,6 +448,12 @@ class S3Adapter:
             ]
         return object_list
 
+    def _retrieve_tail(self, key: str, byte_count: int) -> bytes:
+        response: Dict = self.__s3_client.get_object(
+            Bucket=self.__s3_bucket, Key=key, Range=f"bytes=-{byte_count}"
+        )
+        return response.get("Body").read()
+
     def _extract_filename(self, item: str) -> str:
         return item.rsplit("/", 1)[-1]
 
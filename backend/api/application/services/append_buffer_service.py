@@ -0,0 +1,279 @@
+import time
+from collections import defaultdict
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Set, Union
+
+import pyarrow as pa
+
+from api.adapter.local_append_log_adapter import LocalAppendLogAdapter
+from api.adapter.s3_adapter import S3Adapter
+from api.application.services.data_service import DataService
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.application.services.dataset_statistics_service import (
+    DatasetStatisticsService,
+)
+from api.application.services.dataset_validation import summarise_validation_errors
+from api.application.services.ingest_tasks import validate_chunk
+from api.application.services.job_service import JobService
+from api.application.services.schema_service import SchemaService
+from api.common.config.constants import (
+    APPEND_BUFFER_CHECK_SECONDS,
+    APPEND_BUFFER_FLUSH_ROWS,
+    APPEND_BUFFER_FLUSH_SECONDS,
+    APPEND_BUFFER_SUBJECT_ID,
+    APPEND_LOG_DIRECTORY,
+    APPEND_MAX_ROWS,
+)
+from api.common.custom_exceptions import DatasetValidationError, UserError
+from api.common.data_handlers import remove_spool_file
+from api.common.logger import AppLogger
+from api.common.spool import spool
+from api.domain.append_log import AppendFlush, AppendLogSegment, buffered_rows
+from api.domain.dataset_lease import LeaseMode
+from api.domain.dataset_metadata import APPEND_LOG_PREFIX, DatasetMetadata
+from api.domain.Jobs.Job import generate_uuid
+
+
+def get_append_log_adapter(
+    directory: Optional[str] = APPEND_LOG_DIRECTORY,
+) -> Union[LocalAppendLogAdapter, S3Adapter]:
+    # The append log is kept on local disk when a directory is configured for it, e.g.: to run without AWS
+    if directory:
+        return LocalAppendLogAdapter(directory)
+    return S3Adapter()
+
+
+class AppendBufferService:
+    """
+    Buffers the small batches of rows appended to a dataset in its append log, a write-ahead log that
+    holds every batch durably from the moment it is accepted. The buffered rows are written to the dataset
+    as a single upload once there are enough of them for a right-sized file, or once the oldest of them
+    has been buffered for the flush interval, so that frequent appends do not fill the dataset with small files.
+    """
+
+    def __init__(
+        self,
+        append_log_adapter=get_append_log_adapter(),
+        s3_adapter=S3Adapter(),
+        schema_service=SchemaService(),
+        job_service=JobService(),
+        data_service=DataService(),
+        dataset_lease_service=DatasetLeaseService(),
+        dataset_statistics_service=DatasetStatisticsService(),
+        flush_rows: int = APPEND_BUFFER_FLUSH_ROWS,
+        flush_seconds: float = APPEND_BUFFER_FLUSH_SECONDS,
+        check_seconds: float = APPEND_BUFFER_CHECK_SECONDS,
+    ):
+        self.append_log_adapter = append_log_adapter
+        self.s3_adapter = s3_adapter
+        self.schema_service = schema_service
+        self.job_service = job_service
+        self.data_service = data_service
+        self.dataset_lease_service = dataset_lease_service
+        self.dataset_statistics_service = dataset_statistics_service
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.check_seconds = check_seconds
+        self._flushing: Set[str] = set()
+        self._lock = Lock()
+        self._stopped = Event()
+
+    def append(self, dataset: DatasetMetadata, table: pa.Table) -> int:
+        """
+        Validates the rows and adds them to the append log of the dataset, returning the number of rows
+        buffered for the dataset
+        """
+        schema = self.schema_service.get_schema(dataset)
+        if not schema.has_append_behaviour():
+            raise UserError(
+                f"Rows can only be appended to datasets with the APPEND update behaviour, the {dataset.string_representation()} has the {schema.get_update_behaviour()} update behaviour"
+            )
+        if table.num_rows > APPEND_MAX_ROWS:
+            raise UserError(
+                f"At most {APPEND_MAX_ROWS} rows can be appended at once, upload larger amounts of data as a file"
+            )
+        errors = validate_chunk(schema, table.to_pandas())
+        if errors:
+            raise DatasetValidationError(summarise_validation_errors(errors))
+
+        segment_key = dataset.append_log_path(
+            AppendLogSegment.generate_name(table.num_rows)
+        )
+        self.append_log_adapter.store_append_log_segment(
+            segment_key, encode_segment(table)
+        )
+        rows = buffered_rows(self.list_segments(dataset.append_log_location()))
+        if rows >= self.flush_rows:
+            Thread(
+                target=self.flush,
+                args=(dataset,),
+                name=f"{dataset.dataset_identifier()}-append-flush",
+            ).start()
+        return rows
+
+    def flush(self, dataset: DatasetMetadata) -> None:
+        """
+        Writes the rows buffered for the dataset to it. Failed flushes keep the rows buffered, so that
+        they are written by the next flush.
+        """
+        lease_key = dataset.append_log_location()
+        with self._lock:
+            if lease_key in self._flushing:
+                return
+            self._flushing.add(lease_key)
+        try:
+            # Nodes that flush the same dataset would otherwise write its buffered rows more than once
+            with self.dataset_lease_service.hold_key(
+                lease_key, generate_uuid(), LeaseMode.EXCLUSIVE
+            ):
+                self.resume_flush(dataset)
+                segment_keys = self.append_log_adapter.list_append_log_segments(
+                    lease_key
+                )
+                if segment_keys:
+                    self.write_flush(
+                        dataset,
+                        AppendFlush(
+                            flush_identifier=generate_uuid(), segment_keys=segment_keys
+                        ),
+                    )
+        except Exception as error:
+            AppLogger.error(
+                f"Flushing appended rows failed for {dataset.string_representation()}, they stay buffered until the next flush: {error}"
+            )
+        finally:
+            with self._lock:
+                self._flushing.discard(lease_key)
+
+    def resume_flush(self, dataset: DatasetMetadata) -> None:
+        """
+        Completes the flush recorded for the dataset by an earlier attempt that did not finish, before
+        any segment appended since is flushed
+        """
+        content = self.append_log_adapter.retrieve_append_flush(
+            dataset.append_flush_path()
+        )
+        if content is None:
+            return
+        append_flush = AppendFlush.model_validate_json(content)
+        remaining_keys = set(
+            self.append_log_adapter.list_append_log_segments(
+                dataset.append_log_location()
+            )
+        )
+        # Segments are only deleted once their rows are written, so the earlier attempt wrote them
+        # unless every one of them is left
+        if remaining_keys.issuperset(append_flush.segment_keys):
+            AppLogger.info(
+                f"Retrying flush {append_flush.flush_identifier} of {dataset.string_representation()}"
+            )
+            self.write_flush(dataset, append_flush)
+        else:
+            self.append_log_adapter.delete_append_log_segments(
+                [key for key in append_flush.segment_keys if key in remaining_keys]
+            )
+            self.append_log_adapter.delete_append_flush(dataset.append_flush_path())
+
+    def write_flush(self, dataset: DatasetMetadata, append_flush: AppendFlush) -> None:
+        """
+        Records the flush before writing its segments to the dataset, and removes the segments and the
+        record once they are written
+        """
+        self.append_log_adapter.store_append_flush(
+            dataset.append_flush_path(), append_flush.model_dump_json().encode()
+        )
+        self.write_segments(dataset, append_flush)
+        self.append_log_adapter.delete_append_log_segments(append_flush.segment_keys)
+        self.append_log_adapter.delete_append_flush(dataset.append_flush_path())
+
+    def write_segments(
+        self, dataset: DatasetMetadata, append_flush: AppendFlush
+    ) -> None:
+        segment_keys = append_flush.segment_keys
+        AppLogger.info(
+            f"Flushing {len(segment_keys)} appended batches to {dataset.string_representation()}"
+        )
+        schema = self.schema_service.get_schema(dataset)
+        flush_identifier = append_flush.flush_identifier
+        file_path = spool.path_for(f"{flush_identifier}.arrows")
+        table = pa.concat_tables(
+            [
+                pa.ipc.open_stream(
+                    self.append_log_adapter.retrieve_append_log_segment(key)
+                ).read_all()
+                for key in segment_keys
+            ],
+            promote_options="permissive",
+        )
+        # The reservation is held until the file is removed by the upload
+        spool.reserve(file_path, table.nbytes)
+        try:
+            with pa.ipc.new_stream(file_path.as_posix(), table.schema) as writer:
+                writer.write_table(table)
+            # A retried flush replaces the files that an earlier attempt of it wrote
+            self.s3_adapter.delete_dataset_files(dataset, flush_identifier)
+            self.dataset_statistics_service.remove_uploads(dataset, flush_identifier)
+            job = self.job_service.create_upload_job(
+                APPEND_BUFFER_SUBJECT_ID,
+                generate_uuid(),
+                file_path.name,
+                flush_identifier,
+                dataset,
+            )
+        except Exception:
+            remove_spool_file(file_path)
+            raise
+        self.data_service.process_upload(job, schema, file_path, flush_identifier)
+
+    def list_segments(self, location: str) -> List[AppendLogSegment]:
+        return [
+            AppendLogSegment.from_key(key)
+            for key in self.append_log_adapter.list_append_log_segments(location)
+        ]
+
+    def datasets_due_for_flush(self) -> List[DatasetMetadata]:
+        segments_by_dataset: Dict[str, List[AppendLogSegment]] = defaultdict(list)
+        for segment in self.list_segments(APPEND_LOG_PREFIX):
+            segments_by_dataset[segment.key.rsplit("/", 1)[0]].append(segment)
+        oldest_due = time.time() - self.flush_seconds
+        return [
+            segments[0].dataset()
+            for segments in segments_by_dataset.values()
+            if buffered_rows(segments) >= self.flush_rows
+            or min(segment.appended_at for segment in segments) <= oldest_due
+        ]
+
+    def start(self) -> None:
+        """Starts flushing the buffered rows of every dataset once they are due"""
+        self._stopped.clear()
+        Thread(target=self._flush_when_due, name="append-flush", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def flush_due_datasets(self) -> None:
+        # Each dataset is flushed in a thread of its own, so that a dataset that waits for its lease
+        # does not hold up the flushes of the others
+        for dataset in self.datasets_due_for_flush():
+            Thread(
+                target=self.flush,
+                args=(dataset,),
+                name=f"{dataset.dataset_identifier()}-append-flush",
+                daemon=True,
+            ).start()
+
+    def _flush_when_due(self) -> None:
+        while not self._stopped.wait(self.check_seconds):
+            try:
+                self.flush_due_datasets()
+            except Exception as error:
+                AppLogger.warning(
+                    f"Could not check for appended rows to flush: {error}"
+                )
+
+
+def encode_segment(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -1,25 +1,59 @@
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from threading import Thread
-from typing import List, Tuple
+from threading import Event, Thread
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
 
 from api.adapter.athena_adapter import AthenaAdapter
 from api.adapter.glue_adapter import GlueAdapter
 from api.adapter.s3_adapter import S3Adapter
-from api.application.services.dataset_validation import build_validated_dataframe
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.application.services.dataset_statistics_service import (
+    DatasetStatisticsService,
+)
+from api.application.services.dataset_validation import (
+    summarise_quarantined_rows,
+    summarise_validation_errors,
+)
+from api.application.services.query_cache_service import (
+    QueryCacheKey,
+    QueryCacheService,
+)
+from api.application.services.ingest_tasks import (
+    encode_chunk,
+    quarantine_chunk,
+    validate_chunk,
+    validate_chunk_keys,
+)
 from api.application.services.job_service import JobService
-from api.application.services.partitioning_service import generate_partitioned_data
+from api.application.services.partitioning_service import (
+    EncodedPartition,
+    generate_partitioned_data,
+)
 from api.application.services.schema_service import SchemaService
 from api.application.services.subject_service import SubjectService
+from api.application.services.upsert_service import (
+    encode_table,
+    file_may_contain_keys,
+    get_partition_values,
+    partition_may_contain_keys,
+    remove_rows_with_keys,
+)
 from api.common.config.constants import (
     DATASET_ROWS_QUERY_LIMIT,
     DATASET_SIZE_QUERY_LIMIT,
+    REPROCESS_MAX_CONCURRENT_FILES,
 )
 from api.common.custom_exceptions import (
     AWSServiceError,
     DatasetValidationError,
+    JobAlreadyExistsError,
+    JobCancelledError,
     QueryExecutionError,
     UnprocessableDatasetError,
     UserError,
@@ -28,18 +62,35 @@ from api.common.data_handlers import (
     construct_chunked_dataframe,
     delete_incoming_raw_file,
     get_dataframe_from_chunk_type,
+    get_raw_filename,
+    remove_spool_file,
+    restore_raw_file_format,
 )
+from api.common.ingest_executor import ingest_executor as default_ingest_executor
 from api.common.logger import AppLogger
+from api.common.spool import spool
 from api.common.utilities import build_error_message_list
 from api.domain.data_types import DateType
+from api.domain.dataset_lease import LeaseMode
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_validation_result import DatasetValidationResult
 from api.domain.enriched_schema import (
     EnrichedColumn,
     EnrichedSchema,
     EnrichedSchemaMetadata,
 )
+from api.domain.Jobs.Job import JobStatus, generate_uuid
 from api.domain.Jobs.QueryJob import QueryJob, QueryStep
+from api.domain.batch_upload import (
+    BatchFile,
+    BatchManifest,
+    batch_raw_file_identifiers,
+)
 from api.domain.Jobs.UploadJob import UploadJob, UploadStep
+from api.domain.presigned_upload import (
+    PresignedUploadCompletion,
+    PresignedUploadRequest,
+)
 from api.domain.schema import Schema
 from rapid.items.query import Query
 
@@ -53,6 +104,10 @@ class DataService:
         job_service=JobService(),
         schema_service=SchemaService(),
         subject_service=SubjectService(),
+        ingest_executor=default_ingest_executor,
+        dataset_lease_service=DatasetLeaseService(),
+        query_cache_service=QueryCacheService(),
+        dataset_statistics_service=DatasetStatisticsService(),
     ):
         self.s3_adapter = s3_adapter
         self.glue_adapter = glue_adapter
@@ -60,6 +115,10 @@ class DataService:
         self.job_service = job_service
         self.schema_service = schema_service
         self.subject_service = subject_service
+        self.ingest_executor = ingest_executor
+        self.dataset_lease_service = dataset_lease_service
+        self.query_cache_service = query_cache_service
+        self.dataset_statistics_service = dataset_statistics_service
 
     def list_raw_files(self, dataset: DatasetMetadata) -> list[str]:
         raw_files = self.s3_adapter.list_raw_files(dataset)
@@ -73,8 +132,11 @@ class DataService:
     def generate_raw_file_identifier(self) -> str:
         return str(uuid.uuid4())
 
-    def generate_permanent_filename(self, raw_file_identifier: str) -> str:
-        return f"{raw_file_identifier}_{uuid.uuid4()}.parquet"
+    def generate_permanent_filename(
+        self, raw_file_identifier: str, chunk_index: int
+    ) -> str:
+        # Named after the chunk, so that a resumed upload replaces the files of a partly written chunk
+        return f"{raw_file_identifier}_{chunk_index:06d}.parquet"
 
     def upload_dataset(
         self,
@@ -82,6 +144,7 @@ class DataService:
         job_id: str,
         dataset: DatasetMetadata,
         file_path: Path,
+        landing_key: Optional[str] = None,
     ) -> Tuple[str, int, str]:
         schema = self.schema_service.get_schema(dataset)
         raw_file_identifier = self.generate_raw_file_identifier()
@@ -91,30 +154,403 @@ class DataService:
 
         Thread(
             target=self.process_upload,
-            args=(upload_job, schema, file_path, raw_file_identifier),
+            args=(upload_job, schema, file_path, raw_file_identifier, landing_key),
+            name=upload_job.job_id,
+        ).start()
+
+        return (
+            get_raw_filename(raw_file_identifier, file_path),
+            dataset.version,
+            upload_job.job_id,
+        )
+
+    def generate_landing_upload(
+        self,
+        upload_id: str,
+        dataset: DatasetMetadata,
+        upload_request: PresignedUploadRequest,
+    ) -> Dict:
+        filename = upload_request.get_validated_filename()
+        upload_urls = self.s3_adapter.generate_landing_upload_urls(
+            dataset.landing_path(upload_id, filename), upload_request.size
+        )
+        return {"upload_id": upload_id, "filename": filename, **upload_urls}
+
+    def upload_landed_dataset(
+        self,
+        subject_id: str,
+        upload_id: str,
+        dataset: DatasetMetadata,
+        completion: PresignedUploadCompletion,
+    ) -> Tuple[str, int, str]:
+        filename = completion.get_validated_filename()
+        landing_key = dataset.landing_path(upload_id, filename)
+        file_path = spool.path_for(f"{upload_id}-{filename}")
+        # The upload id is the id of its job, so completing an upload again, e.g.: when the client
+        # retries after a timeout, returns the job that is already processing it
+        existing_job = self.job_service.find_upload_job(upload_id)
+        if existing_job is not None:
+            return self._landed_upload_result(existing_job, file_path)
+        if completion.multipart_upload_id:
+            self.s3_adapter.complete_landing_multipart_upload(
+                landing_key, completion.multipart_upload_id, completion.parts or []
+            )
+        size = self.s3_adapter.get_landing_file_size(landing_key)
+        # The reservation is held until the file is removed with delete_incoming_raw_file
+        spool.reserve(file_path, size)
+        try:
+            return self.upload_dataset(
+                subject_id, upload_id, dataset, file_path, landing_key=landing_key
+            )
+        except JobAlreadyExistsError:
+            # The upload was completed concurrently, the reservation of the spool file is its job's
+            AppLogger.info(f"The upload {upload_id} has already been completed")
+            return self._landed_upload_result(
+                self.job_service.get_upload_job(upload_id), file_path
+            )
+        except Exception:
+            spool.release(file_path)
+            raise
+
+    def _landed_upload_result(
+        self, job: UploadJob, file_path: Path
+    ) -> Tuple[str, int, str]:
+        return (
+            get_raw_filename(job.raw_file_identifier, file_path),
+            job.version,
+            job.job_id,
+        )
+
+    def upload_batch(
+        self,
+        subject_id: str,
+        job_id: str,
+        dataset: DatasetMetadata,
+        files: List[BatchFile],
+        landing_keys: Optional[List[str]] = None,
+    ) -> Tuple[List[str], int, str]:
+        schema = self.schema_service.get_schema(dataset)
+        batch_identifier = self.generate_raw_file_identifier()
+        upload_job = self.job_service.create_upload_job(
+            subject_id,
+            job_id,
+            ", ".join(file.filename for file in files),
+            batch_identifier,
+            dataset,
+        )
+
+        Thread(
+            target=self.process_batch_upload,
+            args=(upload_job, schema, files, batch_identifier, landing_keys),
             name=upload_job.job_id,
         ).start()
 
-        return f"{raw_file_identifier}.csv", dataset.version, upload_job.job_id
+        return (
+            [
+                get_raw_filename(raw_file_identifier, file.file_path)
+                for raw_file_identifier, file in zip(
+                    batch_raw_file_identifiers(batch_identifier, len(files)), files
+                )
+            ],
+            dataset.version,
+            upload_job.job_id,
+        )
+
+    def upload_landed_batch(
+        self,
+        subject_id: str,
+        job_id: str,
+        dataset: DatasetMetadata,
+        manifest: BatchManifest,
+    ) -> Tuple[List[str], int, str]:
+        files, landing_keys = [], []
+        try:
+            for index, landed_file in enumerate(manifest.files):
+                filename = landed_file.get_validated_filename()
+                landing_key = dataset.landing_path(landed_file.upload_id, filename)
+                if landed_file.multipart_upload_id:
+                    self.s3_adapter.complete_landing_multipart_upload(
+                        landing_key,
+                        landed_file.multipart_upload_id,
+                        landed_file.parts or [],
+                    )
+                size = self.s3_adapter.get_landing_file_size(landing_key)
+                file_path = spool.path_for(f"{job_id}-{index:04d}-{filename}")
+                spool.reserve(file_path, size)
+                files.append(BatchFile(filename=filename, file_path=file_path))
+                landing_keys.append(landing_key)
+            return self.upload_batch(subject_id, job_id, dataset, files, landing_keys)
+        except Exception:
+            for file in files:
+                spool.release(file.file_path)
+            raise
+
+    def process_batch_upload(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        files: List[BatchFile],
+        batch_identifier: str,
+        landing_keys: Optional[List[str]] = None,
+    ) -> None:
+        raw_file_identifiers = batch_raw_file_identifiers(batch_identifier, len(files))
+        try:
+            if landing_keys:
+                self.job_service.update_step(job, UploadStep.LANDED_DATA_DOWNLOAD)
+                for landing_key, file in zip(landing_keys, files):
+                    self.s3_adapter.download_landing_file(landing_key, file.file_path)
+            self.raise_if_cancelled(job)
+            self.job_service.update_step(job, UploadStep.VALIDATION)
+            incoming_keys = self.validate_incoming_batch(
+                job, schema, files, raw_file_identifiers
+            )
+            self.raise_if_cancelled(job)
+            self.job_service.update_step(job, UploadStep.RAW_DATA_UPLOAD)
+            for raw_file_identifier, file in zip(raw_file_identifiers, files):
+                self.s3_adapter.upload_raw_data(
+                    schema.metadata, file.file_path, raw_file_identifier
+                )
+            with self.hold_write_lease(job, schema) as lease_lost:
+                self.job_service.update_step(job, UploadStep.DATA_UPLOAD)
+                for raw_file_identifier, file in zip(raw_file_identifiers, files):
+                    self.raise_if_cancelled(job)
+                    self.upload_chunks(
+                        schema,
+                        file.file_path,
+                        raw_file_identifier,
+                        lease_lost=lease_lost,
+                    )
+                self.raise_if_lease_lost(schema, lease_lost)
+                # Every file of the batch shares the batch identifier as a prefix, so none of them are removed
+                if schema.has_overwrite_behaviour():
+                    self.remove_existing_data(schema, batch_identifier)
+                if schema.has_upsert_behaviour():
+                    self.replace_existing_rows(schema, batch_identifier, incoming_keys)
+                self.job_service.update_step(job, UploadStep.LOAD_PARTITIONS)
+                self.load_partitions(schema)
+                self.query_cache_service.invalidate(schema.metadata)
+            self.job_service.update_step(job, UploadStep.CLEAN_UP)
+            for raw_file_identifier, file in zip(raw_file_identifiers, files):
+                delete_incoming_raw_file(schema, file.file_path, raw_file_identifier)
+            for landing_key in landing_keys or []:
+                self.s3_adapter.delete_landing_file(landing_key)
+            self.job_service.update_step(job, UploadStep.NONE)
+            self.job_service.succeed(job)
+        except JobCancelledError as error:
+            for raw_file_identifier, file in zip(raw_file_identifiers, files):
+                delete_incoming_raw_file(schema, file.file_path, raw_file_identifier)
+            self.cancel_upload(
+                job,
+                schema,
+                batch_identifier,
+                [
+                    get_raw_filename(raw_file_identifier, file.file_path)
+                    for raw_file_identifier, file in zip(raw_file_identifiers, files)
+                ],
+                landing_keys,
+                quarantine_identifiers=raw_file_identifiers,
+            )
+            raise error
+        except Exception as error:
+            AppLogger.error(
+                f"Processing batch upload failed for layer [{schema.get_layer()}], domain [{schema.get_domain()}], dataset [{schema.get_dataset()}], and version [{schema.get_version()}]: {error}"
+            )
+            for raw_file_identifier, file in zip(raw_file_identifiers, files):
+                delete_incoming_raw_file(schema, file.file_path, raw_file_identifier)
+            self.job_service.fail(job, build_error_message_list(error))
+            raise error
+
+    def validate_incoming_batch(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        files: List[BatchFile],
+        raw_file_identifiers: List[str],
+    ) -> Optional[pd.DataFrame]:
+        """
+        Validates the files of the batch together, reporting errors against the file they were found in.
+        When the schema quarantines invalid rows, the rows that fail validation are split off into a
+        quarantine file for each file of the batch and the number of accepted and quarantined rows of
+        the batch is recorded on the job.
+        """
+        AppLogger.info(
+            f"Validating batch of {len(files)} files for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()}"
+        )
+        file_errors = [[] for _ in files]
+        file_accepted_rows = [0 for _ in files]
+        file_quarantined_chunks = [[] for _ in files]
+        chunk_keys = []
+        # The index of the file each chunk was read from, in the order the chunks are validated
+        chunk_file_indexes = deque()
+
+        def read_batch_chunks() -> Iterator[pd.DataFrame]:
+            for index, file in enumerate(files):
+                try:
+                    for chunk in self._read_chunks(schema, file.file_path):
+                        chunk_file_indexes.append(index)
+                        yield chunk
+                except Exception as error:
+                    file_errors[index].extend(build_error_message_list(error))
+
+        if schema.quarantines_invalid_rows():
+            validated_chunks = self.ingest_executor.map(
+                quarantine_chunk, schema, read_batch_chunks()
+            )
+        else:
+            validated_chunks = (
+                (chunk_errors, keys, 0, None)
+                for chunk_errors, keys in self._validate_chunks(
+                    schema, read_batch_chunks()
+                )
+            )
+        for chunk_errors, keys, chunk_rows, quarantined in validated_chunks:
+            index = chunk_file_indexes.popleft()
+            file_errors[index].extend(chunk_errors)
+            chunk_keys.append(keys)
+            file_accepted_rows[index] += chunk_rows
+            if quarantined is not None and len(quarantined):
+                file_quarantined_chunks[index].append(quarantined)
+
+        file_quarantined_rows = [
+            pd.concat(chunks, ignore_index=True) if chunks else None
+            for chunks in file_quarantined_chunks
+        ]
+        if schema.quarantines_invalid_rows():
+            # As with a single upload, a file that had every row quarantined fails the batch
+            for errors, accepted_rows, quarantined_rows in zip(
+                file_errors, file_accepted_rows, file_quarantined_rows
+            ):
+                if not errors and accepted_rows == 0:
+                    errors.extend(summarise_quarantined_rows(quarantined_rows))
+
+        batch_errors = [
+            f"{file.filename}: {error}"
+            for file, errors in zip(files, file_errors)
+            for error in summarise_validation_errors(errors)
+        ]
+        incoming_keys, key_errors = self._combine_keys(schema, chunk_keys)
+        batch_errors.extend(key_errors)
+        if batch_errors:
+            raise DatasetValidationError(batch_errors)
+
+        if schema.quarantines_invalid_rows():
+            for raw_file_identifier, quarantined_rows in zip(
+                raw_file_identifiers, file_quarantined_rows
+            ):
+                if quarantined_rows is not None:
+                    self.s3_adapter.store_data(
+                        schema.metadata.quarantine_path(raw_file_identifier),
+                        quarantined_rows.to_parquet(index=False),
+                    )
+            self.job_service.set_row_counts(
+                job,
+                sum(file_accepted_rows),
+                sum(
+                    len(quarantined_rows)
+                    for quarantined_rows in file_quarantined_rows
+                    if quarantined_rows is not None
+                ),
+            )
+        return incoming_keys
+
+    def validate_dataset(
+        self,
+        dataset: DatasetMetadata,
+        file_path: Path,
+        fail_fast: bool = False,
+        sample_rows: Optional[int] = None,
+    ) -> DatasetValidationResult:
+        """
+        Runs the validation of an upload over a file without creating a job or storing any data.
+        With fail_fast validation stops at the first chunk with errors, and with sample_rows only
+        the first rows of the file are validated.
+        """
+        schema = self.schema_service.get_schema(dataset)
+        AppLogger.info(
+            f"Validating dataset without upload for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()}/{schema.get_version()}"
+        )
+        errors = []
+        rows_validated = 0
+        # The number of rows of each chunk, in the order the chunks are validated
+        chunk_row_counts = deque()
+
+        def read_sampled_chunks() -> Iterator[pd.DataFrame]:
+            rows_read = 0
+            for chunk in self._read_chunks(schema, file_path):
+                if sample_rows is not None and rows_read + len(chunk) > sample_rows:
+                    chunk = chunk.iloc[: sample_rows - rows_read].copy()
+                rows_read += len(chunk)
+                chunk_row_counts.append(len(chunk))
+                yield chunk
+                if sample_rows is not None and rows_read >= sample_rows:
+                    return
+
+        chunk_keys = []
+        try:
+            for chunk_errors, keys in self._validate_chunks(
+                schema, read_sampled_chunks()
+            ):
+                rows_validated += chunk_row_counts.popleft()
+                errors.extend(chunk_errors)
+                chunk_keys.append(keys)
+                if errors and fail_fast:
+                    break
+        except UserError as error:
+            errors.extend(build_error_message_list(error))
+        # Keys repeated across chunks are only found once every chunk is validated, as on upload
+        if not (errors and fail_fast):
+            errors.extend(self._combine_keys(schema, chunk_keys)[1])
+
+        return DatasetValidationResult(
+            valid=not errors,
+            rows_validated=rows_validated,
+            errors=summarise_validation_errors(errors),
+        )
 
     def process_upload(
-        self, job: UploadJob, schema: Schema, file_path: Path, raw_file_identifier: str
+        self,
+        job: UploadJob,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+        landing_key: Optional[str] = None,
     ) -> None:
         try:
+            if landing_key:
+                self.job_service.update_step(job, UploadStep.LANDED_DATA_DOWNLOAD)
+                self.s3_adapter.download_landing_file(landing_key, file_path)
+            self.raise_if_cancelled(job)
             self.job_service.update_step(job, UploadStep.VALIDATION)
-            self.validate_incoming_data(schema, file_path, raw_file_identifier)
+            incoming_keys = self.validate_upload(
+                job, schema, file_path, raw_file_identifier
+            )
+            self.raise_if_cancelled(job)
             self.job_service.update_step(job, UploadStep.RAW_DATA_UPLOAD)
             self.s3_adapter.upload_raw_data(
                 schema.metadata, file_path, raw_file_identifier
             )
-            self.job_service.update_step(job, UploadStep.DATA_UPLOAD)
-            self.process_chunks(schema, file_path, raw_file_identifier)
-            self.job_service.update_step(job, UploadStep.LOAD_PARTITIONS)
-            self.load_partitions(schema)
+            self.job_service.checkpoint_raw_file(
+                job, get_raw_filename(raw_file_identifier, file_path)
+            )
+            self.write_upload(
+                job, schema, file_path, raw_file_identifier, incoming_keys
+            )
             self.job_service.update_step(job, UploadStep.CLEAN_UP)
             delete_incoming_raw_file(schema, file_path, raw_file_identifier)
+            if landing_key:
+                self.s3_adapter.delete_landing_file(landing_key)
             self.job_service.update_step(job, UploadStep.NONE)
             self.job_service.succeed(job)
+        except JobCancelledError as error:
+            delete_incoming_raw_file(schema, file_path, raw_file_identifier)
+            self.cancel_upload(
+                job,
+                schema,
+                raw_file_identifier,
+                [job.raw_filename] if job.raw_filename else [],
+                [landing_key] if landing_key else [],
+            )
+            raise error
         except Exception as error:
             AppLogger.error(
                 f"Processing upload failed for layer [{schema.get_layer()}], domain [{schema.get_domain()}], dataset [{schema.get_dataset()}], and version [{schema.get_version()}]: {error}"
@@ -123,46 +559,505 @@ class DataService:
             self.job_service.fail(job, build_error_message_list(error))
             raise error
 
-    def validate_incoming_data(
-        self, schema: Schema, file_path: Path, raw_file_identifier: str
+    def write_upload(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+        incoming_keys: Optional[pd.DataFrame],
+        committed_chunks: int = 0,
+        data_uploaded: bool = False,
     ) -> None:
+        with self.hold_write_lease(job, schema) as lease_lost:
+            if not data_uploaded:
+                self.raise_if_cancelled(job)
+                self.job_service.update_step(job, UploadStep.DATA_UPLOAD)
+                self.process_chunks(
+                    schema,
+                    file_path,
+                    raw_file_identifier,
+                    job,
+                    committed_chunks,
+                    lease_lost,
+                )
+                if schema.has_upsert_behaviour():
+                    # Cancelling is only possible while no data of earlier uploads has been changed
+                    self.raise_if_cancelled(job)
+                    self.raise_if_lease_lost(schema, lease_lost)
+                    self.replace_existing_rows(
+                        schema, raw_file_identifier, incoming_keys
+                    )
+                self.job_service.checkpoint_step(job, UploadStep.DATA_UPLOAD)
+            self.job_service.update_step(job, UploadStep.LOAD_PARTITIONS)
+            self.load_partitions(schema)
+            self.query_cache_service.invalidate(schema.metadata)
+
+    def retry_upload(self, subject_id: str, job_id: str) -> str:
+        """
+        Resumes a failed upload from the raw file archived by it, skipping the steps and chunks
+        that it completed before it failed
+        """
+        job = self.job_service.get_upload_job(job_id)
+        if job.subject_id != subject_id:
+            raise UserError(
+                f"The job with id {job_id} can only be retried by the subject that started it"
+            )
+        if job.status != JobStatus.FAILED:
+            raise UserError(
+                f"Only failed jobs can be retried, the job with id {job_id} has the status {job.status}"
+            )
+        if not job.has_completed(UploadStep.RAW_DATA_UPLOAD):
+            raise UserError(
+                f"The job with id {job_id} failed before its file was archived, upload the file again"
+            )
+        schema = self.schema_service.get_schema(
+            DatasetMetadata(job.layer, job.domain, job.dataset, job.version)
+        )
+        self.job_service.retry(job)
+        Thread(
+            target=self.resume_upload,
+            args=(job, schema),
+            name=job.job_id,
+        ).start()
+        return job.job_id
+
+    def resume_upload(self, job: UploadJob, schema: Schema) -> None:
+        file_path = spool.path_for(f"{job.job_id}-{job.raw_filename}")
+        try:
+            # The reservation is held until the file is removed with delete_incoming_raw_file
+            spool.reserve(
+                file_path,
+                self.s3_adapter.get_raw_file_size(schema.metadata, job.raw_filename),
+            )
+            self.job_service.update_step(job, UploadStep.RAW_DATA_DOWNLOAD)
+            self.s3_adapter.download_raw_file(
+                schema.metadata, job.raw_filename, file_path
+            )
+            file_path = restore_raw_file_format(file_path)
+            self.raise_if_cancelled(job)
+            data_uploaded = job.has_completed(UploadStep.DATA_UPLOAD)
+            incoming_keys = None
+            if schema.has_upsert_behaviour() and not data_uploaded:
+                self.job_service.update_step(job, UploadStep.VALIDATION)
+                incoming_keys = self.validate_upload(
+                    job, schema, file_path, job.raw_file_identifier
+                )
+            self.write_upload(
+                job,
+                schema,
+                file_path,
+                job.raw_file_identifier,
+                incoming_keys,
+                job.committed_chunks,
+                data_uploaded,
+            )
+            self.job_service.update_step(job, UploadStep.CLEAN_UP)
+            delete_incoming_raw_file(schema, file_path, job.raw_file_identifier)
+            self.job_service.update_step(job, UploadStep.NONE)
+            self.job_service.succeed(job)
+        except JobCancelledError:
+            delete_incoming_raw_file(schema, file_path, job.raw_file_identifier)
+            self.cancel_upload(job, schema, job.raw_file_identifier, [job.raw_filename])
+        except Exception as error:
+            AppLogger.error(
+                f"Resuming upload failed for layer [{schema.get_layer()}], domain [{schema.get_domain()}], dataset [{schema.get_dataset()}], and version [{schema.get_version()}]: {error}"
+            )
+            delete_incoming_raw_file(schema, file_path, job.raw_file_identifier)
+            self.job_service.fail(job, build_error_message_list(error))
+
+    def reprocess_raw_files(
+        self,
+        subject_id: str,
+        dataset: DatasetMetadata,
+        source_version: int,
+        raw_filenames: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Replays the raw files archived for another version of the dataset into the given version, with
+        an upload job for each file. By default every file of the source version is replayed.
+        """
+        if source_version == dataset.version:
+            raise UserError(
+                f"The raw files of version {source_version} cannot be reprocessed into the same version"
+            )
+        schema = self.schema_service.get_schema(dataset)
+        source = DatasetMetadata(
+            dataset.layer, dataset.domain, dataset.dataset, source_version
+        )
+        archived_filenames = self.s3_adapter.list_raw_files_in_upload_order(source)
+        if raw_filenames:
+            missing_filenames = sorted(set(raw_filenames) - set(archived_filenames))
+            if missing_filenames:
+                raise UserError(
+                    f"The files {missing_filenames} were not uploaded to the {source.string_representation()}"
+                )
+            archived_filenames = [
+                filename
+                for filename in archived_filenames
+                if filename in set(raw_filenames)
+            ]
+        if not archived_filenames:
+            raise UserError(
+                f"There are no uploaded files for the {source.string_representation()}"
+            )
+        # The latest file replaces the data of every earlier one
+        if schema.has_overwrite_behaviour():
+            archived_filenames = archived_filenames[-1:]
+
+        jobs = []
+        for filename in archived_filenames:
+            job = self.job_service.create_upload_job(
+                subject_id,
+                generate_uuid(),
+                filename,
+                self.generate_raw_file_identifier(),
+                dataset,
+            )
+            self.job_service.update_step(job, UploadStep.QUEUED)
+            jobs.append((job, filename))
+
+        Thread(
+            target=self.process_reprocessing,
+            args=(schema, source, jobs),
+            name=f"{dataset.dataset_identifier()}-reprocess",
+        ).start()
+        return [job.job_id for job, _ in jobs]
+
+    def process_reprocessing(
+        self,
+        schema: Schema,
+        source: DatasetMetadata,
+        jobs: List[Tuple[UploadJob, str]],
+    ) -> None:
+        """
+        Files are reprocessed in parallel into datasets with append behaviour. Otherwise they are reprocessed
+        one at a time in the order they were uploaded, so that later files replace the rows of earlier ones
+        as they did in the source version, and the files after a failed one are not reprocessed.
+        """
+        if schema.has_append_behaviour():
+            with ThreadPoolExecutor(
+                max_workers=REPROCESS_MAX_CONCURRENT_FILES,
+                thread_name_prefix=f"{schema.metadata.dataset_identifier()}-reprocess",
+            ) as executor:
+                for job, filename in jobs:
+                    executor.submit(
+                        self.reprocess_raw_file, job, schema, source, filename
+                    )
+            return
+
+        failed_filename = None
+        for job, filename in jobs:
+            if failed_filename:
+                self.job_service.fail(
+                    job,
+                    [
+                        f"Not reprocessed, as reprocessing the earlier file [{failed_filename}] failed"
+                    ],
+                )
+            elif not self.reprocess_raw_file(job, schema, source, filename):
+                failed_filename = filename
+
+    def reprocess_raw_file(
+        self, job: UploadJob, schema: Schema, source: DatasetMetadata, filename: str
+    ) -> bool:
+        # Jobs cancelled while they were queued are not downloaded
+        if self.job_service.is_cancellation_requested(job):
+            self.job_service.cancel(job)
+            return False
+        file_path = spool.path_for(f"{job.job_id}-{filename}")
+        try:
+            # The reservation is held until the file is removed by the upload
+            spool.reserve(
+                file_path, self.s3_adapter.get_raw_file_size(source, filename)
+            )
+            self.job_service.update_step(job, UploadStep.RAW_DATA_DOWNLOAD)
+            self.s3_adapter.download_raw_file(source, filename, file_path)
+            file_path = restore_raw_file_format(file_path)
+        except Exception as error:
+            AppLogger.error(
+                f"Downloading the raw file [{filename}] of the {source.string_representation()} for reprocessing failed: {error}"
+            )
+            remove_spool_file(file_path)
+            self.job_service.fail(job, build_error_message_list(error))
+            return False
+        try:
+            self.process_upload(job, schema, file_path, job.raw_file_identifier)
+        except Exception:
+            # The upload has already failed the job
+            return False
+        return True
+
+    def hold_write_lease(self, job: UploadJob, schema: Schema) -> ContextManager[Event]:
+        # Overwrites and upserts change the data of other uploads, so they write to the dataset alone
+        mode = (
+            LeaseMode.EXCLUSIVE
+            if schema.has_overwrite_behaviour() or schema.has_upsert_behaviour()
+            else LeaseMode.SHARED
+        )
+        self.job_service.update_step(job, UploadStep.WAITING_FOR_LEASE)
+        # A cancelled upload leaves the queue instead of waiting for the lease
+        return self.dataset_lease_service.hold(
+            schema.metadata, job.job_id, mode, lambda: self.raise_if_cancelled(job)
+        )
+
+    def validate_upload(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+    ) -> Optional[pd.DataFrame]:
+        if schema.quarantines_invalid_rows():
+            return self.quarantine_incoming_data(
+                job, schema, file_path, raw_file_identifier
+            )
+        return self.validate_incoming_data(schema, file_path, raw_file_identifier, job)
+
+    def quarantine_incoming_data(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Validates the file, splitting off the rows that fail validation into a quarantine file and
+        recording the number of accepted and quarantined rows on the job. Returns the keys of the
+        accepted rows when the schema has upsert behaviour.
+        """
+        AppLogger.info(
+            f"Validating dataset for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()} and quarantining invalid rows"
+        )
+        dataset_errors = []
+        chunk_keys = []
+        accepted_rows = 0
+        quarantined_chunks = []
+        for chunk_errors, keys, chunk_rows, quarantined in self.ingest_executor.map(
+            quarantine_chunk, schema, self._read_chunks(schema, file_path, job)
+        ):
+            dataset_errors.extend(chunk_errors)
+            chunk_keys.append(keys)
+            accepted_rows += chunk_rows
+            if quarantined is not None and len(quarantined):
+                quarantined_chunks.append(quarantined)
+        incoming_keys, key_errors = self._combine_keys(schema, chunk_keys)
+        dataset_errors.extend(key_errors)
+        quarantined_rows = (
+            pd.concat(quarantined_chunks, ignore_index=True)
+            if quarantined_chunks
+            else None
+        )
+        if not dataset_errors and accepted_rows == 0:
+            dataset_errors.extend(summarise_quarantined_rows(quarantined_rows))
+        if dataset_errors:
+            delete_incoming_raw_file(schema, file_path, raw_file_identifier)
+            raise DatasetValidationError(summarise_validation_errors(dataset_errors))
+
+        if quarantined_rows is not None:
+            self.s3_adapter.store_data(
+                schema.metadata.quarantine_path(raw_file_identifier),
+                quarantined_rows.to_parquet(index=False),
+            )
+        self.job_service.set_row_counts(
+            job,
+            accepted_rows,
+            0 if quarantined_rows is None else len(quarantined_rows),
+        )
+        return incoming_keys
+
+    def validate_incoming_data(
+        self,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+        job: Optional[UploadJob] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Validates the file, returning the keys of its rows when the schema has upsert behaviour
+        """
         AppLogger.info(
             f"Validating dataset for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()}"
         )
-        dataset_errors = set()
-        for chunk in construct_chunked_dataframe(file_path):
-            dataframe = get_dataframe_from_chunk_type(chunk)
-            try:
-                build_validated_dataframe(schema, dataframe)
-            except DatasetValidationError as error:
-                dataset_errors.update(error.message)
+        dataset_errors = []
+        chunk_keys = []
+        for chunk_errors, keys in self._validate_chunks(
+            schema, self._read_chunks(schema, file_path, job)
+        ):
+            dataset_errors.extend(chunk_errors)
+            chunk_keys.append(keys)
+        incoming_keys, key_errors = self._combine_keys(schema, chunk_keys)
+        dataset_errors.extend(key_errors)
         if dataset_errors:
             delete_incoming_raw_file(schema, file_path, raw_file_identifier)
-            raise DatasetValidationError(list(dataset_errors))
+            raise DatasetValidationError(summarise_validation_errors(dataset_errors))
+        return incoming_keys
+
+    def _validate_chunks(
+        self, schema: Schema, chunks: Iterator[pd.DataFrame]
+    ) -> Iterator[Tuple[List[str], Optional[pd.DataFrame]]]:
+        if schema.has_upsert_behaviour():
+            yield from self.ingest_executor.map(validate_chunk_keys, schema, chunks)
+            return
+        for chunk_errors in self.ingest_executor.map(validate_chunk, schema, chunks):
+            yield chunk_errors, None
+
+    def _combine_keys(
+        self, schema: Schema, chunk_keys: List[Optional[pd.DataFrame]]
+    ) -> Tuple[Optional[pd.DataFrame], List[str]]:
+        # Each chunk is checked for repeated keys as it is validated, which leaves the keys repeated across chunks
+        chunk_keys = [keys for keys in chunk_keys if keys is not None]
+        if not chunk_keys:
+            return None, []
+        incoming_keys = pd.concat(chunk_keys, ignore_index=True)
+        duplicated_rows = incoming_keys.duplicated(keep=False).sum()
+        if duplicated_rows:
+            return incoming_keys, [
+                f"Key columns {schema.get_key_columns()} have the same values in {duplicated_rows} rows, each key can only be uploaded once"
+            ]
+        return incoming_keys, []
 
     def process_chunks(
-        self, schema: Schema, file_path: Path, raw_file_identifier: str
+        self,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+        job: Optional[UploadJob] = None,
+        committed_chunks: int = 0,
+        lease_lost: Optional[Event] = None,
     ) -> None:
         AppLogger.info(
             f"Processing chunks for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()}/{schema.get_version()}"
         )
-        for chunk in construct_chunked_dataframe(file_path):
-            dataframe = get_dataframe_from_chunk_type(chunk)
-            self.process_chunk(schema, raw_file_identifier, dataframe)
+        self.upload_chunks(
+            schema, file_path, raw_file_identifier, job, committed_chunks, lease_lost
+        )
 
         if schema.has_overwrite_behaviour():
+            self.raise_if_lease_lost(schema, lease_lost)
             self.remove_existing_data(schema, raw_file_identifier)
 
         AppLogger.info(
             f"Processing chunks for {schema.get_layer()}/{schema.get_domain()}/{schema.get_dataset()}/{schema.get_version()} completed"
         )
 
+    def upload_chunks(
+        self,
+        schema: Schema,
+        file_path: Path,
+        raw_file_identifier: str,
+        job: Optional[UploadJob] = None,
+        committed_chunks: int = 0,
+        lease_lost: Optional[Event] = None,
+    ) -> None:
+        """
+        Uploads the chunks of the file after the chunks already committed, checkpointing each
+        uploaded chunk on the job when one is given and stopping once the write lease is lost
+        """
+        chunks = islice(
+            self._read_chunks(schema, file_path, job), committed_chunks, None
+        )
+        for chunk_index, encoded_partitions in enumerate(
+            self.ingest_executor.map(encode_chunk, schema, chunks),
+            start=committed_chunks,
+        ):
+            self.raise_if_lease_lost(schema, lease_lost)
+            self.process_chunk(
+                schema, raw_file_identifier, chunk_index, encoded_partitions, job
+            )
+
     def process_chunk(
-        self, schema: Schema, raw_file_identifier: str, chunk: pd.DataFrame
+        self,
+        schema: Schema,
+        raw_file_identifier: str,
+        chunk_index: int,
+        encoded_partitions: List[EncodedPartition],
+        job: Optional[UploadJob] = None,
     ) -> None:
-        validated_dataframe = build_validated_dataframe(schema, chunk)
-        permanent_filename = self.generate_permanent_filename(raw_file_identifier)
-        self.upload_data(schema, validated_dataframe, permanent_filename)
+        permanent_filename = self.generate_permanent_filename(
+            raw_file_identifier, chunk_index
+        )
+        self.s3_adapter.upload_encoded_partitions(
+            schema, permanent_filename, encoded_partitions
+        )
+        # Counted once the files are written, together with the checkpoint of the chunk on the job
+        self.dataset_statistics_service.record_chunk(
+            schema.metadata,
+            raw_file_identifier,
+            encoded_partitions,
+            job,
+            chunk_index + 1,
+        )
+
+    def _read_chunks(
+        self, schema: Schema, file_path: Path, job: Optional[UploadJob] = None
+    ) -> Iterator[pd.DataFrame]:
+        for chunk in construct_chunked_dataframe(file_path, schema):
+            # Checked as each chunk is read, so that a cancelled upload stops between chunks
+            if job is not None:
+                self.raise_if_cancelled(job)
+            yield get_dataframe_from_chunk_type(chunk)
+
+    def raise_if_cancelled(self, job: UploadJob) -> None:
+        if self.job_service.is_cancellation_requested(job):
+            raise JobCancelledError(f"The job with id {job.job_id} was cancelled")
+
+    def raise_if_lease_lost(self, schema: Schema, lease_lost: Optional[Event]) -> None:
+        # Another overwrite or upsert can hold the lease once it is lost, so nothing more is written
+        if lease_lost is not None:
+            self.dataset_lease_service.raise_if_lost(
+                lease_lost, schema.metadata.dataset_identifier()
+            )
+
+    def cancel_upload(
+        self,
+        job: UploadJob,
+        schema: Schema,
+        raw_file_identifier: str,
+        raw_filenames: List[str],
+        landing_keys: Optional[List[str]] = None,
+        quarantine_identifiers: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Removes the data files, quarantined rows, raw files and landed files written for the cancelled
+        upload, so that it leaves nothing behind, and marks its job as cancelled. The rows of a batch
+        are quarantined under the identifier of each of its files, given as quarantine_identifiers.
+        """
+        AppLogger.info(
+            f"Cancelling upload {job.job_id} for {schema.metadata.string_representation()}"
+        )
+        try:
+            self.s3_adapter.delete_dataset_files(schema.metadata, raw_file_identifier)
+            self.dataset_statistics_service.remove_uploads(
+                schema.metadata, raw_file_identifier
+            )
+            if schema.quarantines_invalid_rows():
+                self.s3_adapter.delete_dataset_files_using_key(
+                    [
+                        schema.metadata.quarantine_path(identifier)
+                        for identifier in quarantine_identifiers
+                        or [raw_file_identifier]
+                    ],
+                    raw_file_identifier,
+                )
+            for raw_filename in raw_filenames:
+                self.s3_adapter.delete_raw_dataset_files(schema.metadata, raw_filename)
+            for landing_key in landing_keys or []:
+                self.s3_adapter.delete_landing_file(landing_key)
+        except Exception as error:
+            AppLogger.error(
+                f"Removing the data of cancelled upload {job.job_id} failed: {error}"
+            )
+            self.job_service.fail(
+                job,
+                [
+                    "The upload was cancelled, but the data it had written could not be removed"
+                ],
+            )
+            return
+        finally:
+            self.query_cache_service.invalidate(schema.metadata)
+        self.job_service.cancel(job)
 
     def remove_existing_data(self, schema: Schema, raw_file_identifier: str) -> None:
         AppLogger.info(
@@ -173,6 +1068,9 @@ class DataService:
                 schema.metadata,
                 raw_file_identifier,
             )
+            self.dataset_statistics_service.remove_previous_uploads(
+                schema.metadata, raw_file_identifier
+            )
         except IndexError:
             AppLogger.warning(
                 f"No data to override for domain [{schema.get_domain()}] and dataset [{schema.get_dataset()}]"
@@ -185,6 +1083,54 @@ class DataService:
                 f"Overriding existing data failed for layer [{schema.get_layer()}], domain [{schema.get_domain()}] and dataset [{schema.get_dataset()}]. Raw file identifier: {raw_file_identifier}"
             )
 
+    def replace_existing_rows(
+        self, schema: Schema, raw_file_identifier: str, incoming_keys: pd.DataFrame
+    ) -> None:
+        """
+        Removes the rows written by previous uploads that have the key of an uploaded row. Only the
+        files whose partition and key column statistics can hold one of the keys are read, and only
+        the files that held one of the keys are rewritten.
+        """
+        AppLogger.info(
+            f"Replacing existing rows for layer [{schema.get_layer()}], domain [{schema.get_domain()}] and dataset [{schema.get_dataset()}]"
+        )
+        rewritten_files = 0
+        for key in self.s3_adapter.list_previous_dataset_files(
+            schema.metadata, raw_file_identifier
+        ):
+            partition_values = get_partition_values(schema, key)
+            if not partition_may_contain_keys(incoming_keys, partition_values):
+                continue
+            metadata = self.s3_adapter.retrieve_parquet_metadata(key)
+            if not file_may_contain_keys(incoming_keys, partition_values, metadata):
+                continue
+            content = self.s3_adapter.retrieve_data(key).read()
+            remaining_rows = remove_rows_with_keys(
+                incoming_keys, partition_values, content
+            )
+            if remaining_rows is None:
+                continue
+            rewritten_files += 1
+            rewritten_content = b""
+            if remaining_rows.num_rows == 0:
+                self.s3_adapter.delete_dataset_files_using_key(
+                    [key], key.rsplit("/", 1)[-1]
+                )
+            else:
+                rewritten_content = encode_table(schema, remaining_rows)
+                self.s3_adapter.store_data(key, rewritten_content)
+            self.dataset_statistics_service.record_rewrite(
+                schema.metadata,
+                key,
+                len(content),
+                metadata.num_rows,
+                len(rewritten_content),
+                remaining_rows.num_rows,
+            )
+        AppLogger.info(
+            f"Replaced existing rows in {rewritten_files} files for layer [{schema.get_layer()}], domain [{schema.get_domain()}] and dataset [{schema.get_dataset()}]"
+        )
+
     def get_last_updated_time(self, metadata: DatasetMetadata) -> str:
         last_updated = self.s3_adapter.get_last_updated_time(
             metadata.dataset_location()
@@ -230,7 +1176,8 @@ class DataService:
         self.s3_adapter.upload_partitioned_data(schema, filename, partitions)
 
     def load_partitions(self, schema: Schema):
-        if schema.get_partition_columns():
+        # Projected partitions are found by Athena from the paths of the files
+        if schema.get_partition_keys() and not schema.has_partition_projection():
             query_id = self.athena_adapter.query_sql_async(
                 f"MSCK REPAIR TABLE `{schema.metadata.glue_table_name()}`;"
             )
@@ -241,19 +1188,46 @@ class DataService:
             if int(query.limit) <= DATASET_ROWS_QUERY_LIMIT:
                 return False
 
-        size_of_datasets = self.s3_adapter.get_folder_size(dataset.s3_file_location())
-        return size_of_datasets > DATASET_SIZE_QUERY_LIMIT
+        statistics = self.dataset_statistics_service.get_statistics(dataset)
+        if statistics is None:
+            # The size of the files of the dataset is used until its statistics are rebuilt
+            self.dataset_statistics_service.rebuild_in_background(dataset)
+            size_of_datasets = self.s3_adapter.get_folder_size(
+                dataset.s3_file_location()
+            )
+            return size_of_datasets > DATASET_SIZE_QUERY_LIMIT
+        if statistics.size_bytes <= DATASET_SIZE_QUERY_LIMIT:
+            return False
+        # A dataset larger than the limit can still be queried when it cannot return too many rows
+        limit = int(query.limit) if query.limit else None
+        return statistics.estimated_result_rows(limit) > DATASET_ROWS_QUERY_LIMIT
 
     def query_data(
         self,
         dataset: DatasetMetadata,
         query: Query,
-    ) -> pd.DataFrame:
+    ) -> Iterator[pd.DataFrame]:
+        # Cached results passed the size check when they were queried from the same data
+        cache_key = self.query_cache_service.cache_key(dataset, query)
+        cached_result = self.query_cache_service.get_result(cache_key)
+        if cached_result is not None:
+            AppLogger.info(
+                f"Serving a cached query result of {dataset.string_representation()}"
+            )
+            return iter(cached_result)
         if not self.is_query_too_large(dataset, query):
-            return self.athena_adapter.query(dataset, query)
+            return self.query_cache_service.cache_result(
+                cache_key, self.athena_adapter.query_chunks(dataset, query)
+            )
         else:
             raise UnprocessableDatasetError("Dataset too large for this endpoint")
 
+    def get_query_column_types(self, dataset: DatasetMetadata) -> pa.Schema:
+        """
+        :return: The types of the columns of the dataset, for the typed formats of query results
+        """
+        return self.schema_service.get_schema(dataset).generate_storage_schema()
+
     def query_large_data(
         self,
         subject_id: str,
@@ -261,22 +1235,32 @@ class DataService:
         query: Query,
     ) -> str:
         query_job = self.job_service.create_query_job(subject_id, dataset)
-        query_execution_id = self.athena_adapter.query_async(dataset, query)
+        # Identical queries of the same data reuse the results of a finished query
+        cache_key = self.query_cache_service.cache_key(dataset, query)
+        query_execution_id = self.query_cache_service.get_large_query_execution(
+            cache_key
+        )
+        if query_execution_id is None:
+            query_execution_id = self.athena_adapter.query_async(dataset, query)
         Thread(
             target=self.generate_results_download_url_async,
-            args=(
-                query_job,
-                query_execution_id,
-            ),
+            args=(query_job, query_execution_id, cache_key),
         ).start()
         return query_job.job_id
 
     def generate_results_download_url_async(
-        self, query_job: QueryJob, query_execution_id: str
+        self,
+        query_job: QueryJob,
+        query_execution_id: str,
+        cache_key: Optional[QueryCacheKey] = None,
     ) -> None:
         try:
             self.job_service.update_step(query_job, QueryStep.RUNNING)
             self.athena_adapter.wait_for_query_to_complete(query_execution_id)
+            if cache_key is not None:
+                self.query_cache_service.cache_large_query_execution(
+                    cache_key, query_execution_id
+                )
             self.job_service.update_step(query_job, QueryStep.GENERATING_RESULTS)
             url = self.s3_adapter.generate_query_result_download_url(query_execution_id)
             self.job_service.succeed_query(query_job, url)
@@ -324,10 +1308,9 @@ class DataService:
     ) -> List[EnrichedColumn]:
         strftime_format = "%Y-%m-%d"
         enriched_columns = []
-        date_columns = schema.get_columns_by_type(DateType)
         for column in schema.columns:
             statistics = None
-            if column in date_columns:
+            if column.is_of_data_type(DateType):
                 statistics = {
                     "max": statistics_dataframe.at[0, f"max_{column.name}"].strftime(
                         strftime_format
@@ -0,0 +1,173 @@
+import random
+import time
+from contextlib import contextmanager
+from threading import Event, Thread
+from typing import Callable, Iterator, Optional, Tuple, TypeVar
+
+from api.adapter.dynamodb_adapter import DynamoDBAdapter
+from api.common.config.constants import (
+    DATASET_LEASE_POLL_SECONDS,
+    DATASET_LEASE_SECONDS,
+    DATASET_LEASE_UPDATE_ATTEMPTS,
+    DATASET_LEASE_UPDATE_BACKOFF_SECONDS,
+    DATASET_LEASE_WAIT_SECONDS,
+)
+from api.common.custom_exceptions import (
+    DatasetLeaseLostError,
+    DatasetLeaseTimeoutError,
+    JobCancelledError,
+)
+from api.common.logger import AppLogger
+from api.domain.dataset_lease import DatasetLease, LeaseMode
+from api.domain.dataset_metadata import DatasetMetadata
+
+T = TypeVar("T")
+
+
+class DatasetLeaseService:
+    """
+    Coordinates the uploads that write to the same dataset version. Appends share the write lease of
+    the dataset and run concurrently, overwrites wait in a queue for the lease to be held exclusively.
+    Uploads to different datasets never wait for each other.
+    """
+
+    def __init__(
+        self,
+        db_adapter=DynamoDBAdapter(),
+        lease_seconds: int = DATASET_LEASE_SECONDS,
+        poll_seconds: float = DATASET_LEASE_POLL_SECONDS,
+        wait_seconds: float = DATASET_LEASE_WAIT_SECONDS,
+    ):
+        self.db_adapter = db_adapter
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.wait_seconds = wait_seconds
+
+    @contextmanager
+    def hold(
+        self,
+        dataset: DatasetMetadata,
+        holder_id: str,
+        mode: LeaseMode,
+        raise_if_cancelled: Optional[Callable[[], None]] = None,
+    ) -> Iterator[Event]:
+        """Holds the write lease of the dataset, renewing it until the block exits"""
+        with self.hold_key(
+            dataset.dataset_identifier(), holder_id, mode, raise_if_cancelled
+        ) as lost:
+            yield lost
+
+    @contextmanager
+    def hold_key(
+        self,
+        lease_key: str,
+        holder_id: str,
+        mode: LeaseMode,
+        raise_if_cancelled: Optional[Callable[[], None]] = None,
+    ) -> Iterator[Event]:
+        """
+        Holds the lease with the given key, renewing it until the block exits. While waiting for the
+        lease, raise_if_cancelled is called on each poll to stop waiting once the holder is cancelled.
+
+        :return: An event that is set once the lease is lost, after which another writer can hold it,
+        so that the block stops writing by checking it with raise_if_lost
+        """
+        self.acquire(lease_key, holder_id, mode, raise_if_cancelled)
+        stopped = Event()
+        lost = Event()
+        renewal = Thread(
+            target=self._renew_until_stopped,
+            args=(lease_key, holder_id, stopped, lost),
+            name=f"{holder_id}-lease",
+            daemon=True,
+        )
+        renewal.start()
+        try:
+            yield lost
+        finally:
+            stopped.set()
+            renewal.join()
+            self.release(lease_key, holder_id)
+
+    def acquire(
+        self,
+        lease_key: str,
+        holder_id: str,
+        mode: LeaseMode,
+        raise_if_cancelled: Optional[Callable[[], None]] = None,
+    ) -> None:
+        deadline = time.time() + self.wait_seconds
+        AppLogger.info(f"Acquiring {mode} write lease for {lease_key} for {holder_id}")
+        while not self._update(
+            lease_key,
+            lambda lease: lease.acquire(holder_id, mode, *self._lease_times()),
+        ):
+            if time.time() >= deadline:
+                self.release(lease_key, holder_id)
+                raise DatasetLeaseTimeoutError(
+                    f"Timed out waiting to write to the dataset {lease_key}, another upload is still writing to it"
+                )
+            if raise_if_cancelled is not None:
+                try:
+                    raise_if_cancelled()
+                except JobCancelledError:
+                    # Leaves the queue, so that the writers queued behind it are not held up
+                    self.release(lease_key, holder_id)
+                    raise
+            time.sleep(self.poll_seconds)
+        AppLogger.info(f"Acquired {mode} write lease for {lease_key} for {holder_id}")
+
+    def release(self, lease_key: str, holder_id: str) -> None:
+        self._update(lease_key, lambda lease: lease.release(holder_id))
+        AppLogger.info(f"Released write lease for {lease_key} for {holder_id}")
+
+    @staticmethod
+    def raise_if_lost(lost: Event, lease_key: str) -> None:
+        if lost.is_set():
+            raise DatasetLeaseLostError(
+                f"The write lease of the dataset {lease_key} was lost, another upload may be writing to it"
+            )
+
+    def _renew_until_stopped(
+        self, lease_key: str, holder_id: str, stopped: Event, lost: Event
+    ) -> None:
+        expiry = self._lease_times()[1]
+        while not stopped.wait(self.lease_seconds / 3):
+            try:
+                renewed = self._update(
+                    lease_key,
+                    lambda lease: lease.renew(holder_id, *self._lease_times()),
+                )
+            except Exception as error:
+                AppLogger.warning(
+                    f"Could not renew write lease for {lease_key} for {holder_id}: {error}"
+                )
+                if time.time() < expiry:
+                    continue
+                renewed = False
+            if not renewed:
+                AppLogger.error(
+                    f"Write lease for {lease_key} expired while held by {holder_id}"
+                )
+                lost.set()
+                return
+            expiry = self._lease_times()[1]
+
+    def _update(self, lease_key: str, update: Callable[[DatasetLease], T]) -> T:
+        # Retried with exponential backoff and jitter while another writer changes the lease in between
+        for attempt in range(1, DATASET_LEASE_UPDATE_ATTEMPTS + 1):
+            lease = self.db_adapter.get_dataset_lease(lease_key)
+            result = update(lease)
+            if self.db_adapter.store_dataset_lease(lease):
+                return result
+            if attempt < DATASET_LEASE_UPDATE_ATTEMPTS:
+                time.sleep(
+                    random.uniform(0, DATASET_LEASE_UPDATE_BACKOFF_SECONDS * 2**attempt)
+                )
+        raise DatasetLeaseTimeoutError(
+            f"Could not update the write lease of the dataset {lease_key}, other uploads kept changing it"
+        )
+
+    def _lease_times(self) -> Tuple[int, int]:
+        now = int(time.time())
+        return now, now + self.lease_seconds
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from threading import Lock, Thread
+from typing import Callable, List, Optional, Set
+
+from api.adapter.dynamodb_adapter import DynamoDBAdapter
+from api.adapter.s3_adapter import S3Adapter
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.application.services.partitioning_service import EncodedPartition
+from api.common.logger import AppLogger
+from api.domain.dataset_lease import LeaseMode
+from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_statistics import DatasetStatistics
+from api.domain.Jobs.Job import generate_uuid
+from api.domain.Jobs.UploadJob import UploadJob
+
+
+class DatasetStatisticsService:
+    """
+    Keeps the size in bytes, files, rows and partitions of every dataset version, so that the size of
+    a dataset is known without listing its files. The partitions of a dataset version are recorded
+    one by one and counted, as there can be more of them than fit in its statistics.
+
+    Every upload adds the statistics of the files that it writes to the statistics of the dataset and
+    to statistics of its own. Data is overwritten, cancelled and deleted by removing the files of whole
+    uploads, so the statistics of those uploads are subtracted again when their files are removed,
+    while rewriting the files of an upload to replace rows adds the difference it makes. Datasets that
+    were written to before statistics were kept have their statistics rebuilt from their files once,
+    while the statistics of a new dataset version are complete from the moment its schema is stored.
+    """
+
+    def __init__(
+        self,
+        db_adapter=DynamoDBAdapter(),
+        s3_adapter=S3Adapter(),
+        dataset_lease_service=DatasetLeaseService(),
+    ):
+        self.db_adapter = db_adapter
+        self.s3_adapter = s3_adapter
+        self.dataset_lease_service = dataset_lease_service
+        self._rebuilding: Set[str] = set()
+        self._lock = Lock()
+
+    def get_statistics(self, dataset: DatasetMetadata) -> Optional[DatasetStatistics]:
+        """
+        :return: The statistics of the dataset, or None until they account for every file of it
+        """
+        statistics = self.db_adapter.get_dataset_statistics(dataset)
+        if statistics is None or not statistics.complete:
+            return None
+        return statistics
+
+    def create_statistics(self, dataset: DatasetMetadata) -> None:
+        """
+        Stores the complete, empty statistics of a new dataset version, so that they account for every
+        file of it from the first write without being rebuilt
+        """
+        self.db_adapter.store_dataset_statistics(dataset, DatasetStatistics(), {})
+
+    def record_chunk(
+        self,
+        dataset: DatasetMetadata,
+        raw_file_identifier: str,
+        encoded_partitions: List[EncodedPartition],
+        job: Optional[UploadJob] = None,
+        committed_chunks: int = 0,
+    ) -> None:
+        """
+        Adds the statistics of the files written for a chunk of the upload, checkpointing the committed
+        chunks on the job given in the same transaction
+        """
+        if job is not None:
+            job.committed_chunks = committed_chunks
+        partitions = {
+            partition.path for partition in encoded_partitions if partition.path
+        }
+        if partitions:
+            self.db_adapter.add_dataset_partitions(dataset, partitions)
+        self.db_adapter.add_dataset_statistics(
+            dataset,
+            raw_file_identifier,
+            DatasetStatistics(
+                size_bytes=sum(
+                    len(partition.content) for partition in encoded_partitions
+                ),
+                files=len(encoded_partitions),
+                rows=sum(partition.rows for partition in encoded_partitions),
+                partitions=partitions,
+            ),
+            job,
+        )
+
+    def record_rewrite(
+        self,
+        dataset: DatasetMetadata,
+        key: str,
+        original_size: int,
+        original_rows: int,
+        rewritten_size: int,
+        rewritten_rows: int,
+    ) -> None:
+        """
+        Adds the difference made by rewriting the data file with the key, where a file that has no
+        rows left is deleted
+        """
+        self.db_adapter.add_dataset_statistics(
+            dataset,
+            get_raw_file_identifier(key),
+            DatasetStatistics(
+                size_bytes=rewritten_size - original_size,
+                files=0 if rewritten_rows else -1,
+                rows=rewritten_rows - original_rows,
+            ),
+        )
+
+    def remove_uploads(
+        self, dataset: DatasetMetadata, raw_file_identifier: str
+    ) -> None:
+        """
+        Subtracts the statistics of the uploads whose files were removed by the raw file identifier,
+        e.g.: of a cancelled upload or of a deleted file
+        """
+        self._remove_uploads(
+            dataset, lambda identifier: identifier.startswith(raw_file_identifier)
+        )
+
+    def remove_previous_uploads(
+        self, dataset: DatasetMetadata, raw_file_identifier: str
+    ) -> None:
+        """
+        Subtracts the statistics of every upload but the one of the raw file identifier, once the
+        data of that upload has overwritten theirs
+        """
+        self._remove_uploads(
+            dataset, lambda identifier: not identifier.startswith(raw_file_identifier)
+        )
+
+    def delete_statistics(self, dataset: DatasetMetadata) -> None:
+        self.db_adapter.delete_dataset_statistics(dataset)
+
+    def rebuild_in_background(self, dataset: DatasetMetadata) -> None:
+        """Rebuilds the statistics of the dataset, unless they are already being rebuilt"""
+        identifier = dataset.dataset_identifier()
+        with self._lock:
+            if identifier in self._rebuilding:
+                return
+            self._rebuilding.add(identifier)
+        Thread(
+            target=self._rebuild_once,
+            args=(dataset,),
+            name=f"{identifier}-statistics",
+            daemon=True,
+        ).start()
+
+    def rebuild(self, dataset: DatasetMetadata) -> None:
+        """
+        Rebuilds the statistics of the dataset from the sizes and the parquet metadata of its files,
+        holding the write lease of the dataset exclusively so that no upload writes to it meanwhile
+        """
+        with self.dataset_lease_service.hold(
+            dataset, generate_uuid(), LeaseMode.EXCLUSIVE
+        ):
+            AppLogger.info(
+                f"Rebuilding the statistics of {dataset.string_representation()}"
+            )
+            upload_statistics = defaultdict(DatasetStatistics)
+            for key, size in self.s3_adapter.list_dataset_file_sizes(dataset).items():
+                partition = get_partition_path(dataset, key)
+                upload_statistics[get_raw_file_identifier(key)].add(
+                    DatasetStatistics(
+                        size_bytes=size,
+                        files=1,
+                        rows=self.s3_adapter.retrieve_parquet_metadata(key).num_rows,
+                        partitions={partition} if partition else set(),
+                    )
+                )
+            statistics = DatasetStatistics()
+            for upload in upload_statistics.values():
+                statistics.add(upload)
+            self.db_adapter.store_dataset_statistics(
+                dataset, statistics, dict(upload_statistics)
+            )
+
+    def _rebuild_once(self, dataset: DatasetMetadata) -> None:
+        try:
+            self.rebuild(dataset)
+        except Exception as error:
+            AppLogger.warning(
+                f"Could not rebuild the statistics of {dataset.string_representation()}: {error}"
+            )
+        finally:
+            with self._lock:
+                self._rebuilding.discard(dataset.dataset_identifier())
+
+    def _remove_uploads(
+        self, dataset: DatasetMetadata, is_removed: Callable[[str], bool]
+    ) -> None:
+        uploads = self.db_adapter.list_upload_statistics(dataset)
+        remaining_partitions = set().union(
+            *(
+                upload.partitions
+                for identifier, upload in uploads.items()
+                if not is_removed(identifier)
+            )
+        )
+        removed_partitions = set()
+        for identifier, upload in uploads.items():
+            if is_removed(identifier) and self.db_adapter.remove_upload_statistics(
+                dataset, identifier, upload
+            ):
+                removed_partitions |= upload.partitions - remaining_partitions
+        if removed_partitions:
+            self.db_adapter.remove_dataset_partitions(dataset, removed_partitions)
+
+
+def get_raw_file_identifier(key: str) -> str:
+    # Data files are named after the raw file identifier and the chunk, e.g.: 123-456_000001.parquet
+    return key.rsplit("/", 1)[-1].split(".")[0].rsplit("_", 1)[0]
+
+
+def get_partition_path(dataset: DatasetMetadata, key: str) -> str:
+    path = key.removeprefix(f"{dataset.dataset_location()}/")
+    return path.rsplit("/", 1)[0] if "/" in path else ""
@@ -1,23 +1,136 @@
-import re
-from typing import Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from pandas import Timestamp
 import pandera
 
+from api.common.config.constants import (
+    QUARANTINE_REASON_COLUMN,
+    VALIDATION_FAILURE_SAMPLE_SIZE,
+)
 from api.common.custom_exceptions import (
     DatasetValidationError,
     UnprocessableDatasetError,
 )
+from api.common.logger import AppLogger
 from api.common.value_transformers import clean_column_name
 from api.domain.data_types import (
     extract_athena_types,
     AthenaDataType,
+    BooleanType,
+    NumericType,
     StringType,
     DateType,
 )
 from api.domain.schema import Schema
 from api.domain.validation_context import ValidationContext
+from rapid.items.schema import Column, PartitionOverflow
+
+# Values of boolean columns whose values were not all read as booleans
+BOOLEAN_VALUES = {
+    True: True,
+    False: False,
+    "True": True,
+    "False": False,
+    "true": True,
+    "false": False,
+}
+
+
+@dataclass
+class PanderaFailure:
+    """
+    Rows that failed a pandera check of a column, into which the failures of the same check in the
+    other chunks of a file are merged, so that every failing check is reported once per file
+    """
+
+    column: Any
+    check: str
+    check_number: Any
+    count: int
+    # The failure case and the index of the first failing rows
+    samples: List[Tuple[Any, Any]]
+
+    def key(self) -> tuple:
+        return tuple(
+            None if pd.isna(value) else value
+            for value in (self.column, self.check, self.check_number)
+        )
+
+    def merge(self, other: "PanderaFailure") -> None:
+        self.count += other.count
+        self.samples.extend(
+            other.samples[: VALIDATION_FAILURE_SAMPLE_SIZE - len(self.samples)]
+        )
+
+    def describe(self) -> str:
+        rows = f"{self.count} row" if self.count == 1 else f"{self.count} rows"
+        if self.check == "not_nullable":
+            description = (
+                f"non-nullable series '{self.column}' contains null values in {rows}"
+            )
+            failures = [_format_row(index) for _, index in self.samples]
+        elif self.check == "field_uniqueness":
+            description = f"series '{self.column}' contains duplicate values in {rows}"
+            failures = [
+                _format_failure_case(value, index) for value, index in self.samples
+            ]
+        elif pd.isna(self.check_number):
+            description = f"[{self.check}] Column '{self.column}' failure cases in {rows}"
+            failures = [
+                _format_failure_case(value, index) for value, index in self.samples
+            ]
+        else:
+            description = f"[{self.check}] Column '{self.column}' failed element-wise validator number {int(self.check_number)}: {self.check} failure cases in {rows}"
+            failures = [
+                _format_failure_case(value, index) for value, index in self.samples
+            ]
+
+        if self.count > len(self.samples):
+            failures.append(f"and {self.count - len(self.samples)} more")
+        return f"{description}: {', '.join(failures)}"
+
+
+# An error of a chunk, as an error message or as failures that are merged across chunks
+ValidationError = Union[str, PanderaFailure]
+
+
+class ChunkValidationError(DatasetValidationError):
+    """
+    Raised with the errors of a chunk, whose pandera failures are kept apart so that they can be
+    merged with the failures of the other chunks of the file
+    """
+
+    def __init__(self, errors: List[ValidationError]):
+        super().__init__(summarise_validation_errors(errors))
+        self.errors = errors
+
+
+def summarise_validation_errors(errors: Iterable[ValidationError]) -> list[str]:
+    """
+    Builds the error messages of the chunks of a file, merging the failures of the same check of
+    a column into one message and repeated messages into one
+    """
+    summary: Dict[Any, ValidationError] = {}
+    for error in errors:
+        if isinstance(error, str):
+            summary.setdefault(error, error)
+        elif error.key() in summary:
+            summary[error.key()].merge(error)
+        else:
+            summary[error.key()] = PanderaFailure(
+                error.column,
+                error.check,
+                error.check_number,
+                error.count,
+                list(error.samples),
+            )
+    return [
+        error if isinstance(error, str) else error.describe()
+        for error in summary.values()
+    ]
 
 
 def build_validated_dataframe(schema: Schema, dataframe: pd.DataFrame) -> pd.DataFrame:
@@ -33,16 +146,132 @@ def transform_and_validate(schema: Schema, data: pd.DataFrame) -> pd.DataFrame:
         .pipe(dataset_has_correct_columns, schema)
         .pipe(convert_date_columns, schema)
         .pipe(dataset_has_correct_data_types, schema)
+        .pipe(add_derived_partition, schema)
         .pipe(dataset_has_no_illegal_characters_in_partition_columns, schema)
+        .pipe(dataset_has_partition_count_within_limit, schema)
         .pipe(validate_with_pandera, schema)
+        .pipe(dataset_has_unique_keys, schema)
     )
 
     if validation_context.has_errors():
-        raise DatasetValidationError(validation_context.errors())
+        raise ChunkValidationError(validation_context.errors())
 
     return validation_context.get_dataframe()
 
 
+def split_invalid_rows(
+    schema: Schema, data: pd.DataFrame
+) -> Tuple[Optional[pd.DataFrame], pd.DataFrame]:
+    """
+    Splits off the rows that fail the row-level checks of the schema: values that cannot be read as the
+    type of their column, dates that do not match their format, partition values with illegal characters
+    and values that fail the pandera checks of their column. Each check is applied to whole columns at once.
+
+    Returns the validated remaining rows, or None when no row remains, and the rows that were split off
+    as they were received, with the reasons they failed. Failures that do not belong to single rows, such
+    as missing columns or repeated keys, still raise a DatasetValidationError.
+    """
+    validation_context = (
+        ValidationContext(data)
+        .pipe(dataset_has_rows)
+        .pipe(remove_empty_rows)
+        .pipe(clean_column_headers)
+        .pipe(dataset_has_correct_columns, schema)
+    )
+    if validation_context.has_errors():
+        raise DatasetValidationError(validation_context.errors())
+    received = validation_context.get_dataframe()
+
+    reasons = pd.Series("", index=received.index, dtype=object)
+
+    def reject(mask: pd.Series, reason: str) -> None:
+        reasons[mask] = reasons[mask] + f"{reason}; "
+
+    for column in schema.columns:
+        series = received[column.name]
+        values = _convert_values(column, series, errors="coerce")
+        if values is not None:
+            reject(
+                series.notna() & values.isna(),
+                (
+                    f"Column [{column.name}] does not match specified date format"
+                    if column.is_of_data_type(DateType)
+                    else f"Column [{column.name}] is not of type {column.data_type}"
+                ),
+            )
+
+    for column in schema.get_partition_columns():
+        series = received[column.name]
+        # Checked by dtype, as object columns that hold nulls are not inferred as strings
+        if column.is_of_data_type(StringType) and pd.api.types.is_string_dtype(
+            series.dtype
+        ):
+            reject(
+                series.astype("string").str.contains("/", na=False),
+                f"Partition column [{column.name}] has values with illegal characters '/'",
+            )
+
+    derived_partition = schema.get_derived_partition()
+    if derived_partition is not None:
+        dates = _convert_values(
+            schema.get_column(derived_partition.column),
+            received[derived_partition.column],
+            errors="coerce",
+        )
+        outside_range = _outside_projected_range(schema, dates)
+        reject(
+            outside_range,
+            f"Column [{derived_partition.column}] has a date outside the range of the partitions "
+            f"that can be queried, {_describe_projected_range(schema)}",
+        )
+
+    # Values are only converted once the rows they cannot be read from are split off, so that
+    # the remaining values of integer columns are not read as floats
+    candidates = received[reasons == ""].copy()
+    for column in schema.columns:
+        values = _convert_values(column, candidates[column.name])
+        if values is not None:
+            candidates[column.name] = values
+
+    try:
+        schema.pandera_validate(candidates, lazy=True)
+    except pandera.errors.SchemaErrors as exc:
+        failure_cases = exc.failure_cases
+        # Failures of a whole column cannot be split off with a set of rows
+        if failure_cases is None or failure_cases["index"].isna().any():
+            raise ChunkValidationError(collect_pandera_failures(exc))
+        for (column, check), failures in failure_cases.groupby(
+            ["column", "check"], sort=False
+        ):
+            reject(
+                received.index.isin(failures["index"]),
+                f"Column [{column}] failed the check {check}",
+            )
+
+    is_valid = reasons == ""
+    quarantined = received[~is_valid].astype("string")
+    quarantined[QUARANTINE_REASON_COLUMN] = reasons[~is_valid].str[:-2].astype("string")
+    if not is_valid.any():
+        return None, quarantined
+    return (
+        transform_and_validate(schema, candidates[is_valid[candidates.index]].copy()),
+        quarantined,
+    )
+
+
+def _convert_values(
+    column: Column, series: pd.Series, errors: str = "raise"
+) -> Optional[pd.Series]:
+    """Reads the values of a column as its type, returning None for columns that are read as they are"""
+    if column.is_of_data_type(DateType):
+        return pd.to_datetime(series, format=column.format, errors=errors)
+    if series.dtype == object and column.is_of_data_type(NumericType):
+        return pd.to_numeric(series, errors=errors)
+    if series.dtype == object and column.is_of_data_type(BooleanType):
+        return series.map(BOOLEAN_VALUES)
+    return None
+
+
 def dataset_has_rows(df: pd.DataFrame) -> Tuple[pd.DataFrame, list[str]]:
     if df.shape[0] == 0:
         # Cannot proceed if there are no rows
@@ -58,9 +287,7 @@ def dataset_has_correct_columns(
     actual_columns = list(df.columns)
     error_list = []
 
-    has_expected_columns = all(
-        [expected_column in actual_columns for expected_column in expected_columns]
-    )
+    has_expected_columns = set(expected_columns).issubset(actual_columns)
 
     if not has_expected_columns or len(actual_columns) != len(expected_columns):
         # Cannot reasonably proceed with further validation if we don't even have the correct columns
@@ -114,6 +341,47 @@ def dataset_has_correct_data_types(
     return data_frame, error_list
 
 
+def add_derived_partition(
+    data_frame: pd.DataFrame, schema: Schema
+) -> Tuple[pd.DataFrame, list[str]]:
+    derived_partition = schema.get_derived_partition()
+    # A date column that could not be converted has already been reported
+    if derived_partition is None or not pd.api.types.is_datetime64_any_dtype(
+        data_frame[derived_partition.column]
+    ):
+        return data_frame, []
+
+    outside_range = _outside_projected_range(
+        schema, data_frame[derived_partition.column]
+    )
+    if outside_range.any():
+        return data_frame, [
+            f"Column [{derived_partition.column}] has {outside_range.sum()} dates outside the range of the "
+            f"partitions that can be queried, {_describe_projected_range(schema)}"
+        ]
+
+    data_frame[derived_partition.partition_name()] = data_frame[
+        derived_partition.column
+    ].dt.strftime(schema.get_derived_partition_format())
+    return data_frame, []
+
+
+def _outside_projected_range(schema: Schema, dates: pd.Series) -> pd.Series:
+    """
+    Finds the dates of the derived partition that Athena would not project a partition for, as the
+    rows written to those partitions could never be queried
+    """
+    if not schema.has_partition_projection():
+        return pd.Series(False, index=dates.index)
+    start, end = schema.get_partition_projection_range()
+    return (dates < start) | (dates >= end)
+
+
+def _describe_projected_range(schema: Schema) -> str:
+    start, end = schema.get_partition_projection_range()
+    return f"from {start.date()} to before {end.date()}"
+
+
 def dataset_has_no_illegal_characters_in_partition_columns(
     data_frame: pd.DataFrame, schema: Schema
 ) -> Tuple[pd.DataFrame, list[str]]:
@@ -130,6 +398,42 @@ def dataset_has_no_illegal_characters_in_partition_columns(
     return data_frame, error_list
 
 
+def dataset_has_partition_count_within_limit(
+    data_frame: pd.DataFrame, schema: Schema
+) -> Tuple[pd.DataFrame, list[str]]:
+    partitions = schema.get_partition_keys()
+    if not partitions:
+        return data_frame, []
+
+    max_partitions = schema.get_max_partitions()
+    partition_count = data_frame.groupby(by=partitions).ngroups
+    if partition_count <= max_partitions:
+        return data_frame, []
+
+    message = f"Partition columns {partitions} have more than {max_partitions} distinct values in a single chunk of the data"
+    if schema.get_partition_overflow() == PartitionOverflow.REJECT:
+        return data_frame, [message]
+    AppLogger.warning(
+        f"{message}, writing {partition_count} files for the chunk of dataset {schema.metadata.string_representation()}"
+    )
+    return data_frame, []
+
+
+def dataset_has_unique_keys(
+    data_frame: pd.DataFrame, schema: Schema
+) -> Tuple[pd.DataFrame, list[str]]:
+    if not schema.has_upsert_behaviour():
+        return data_frame, []
+
+    key_columns = schema.get_key_columns()
+    duplicated_rows = data_frame.duplicated(subset=key_columns, keep=False).sum()
+    if duplicated_rows:
+        return data_frame, [
+            f"Key columns {key_columns} have the same values in {duplicated_rows} rows, each key can only be uploaded once"
+        ]
+    return data_frame, []
+
+
 def remove_empty_rows(df: pd.DataFrame) -> Tuple[pd.DataFrame, list[str]]:
     error_list = []
     try:
@@ -172,52 +476,82 @@ def is_valid_custom_dtype(actual_type: str, expected_type: str) -> bool:
     return is_custom_dtype and actual_type in list(StringType)
 
 
-def parse_pandera_errors(exc: pandera.errors.SchemaErrors) -> list[str]:
+def summarise_pandera_failures(exc: pandera.errors.SchemaErrors) -> list[str]:
     """
-    Parse Pandera SchemaErrors exception to extract the 'error' field from error messages.
-
+    Builds one error message per failing column and check from the failure cases of the
+    validation, with the number of failing rows and a bounded sample of them
     """
-    error_messages = []
+    return summarise_validation_errors(collect_pandera_failures(exc))
 
-    error_str = str(exc)
 
-    # Creating a list of singular (json like) entries from the pandera error string
-    # For example: {'check': 'pandera_check', 'error': 'error message', ...}
-    failure_object_pattern = r'\{\s*(?:[^{}]*?)\}'
-    failure_objects = re.findall(failure_object_pattern, error_str)
+def collect_pandera_failures(
+    exc: pandera.errors.SchemaErrors,
+) -> List[ValidationError]:
+    failure_cases = exc.failure_cases
+    if failure_cases is None or failure_cases.empty:
+        return [str(exc)]
 
-    # Extracting and cleaning each error statement
-    for obj in failure_objects:
+    grouped_failure_cases = failure_cases.groupby(
+        ["column", "check", "check_number"], sort=False, dropna=False
+    )
+    group_ids = grouped_failure_cases.ngroup().to_numpy()
+    failure_counts = np.bincount(group_ids)
+    is_sampled = (
+        grouped_failure_cases.cumcount() < VALIDATION_FAILURE_SAMPLE_SIZE
+    ).to_numpy()
+
+    failures_by_group = {}
+    for group_id, column, check, check_number, failure_case, index in zip(
+        group_ids[is_sampled],
+        failure_cases["column"][is_sampled],
+        failure_cases["check"][is_sampled],
+        failure_cases["check_number"][is_sampled],
+        failure_cases["failure_case"][is_sampled],
+        failure_cases["index"][is_sampled],
+    ):
+        if group_id not in failures_by_group:
+            failures_by_group[group_id] = PanderaFailure(
+                column, check, check_number, int(failure_counts[group_id]), []
+            )
+        failures_by_group[group_id].samples.append((failure_case, index))
 
-        error_match = re.search(r'"error":\s*"((?:[^"\\]|\\.)*)"', obj)
+    return [failure for _, failure in sorted(failures_by_group.items())]
 
-        if not error_match:
-            continue
 
-        error_msg = error_match.group(1)
-        error_msg = error_msg.replace(r"\'", "'").replace(r'\"', '"')
-
-        check_match = re.search(r'"check":\s*"([^"]*)"', obj)
-        check_name = check_match.group(1) if check_match else None
+def summarise_quarantined_rows(quarantined_rows: Optional[pd.DataFrame]) -> list[str]:
+    """
+    Builds one error message per reason that rows were quarantined for, for uploads that had
+    every row quarantined
+    """
+    if quarantined_rows is None:
+        return ["Every row failed validation"]
+    reason_counts = (
+        quarantined_rows[QUARANTINE_REASON_COLUMN]
+        .str.split("; ")
+        .explode()
+        .value_counts()
+    )
+    return [
+        f"Every row failed validation, {reason} in {count} {'row' if count == 1 else 'rows'}"
+        for reason, count in reason_counts.items()
+    ]
 
-        if ':' in error_msg and ('Name:' in error_msg or 'dtype:' in error_msg):
-            error_msg = error_msg.split(':')[0]
 
-        if check_name and check_name not in ['not_nullable', 'field_uniqueness']:
-            error_msg = f"[{check_name}] {error_msg}"
+def _format_row(index) -> str:
+    return "unknown row" if pd.isna(index) else f"row {int(index)}"
 
-        error_messages.append(error_msg)
 
-    return error_messages if error_messages else [str(exc)]
+def _format_failure_case(value, index) -> str:
+    return f"{value} ({_format_row(index)})"
 
 
 def validate_with_pandera(
     data_frame: pd.DataFrame, schema: Schema
-) -> Tuple[pd.DataFrame, list[str]]:
+) -> Tuple[pd.DataFrame, list[ValidationError]]:
     error_list = []
     try:
         validated_df = schema.pandera_validate(data_frame, lazy=True)
         return validated_df, []
     except pandera.errors.SchemaErrors as exc:
-        error_list = parse_pandera_errors(exc)
+        error_list = collect_pandera_failures(exc)
         return data_frame, error_list
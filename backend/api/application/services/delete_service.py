@@ -2,6 +2,10 @@ import re
 
 from api.adapter.glue_adapter import GlueAdapter
 from api.adapter.s3_adapter import S3Adapter
+from api.application.services.dataset_statistics_service import (
+    DatasetStatisticsService,
+)
+from api.application.services.query_cache_service import QueryCacheService
 from api.application.services.schema_service import SchemaService
 from api.common.config.constants import FILENAME_WITH_TIMESTAMP_REGEX
 from api.common.custom_exceptions import AWSServiceError, UserError
@@ -15,10 +19,14 @@ class DeleteService:
         s3_adapter=S3Adapter(),
         glue_adapter=GlueAdapter(),
         schema_service=SchemaService(),
+        query_cache_service=QueryCacheService(),
+        dataset_statistics_service=DatasetStatisticsService(),
     ):
         self.s3_adapter = s3_adapter
         self.glue_adapter = glue_adapter
         self.schema_service = schema_service
+        self.query_cache_service = query_cache_service
+        self.dataset_statistics_service = dataset_statistics_service
 
     def delete_schemas(self, metadata: type[DatasetMetadata]):
         self.schema_service.delete_schemas(metadata)
@@ -41,6 +49,8 @@ class DeleteService:
         self._validate_filename(filename)
         self.s3_adapter.find_raw_file(dataset, filename)
         self.s3_adapter.delete_dataset_files(dataset, filename)
+        self.dataset_statistics_service.remove_uploads(dataset, filename.split(".")[0])
+        self.query_cache_service.invalidate(dataset)
 
     def delete_table(self, dataset: DatasetMetadata):
         self.glue_adapter.delete_tables([dataset.glue_table_name()])
@@ -58,6 +68,8 @@ class DeleteService:
         tables = self.glue_adapter.get_tables_for_dataset(dataset)
         self.glue_adapter.delete_tables(tables)
         self.schema_service.delete_schemas(dataset)
+        self.dataset_statistics_service.delete_statistics(dataset)
+        self.query_cache_service.invalidate(dataset)
 
     def _validate_filename(self, filename: str):
         if not re.match(FILENAME_WITH_TIMESTAMP_REGEX, filename):
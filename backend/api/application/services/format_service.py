@@ -1,15 +1,192 @@
 import csv
-from pandas import DataFrame
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas import DataFrame, Series
 
 from api.domain.mime_type import MimeType
 
 
+class _StreamSink:
+    """
+    Write-only file that hands over what has been written to it so far each time it is drained,
+    while keeping track of the position of the whole output as the parquet writer requires
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._position = 0
+        self._buffers: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._buffers.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._buffers)
+        self._buffers = []
+        return data
+
+
 class FormatService:
+    # Formats that keep the types of the columns of the query result instead of casting them to strings
+    TYPED_MIME_TYPES = [MimeType.ARROW_STREAM, MimeType.BINARY]
+
     @staticmethod
-    def from_df_to_mimetype(df: DataFrame, mime_type: MimeType):
-        if mime_type == MimeType.TEXT_CSV:
-            return df.to_csv(quoting=csv.QUOTE_NONNUMERIC, index=False)
+    def from_chunks_to_mimetype(
+        chunks: Iterable[DataFrame],
+        mime_type: MimeType,
+        column_types: Optional[pa.Schema] = None,
+    ) -> Iterator[Union[str, bytes]]:
+        """
+        Formats the chunks of a query result one at a time, so that the output can be streamed
+        without holding the whole result in memory
+
+        :param column_types: The types of the columns of the dataset, used by the typed formats
+        for the columns of the result that are columns of the dataset
+        """
+        if mime_type == MimeType.ARROW_STREAM:
+            return FormatService._to_arrow_stream(chunks, column_types)
         elif mime_type == MimeType.BINARY:
-            return df.to_parquet(engine="pyarrow")
+            return FormatService._to_parquet(chunks, column_types)
+
+        chunks = (chunk.astype("string") for chunk in chunks)
+        if mime_type == MimeType.TEXT_CSV:
+            return FormatService._to_csv(chunks)
+        elif mime_type == MimeType.APPLICATION_NDJSON:
+            return FormatService._to_ndjson(chunks)
         else:
-            return df.to_dict(orient="index")
+            return FormatService._to_json(chunks)
+
+    @staticmethod
+    def _to_csv(chunks: Iterable[DataFrame]) -> Iterator[str]:
+        header = True
+        for chunk in chunks:
+            yield chunk.to_csv(quoting=csv.QUOTE_NONNUMERIC, index=False, header=header)
+            header = False
+
+    @staticmethod
+    def _to_ndjson(chunks: Iterable[DataFrame]) -> Iterator[str]:
+        for chunk in chunks:
+            if chunk.shape[0] > 0:
+                yield chunk.to_json(orient="records", lines=True, force_ascii=False)
+
+    @staticmethod
+    def _to_json(chunks: Iterable[DataFrame]) -> Iterator[str]:
+        """
+        Each key of the JSON object is the index of a row in the whole result
+        """
+        row_index = 0
+        separator = "{"
+        for chunk in chunks:
+            if chunk.shape[0] == 0:
+                continue
+            chunk.index = range(row_index, row_index + chunk.shape[0])
+            row_index += chunk.shape[0]
+            # Strip the braces of the object of each chunk to output the rows of a single object
+            yield separator + chunk.to_json(orient="index", force_ascii=False)[1:-1]
+            separator = ","
+        yield "{}" if separator == "{" else "}"
+
+    @staticmethod
+    def _to_arrow_stream(
+        chunks: Iterable[DataFrame], column_types: Optional[pa.Schema]
+    ) -> Iterator[bytes]:
+        return FormatService._write_chunks(chunks, column_types, pa.ipc.new_stream)
+
+    @staticmethod
+    def _to_parquet(
+        chunks: Iterable[DataFrame], column_types: Optional[pa.Schema]
+    ) -> Iterator[bytes]:
+        # Each chunk is written as a row group that can be sent as soon as it is written
+        return FormatService._write_chunks(chunks, column_types, pq.ParquetWriter)
+
+    @staticmethod
+    def _write_chunks(
+        chunks: Iterable[DataFrame],
+        column_types: Optional[pa.Schema],
+        open_writer: Callable[[_StreamSink, pa.Schema], Any],
+    ) -> Iterator[bytes]:
+        sink = _StreamSink()
+        writer, schema = None, None
+        for chunk in chunks:
+            if writer is None:
+                schema = FormatService._result_schema(chunk, column_types)
+                writer = open_writer(sink, schema)
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+            yield sink.drain()
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+
+    @staticmethod
+    def _result_schema(
+        chunk: DataFrame, column_types: Optional[pa.Schema]
+    ) -> pa.Schema:
+        """
+        Every chunk of the result is written with the schema of the first one, where the columns of
+        the dataset have the types of the dataset and other columns, e.g.: aggregations, have the
+        types of the first chunk. Columns that only share the name of a dataset column, e.g.: an
+        aggregation aliased as the column, keep the types of the first chunk unless their values
+        convert safely to the type of the dataset column.
+        """
+        inferred_schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+        if column_types is None:
+            return inferred_schema
+        return pa.schema(
+            [
+                (
+                    column_types.field(field.name)
+                    if field.name in column_types.names
+                    and _converts_safely(
+                        chunk[field.name],
+                        field.type,
+                        column_types.field(field.name).type,
+                    )
+                    else field
+                )
+                for field in inferred_schema
+            ]
+        )
+
+
+def _type_kind(data_type: pa.DataType) -> str:
+    if (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+    ):
+        return "numeric"
+    if pa.types.is_temporal(data_type):
+        return "temporal"
+    if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return "string"
+    return str(data_type)
+
+
+def _converts_safely(
+    values: Series, inferred_type: pa.DataType, column_type: pa.DataType
+) -> bool:
+    # Arrow converts some values across kinds of types, e.g.: counts to timestamps or booleans
+    if not pa.types.is_null(inferred_type) and _type_kind(inferred_type) != _type_kind(
+        column_type
+    ):
+        return False
+    try:
+        pa.Array.from_pandas(values, type=column_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return False
+    return True
@@ -0,0 +1,78 @@
+# Ingest stages that are run in the ingest worker processes. These functions must stay
+# importable at module level and take only picklable arguments, as they are sent to the
+# worker processes by the IngestExecutor.
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from api.application.services.dataset_validation import (
+    ChunkValidationError,
+    ValidationError,
+    build_validated_dataframe,
+    split_invalid_rows,
+)
+from api.application.services.partitioning_service import (
+    EncodedPartition,
+    encode_partitions,
+    generate_partitioned_data,
+)
+from api.application.services.upsert_service import extract_keys
+from api.common.custom_exceptions import DatasetValidationError
+from api.domain.schema import Schema
+
+
+def validate_chunk(schema: Schema, chunk: pd.DataFrame) -> List[ValidationError]:
+    try:
+        build_validated_dataframe(schema, chunk)
+    except DatasetValidationError as error:
+        return _chunk_errors(error)
+    return []
+
+
+def validate_chunk_keys(
+    schema: Schema, chunk: pd.DataFrame
+) -> Tuple[List[ValidationError], Optional[pd.DataFrame]]:
+    try:
+        validated_dataframe = build_validated_dataframe(schema, chunk)
+    except DatasetValidationError as error:
+        return _chunk_errors(error), None
+    return [], extract_keys(schema, validated_dataframe)
+
+
+def quarantine_chunk(
+    schema: Schema, chunk: pd.DataFrame
+) -> Tuple[List[ValidationError], Optional[pd.DataFrame], int, Optional[pd.DataFrame]]:
+    """
+    Validates the chunk, splitting off its invalid rows, and returns the errors of the chunk, the keys
+    of its valid rows when the schema has upsert behaviour, the number of valid rows and the invalid rows
+    """
+    try:
+        validated_dataframe, quarantined_rows = split_invalid_rows(schema, chunk)
+    except DatasetValidationError as error:
+        return _chunk_errors(error), None, 0, None
+    if validated_dataframe is None:
+        return [], None, 0, quarantined_rows
+    keys = (
+        extract_keys(schema, validated_dataframe)
+        if schema.has_upsert_behaviour()
+        else None
+    )
+    return [], keys, len(validated_dataframe), quarantined_rows
+
+
+def encode_chunk(schema: Schema, chunk: pd.DataFrame) -> List[EncodedPartition]:
+    if schema.quarantines_invalid_rows():
+        validated_dataframe, _ = split_invalid_rows(schema, chunk)
+        if validated_dataframe is None:
+            return []
+    else:
+        validated_dataframe = build_validated_dataframe(schema, chunk)
+    partitions = generate_partitioned_data(schema, validated_dataframe)
+    return encode_partitions(schema, partitions)
+
+
+def _chunk_errors(error: DatasetValidationError) -> List[ValidationError]:
+    # The errors of the chunk are returned unsummarised, to be summarised with the other chunks of the file
+    if isinstance(error, ChunkValidationError):
+        return error.errors
+    return error.message
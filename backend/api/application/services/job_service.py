@@ -1,11 +1,12 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from api.adapter.dynamodb_adapter import DynamoDBAdapter
+from api.common.custom_exceptions import UserError
 from api.common.logger import AppLogger
 from api.domain.dataset_metadata import DatasetMetadata
-from api.domain.Jobs.Job import JobStep, Job, JobStatus
+from api.domain.Jobs.Job import JobStep, Job, JobStatus, JobType
 from api.domain.Jobs.QueryJob import QueryJob, QueryStep
-from api.domain.Jobs.UploadJob import UploadJob
+from api.domain.Jobs.UploadJob import UploadJob, UploadStep
 
 
 class JobService:
@@ -18,6 +19,18 @@ class JobService:
     def get_job(self, job_id: str) -> Dict:
         return self.db_adapter.get_job(job_id)
 
+    def get_upload_job(self, job_id: str) -> UploadJob:
+        item = self.db_adapter.get_job(job_id)
+        if item["type"] != JobType.UPLOAD:
+            raise UserError(f"The job with id {job_id} is not an upload job")
+        return UploadJob.from_item(item)
+
+    def find_upload_job(self, job_id: str) -> Optional[UploadJob]:
+        try:
+            return self.get_upload_job(job_id)
+        except UserError:
+            return None
+
     def create_upload_job(
         self,
         subject_id: str,
@@ -51,6 +64,59 @@ class JobService:
         job.set_errors(set(errors))
         self.db_adapter.update_job(job)
 
+    def checkpoint_raw_file(self, job: UploadJob, raw_filename: str) -> None:
+        AppLogger.info(f"Raw file of job {job.job_id} archived as {raw_filename}")
+        job.raw_filename = raw_filename
+        job.completed_steps.append(UploadStep.RAW_DATA_UPLOAD)
+        self.db_adapter.update_upload_job(job)
+
+    def checkpoint_step(self, job: UploadJob, step: UploadStep) -> None:
+        AppLogger.info(f"Step {step} of job {job.job_id} completed")
+        job.completed_steps.append(step)
+        self.db_adapter.update_upload_job(job)
+
+    def set_row_counts(
+        self, job: UploadJob, accepted_rows: int, quarantined_rows: int
+    ) -> None:
+        AppLogger.info(
+            f"Job {job.job_id} accepted {accepted_rows} rows and quarantined {quarantined_rows} rows"
+        )
+        job.set_row_counts(accepted_rows, quarantined_rows)
+        self.db_adapter.update_upload_job(job)
+
+    def retry(self, job: UploadJob) -> None:
+        AppLogger.info(f"Retrying job {job.job_id}")
+        job.set_status(JobStatus.IN_PROGRESS)
+        job.set_errors(set())
+        self.db_adapter.retry_upload_job(job)
+
+    def request_cancellation(self, subject_id: str, job_id: str) -> str:
+        """
+        Requests the cancellation of an upload job in progress. The upload stops at the next chunk or
+        step it starts, removes the data it has written and leaves the job cancelled.
+        """
+        job = self.get_upload_job(job_id)
+        if job.subject_id != subject_id:
+            raise UserError(
+                f"The job with id {job_id} can only be cancelled by the subject that started it"
+            )
+        if job.status != JobStatus.IN_PROGRESS:
+            raise UserError(
+                f"Only jobs in progress can be cancelled, the job with id {job_id} has the status {job.status}"
+            )
+        AppLogger.info(f"Requesting the cancellation of job {job_id}")
+        self.db_adapter.request_job_cancellation(job_id)
+        return job_id
+
+    def is_cancellation_requested(self, job: UploadJob) -> bool:
+        return bool(self.db_adapter.get_job(job.job_id).get("cancel_requested"))
+
+    def cancel(self, job: UploadJob) -> None:
+        AppLogger.info(f"Job {job.job_id} has been cancelled")
+        job.set_step(UploadStep.NONE)
+        job.set_status(JobStatus.CANCELLED)
+        self.db_adapter.update_job(job)
+
     def succeed_query(self, query_job: QueryJob, url: str) -> None:
         AppLogger.info(f"Query job {query_job.job_id} has succeeded")
         query_job.set_step(QueryStep.NONE)
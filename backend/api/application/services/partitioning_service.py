@@ -1,9 +1,13 @@
 from typing import List, Tuple, Hashable, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from pydantic import BaseModel, ConfigDict
 
+from api.common.config.constants import SORTED_ROW_GROUP_SIZE
 from api.domain.schema import Schema
+from rapid.items.schema import SortMethod
 
 
 class Partition(BaseModel):
@@ -14,6 +18,12 @@ class Partition(BaseModel):
     df: pd.DataFrame
 
 
+class EncodedPartition(BaseModel):
+    path: Optional[str] = ""
+    content: bytes
+    rows: int = 0
+
+
 def generate_path(group_partitions: List[str], group_info: Tuple[Hashable, ...]) -> str:
     formatted_group_partitions = [
         f"{partition}={value}" for partition, value in zip(group_partitions, group_info)
@@ -26,7 +36,9 @@ def drop_columns(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
 
 
 def generate_partitioned_data(schema: Schema, df: pd.DataFrame) -> List[Partition]:
-    partitions = schema.get_partitions()
+    partitions = schema.get_partition_keys()
+    # Grouping keeps the order of the rows, so each partition is written in the sort order
+    df = sort_rows(schema, df)
 
     if len(partitions) == 0:
         return non_partitioned_dataframe(df)
@@ -58,3 +70,63 @@ def partitioned_dataframe(df: pd.DataFrame, partitions: List[str]) -> List[Parti
 
 def non_partitioned_dataframe(df: pd.DataFrame) -> List[Partition]:
     return [Partition(df=df)]
+
+
+def sort_rows(schema: Schema, df: pd.DataFrame) -> pd.DataFrame:
+    sort_by = schema.get_sort_by()
+    if not sort_by:
+        return df
+    if schema.get_sort_method() == SortMethod.ZORDER and len(sort_by) > 1:
+        return df.iloc[z_order(df, sort_by)].reset_index(drop=True)
+    return df.sort_values(
+        by=sort_by, kind="stable", na_position="last", ignore_index=True
+    )
+
+
+def z_order(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Returns the positions of the rows ordered along a Z-order curve over the ranks of the values
+    of the columns, so that rows with close values in every column are stored close together
+    """
+    bits_per_column = 64 // len(columns)
+    max_rank = (1 << bits_per_column) - 1
+    z_values = np.zeros(len(df), dtype=np.uint64)
+    for position, column in enumerate(columns):
+        ranks = df[column].rank(method="dense", na_option="bottom").to_numpy() - 1
+        highest_rank = ranks.max() if len(ranks) else 0
+        if highest_rank > max_rank:
+            # Columns with more distinct values than fit in their bits are bucketed evenly
+            ranks = np.floor(ranks * (max_rank / highest_rank))
+        ranks = ranks.astype(np.uint64)
+        for bit in range(min(bits_per_column, int(ranks.max(initial=0)).bit_length())):
+            z_values |= ((ranks >> np.uint64(bit)) & np.uint64(1)) << np.uint64(
+                bit * len(columns) + position
+            )
+    return np.argsort(z_values, kind="stable")
+
+
+def encode_partitions(
+    schema: Schema, partitions: List[Partition]
+) -> List[EncodedPartition]:
+    storage_schema = schema.generate_storage_schema()
+    # Partition columns are encoded in the partition path rather than in the files
+    partition_columns = schema.get_partition_keys()
+    if partition_columns:
+        storage_schema = pa.schema(
+            [field for field in storage_schema if field.name not in partition_columns]
+        )
+    # Sorted files are split into row groups, so that their statistics can be used to skip data
+    row_group_size = SORTED_ROW_GROUP_SIZE if schema.get_sort_by() else None
+    return [
+        EncodedPartition(
+            path=partition.path,
+            content=partition.df.to_parquet(
+                compression="gzip",
+                index=False,
+                schema=storage_schema,
+                row_group_size=row_group_size,
+            ),
+            rows=len(partition.df),
+        )
+        for partition in partitions
+    ]
@@ -0,0 +1,143 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from pandas import DataFrame
+
+from api.adapter.dynamodb_adapter import DynamoDBAdapter
+from api.common.config.constants import (
+    QUERY_CACHE_LARGE_QUERY_TTL_SECONDS,
+    QUERY_CACHE_MAX_BYTES,
+    QUERY_CACHE_MAX_RESULT_BYTES,
+    QUERY_CACHE_TTL_SECONDS,
+)
+from api.common.logger import AppLogger
+from api.domain.dataset_metadata import DatasetMetadata
+from rapid.items.query import Query
+
+# Table name, SQL of the query and data version of the dataset
+QueryCacheKey = Tuple[str, str, int]
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expiry: float
+
+
+class _LruCache:
+    """Entries that expire after the TTL, evicting the least recently used over the maximum size"""
+
+    def __init__(self, max_bytes: float, ttl_seconds: int, clock: Callable[[], float]):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: OrderedDict[QueryCacheKey, _CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, key: QueryCacheKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expiry <= self.clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key: QueryCacheKey, value: Any, size: int = 0) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CacheEntry(
+                value=value, size=size, expiry=self.clock() + self.ttl_seconds
+            )
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: QueryCacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+
+class QueryCacheService:
+    """
+    Caches the results of queries in memory, so that identical queries of data that has not changed
+    are answered without running them in Athena again.
+
+    Results are keyed by the table, the SQL of the query and the data version of the dataset, which
+    is incremented every time data of the dataset is written or deleted, so a result is not served
+    once the data it was read from has changed. The SQL is generated from the query, so queries that
+    only differ in the formatting of their request have the same key.
+
+    The least recently used results are evicted once the cached results take up more than the
+    maximum size, and every result expires after the TTL. Finished large queries are kept the same
+    way, so that identical large queries reuse the results in S3 of the first one.
+    """
+
+    def __init__(
+        self,
+        db_adapter=DynamoDBAdapter(),
+        max_bytes: int = QUERY_CACHE_MAX_BYTES,
+        max_result_bytes: int = QUERY_CACHE_MAX_RESULT_BYTES,
+        ttl_seconds: int = QUERY_CACHE_TTL_SECONDS,
+        large_query_ttl_seconds: int = QUERY_CACHE_LARGE_QUERY_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_adapter = db_adapter
+        self.max_result_bytes = max_result_bytes
+        self._results = _LruCache(max_bytes, ttl_seconds, clock)
+        # Only the ids of the query executions are kept, their results are in S3
+        self._large_queries = _LruCache(math.inf, large_query_ttl_seconds, clock)
+
+    def cache_key(self, dataset: DatasetMetadata, query: Query) -> QueryCacheKey:
+        table_name = dataset.glue_table_name()
+        return (
+            table_name,
+            query.to_sql(table_name),
+            self.db_adapter.get_data_version(dataset),
+        )
+
+    def invalidate(self, dataset: DatasetMetadata) -> None:
+        """Stops the cached results of the dataset from being served, once its data has changed"""
+        AppLogger.info(
+            f"Invalidating the cached query results of {dataset.string_representation()}"
+        )
+        self.db_adapter.increment_data_version(dataset)
+
+    def get_result(self, key: QueryCacheKey) -> Optional[List[DataFrame]]:
+        return self._results.get(key)
+
+    def cache_result(
+        self, key: QueryCacheKey, chunks: Iterator[DataFrame]
+    ) -> Iterator[DataFrame]:
+        """
+        Passes the chunks of the result through as they are read, and caches the result once all of
+        them have been read, unless it is too large to be cached
+        """
+        cached_chunks, size = [], 0
+        for chunk in chunks:
+            if cached_chunks is not None:
+                size += int(chunk.memory_usage(index=True, deep=True).sum())
+                if size > self.max_result_bytes:
+                    cached_chunks = None
+                else:
+                    cached_chunks.append(chunk)
+            yield chunk
+        if cached_chunks is not None:
+            self._results.put(key, cached_chunks, size)
+
+    def get_large_query_execution(self, key: QueryCacheKey) -> Optional[str]:
+        return self._large_queries.get(key)
+
+    def cache_large_query_execution(
+        self, key: QueryCacheKey, query_execution_id: str
+    ) -> None:
+        self._large_queries.put(key, query_execution_id)
@@ -8,8 +8,8 @@ from api.common.config.layers import Layer
 from api.common.custom_exceptions import UserError
 from api.common.data_handlers import (
     construct_chunked_dataframe,
-    delete_incoming_raw_file,
     get_dataframe_from_chunk_type,
+    remove_spool_file,
 )
 from api.common.value_transformers import clean_column_name
 
@@ -30,24 +30,24 @@ class SchemaInferService:
         sensitivity: str,
         file_path: Path,
     ) -> dict[str, Any]:
-        dataframe = self._construct_single_chunk_dataframe(file_path)
-        columns = self._infer_columns(dataframe)
-        schema = Schema(
-            metadata=SchemaMetadata(
-                layer=layer,
-                domain=domain,
-                dataset=dataset,
-                sensitivity=sensitivity,
-                owners=[Owner(name="change_me", email="change_me@email.com")],
-            ),
-            columns=columns,
-        )
         try:
+            dataframe = self._construct_single_chunk_dataframe(file_path)
+            columns = self._infer_columns(dataframe)
+            schema = Schema(
+                metadata=SchemaMetadata(
+                    layer=layer,
+                    domain=domain,
+                    dataset=dataset,
+                    sensitivity=sensitivity,
+                    owners=[Owner(name="change_me", email="change_me@email.com")],
+                ),
+                columns=columns,
+            )
             validate_schema(schema)
         finally:
             # We need to delete the incoming file from the local file system
-            # regardless of the schema validation was successful or not
-            delete_incoming_raw_file(schema, file_path)
+            # regardless of whether the schema could be inferred or not
+            remove_spool_file(file_path)
         return schema.model_dump(exclude={"metadata": {"version"}})
 
     def _construct_single_chunk_dataframe(self, file_path: Path) -> pd.DataFrame:
@@ -2,6 +2,9 @@ from typing import List, Type
 
 from api.adapter.dynamodb_adapter import DynamoDBAdapter
 from api.adapter.glue_adapter import GlueAdapter
+from api.application.services.dataset_statistics_service import (
+    DatasetStatisticsService,
+)
 from api.application.services.protected_domain_service import ProtectedDomainService
 from api.application.services.schema_validation import validate_schema_for_upload
 from api.common.config.constants import (
@@ -29,10 +32,12 @@ class SchemaService:
         dynamodb_adapter=DynamoDBAdapter(),
         glue_adapter=GlueAdapter(),
         protected_domain_service=ProtectedDomainService(),
+        dataset_statistics_service=DatasetStatisticsService(),
     ):
         self.dynamodb_adapter = dynamodb_adapter
         self.glue_adapter = glue_adapter
         self.protected_domain_service = protected_domain_service
+        self.dataset_statistics_service = dataset_statistics_service
 
     def get_schema(
         self, dataset: Type[DatasetMetadata], latest: bool = False
@@ -103,6 +108,7 @@ class SchemaService:
         self.check_for_protected_domain(schema)
         validate_schema_for_upload(schema)
         self.glue_adapter.create_table(schema)
+        self.dataset_statistics_service.create_statistics(dataset)
         self.dynamodb_adapter.store_schema(schema)
         return schema.metadata.glue_table_name()
 
@@ -119,6 +125,7 @@ class SchemaService:
 
         # Upload schema
         self.glue_adapter.create_table(schema)
+        self.dataset_statistics_service.create_statistics(schema.metadata)
 
         self.dynamodb_adapter.store_schema(schema)
         self.dynamodb_adapter.deprecate_schema(original_schema.metadata)
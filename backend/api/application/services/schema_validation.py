@@ -10,15 +10,25 @@ from api.common.config.constants import (
     COLUMN_NAME_REGEX,
 )
 from api.common.custom_exceptions import SchemaValidationError
-from api.domain.data_types import AthenaDataType, is_date_type
+from api.common.logger import AppLogger
+from api.domain.data_types import AthenaDataType, BooleanType, is_date_type
 from api.domain.schema import Schema
-from rapid.items.schema import UpdateBehaviour, Owner
+from rapid.items.schema import (
+    Column,
+    InvalidRows,
+    PartitionGranularity,
+    PartitionOverflow,
+    SortMethod,
+    UpdateBehaviour,
+    Owner,
+)
 
 
 def validate_schema_for_upload(schema: Schema):
     validate_schema(schema)
     schema_has_valid_data_owner(schema)
     schema_has_valid_tag_set(schema)
+    schema_has_valid_partition_count(schema)
 
 
 def validate_schema(schema: Schema):
@@ -38,6 +48,9 @@ def schema_has_valid_column_definitions(schema: Schema):
     has_only_accepted_data_types(schema)
     has_valid_date_column_definition(schema)
     has_valid_allow_unique_columns(schema)
+    has_valid_key_columns(schema)
+    has_valid_derived_partition(schema)
+    has_valid_sort_by(schema)
 
 
 def has_columns(schema: Schema):
@@ -99,6 +112,8 @@ def schema_has_valid_metadata_values(schema: Schema):
         )
     has_valid_sensitivity_level(schema)
     has_valid_update_behaviour(schema)
+    has_valid_partition_limit(schema)
+    has_valid_invalid_rows(schema)
 
 
 def valid_domain_name(domain: str) -> bool:
@@ -155,6 +170,93 @@ def has_valid_partition_index_values(schema: Schema):
         )
 
 
+def schema_has_valid_partition_count(schema: Schema):
+    partitions = schema.get_partition_keys()
+    if not partitions:
+        return
+    max_partitions = schema.get_max_partitions()
+    partition_count = expected_partition_count(schema)
+    if partition_count is None:
+        AppLogger.info(
+            f"Schema {schema.metadata.string_representation()} is partitioned by {partitions} with an unknown number of distinct values, each chunk of an upload will be written as up to {max_partitions} files"
+        )
+        return
+    AppLogger.info(
+        f"Schema {schema.metadata.string_representation()} is partitioned by {partitions} into up to {partition_count} partitions, each chunk of an upload will be written as up to {min(partition_count, max_partitions)} files"
+    )
+    if partition_count > max_partitions:
+        message = f"The partition columns {partitions} can have up to {partition_count} distinct values, which is more than the limit of {max_partitions} partitions in a single chunk"
+        if schema.get_partition_overflow() == PartitionOverflow.REJECT:
+            raise SchemaValidationError(message)
+        AppLogger.warning(message)
+
+
+def expected_partition_count(schema: Schema) -> Optional[int]:
+    """
+    The number of partitions the partition columns can produce, if every partition column
+    has a known number of distinct values
+    """
+    if schema.get_derived_partition() is not None:
+        return None
+    partition_count = 1
+    for column in schema.get_partition_columns():
+        column_count = _distinct_value_count(column)
+        if column_count is None:
+            return None
+        partition_count *= column_count
+    return partition_count
+
+
+def _distinct_value_count(column: Column) -> Optional[int]:
+    if column.is_of_data_type(BooleanType):
+        return 2
+    for check in column.checks.values():
+        if isinstance(check, dict) and check.get("check_type") == "isin":
+            return len(set(check.get("parameters", {}).get("allowed_values", [])))
+    return None
+
+
+def has_valid_derived_partition(schema: Schema):
+    derived_partition = schema.get_derived_partition()
+    if derived_partition is None:
+        return
+    if derived_partition.granularity not in list(PartitionGranularity):
+        raise SchemaValidationError(
+            f"You must specify a valid partition granularity. Accepted values: {PartitionGranularity._member_names_}"
+        )
+    column = schema.get_column(derived_partition.column)
+    if column is None or not is_date_type(column.data_type):
+        raise SchemaValidationError(
+            f"The column [{derived_partition.column}] to partition by must be a date column of the schema"
+        )
+    if column.allow_null:
+        raise SchemaValidationError(
+            f"The column [{derived_partition.column}] to partition by cannot allow null values"
+        )
+    if schema.get_column(derived_partition.partition_name()) is not None:
+        raise SchemaValidationError(
+            f"The derived partition [{derived_partition.partition_name()}] has the same name as a column of the schema"
+        )
+
+
+def has_valid_sort_by(schema: Schema):
+    if schema.get_sort_method() not in list(SortMethod):
+        raise SchemaValidationError(
+            f"You must specify a valid sort method. Accepted values: {SortMethod._member_names_}"
+        )
+    sort_by = schema.get_sort_by()
+    __has_unique_value(sort_by, sort_by, "sort columns")
+    unknown_columns = set(sort_by) - set(schema.get_column_names())
+    if unknown_columns:
+        raise SchemaValidationError(
+            f"Sort columns {sorted(unknown_columns)} are not columns of the schema"
+        )
+    if set(sort_by) & set(schema.get_partitions()):
+        raise SchemaValidationError(
+            "Partition columns cannot be sort columns, they have a single value in each file"
+        )
+
+
 def has_allow_null_false_on_partitioned_columns(schema):
     for partitioned_col in schema.get_partition_columns():
         if partitioned_col.allow_null:
@@ -206,15 +308,58 @@ def has_valid_update_behaviour(schema: Schema):
         )
 
 
+def has_valid_partition_limit(schema: Schema):
+    if schema.get_partition_overflow() not in list(PartitionOverflow):
+        raise SchemaValidationError(
+            f"You must specify a valid partition overflow. Accepted values: {PartitionOverflow._member_names_}"
+        )
+    if (
+        schema.metadata.max_partitions is not None
+        and schema.metadata.max_partitions < 1
+    ):
+        raise SchemaValidationError(
+            "The maximum number of partitions must be a positive integer"
+        )
+
+
+def has_valid_invalid_rows(schema: Schema):
+    if schema.get_invalid_rows() not in list(InvalidRows):
+        raise SchemaValidationError(
+            f"You must specify a valid handling of invalid rows. Accepted values: {InvalidRows._member_names_}"
+        )
+
+
 def has_valid_allow_unique_columns(schema: Schema):
     if not schema.has_overwrite_behaviour():
         for column in schema.columns:
             if column.unique:
                 raise SchemaValidationError(
-                    "Schema with APPEND update behaviour cannot force unique values in columns"
+                    f"Schema with {schema.get_update_behaviour()} update behaviour cannot force unique values in columns"
                 )
 
 
+def has_valid_key_columns(schema: Schema):
+    key_columns = schema.get_key_columns()
+    if not schema.has_upsert_behaviour():
+        if key_columns:
+            raise SchemaValidationError(
+                "Key columns can only be set for a schema with UPSERT update behaviour"
+            )
+        return
+    if not key_columns:
+        raise SchemaValidationError(
+            "Schema with UPSERT update behaviour must set the key columns that identify its rows"
+        )
+    __has_unique_value(key_columns, key_columns, "key columns")
+    unknown_columns = set(key_columns) - set(schema.get_column_names())
+    if unknown_columns:
+        raise SchemaValidationError(
+            f"Key columns {sorted(unknown_columns)} are not columns of the schema"
+        )
+    if any(schema.get_column(name).allow_null for name in key_columns):
+        raise SchemaValidationError("Key columns cannot allow null values")
+
+
 def __has_unique_value(
     set_to_compare: List[Union[str, int]], actual_value: List[Any], field_name: str
 ):
@@ -0,0 +1,118 @@
+from io import BytesIO
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from api.common.config.constants import SORTED_ROW_GROUP_SIZE
+from api.domain.schema import Schema
+
+
+def extract_keys(schema: Schema, data_frame: pd.DataFrame) -> pd.DataFrame:
+    """Returns the key of each row as the values it has once written to the dataset"""
+    partitions = schema.get_partitions()
+    storage_schema = schema.generate_storage_schema()
+    keys = pd.DataFrame(index=pd.RangeIndex(len(data_frame)))
+    for column in schema.get_key_columns():
+        values = data_frame[column]
+        if column in partitions:
+            # Partition values are only kept in the partition path of the files
+            keys[column] = values.map(str).to_numpy()
+        else:
+            keys[column] = pa.Array.from_pandas(
+                values, type=storage_schema.field(column).type
+            ).to_pandas()
+    return keys
+
+
+def get_partition_values(schema: Schema, key: str) -> Dict[str, str]:
+    partition_path = key.removeprefix(f"{schema.metadata.dataset_location()}/")
+    return dict(partition.split("=", 1) for partition in partition_path.split("/")[:-1])
+
+
+def partition_may_contain_keys(
+    keys: pd.DataFrame, partition_values: Dict[str, str]
+) -> bool:
+    return bool(_partition_candidates(keys, partition_values).any())
+
+
+def file_may_contain_keys(
+    keys: pd.DataFrame,
+    partition_values: Dict[str, str],
+    metadata: pq.FileMetaData,
+) -> bool:
+    """
+    Checks the keys against the partition of the file and the min/max statistics of its key columns,
+    so that only the files that can hold one of the keys have to be read
+    """
+    candidates = _partition_candidates(keys, partition_values)
+    for column in keys.columns:
+        if column in partition_values:
+            continue
+        bounds = _column_bounds(metadata, column)
+        if bounds is None:
+            continue
+        minimum, maximum = bounds
+        try:
+            candidates &= (keys[column] >= minimum) & (keys[column] <= maximum)
+        except TypeError:
+            # The statistics cannot be compared to the keys, so the file has to be read
+            continue
+    return bool(candidates.any())
+
+
+def remove_rows_with_keys(
+    keys: pd.DataFrame, partition_values: Dict[str, str], content: bytes
+) -> Optional[pa.Table]:
+    """
+    Removes the rows of the parquet file that have one of the keys, returning the remaining rows,
+    or None when no row of the file has one of the keys
+    """
+    table = pq.read_table(BytesIO(content))
+    existing_keys = pd.DataFrame(index=pd.RangeIndex(table.num_rows))
+    for column in keys.columns:
+        if column in partition_values:
+            existing_keys[column] = partition_values[column]
+        else:
+            existing_keys[column] = table.column(column).to_pandas()
+    replaced = pd.MultiIndex.from_frame(existing_keys).isin(
+        pd.MultiIndex.from_frame(keys)
+    )
+    if not replaced.any():
+        return None
+    return table.filter(pa.array(~replaced))
+
+
+def encode_table(schema: Schema, table: pa.Table) -> bytes:
+    # Removing rows keeps the order of the rest, so sorted files stay sorted
+    row_group_size = SORTED_ROW_GROUP_SIZE if schema.get_sort_by() else None
+    buffer = BytesIO()
+    pq.write_table(table, buffer, compression="gzip", row_group_size=row_group_size)
+    return buffer.getvalue()
+
+
+def _partition_candidates(
+    keys: pd.DataFrame, partition_values: Dict[str, str]
+) -> pd.Series:
+    candidates = pd.Series(True, index=keys.index)
+    for column, value in partition_values.items():
+        if column in keys.columns:
+            candidates &= keys[column] == value
+    return candidates
+
+
+def _column_bounds(metadata: pq.FileMetaData, column: str) -> Optional[tuple]:
+    if column not in metadata.schema.names:
+        return None
+    column_index = metadata.schema.names.index(column)
+    minimums, maximums = [], []
+    for row_group in range(metadata.num_row_groups):
+        statistics = metadata.row_group(row_group).column(column_index).statistics
+        if statistics is None or not statistics.has_min_max:
+            return None
+        minimums.append(statistics.min)
+        maximums.append(statistics.max)
+    if not minimums:
+        return None
+    return min(minimums), max(maximums)
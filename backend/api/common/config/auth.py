@@ -107,3 +107,6 @@ class PermissionsTableItem(StrEnum):
 
 class ServiceTableItem(StrEnum):
     JOB = "JOB"
+    LEASE = "LEASE"
+    DATA_VERSION = "DATA_VERSION"
+    DATASET_STATISTICS = "DATASET_STATISTICS"
@@ -24,6 +24,10 @@ GLUE_CSV_SERIALISATION_LIBRARY = "org.apache.hadoop.hive.serde2.OpenCSVSerde"
 GLUE_QUOTE_CHAR = '"'
 GLUE_TABLE_PRESENCE_CHECK_RETRY_COUNT = 18
 GLUE_TABLE_PRESENCE_CHECK_INTERVAL = 20
+# Transactions on the service table that conflict with a concurrent transaction on the same items are
+# retried with exponential backoff, e.g.: updates of the statistics of a dataset that uploads write to at once
+DYNAMO_TRANSACTION_ATTEMPTS = 8
+DYNAMO_TRANSACTION_BACKOFF_SECONDS = 0.05
 
 INFERRED_UNNAMED_COLUMN_PREFIX = (
     "unnamed_"  # Pandas infers an empty column name as "unnamed_\d"
@@ -2,12 +2,27 @@ import os
 
 BASE_API_PATH = "/api"
 BASE_REGEX = "^[a-zA-Z0-9_-]"
-FILENAME_WITH_TIMESTAMP_REGEX = r"[a-zA-Z0-9:_\-]+.csv$"
+FILENAME_WITH_TIMESTAMP_REGEX = r"[a-zA-Z0-9:_\-]+\.(csv(\.gz|\.zst)?|parquet|arrows)$"
 
 CONTENT_ENCODING = "utf-8"
 # https://developer.mozilla.org/en-US/docs/Web/HTTP/Basics_of_HTTP/MIME_types/Common_types
-VALID_FILE_MIME_TYPES = ["text/csv", "application/octest-stream"]
-VALID_FILE_EXTENSIONS = ["csv", "parquet"]
+ARROW_STREAM_MIME_TYPE = "application/vnd.apache.arrow.stream"
+VALID_FILE_MIME_TYPES = [
+    "text/csv",
+    "application/octest-stream",
+    ARROW_STREAM_MIME_TYPE,
+]
+VALID_FILE_EXTENSIONS = ["csv", "parquet", "arrows"]
+# Compressed csv files can be uploaded with one of these file suffixes, e.g.: data.csv.gz,
+# or by setting the Content-Encoding header of the file part of the request
+COMPRESSION_FILE_EXTENSIONS = {"gz": "gzip", "zst": "zstd"}
+COMPRESSION_CONTENT_ENCODINGS = {"gzip": "gzip", "x-gzip": "gzip", "zstd": "zstd"}
+COMPRESSIBLE_FILE_EXTENSIONS = ["csv"]
+# Compressible files that were uploaded uncompressed are compressed as they are archived as raw files
+RAW_FILE_COMPRESSION = "zstd"
+RAW_FILE_ZSTD_LEVEL = int(os.getenv("RAW_FILE_ZSTD_LEVEL", "3"))
+# Bytes read from the end of a data file to find its parquet footer with a single request
+PARQUET_FOOTER_READ_BYTES = 64 * 1024
 
 TAG_KEYS_REGEX = BASE_REGEX + "{1,128}$"
 TAG_VALUES_REGEX = BASE_REGEX + "{0,256}$"
@@ -33,10 +48,87 @@ QUERY_RESULTS_LINK_EXPIRY_SECONDS = 86400
 DATASET_ROWS_QUERY_LIMIT = 100_000
 # 200MB
 DATASET_SIZE_QUERY_LIMIT = 200_000_000
+# Query results are read from Athena and streamed to the client in chunks of this many rows
+QUERY_RESULT_CHUNK_ROWS = int(os.getenv("QUERY_RESULT_CHUNK_ROWS", "10000"))
+# Results of queries are cached in memory up to this many bytes, 256MB, evicting the least recently used
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", "268435456"))
+# Results larger than this, 32MB, are not cached so that a single result cannot evict all the others
+QUERY_CACHE_MAX_RESULT_BYTES = int(
+    os.getenv("QUERY_CACHE_MAX_RESULT_BYTES", "33554432")
+)
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+# Finished large queries are reused for identical queries for this long, while their results are kept
+QUERY_CACHE_LARGE_QUERY_TTL_SECONDS = int(
+    os.getenv("QUERY_CACHE_LARGE_QUERY_TTL_SECONDS", "3600")
+)
 MB_1 = 1024 * 1024
 CHUNK_SIZE = 50
 CHUNK_SIZE_MB = MB_1 * CHUNK_SIZE
 PARQUET_CHUNK_SIZE = 10000
+# Failing rows reported for each column and check that fails validation
+VALIDATION_FAILURE_SAMPLE_SIZE = 5
+# Column of the quarantine files that records why each of their rows failed validation
+QUARANTINE_REASON_COLUMN = "quarantine_reason"
+# Each partition of a chunk is written as a separate file
+MAX_PARTITIONS_PER_CHUNK = int(os.getenv("MAX_PARTITIONS_PER_CHUNK", "1000"))
+# Files of a schema with sort_by are split into row groups of this many rows, so that queries can
+# skip the row groups whose min/max statistics do not match
+SORTED_ROW_GROUP_SIZE = int(os.getenv("SORTED_ROW_GROUP_SIZE", "100000"))
+# First date of the partitions that Athena projects for a partition derived from a date column
+PARTITION_PROJECTION_START_DATE = os.getenv(
+    "PARTITION_PROJECTION_START_DATE", "2000-01-01"
+)
+# Years past the date of each query that the projected partitions extend to
+PARTITION_PROJECTION_FUTURE_YEARS = int(
+    os.getenv("PARTITION_PROJECTION_FUTURE_YEARS", "10")
+)
+
+SPOOL_DIRECTORY = os.getenv("SPOOL_DIRECTORY", "spool")
+# 0 means the spool is only bounded by the free disk space
+SPOOL_QUOTA_BYTES = int(os.getenv("SPOOL_QUOTA_BYTES", "0"))
+SPOOL_DISK_HEADROOM_BYTES = int(
+    os.getenv("SPOOL_DISK_HEADROOM_BYTES", str(MB_1 * 1024))
+)
+SPOOL_RETRY_AFTER_SECONDS = int(os.getenv("SPOOL_RETRY_AFTER_SECONDS", "30"))
+
+# 0 runs the CPU heavy ingest stages inline in the API process
+INGEST_WORKER_PROCESSES = int(
+    os.getenv("INGEST_WORKER_PROCESSES", str(os.cpu_count() or 1))
+)
+INGEST_WORKER_MAX_IN_FLIGHT_PER_PROCESS = 2
+
+# Write leases are renewed while an upload holds them and expire if it dies
+DATASET_LEASE_SECONDS = int(os.getenv("DATASET_LEASE_SECONDS", "300"))
+DATASET_LEASE_POLL_SECONDS = int(os.getenv("DATASET_LEASE_POLL_SECONDS", "5"))
+DATASET_LEASE_WAIT_SECONDS = int(os.getenv("DATASET_LEASE_WAIT_SECONDS", "3600"))
+# Writes of a lease that another writer changed in between are retried with exponential backoff
+DATASET_LEASE_UPDATE_ATTEMPTS = 8
+DATASET_LEASE_UPDATE_BACKOFF_SECONDS = 0.05
+
+# Rows appended to a dataset are buffered until there are enough of them for a right-sized file,
+# or until the oldest of them has been buffered for the flush interval
+APPEND_BUFFER_FLUSH_ROWS = int(os.getenv("APPEND_BUFFER_FLUSH_ROWS", "200000"))
+APPEND_BUFFER_FLUSH_SECONDS = int(os.getenv("APPEND_BUFFER_FLUSH_SECONDS", "300"))
+APPEND_BUFFER_CHECK_SECONDS = int(os.getenv("APPEND_BUFFER_CHECK_SECONDS", "30"))
+# Appends are for small batches of rows, larger amounts of data are uploaded as files
+APPEND_MAX_ROWS = 10_000
+APPEND_MAX_BYTES = MB_1 * 10
+# Directory to keep the append log in on local disk, it is kept in S3 when this is not set
+APPEND_LOG_DIRECTORY = os.getenv("APPEND_LOG_DIRECTORY")
+# Flushes of buffered rows are recorded as upload jobs of this subject
+APPEND_BUFFER_SUBJECT_ID = "append-buffer"
+
+# Batch files are indexed with four digits in their raw file identifiers
+BATCH_UPLOAD_MAX_FILES = 1000
+
+# Raw files reprocessed into a dataset with append behaviour at the same time, each of them is held
+# in the spool while it is processed
+REPROCESS_MAX_CONCURRENT_FILES = int(os.getenv("REPROCESS_MAX_CONCURRENT_FILES", "4"))
+
+PRESIGNED_UPLOAD_EXPIRY_SECONDS = 3600
+# Files larger than a single part are uploaded to S3 in parts, S3 allows at most 10,000 parts
+PRESIGNED_UPLOAD_PART_SIZE = MB_1 * 100
+PRESIGNED_UPLOAD_MAX_PARTS = 10_000
 
 FIRST_SCHEMA_VERSION_NUMBER = 1
 SCHEMA_VERSION_INCREMENT = 1
@@ -34,11 +34,34 @@ class ConflictError(UserError):
         super().__init__(message, status_code)
 
 
+class LengthRequiredError(UserError):
+    def __init__(self, message, status_code: int = 411):
+        super().__init__(message, status_code)
+
+
 class TooManyRequestsError(UserError):
     def __init__(self, message, status_code: int = 429):
         super().__init__(message, status_code)
 
 
+class DatasetLeaseTimeoutError(ConflictError):
+    pass
+
+
+class DatasetLeaseLostError(ConflictError):
+    pass
+
+
+class JobAlreadyExistsError(ConflictError):
+    pass
+
+
+class SpoolCapacityExceededError(TooManyRequestsError):
+    def __init__(self, message, retry_after: int, status_code: int = 429):
+        super().__init__(message, status_code)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
 class QueryExecutionError(AWSServiceError):
     def __init__(self, message):
         super().__init__(message)
@@ -93,5 +116,9 @@ class TableDoesNotExistError(Exception):
     pass
 
 
+class JobCancelledError(Exception):
+    pass
+
+
 class UnsupportedTypeError(Exception):
     pass
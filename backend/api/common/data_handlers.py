@@ -1,38 +1,157 @@
+import gzip
 import os
-import psutil
-from typing import Any
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
 from pathlib import Path
 
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
+import zstandard
 from fastapi import UploadFile, File
 from pandas.io.parsers import TextFileReader
 
 from api.common.logger import AppLogger
+from api.common.spool import spool
 from api.common.config.constants import (
+    ARROW_STREAM_MIME_TYPE,
     CHUNK_SIZE_MB,
+    COMPRESSIBLE_FILE_EXTENSIONS,
+    COMPRESSION_CONTENT_ENCODINGS,
+    COMPRESSION_FILE_EXTENSIONS,
     PARQUET_CHUNK_SIZE,
     CONTENT_ENCODING,
+    RAW_FILE_COMPRESSION,
+    RAW_FILE_ZSTD_LEVEL,
+    VALID_FILE_EXTENSIONS,
+    VALID_FILE_MIME_TYPES,
 )
+from api.common.custom_exceptions import InvalidFileUploadError
+from api.common.value_transformers import clean_column_name
+from api.domain.data_types import DateType, StringType
 from api.domain.schema import Schema
 
 CHUNK_SIZE = 200_000
+COMPRESSION_SUFFIXES = {
+    compression: extension
+    for extension, compression in COMPRESSION_FILE_EXTENSIONS.items()
+}
+# Leading bytes of the formats that were archived under a .csv name, before raw files kept their format
+ARCHIVED_FORMAT_MAGIC_BYTES = {b"PAR1": "parquet", b"\xff\xff\xff\xff": "arrows"}
+
+
+def get_file_type(filename: str) -> Tuple[str, Optional[str]]:
+    # Returns the extension and compression of a file name, e.g.: data.csv.gz -> (csv, gzip)
+    suffixes = filename.lower().split(".")
+    if len(suffixes) > 2 and suffixes[-1] in COMPRESSION_FILE_EXTENSIONS:
+        return suffixes[-2], COMPRESSION_FILE_EXTENSIONS[suffixes[-1]]
+    return suffixes[-1], None
+
+
+def get_raw_filename(raw_file_identifier: str, file_path: Path) -> str:
+    # Raw files are archived in their original format, e.g.: 123-456.parquet, and compressible
+    # files in the compressed form they were uploaded in or otherwise with the raw file compression
+    extension, compression = get_file_type(file_path.name)
+    if extension in COMPRESSIBLE_FILE_EXTENSIONS:
+        compression = compression or RAW_FILE_COMPRESSION
+        return f"{raw_file_identifier}.{extension}.{COMPRESSION_SUFFIXES[compression]}"
+    return f"{raw_file_identifier}.{extension}"
+
+
+def restore_raw_file_format(file_path: Path) -> Path:
+    """
+    Raw files used to be archived as {identifier}.csv whatever format they were uploaded in, so the format
+    of a downloaded uncompressed CSV raw file is read from its leading bytes. A file of another format is
+    renamed to its extension, moving its spool reservation with it.
+
+    :return: The path of the file with the extension of its format
+    """
+    if get_file_type(file_path.name) != ("csv", None):
+        return file_path
+    with open(file_path, "rb") as raw_file:
+        extension = ARCHIVED_FORMAT_MAGIC_BYTES.get(raw_file.read(4))
+    if extension is None:
+        return file_path
+    restored_path = file_path.with_suffix(f".{extension}")
+    AppLogger.info(
+        f"The raw file [{file_path.name}] was archived as CSV but is {extension}, reading it as {restored_path.name}"
+    )
+    spool.reserve(restored_path, os.path.getsize(file_path), held_by=file_path)
+    spool.release(file_path)
+    os.replace(file_path, restored_path)
+    return restored_path
+
+
+def requires_raw_file_compression(file_path: Path) -> bool:
+    extension, compression = get_file_type(file_path.name)
+    return extension in COMPRESSIBLE_FILE_EXTENSIONS and compression is None
+
+
+def open_compressed_raw_file(file_path: Path) -> BinaryIO:
+    # The file is compressed as it is read, so the compressed copy is never written to disk
+    return zstandard.ZstdCompressor(level=RAW_FILE_ZSTD_LEVEL).stream_reader(
+        open(file_path, "rb"), size=os.path.getsize(file_path)
+    )
+
+
+def get_upload_file_type(file: UploadFile) -> Tuple[str, Optional[str]]:
+    extension, compression = get_file_type(file.filename)
+    if file.content_type == ARROW_STREAM_MIME_TYPE:
+        extension = "arrows"
+    if (
+        file.content_type not in VALID_FILE_MIME_TYPES
+        and extension not in VALID_FILE_EXTENSIONS
+    ):
+        raise InvalidFileUploadError(f"This file type {extension}, is not supported.")
+    if compression is None and file.headers is not None:
+        content_encoding = file.headers.get("content-encoding", "identity").lower()
+        if content_encoding != "identity":
+            if content_encoding not in COMPRESSION_CONTENT_ENCODINGS:
+                raise InvalidFileUploadError(
+                    f"The content encoding {content_encoding}, is not supported."
+                )
+            compression = COMPRESSION_CONTENT_ENCODINGS[content_encoding]
+    if compression is not None and extension not in COMPRESSIBLE_FILE_EXTENSIONS:
+        raise InvalidFileUploadError(
+            f"Compressed uploads are not supported for the file type {extension}."
+        )
+    return extension, compression
 
 
 def store_file_to_disk(
-    extension: str, id: str, file: UploadFile = File(...), to_chunk: bool = False
+    extension: str,
+    id: str,
+    file: UploadFile = File(...),
+    to_chunk: bool = False,
+    expected_size: Optional[int] = None,
+    compression: Optional[str] = None,
+    reservation: Optional[Path] = None,
 ) -> Path:
-    file_path = Path(f"{id}-{file.filename}")
+    file_path = spool.path_for(
+        _spool_filename(
+            f"{id}-{file.filename}", extension, compression, decompress=to_chunk
+        )
+    )
+    if to_chunk and expected_size is not None:
+        expected_size = min(expected_size, CHUNK_SIZE_MB)
+    # The reservation is held until the file is removed with delete_incoming_raw_file, taken
+    # from the reservation made for the request when its body was admitted
+    spool.reserve(file_path, expected_size, held_by=reservation)
     AppLogger.info(
         f"Writing incoming file chunk ({CHUNK_SIZE_MB}MB) to disk [{file.filename}]"
     )
-    AppLogger.info(f"Available disk space: {psutil.disk_usage('/').free / (2 ** 30)}GB")
 
-    if extension == "csv":
-        store_csv_file_to_disk(file_path, to_chunk, file)
-    elif extension == "parquet":
-        store_parquet_file_to_disk(file_path, to_chunk, file)
+    try:
+        if extension == "csv" and compression and to_chunk:
+            store_decompressed_csv_file_to_disk(file_path, compression, file)
+        elif extension == "csv":
+            store_csv_file_to_disk(file_path, to_chunk, file)
+        elif extension == "parquet":
+            store_parquet_file_to_disk(file_path, to_chunk, file)
+        elif extension == "arrows":
+            store_arrow_stream_file_to_disk(file_path, to_chunk, file)
+    except Exception:
+        remove_spool_file(file_path)
+        raise
     return file_path
 
 
@@ -48,6 +167,32 @@ def store_csv_file_to_disk(
                 break
 
 
+def store_decompressed_csv_file_to_disk(
+    file_path: Path, compression: str, file: UploadFile = File(...)
+):
+    # Decompresses the upload as it is read, writing only the first chunk to disk
+    try:
+        with open_decompressed(file.file, compression) as decompressed_file, open(
+            file_path, "wb"
+        ) as incoming_file:
+            written = 0
+            while written < CHUNK_SIZE_MB and (
+                contents := decompressed_file.read(CHUNK_SIZE_MB - written)
+            ):
+                incoming_file.write(contents)
+                written += len(contents)
+    except (OSError, EOFError, zstandard.ZstdError) as error:
+        raise InvalidFileUploadError(
+            f"The file could not be decompressed as {compression}: {error}"
+        )
+
+
+def open_decompressed(file: BinaryIO, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file, mode="rb")
+    return zstandard.ZstdDecompressor().stream_reader(file)
+
+
 def store_parquet_file_to_disk(
     file_path: Path, to_chunk: bool, file: UploadFile = File(...)
 ):
@@ -64,17 +209,42 @@ def store_parquet_file_to_disk(
     writer.close()
 
 
+def store_arrow_stream_file_to_disk(
+    file_path: Path, to_chunk: bool, file: UploadFile = File(...)
+):
+    # The stream is copied one record batch at a time, so it is never held in memory as a whole
+    try:
+        with pa.ipc.open_stream(file.file) as reader, pa.ipc.new_stream(
+            file_path.as_posix(), reader.schema
+        ) as writer:
+            rows = 0
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                if to_chunk and rows >= PARQUET_CHUNK_SIZE:
+                    break
+    except pa.ArrowInvalid as error:
+        raise InvalidFileUploadError(f"The file is not a valid Arrow stream: {error}")
+
+
 def construct_chunked_dataframe(
     file_path: Path,
+    schema: Optional[Schema] = None,
 ) -> TextFileReader | Any | None:
     # Loads the file from the local path and splits into each dataframe chunk for processing
     # when loading csv Pandas returns an IO iterable TextFileReader but for a Pyarrow chunking
     # it returns an iterable of pyarrow.RecordBatch, we then pass this through the extra function
     # to return a dataframe compatiable format
-    extension = file_path.as_posix().split(".")[-1].lower()
+    extension, compression = get_file_type(file_path.name)
     if extension == "csv":
+        # Compressed files are decompressed as the chunks are read
         chunk = pd.read_csv(
-            file_path, encoding=CONTENT_ENCODING, sep=",", chunksize=CHUNK_SIZE
+            file_path,
+            encoding=CONTENT_ENCODING,
+            sep=",",
+            chunksize=CHUNK_SIZE,
+            compression=compression,
+            **(csv_read_types(file_path, compression, schema) if schema else {}),
         )
         return chunk
 
@@ -84,6 +254,58 @@ def construct_chunked_dataframe(
 
         return chunk
 
+    elif extension == "arrows":
+        return iter_arrow_stream_chunks(file_path)
+
+
+def csv_read_types(
+    file_path: Path, compression: Optional[str], schema: Schema
+) -> Dict[str, Any]:
+    """
+    Declares the types of the columns of a CSV file from the schema of its dataset, so that they are
+    not inferred again for each chunk. String columns are read as strings whatever their values look
+    like, and date columns are parsed with their format as they are read. Numeric and boolean columns
+    are parsed by the reader, as declaring them would fail the whole read at the first invalid value.
+    Columns whose values cannot be parsed are left as text, which validation reports as a mismatch.
+    """
+    # Headers are matched to the columns of the schema once cleaned, as they are during validation
+    headers = pd.read_csv(
+        file_path,
+        encoding=CONTENT_ENCODING,
+        sep=",",
+        nrows=0,
+        compression=compression,
+    ).columns
+    headers_by_column = {clean_column_name(str(header)): header for header in headers}
+    dtype, parse_dates, date_format = {}, [], {}
+    for column in schema.columns:
+        header = headers_by_column.get(column.name)
+        if header is None:
+            continue
+        if column.is_of_data_type(StringType):
+            dtype[header] = "string[pyarrow]"
+        elif column.is_of_data_type(DateType) and column.format:
+            parse_dates.append(header)
+            date_format[header] = column.format
+    return {"dtype": dtype, "parse_dates": parse_dates, "date_format": date_format}
+
+
+def iter_arrow_stream_chunks(file_path: Path) -> Iterator[pa.Table]:
+    # Producers may send record batches of any size, so they are combined into chunks of
+    # at least CHUNK_SIZE rows to avoid writing many small files
+    with pa.memory_map(file_path.as_posix()) as source, pa.ipc.open_stream(
+        source
+    ) as reader:
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= CHUNK_SIZE:
+                yield pa.Table.from_batches(batches, schema=reader.schema)
+                batches, rows = [], 0
+        if batches:
+            yield pa.Table.from_batches(batches, schema=reader.schema)
+
 
 def get_dataframe_from_chunk_type(
     chunk: TextFileReader | Any,
@@ -92,7 +314,7 @@ def get_dataframe_from_chunk_type(
     # for csv this is TextFileReader for Pyarrow Parquet we need to perform a to_pandas()
     if isinstance(chunk, pd.DataFrame):
         return chunk
-    elif isinstance(chunk, pa.RecordBatch):
+    elif isinstance(chunk, (pa.RecordBatch, pa.Table)):
         return chunk.to_pandas()
 
 
@@ -101,7 +323,8 @@ def delete_incoming_raw_file(
 ):
     raw_file_identifier_string = f"Raw file identifier: {raw_file_identifier}"
     try:
-        os.remove(file_path.name)
+        spool.release(file_path)
+        os.remove(file_path)
         AppLogger.info(
             f"""Temporary upload file for {schema.metadata.string_representation()} deleted. {raw_file_identifier_string if raw_file_identifier is not None else ''}"""
         )
@@ -109,3 +332,25 @@ def delete_incoming_raw_file(
         AppLogger.error(
             f"Temporary upload file for {schema.metadata.string_representation()} not deleted. {raw_file_identifier_string if raw_file_identifier is not None else ''}. Detail: {error}"
         )
+
+
+def _spool_filename(
+    filename: str, extension: str, compression: Optional[str], decompress: bool
+) -> str:
+    # The type and compression of a spooled file are always recorded by its suffixes
+    filename_extension, filename_compression = get_file_type(filename)
+    if filename_extension != extension and not filename_compression:
+        filename = f"{filename}.{extension}"
+    if decompress and filename_compression:
+        return filename.rsplit(".", 1)[0]
+    if compression and not decompress and not filename_compression:
+        return f"{filename}.{COMPRESSION_SUFFIXES[compression]}"
+    return filename
+
+
+def remove_spool_file(file_path: Path) -> None:
+    spool.release(file_path)
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,156 @@
+from contextlib import aclosing
+from email.message import Message
+from io import BufferedReader, RawIOBase
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, List, Sequence
+
+import anyio
+from fastapi import Request, UploadFile
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from api.common.custom_exceptions import LengthRequiredError, UserError
+from api.common.spool import spool
+from api.common.utilities import get_content_length
+
+
+class SpooledMultiPartParser(MultiPartParser):
+    """
+    Parses a multipart body, buffering the files in it in the spool directory rather than in the
+    temporary directory of the system, so that they are written to the disk that they are reserved on
+    """
+
+    def __init__(self, *args, directory: Path, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.directory = directory
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            # Replaces the file created for the part before any of its data is written to it
+            self._files_to_close_on_error.pop().close()
+            upload.file = SpooledTemporaryFile(
+                max_size=self.spool_max_size, dir=self.directory
+            )
+            self._files_to_close_on_error.append(upload.file)
+
+
+async def admit_file_upload(request: Request) -> AsyncIterator[FormData]:
+    """
+    Admits the files uploaded in the body of the request, reserving space in the spool for the length
+    of the body before it is read. Declared after the security dependency of a route, so that only
+    requests that are allowed to upload hold any of the spool.
+
+    :return: The form data of the request, whose files are buffered in the spool directory
+    """
+    size = get_content_length(request)
+    if size is None:
+        raise LengthRequiredError(
+            "The Content-Length header is required to upload files"
+        )
+    reservation = spool.reserve_request(size)
+    # Files spooled for the request are reserved from it, see get_spool_reservation
+    request.state.spool_reservation = reservation
+    try:
+        form = await _parse_form(request)
+        try:
+            yield form
+        finally:
+            await form.close()
+    finally:
+        spool.release(reservation)
+
+
+class RequestBodyReader(RawIOBase):
+    """
+    Reads the body of a request as it is received, so that a raw body can be read as a file by a route
+    that runs in a worker thread without holding the body in memory
+    """
+
+    def __init__(self, request: Request):
+        self._chunks = request.stream()
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = anyio.from_thread.run(anext, self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def get_body_file(request: Request, default_filename: str) -> UploadFile:
+    """
+    :return: The raw body of the request as an uploaded file, named by the filename of its
+    Content-Disposition header when it has one
+    """
+    disposition = Message()
+    disposition["content-disposition"] = request.headers.get("content-disposition", "")
+    return UploadFile(
+        BufferedReader(RequestBodyReader(request)),
+        filename=disposition.get_filename() or default_filename,
+        headers=request.headers,
+    )
+
+
+def get_form_files(form: FormData, key: str) -> List[UploadFile]:
+    files = [value for value in form.getlist(key) if not isinstance(value, str)]
+    if not files:
+        raise UserError(f"A file is required in the form data with the key '{key}'")
+    return files
+
+
+def file_upload_request_body(
+    key: str, multiple: bool = False, body_media_types: Sequence[str] = ()
+) -> Dict:
+    """
+    :return: The OpenAPI request body of a route that reads its files with admit_file_upload,
+    which FastAPI cannot document from the parameters of the route. A file of one of the
+    body_media_types can also be sent as the whole body of the request.
+    """
+    file_schema = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [key],
+                        "properties": {
+                            key: (
+                                {"type": "array", "items": file_schema}
+                                if multiple
+                                else file_schema
+                            )
+                        },
+                    }
+                },
+                **{
+                    media_type: {"schema": file_schema}
+                    for media_type in body_media_types
+                },
+            },
+        }
+    }
+
+
+async def _parse_form(request: Request) -> FormData:
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return FormData()
+    try:
+        async with aclosing(request.stream()) as stream:
+            return await SpooledMultiPartParser(
+                request.headers, stream, directory=spool.buffer_directory()
+            ).parse()
+    except MultiPartException as error:
+        raise UserError(error.message)
@@ -0,0 +1,85 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from threading import Lock
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from api.common.config.constants import (
+    INGEST_WORKER_MAX_IN_FLIGHT_PER_PROCESS,
+    INGEST_WORKER_PROCESSES,
+)
+from api.common.logger import AppLogger
+
+
+class IngestExecutor:
+    """
+    Runs the CPU heavy stages of ingest (validation, partitioning and parquet encoding) in a pool of
+    worker processes, so that they do not hold the GIL of the process serving API requests.
+
+    The pool is shared by every upload on the node. With zero worker processes the tasks are run inline
+    in the calling thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = INGEST_WORKER_PROCESSES,
+        max_in_flight_per_process: int = INGEST_WORKER_MAX_IN_FLIGHT_PER_PROCESS,
+    ):
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_workers * max_in_flight_per_process, 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if not self.max_workers:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+        try:
+            return self._get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            AppLogger.warning("Ingest worker pool is broken, restarting it")
+            self.shutdown()
+            return self._get_pool().submit(fn, *args)
+
+    def map(self, fn: Callable, first_arg: Any, items: Iterable) -> Iterator:
+        """
+        Applies fn(first_arg, item) to every item, yielding the results in order.
+        At most max_in_flight items are held by the pool at once to bound memory use.
+        """
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(self.submit(fn, first_arg, item))
+                if len(pending) >= self.max_in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                AppLogger.info(
+                    f"Starting ingest worker pool with {self.max_workers} processes"
+                )
+                # Worker processes are spawned rather than forked from the threaded API process
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=get_context("spawn")
+                )
+            return self._pool
+
+
+ingest_executor = IngestExecutor()
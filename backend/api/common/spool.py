@@ -0,0 +1,148 @@
+import os
+import uuid
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+import psutil
+
+from api.common.config.constants import (
+    SPOOL_DIRECTORY,
+    SPOOL_DISK_HEADROOM_BYTES,
+    SPOOL_QUOTA_BYTES,
+    SPOOL_RETRY_AFTER_SECONDS,
+)
+from api.common.custom_exceptions import SpoolCapacityExceededError
+from api.common.logger import AppLogger
+
+
+class Spool:
+    """
+    Local directory that incoming upload files are written to before processing.
+
+    Every spooled file holds a byte reservation for as long as it exists, so that concurrent
+    uploads are admitted only while the quota and the free disk space can accommodate them.
+    """
+
+    def __init__(
+        self,
+        directory: str = SPOOL_DIRECTORY,
+        quota_bytes: int = SPOOL_QUOTA_BYTES,
+        headroom_bytes: int = SPOOL_DISK_HEADROOM_BYTES,
+        retry_after_seconds: int = SPOOL_RETRY_AFTER_SECONDS,
+        disk_usage: Callable = psutil.disk_usage,
+    ):
+        self.directory = Path(directory)
+        self.quota_bytes = quota_bytes
+        self.headroom_bytes = headroom_bytes
+        self.retry_after_seconds = retry_after_seconds
+        self._disk_usage = disk_usage
+        self._reservations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def path_for(self, filename: str) -> Path:
+        return self.buffer_directory() / filename
+
+    def buffer_directory(self) -> Path:
+        """:return: The directory that the bodies of requests are buffered to while they are read"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory
+
+    def reserve(
+        self, file_path: Path, size: Optional[int], held_by: Optional[Path] = None
+    ) -> None:
+        """
+        Reserves space for the file, moving as much of the size as it can from the reservation that
+        it is held by so that the bytes already reserved for a request are not reserved twice
+        """
+        size = max(size or 0, 0)
+        with self._lock:
+            held_by_key = self._key(held_by) if held_by is not None else None
+            transferred = min(size, self._reservations.get(held_by_key, 0))
+            available = self._available_bytes()
+            if size - transferred > available:
+                AppLogger.warning(
+                    f"Rejecting spool reservation of {size} bytes for [{file_path.name}], {available} bytes available"
+                )
+                raise SpoolCapacityExceededError(
+                    "The service is currently at capacity for uploads, please retry later",
+                    retry_after=self.retry_after_seconds,
+                )
+            if transferred:
+                self._reservations[held_by_key] -= transferred
+            self._reservations[self._key(file_path)] = size
+            AppLogger.info(
+                f"Reserved {size} bytes of spool space for [{file_path.name}], {available - size + transferred} bytes remaining"
+            )
+
+    def reserve_request(self, size: Optional[int]) -> Path:
+        """
+        Reserves space for the body of a request before it is read, as file uploads are buffered to
+        disk while they are parsed. The files spooled for the request are reserved from it.
+
+        :return: The path that the reservation is held under, to be released once the request ends
+        """
+        reservation = self.directory / f".request-{uuid.uuid4()}"
+        self.reserve(reservation, size)
+        return reservation
+
+    def release(self, file_path: Path) -> None:
+        with self._lock:
+            self._reservations.pop(self._key(file_path), None)
+
+    def reserved_bytes(self) -> int:
+        with self._lock:
+            return sum(self._reservations.values())
+
+    def available_bytes(self) -> int:
+        with self._lock:
+            return self._available_bytes()
+
+    def reap_orphans(self) -> None:
+        """Removes spool files left behind by a previous process that no reservation accounts for"""
+        if not self.directory.is_dir():
+            return
+        with self._lock:
+            for file_path in self.directory.iterdir():
+                if (
+                    not file_path.is_file()
+                    or self._key(file_path) in self._reservations
+                ):
+                    continue
+                try:
+                    os.remove(file_path)
+                    AppLogger.info(f"Removed orphaned spool file [{file_path.name}]")
+                except OSError as error:
+                    AppLogger.warning(
+                        f"Could not remove orphaned spool file [{file_path.name}]: {error}"
+                    )
+
+    def _available_bytes(self) -> int:
+        reserved = sum(self._reservations.values())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Bytes that have already been written for a reservation are counted once, against the reservation
+        free_disk = (
+            self._disk_usage(self.directory.as_posix()).free
+            + self._spooled_bytes()
+            - self.headroom_bytes
+        )
+        available = free_disk - reserved
+        if self.quota_bytes:
+            available = min(available, self.quota_bytes - reserved)
+        return max(available, 0)
+
+    def _spooled_bytes(self) -> int:
+        spooled = 0
+        for key, reserved in self._reservations.items():
+            try:
+                spooled += min(os.path.getsize(key), reserved)
+            except OSError:
+                continue
+        return spooled
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return os.path.abspath(file_path)
+
+
+spool = Spool()
@@ -1,5 +1,8 @@
+from pathlib import Path
 from typing import List, Optional, Union
 
+from fastapi import Request
+
 from api.application.services.schema_service import SchemaService
 from api.common.config.layers import Layer
 from api.common.custom_exceptions import BaseAppException
@@ -26,6 +29,18 @@ def build_error_message_list(error: Union[Exception, BaseAppException]) -> List[
         return [str(error)]
 
 
+def get_content_length(request: Request) -> Optional[int]:
+    try:
+        return int(request.headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_spool_reservation(request: Request) -> Optional[Path]:
+    # Set by admit_file_upload, which reserves the space for file uploads before their body is read
+    return getattr(request.state, "spool_reservation", None)
+
+
 def strtobool(val):
     val = val.lower()
     if val in ("y", "yes", "t", "true", "on", "1"):
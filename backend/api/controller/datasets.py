@@ -1,12 +1,17 @@
 import os
-from typing import Optional
+from itertools import chain
+from typing import Iterable, Optional
 
-from fastapi import APIRouter, Request
-from fastapi import UploadFile, File, Response, Security
+from fastapi import APIRouter, Depends, Request
+from fastapi import Response, Security
 from fastapi import status as http_status
 from fastapi import Path as FastApiPath
 from pandas import DataFrame
-from starlette.responses import PlainTextResponse
+import pyarrow as pa
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import FormData
+from starlette.responses import PlainTextResponse, StreamingResponse
 
 from api.adapter.athena_adapter import AthenaAdapter
 from api.application.services.authorisation.authorisation_service import (
@@ -17,32 +22,54 @@ from api.application.services.authorisation.authorisation_service import (
 from api.application.services.authorisation.dataset_access_evaluator import (
     DatasetAccessEvaluator,
 )
+from api.application.services.append_buffer_service import AppendBufferService
 from api.application.services.data_service import DataService
 
 from api.application.services.delete_service import DeleteService
 from api.application.services.format_service import FormatService
 from api.application.services.schema_service import SchemaService
 from api.application.services.search_service import SearchService
-from api.common.data_handlers import store_file_to_disk
-from api.common.utilities import strtobool
+from api.common.file_uploads import (
+    admit_file_upload,
+    file_upload_request_body,
+    get_body_file,
+    get_form_files,
+)
+from api.common.data_handlers import (
+    get_upload_file_type,
+    remove_spool_file,
+    store_file_to_disk,
+)
+from api.common.utilities import (
+    get_content_length,
+    get_spool_reservation,
+    strtobool,
+)
 from api.common.config.auth import Action
 from api.common.config.constants import (
+    APPEND_MAX_BYTES,
+    ARROW_STREAM_MIME_TYPE,
     BASE_API_PATH,
     LOWERCASE_ROUTE_DESCRIPTION,
     LOWERCASE_REGEX,
-    VALID_FILE_MIME_TYPES,
-    VALID_FILE_EXTENSIONS,
+    BATCH_UPLOAD_MAX_FILES,
 )
 from api.common.config.layers import Layer
 from api.common.custom_exceptions import (
     SchemaNotFoundError,
     UserError,
-    InvalidFileUploadError,
 )
 from api.common.logger import AppLogger
 from api.common.utilities import construct_dataset_metadata
+from api.domain.append_log import AppendRows
+from api.domain.batch_upload import BatchFile, BatchManifest
 from api.domain.dataset_filters import DatasetFilters
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.presigned_upload import (
+    PresignedUploadCompletion,
+    PresignedUploadRequest,
+)
+from api.domain.reprocess import ReprocessRequest
 from api.domain.schema_metadata import SchemaMetadata
 from api.domain.mime_type import MimeType
 from rapid.items.query import Query
@@ -53,6 +80,7 @@ CATALOG_DISABLED = strtobool(os.environ.get("CATALOG_DISABLED", "False"))
 
 athena_adapter = AthenaAdapter()
 data_service = DataService()
+append_buffer_service = AppendBufferService()
 delete_service = DeleteService()
 schema_service = SchemaService()
 data_access_evaluator = DatasetAccessEvaluator()
@@ -357,6 +385,9 @@ async def delete_data_file(
     "/{layer}/{domain}/{dataset}",
     status_code=http_status.HTTP_201_CREATED,
     dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+    openapi_extra=file_upload_request_body(
+        "file", body_media_types=[ARROW_STREAM_MIME_TYPE]
+    ),
 )
 def upload_data(
     layer: Layer,
@@ -367,7 +398,7 @@ def upload_data(
         ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
     ),
     version: Optional[int] = None,
-    file: UploadFile = File(...),
+    form: FormData = Depends(admit_file_upload),
 ):
     """
     ## Upload dataset
@@ -399,6 +430,22 @@ def upload_data(
 
     The domain must also be lowercase only.
 
+    #### Compressed files
+
+    CSV files can be uploaded compressed with gzip or zstd, either by using the `.csv.gz` or `.csv.zst` file suffix
+    or by setting the `Content-Encoding` header of the file part to `gzip` or `zstd`. The file is decompressed as it is
+    processed and is stored in its compressed form as the raw file.
+
+    #### Arrow streams
+
+    Data can also be uploaded as an Arrow IPC stream, using the `.arrows` file suffix or the
+    `application/vnd.apache.arrow.stream` content type for the file part. The stream is processed one record batch at a
+    time, so producers can write record batches as they are generated without first materialising a Parquet file.
+
+    The stream can also be sent as the whole body of the request, instead of as form data, by setting the `Content-Type`
+    header to `application/vnd.apache.arrow.stream`. The body is then read as it is received, and the file is named by
+    the filename of the `Content-Disposition` header, e.g.: `attachment; filename="passengers_by_airport.arrows"`.
+
     ### Output
 
     If successful returns file name with a timestamp included, e.g.:
@@ -409,6 +456,13 @@ def upload_data(
     }
     ```
 
+    ### Capacity
+
+    Incoming files are held on local disk while they are processed. If there is not enough space available for the
+    size of the request a `429` response is returned, before the file is received, with a `Retry-After` header giving
+    the number of seconds to wait before trying again. Requests without a `Content-Length` header are rejected with a
+    `411` response, as the space they need cannot be known before they are received.
+
     ### Accepted permissions
 
     In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
@@ -418,24 +472,32 @@ def upload_data(
 
     """
     try:
-        extension = file.filename.split(".")[-1].lower()
-        if (
-            file.content_type not in VALID_FILE_MIME_TYPES
-            and extension not in VALID_FILE_EXTENSIONS
-        ):
-            raise InvalidFileUploadError(
-                f"This file type {extension}, is not supported."
-            )
+        if request.headers.get("content-type", "").startswith(ARROW_STREAM_MIME_TYPE):
+            file = get_body_file(request, f"{dataset}.arrows")
+        else:
+            file = get_form_files(form, "file")[0]
+        extension, compression = get_upload_file_type(file)
 
         subject_id = get_subject_id(request)
         job_id = generate_uuid()
-        incoming_file_path = store_file_to_disk(extension, job_id, file)
-        raw_filename, version, job_id = data_service.upload_dataset(
-            subject_id,
+        incoming_file_path = store_file_to_disk(
+            extension,
             job_id,
-            construct_dataset_metadata(layer, domain, dataset, version),
-            incoming_file_path,
+            file,
+            expected_size=get_content_length(request),
+            compression=compression,
+            reservation=get_spool_reservation(request),
         )
+        try:
+            raw_filename, version, job_id = data_service.upload_dataset(
+                subject_id,
+                job_id,
+                construct_dataset_metadata(layer, domain, dataset, version),
+                incoming_file_path,
+            )
+        except Exception:
+            remove_spool_file(incoming_file_path)
+            raise
         response.status_code = http_status.HTTP_202_ACCEPTED
         return {
             "details": {
@@ -451,6 +513,619 @@ def upload_data(
         raise UserError(message=error.args[0])
 
 
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/append",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+)
+async def append_data(
+    layer: Layer,
+    dataset: str,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+):
+    """
+    ## Append rows
+
+    Appends a small batch of rows to a dataset without uploading a file. The rows are validated against the schema
+    straight away and buffered with the rows of other appends to the dataset, which are written to it together once
+    enough rows have been buffered, or at the latest after a few minutes. This keeps feeds that send a few rows at a time
+    from filling the dataset with small files. Rows can only be appended to datasets with the `APPEND` update behaviour.
+
+    ### Inputs
+
+    | Parameters | Required | Usage             | Example values                                   | Definition            |
+    |------------|----------|-------------------|--------------------------------------------------|-----------------------|
+    | `layer`    | True     | URL parameter     | `raw`                                            | layer of the dataset  |
+    | `domain`   | True     | URL parameter     | `air`                                            | domain of the dataset |
+    | `dataset`  | True     | URL parameter     | `passengers_by_airport`                          | dataset title         |
+    | `version`  | False    | Query parameter   | `3`                                              | dataset version       |
+    | `rows`     | True     | JSON request body | `{"rows": [{"airport": "LHR", "passengers": 5}]}` | the rows to append    |
+
+    The rows can also be sent as an Arrow IPC stream by setting the `Content-Type` header to
+    `application/vnd.apache.arrow.stream`. At most 10,000 rows can be appended at once, larger amounts of data should
+    be uploaded as a file.
+
+    ### Output
+
+    If successful returns the number of rows buffered for the dataset, including the appended rows, e.g.:
+
+    ```json
+    {
+        "details": {
+            "dataset_version": 3,
+            "buffered_rows": 1200,
+            "status": "Rows buffered"
+        }
+    }
+    ```
+
+    Each time the buffered rows are written to the dataset an upload job is recorded for them.
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    content_length = get_content_length(request)
+    if content_length is not None and content_length > APPEND_MAX_BYTES:
+        raise UserError(
+            f"At most {APPEND_MAX_BYTES} bytes can be appended at once, upload larger amounts of data as a file"
+        )
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(ARROW_STREAM_MIME_TYPE):
+            table = pa.ipc.open_stream(body).read_all()
+        else:
+            table = pa.Table.from_pylist(AppendRows.model_validate_json(body).rows)
+    except (pa.ArrowInvalid, ValidationError) as error:
+        raise UserError(f"The rows could not be read: {error}")
+    try:
+        dataset_metadata = await run_in_threadpool(
+            construct_dataset_metadata, layer, domain, dataset, version
+        )
+        buffered_rows = await run_in_threadpool(
+            append_buffer_service.append, dataset_metadata, table
+        )
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+    return {
+        "details": {
+            "dataset_version": dataset_metadata.version,
+            "buffered_rows": buffered_rows,
+            "status": "Rows buffered",
+        }
+    }
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/validate",
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+    openapi_extra=file_upload_request_body("file"),
+)
+def validate_data(
+    layer: Layer,
+    dataset: str,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+    fail_fast: bool = False,
+    sample_rows: Optional[int] = None,
+    form: FormData = Depends(admit_file_upload),
+):
+    """
+    ## Validate dataset
+
+    Runs the same checks as an upload over a file without storing any of it, so that a file can be checked against the
+    schema of a dataset before it is uploaded. No job is created and nothing is written to the raw or data storage or to
+    the catalogue. The validation errors are returned directly in the response.
+
+    ### Inputs
+
+    | Parameters    | Required | Usage                                   | Example values              | Definition                                           |
+    |---------------|----------|-----------------------------------------|-----------------------------|------------------------------------------------------|
+    | `layer`       | True     | URL parameter                           | `raw`                       | layer of the dataset                                 |
+    | `domain`      | True     | URL parameter                           | `air`                       | domain of the dataset                                |
+    | `dataset`     | True     | URL parameter                           | `passengers_by_airport`     | dataset title                                        |
+    | `version`     | False    | Query parameter                         | `3`                         | dataset version                                      |
+    | `fail_fast`   | False    | Query parameter                         | `true`                      | stop at the first chunk of the file with errors      |
+    | `sample_rows` | False    | Query parameter                         | `10000`                     | only validate this many rows from the start of file  |
+    | `file`        | True     | File in form data with key value `file` | `passengers_by_airport.csv` | the dataset file itself                              |
+
+    The same file types and compressions are accepted as for uploading a dataset.
+
+    ### Output
+
+    Whether the file is valid, the number of rows that were validated and any validation errors, e.g.:
+
+    ```json
+    {
+      "details": {
+        "valid": false,
+        "rows_validated": 20000,
+        "errors": [
+          "Column [passengers] has an incorrect data type. Expected Int64, received object"
+        ]
+      }
+    }
+    ```
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    if sample_rows is not None and sample_rows < 1:
+        raise UserError("The number of sample rows must be greater than zero")
+
+    dataset_metadata = construct_dataset_metadata(layer, domain, dataset, version)
+    file = get_form_files(form, "file")[0]
+    extension, compression = get_upload_file_type(file)
+    incoming_file_path = store_file_to_disk(
+        extension,
+        generate_uuid(),
+        file,
+        expected_size=get_content_length(request),
+        compression=compression,
+        reservation=get_spool_reservation(request),
+    )
+    try:
+        result = data_service.validate_dataset(
+            dataset_metadata, incoming_file_path, fail_fast, sample_rows
+        )
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+    finally:
+        remove_spool_file(incoming_file_path)
+    return {"details": result.model_dump()}
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/batch",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+    openapi_extra=file_upload_request_body("files", multiple=True),
+)
+def upload_batch(
+    layer: Layer,
+    dataset: str,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+    form: FormData = Depends(admit_file_upload),
+):
+    """
+    ## Upload batch
+
+    Uploads many files to a dataset as a single job. The files are validated together, with any errors reported against
+    the file they were found in. The data is only stored if every file is valid, and the partitions of the dataset are
+    loaded once for the whole batch. When the schema quarantines invalid rows, the rows of each file that fail validation
+    are stored in a quarantine file for that file, and the job reports the accepted and quarantined rows of the batch.
+
+    Each file is kept as its own raw file, so they can still be deleted individually.
+
+    ### Inputs
+
+    | Parameters | Required | Usage                                                | Example values                  | Definition              |
+    |------------|----------|------------------------------------------------------|---------------------------------|-------------------------|
+    | `layer`    | True     | URL parameter                                        | `raw`                           | layer of the dataset    |
+    | `domain`   | True     | URL parameter                                        | `air`                           | domain of the dataset   |
+    | `dataset`  | True     | URL parameter                                        | `passengers_by_airport`         | dataset title           |
+    | `version`  | False    | Query parameter                                      | `3`                             | dataset version         |
+    | `files`    | True     | Files in form data, each with the key value `files`  | `passengers_2022-01-01_00.csv`  | the dataset files       |
+
+    Up to 1000 files can be uploaded in one batch, of any of the file types accepted by the upload dataset endpoint.
+
+    ### Output
+
+    If successful returns the raw file name of each file, in the order they were uploaded:
+
+    ```json
+    {
+        "details": {
+            "original_filenames": ["passengers_00.csv", "passengers_01.csv"],
+            "raw_filenames": ["123-456-789-0000.csv", "123-456-789-0001.csv"],
+            "dataset_version": 3,
+            "status": "Data processing",
+            "job_id": "abc-123"
+        }
+    }
+    ```
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    files = get_form_files(form, "files")
+    if len(files) > BATCH_UPLOAD_MAX_FILES:
+        raise UserError(
+            f"A batch can contain at most {BATCH_UPLOAD_MAX_FILES} files, {len(files)} were provided"
+        )
+    file_types = [get_upload_file_type(file) for file in files]
+    subject_id = get_subject_id(request)
+    job_id = generate_uuid()
+    batch_files = []
+    try:
+        for index, (file, (extension, compression)) in enumerate(
+            zip(files, file_types)
+        ):
+            incoming_file_path = store_file_to_disk(
+                extension,
+                f"{job_id}-{index:04d}",
+                file,
+                expected_size=file.size,
+                compression=compression,
+                reservation=get_spool_reservation(request),
+            )
+            batch_files.append(
+                BatchFile(filename=file.filename, file_path=incoming_file_path)
+            )
+        raw_filenames, version, job_id = data_service.upload_batch(
+            subject_id,
+            job_id,
+            construct_dataset_metadata(layer, domain, dataset, version),
+            batch_files,
+        )
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        for batch_file in batch_files:
+            remove_spool_file(batch_file.file_path)
+        raise UserError(message=error.args[0])
+    except Exception:
+        for batch_file in batch_files:
+            remove_spool_file(batch_file.file_path)
+        raise
+    return {
+        "details": {
+            "original_filenames": [file.filename for file in files],
+            "raw_filenames": raw_filenames,
+            "dataset_version": version,
+            "status": "Data processing",
+            "job_id": job_id,
+        }
+    }
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/batch/manifest",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+)
+def upload_batch_manifest(
+    layer: Layer,
+    dataset: str,
+    manifest: BatchManifest,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+):
+    """
+    ## Upload batch manifest
+
+    Processes many files that have been uploaded with presigned uploads as a single job, in the same way as the upload
+    batch endpoint. The manifest lists the upload id and file name of each presigned upload, along with the multipart
+    upload details for files uploaded in parts.
+
+    ### Inputs
+
+    | Parameters | Required | Usage             | Example values | Definition                 |
+    |------------|----------|-------------------|----------------|----------------------------|
+    | `layer`    | True     | URL parameter     | `raw`          | layer of the dataset       |
+    | `domain`   | True     | URL parameter     | `air`          | domain of the dataset      |
+    | `dataset`  | True     | URL parameter     | `passengers`   | dataset title              |
+    | `version`  | False    | Query parameter   | `3`            | dataset version            |
+    | `manifest` | True     | JSON request body | see below      | the presigned uploads      |
+
+    ```json
+    {
+        "files": [
+            {"upload_id": "abc-123", "filename": "passengers_00.csv"},
+            {"upload_id": "def-456", "filename": "passengers_01.csv.gz", "multipart_upload_id": "xyz-789", "parts": [{"part_number": 1, "etag": "\"etag-1\""}]}
+        ]
+    }
+    ```
+
+    ### Output
+
+    If successful returns the raw file name of each file, as with the upload batch endpoint.
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        raw_filenames, version, job_id = data_service.upload_landed_batch(
+            get_subject_id(request),
+            generate_uuid(),
+            construct_dataset_metadata(layer, domain, dataset, version),
+            manifest,
+        )
+        return {
+            "details": {
+                "original_filenames": [file.filename for file in manifest.files],
+                "raw_filenames": raw_filenames,
+                "dataset_version": version,
+                "status": "Data processing",
+                "job_id": job_id,
+            }
+        }
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/reprocess",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+)
+def reprocess_raw_files(
+    layer: Layer,
+    dataset: str,
+    reprocess_request: ReprocessRequest,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+):
+    """
+    ## Reprocess
+
+    Replays the raw files archived for another version of a dataset into this version, e.g.: after a schema update, so
+    that the data does not need to be uploaded again. Each file is processed as an upload, with its own job, and is
+    validated against the schema of this version.
+
+    Files are processed in parallel for datasets with the `APPEND` update behaviour. For `UPSERT` they are processed one
+    at a time in the order they were uploaded, and the files after a failed one are not processed. For `OVERWRITE` only
+    the latest file is processed, as it replaces the data of every earlier one.
+
+    ### Inputs
+
+    | Parameters          | Required | Usage             | Example values | Definition                                   |
+    |---------------------|----------|-------------------|----------------|----------------------------------------------|
+    | `layer`             | True     | URL parameter     | `raw`          | layer of the dataset                         |
+    | `domain`            | True     | URL parameter     | `air`          | domain of the dataset                        |
+    | `dataset`           | True     | URL parameter     | `passengers`   | dataset title                                |
+    | `version`           | False    | Query parameter   | `3`            | dataset version to reprocess the files into  |
+    | `reprocess_request` | True     | JSON request body | see below      | the version and raw files to reprocess       |
+
+    ```json
+    {
+        "source_version": 2,
+        "raw_files": ["661c9467-5d0e-4ec7-ad05-b8651598b675.csv.zst"]
+    }
+    ```
+
+    Every raw file of the source version is reprocessed when `raw_files` is not given.
+
+    ### Output
+
+    If successful returns the id of the upload job of each reprocessed file, in the order they were uploaded.
+
+    ```json
+    {
+        "details": {
+            "dataset_version": 3,
+            "status": "Data processing",
+            "job_ids": ["3bd7d98f-2264-4f88-bd65-5a2089161650"]
+        }
+    }
+    ```
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        dataset_metadata = construct_dataset_metadata(layer, domain, dataset, version)
+        job_ids = data_service.reprocess_raw_files(
+            get_subject_id(request),
+            dataset_metadata,
+            reprocess_request.source_version,
+            reprocess_request.raw_files,
+        )
+        return {
+            "details": {
+                "dataset_version": dataset_metadata.version,
+                "status": "Data processing",
+                "job_ids": job_ids,
+            }
+        }
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/presigned-upload",
+    status_code=http_status.HTTP_201_CREATED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+)
+def generate_presigned_upload(
+    layer: Layer,
+    dataset: str,
+    upload_request: PresignedUploadRequest,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+):
+    """
+    ## Generate presigned upload
+
+    Generates presigned URLs to upload a file directly to S3, bypassing the API. Once the file has been uploaded,
+    use the complete presigned upload endpoint to start processing it exactly as with the upload dataset endpoint.
+
+    ### Inputs
+
+    | Parameters       | Required | Usage             | Example values                                       | Definition                        |
+    |------------------|----------|-------------------|------------------------------------------------------|-----------------------------------|
+    | `layer`          | True     | URL parameter     | `raw`                                                | layer of the dataset              |
+    | `domain`         | True     | URL parameter     | `air`                                                | domain of the dataset             |
+    | `dataset`        | True     | URL parameter     | `passengers_by_airport`                              | dataset title                     |
+    | `version`        | False    | Query parameter   | `3`                                                  | dataset version                   |
+    | `upload_request` | True     | JSON request body | `{"filename": "passengers.csv.gz", "size": 1048576}` | the file name and size in bytes   |
+
+    ### Output
+
+    Files up to 100MB, or when no size is given, get a single URL to `PUT` the file to:
+
+    ```json
+    {
+        "details": {
+            "upload_id": "abc-123",
+            "filename": "passengers.csv.gz",
+            "url": "https://..."
+        }
+    }
+    ```
+
+    Larger files get a multipart upload, with a URL to `PUT` each `part_size` bytes of the file to. Keep the `ETag`
+    header of each part response to complete the upload:
+
+    ```json
+    {
+        "details": {
+            "upload_id": "abc-123",
+            "filename": "passengers.csv.gz",
+            "multipart_upload_id": "xyz-789",
+            "part_size": 104857600,
+            "parts": [{"part_number": 1, "url": "https://..."}, {"part_number": 2, "url": "https://..."}]
+        }
+    }
+    ```
+
+    The URLs expire after an hour.
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        return {
+            "details": data_service.generate_landing_upload(
+                generate_uuid(),
+                construct_dataset_metadata(layer, domain, dataset, version),
+                upload_request,
+            )
+        }
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
+@datasets_router.post(
+    "/{layer}/{domain}/{dataset}/presigned-upload/{upload_id}/complete",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(secure_dataset_endpoint, scopes=[Action.WRITE])],
+)
+def complete_presigned_upload(
+    layer: Layer,
+    dataset: str,
+    upload_id: str,
+    completion: PresignedUploadCompletion,
+    request: Request,
+    domain: str = FastApiPath(
+        ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
+    ),
+    version: Optional[int] = None,
+):
+    """
+    ## Complete presigned upload
+
+    Starts processing a file that has been uploaded with the URLs from the generate presigned upload endpoint. The file
+    is read from S3 and validated and stored exactly as with the upload dataset endpoint.
+
+    ### Inputs
+
+    | Parameters   | Required | Usage             | Example values              | Definition                                      |
+    |--------------|----------|-------------------|-----------------------------|-------------------------------------------------|
+    | `layer`      | True     | URL parameter     | `raw`                       | layer of the dataset                            |
+    | `domain`     | True     | URL parameter     | `air`                       | domain of the dataset                           |
+    | `dataset`    | True     | URL parameter     | `passengers_by_airport`     | dataset title                                   |
+    | `upload_id`  | True     | URL parameter     | `abc-123`                   | the upload id of the presigned upload           |
+    | `version`    | False    | Query parameter   | `3`                         | dataset version                                 |
+    | `completion` | True     | JSON request body | see below                   | the file name and any multipart upload details  |
+
+    ```json
+    {
+        "filename": "passengers.csv.gz",
+        "multipart_upload_id": "xyz-789",
+        "parts": [{"part_number": 1, "etag": "\"etag-1\""}, {"part_number": 2, "etag": "\"etag-2\""}]
+    }
+    ```
+
+    `multipart_upload_id` and `parts` are only required for multipart uploads.
+
+    ### Output
+
+    If successful returns the details of the upload job, as with the upload dataset endpoint. The job id is the upload id,
+    so completing the same upload again, e.g.: when retrying after a timeout, returns the job that is already processing
+    it instead of processing the file twice.
+
+    ### Accepted permissions
+
+    In order to use this endpoint you need a relevant `WRITE` permission that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        raw_filename, version, job_id = data_service.upload_landed_dataset(
+            get_subject_id(request),
+            upload_id,
+            construct_dataset_metadata(layer, domain, dataset, version),
+            completion,
+        )
+        return {
+            "details": {
+                "original_filename": completion.filename,
+                "raw_filename": raw_filename,
+                "dataset_version": version,
+                "status": "Data processing",
+                "job_id": job_id,
+            }
+        }
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
 @datasets_router.post(
     "/{layer}/{domain}/{dataset}/query",
     dependencies=[Security(secure_dataset_endpoint, scopes=[Action.READ])],
@@ -467,6 +1142,10 @@ def upload_data(
                     "example": 'col1;col2;col3\n"123","something","500"\n"456","something else","600"'
                 },
                 "application/octet-stream": {},
+                "application/x-ndjson": {
+                    "example": '{"col1":"123","col2":"something","col3":"500"}\n{"col1":"456","col2":"something else","col3":"600"}'
+                },
+                "application/vnd.apache.arrow.stream": {},
             }
         },
         204: {
@@ -549,10 +1228,30 @@ async def query_dataset(
     ### Parquet
 
     To get a Parquet response, the `Accept` Header has to be set to `application/octet-stream`, this can be set below. The response will be the raw Parquet
-    binary result.
+    binary result. Unlike the text formats, the columns keep their types, e.g.: numbers and dates are not returned as strings.
 
     We recommend using this in a programmatic sense.
 
+    ### NDJSON
+
+    To get a newline delimited JSON response, the `Accept` Header has to be set to `application/x-ndjson`. Each line of the response
+    is a row, e.g.:
+
+    ```json
+    {"column1":"value1","column2":"value2"}
+    ...
+    ```
+
+    ### Arrow
+
+    To get an Arrow IPC stream response, the `Accept` Header has to be set to `application/vnd.apache.arrow.stream`. As with Parquet, the columns
+    keep their types, so the result can be read by Arrow clients, e.g.: `pyarrow` or the `arrow` R package, without converting it.
+
+    ### Streaming
+
+    The rows are read from the result of the query and sent in chunks as they are read, so the response of large queries starts
+    before the whole result has been read.
+
     ### Empty response
 
     If there are no rows to return then a 204 response will be returned.
@@ -567,20 +1266,27 @@ async def query_dataset(
     ### Click  `Try it out` to use the endpoint
 
     """
-    df = data_service.query_data(
-        construct_dataset_metadata(layer, domain, dataset, version), query
-    )
-    if df.shape[0] == 0:
-        # Return 204 if dataframe is empty
+    dataset_metadata = construct_dataset_metadata(layer, domain, dataset, version)
+    chunks = data_service.query_data(dataset_metadata, query)
+    # Read up to the first rows of the result to know whether there are any to stream
+    first_chunk = next((chunk for chunk in chunks if chunk.shape[0] > 0), None)
+    if first_chunk is None:
+        # Return 204 if the result is empty
         return PlainTextResponse(
             status_code=204,
             content="No rows were returned. Either there is no data or the query is too limiting.",
         )
     else:
-        string_df = df.astype("string")
         output_format = request.headers.get("Accept")
         mime_type = MimeType.to_mimetype(output_format)
-        return _format_query_output(string_df, mime_type)
+        column_types = (
+            data_service.get_query_column_types(dataset_metadata)
+            if mime_type in FormatService.TYPED_MIME_TYPES
+            else None
+        )
+        return _format_query_output(
+            chain([first_chunk], chunks), mime_type, column_types
+        )
 
 
 @datasets_router.post(
@@ -652,9 +1358,13 @@ async def query_large_dataset(
     return {"details": {"job_id": job_id}}
 
 
-def _format_query_output(df: DataFrame, mime_type: MimeType) -> Response:
-    formatted_output = FormatService.from_df_to_mimetype(df, mime_type)
-    if mime_type in [MimeType.TEXT_CSV, MimeType.BINARY]:
-        return PlainTextResponse(status_code=200, content=formatted_output)
-    else:
-        return formatted_output
+def _format_query_output(
+    chunks: Iterable[DataFrame],
+    mime_type: MimeType,
+    column_types: Optional[pa.Schema] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        FormatService.from_chunks_to_mimetype(chunks, mime_type, column_types),
+        status_code=200,
+        media_type=mime_type,
+    )
@@ -7,11 +7,13 @@ from api.application.services.authorisation.authorisation_service import (
     secure_endpoint,
     get_subject_id,
 )
+from api.application.services.data_service import DataService
 from api.application.services.job_service import JobService
 from api.common.config.auth import Action
 from api.common.config.constants import BASE_API_PATH
 
 jobs_service = JobService()
+data_service = DataService()
 
 jobs_router = APIRouter(
     prefix=f"{BASE_API_PATH}/jobs",
@@ -71,3 +73,75 @@ async def get_job(job_id: str):
 
     """
     return jobs_service.get_job(job_id)
+
+
+@jobs_router.post(
+    "/{job_id}/retry",
+    dependencies=[Security(secure_endpoint, scopes=[Action.WRITE])],
+    status_code=http_status.HTTP_202_ACCEPTED,
+)
+async def retry_job(request: Request, job_id: str):
+    """
+    ## Retry a failed upload job
+
+    Use this endpoint to resume a failed upload job. The upload resumes from the raw file that was archived
+    when it was uploaded, skipping the steps and the chunks of data it had completed before it failed, so the
+    file does not need to be uploaded again.
+
+    Only upload jobs that failed after their file was archived (the `RAW_DATA_UPLOAD` step) can be retried, and
+    only by the subject that started them. The job keeps its id and can be tracked with the jobs endpoints. A retry
+    of a job that another retry has already resumed fails with a `409` status code.
+
+    ### Inputs
+
+    | Parameters | Usage         | Example values | Definition                   |
+    |------------|---------------|----------------|------------------------------|
+    | `job_id`   | URL parameter | `abc-123`      | the id of the failed job     |
+
+    ### Accepted permissions
+
+    You can retry the upload jobs you started, provided you have a `WRITE` permission, e.g.: `WRITE_ALL`,
+    `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    subject_id = get_subject_id(request)
+    return {"details": {"job_id": data_service.retry_upload(subject_id, job_id)}}
+
+
+@jobs_router.post(
+    "/{job_id}/cancel",
+    dependencies=[Security(secure_endpoint, scopes=[Action.WRITE])],
+    status_code=http_status.HTTP_202_ACCEPTED,
+)
+async def cancel_job(request: Request, job_id: str):
+    """
+    ## Cancel an upload job
+
+    Use this endpoint to stop an upload job in progress, e.g.: a file uploaded by mistake. The upload stops
+    at the next chunk of data or step it starts, removes the data it has written along with its raw file,
+    and leaves the job with the `CANCELLED` status.
+
+    Uploads stop before they change the data of earlier uploads, so a job that has started to overwrite or
+    replace existing data completes instead. Only upload jobs in progress can be cancelled, and only by the
+    subject that started them.
+
+    ### Inputs
+
+    | Parameters | Usage         | Example values | Definition                   |
+    |------------|---------------|----------------|------------------------------|
+    | `job_id`   | URL parameter | `abc-123`      | the id of the job to cancel  |
+
+    ### Accepted permissions
+
+    You can cancel the upload jobs you started, provided you have a `WRITE` permission, e.g.: `WRITE_ALL`,
+    `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    subject_id = get_subject_id(request)
+    return {
+        "details": {"job_id": jobs_service.request_cancellation(subject_id, job_id)}
+    }
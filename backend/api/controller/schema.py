@@ -1,7 +1,8 @@
-from fastapi import APIRouter
-from fastapi import UploadFile, File, Security
+from fastapi import APIRouter, Depends, Request
+from fastapi import Security
 from fastapi import status as http_status
 from fastapi import Path as FastApiPath
+from starlette.datastructures import FormData
 
 from api.application.services.authorisation.authorisation_service import secure_endpoint
 from api.application.services.delete_service import DeleteService
@@ -12,16 +13,19 @@ from api.common.config.constants import (
     BASE_API_PATH,
     LOWERCASE_REGEX,
     LOWERCASE_ROUTE_DESCRIPTION,
-    VALID_FILE_MIME_TYPES,
-    VALID_FILE_EXTENSIONS,
 )
 from api.common.config.layers import Layer
 from api.common.custom_exceptions import (
     AWSServiceError,
-    InvalidFileUploadError,
 )
-from api.common.data_handlers import store_file_to_disk
+from api.common.data_handlers import get_upload_file_type, store_file_to_disk
+from api.common.file_uploads import (
+    admit_file_upload,
+    file_upload_request_body,
+    get_form_files,
+)
 from api.common.logger import AppLogger
+from api.common.utilities import get_content_length, get_spool_reservation
 from api.domain.Jobs.Job import generate_uuid
 from api.domain.schema import Schema
 
@@ -36,15 +40,19 @@ schema_router = APIRouter(
 )
 
 
-@schema_router.post("/{layer}/{sensitivity}/{domain}/{dataset}/generate")
+@schema_router.post(
+    "/{layer}/{sensitivity}/{domain}/{dataset}/generate",
+    openapi_extra=file_upload_request_body("file"),
+)
 async def generate_schema(
     layer: Layer,
     sensitivity: Sensitivity,
     dataset: str,
+    request: Request,
     domain: str = FastApiPath(
         ..., pattern=LOWERCASE_REGEX, description=LOWERCASE_ROUTE_DESCRIPTION
     ),
-    file: UploadFile = File(...),
+    form: FormData = Depends(admit_file_upload),
 ):
     """
     ## Generate schema
@@ -55,8 +63,9 @@ async def generate_schema(
     output of this endpoint in the Schema Upload endpoint.
 
     ⚠️ WARNING:
-    - The first 50MB if the file is of type csv or the first 10,000 rows if Parquet, of the uploaded file (regardless of size) are used to infer the schema
+    - The first 50MB if the file is of type csv or the first 10,000 rows if Parquet or an Arrow stream, of the uploaded file (regardless of size) are used to infer the schema
     - Consider uploading a representative sample of your dataset (e.g.: the first 10,000 rows) instead of uploading the entire large file which could take a long time
+    - CSV files can be compressed with gzip or zstd, using the `.csv.gz` or `.csv.zst` file suffix or the `Content-Encoding` header of the file part, in which case the first 50MB of the decompressed file are used
 
     ### Inputs
 
@@ -84,15 +93,19 @@ async def generate_schema(
     ### Click  `Try it out` to use the endpoint
 
     """
-    extension = file.filename.split(".")[-1].lower()
-    if (
-        file.content_type not in VALID_FILE_MIME_TYPES
-        and extension not in VALID_FILE_EXTENSIONS
-    ):
-        raise InvalidFileUploadError(f"This file type {extension}, is not supported.")
+    file = get_form_files(form, "file")[0]
+    extension, compression = get_upload_file_type(file)
 
     job_id = generate_uuid()
-    incoming_file_path = store_file_to_disk(extension, job_id, file, to_chunk=True)
+    incoming_file_path = store_file_to_disk(
+        extension,
+        job_id,
+        file,
+        to_chunk=True,
+        expected_size=get_content_length(request),
+        compression=compression,
+        reservation=get_spool_reservation(request),
+    )
     return schema_infer_service.infer_schema(
         layer, domain, dataset, sensitivity, incoming_file_path
     )
@@ -10,6 +10,7 @@ class JobStatus(StrEnum):
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
     IN_PROGRESS = "IN PROGRESS"
+    CANCELLED = "CANCELLED"
 
 
 class JobType(StrEnum):
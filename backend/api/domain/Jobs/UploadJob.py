@@ -1,14 +1,19 @@
 import time
+from typing import Dict, List, Optional
 
 from api.common.config.constants import UPLOAD_JOB_EXPIRY_DAYS
 from api.common.config.layers import Layer
 from api.domain.dataset_metadata import DatasetMetadata
-from api.domain.Jobs.Job import Job, JobType, JobStep
+from api.domain.Jobs.Job import Job, JobStatus, JobType, JobStep
 
 
 class UploadStep(JobStep):
+    QUEUED = "QUEUED"
+    LANDED_DATA_DOWNLOAD = "LANDED_DATA_DOWNLOAD"
+    RAW_DATA_DOWNLOAD = "RAW_DATA_DOWNLOAD"
     VALIDATION = "VALIDATION"
     RAW_DATA_UPLOAD = "RAW_DATA_UPLOAD"
+    WAITING_FOR_LEASE = "WAITING_FOR_LEASE"
     DATA_UPLOAD = "DATA_UPLOAD"
     LOAD_PARTITIONS = "LOAD_PARTITIONS"
     CLEAN_UP = "CLEAN_UP"
@@ -32,3 +37,44 @@ class UploadJob(Job):
         self.dataset: str = dataset.dataset
         self.version: int = dataset.version
         self.expiry_time: int = int(time.time() + UPLOAD_JOB_EXPIRY_DAYS * 24 * 60 * 60)
+        # Checkpoints that let a failed upload resume from its archived raw file
+        self.raw_filename: Optional[str] = None
+        self.committed_chunks: int = 0
+        self.completed_steps: List[UploadStep] = []
+        # Rows written and rows split off, for schemas that quarantine invalid rows
+        self.accepted_rows: Optional[int] = None
+        self.quarantined_rows: Optional[int] = None
+
+    @classmethod
+    def from_item(cls, item: Dict) -> "UploadJob":
+        job = cls(
+            item["sk2"],
+            item["job_id"],
+            item["filename"],
+            item["raw_file_identifier"],
+            DatasetMetadata(
+                item["layer"], item["domain"], item["dataset"], int(item["version"])
+            ),
+        )
+        job.set_step(UploadStep(item["step"]))
+        job.set_status(JobStatus(item["status"]))
+        job.set_errors(set(item.get("errors") or []))
+        job.created_at = int(item["createdat"])
+        job.expiry_time = int(item["ttl"])
+        job.raw_filename = item.get("raw_filename")
+        job.committed_chunks = int(item.get("committed_chunks") or 0)
+        job.completed_steps = [
+            UploadStep(step) for step in item.get("completed_steps") or []
+        ]
+        if item.get("accepted_rows") is not None:
+            job.set_row_counts(
+                int(item["accepted_rows"]), int(item["quarantined_rows"])
+            )
+        return job
+
+    def set_row_counts(self, accepted_rows: int, quarantined_rows: int) -> None:
+        self.accepted_rows = accepted_rows
+        self.quarantined_rows = quarantined_rows
+
+    def has_completed(self, step: UploadStep) -> bool:
+        return step in self.completed_steps
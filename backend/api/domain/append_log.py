@@ -0,0 +1,55 @@
+import time
+import uuid
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from api.domain.dataset_metadata import DatasetMetadata
+
+SEGMENT_EXTENSION = "arrows"
+
+
+class AppendRows(BaseModel):
+    rows: List[Dict[str, Any]]
+
+
+class AppendLogSegment(BaseModel):
+    """
+    A batch of rows appended to a dataset, held in the append log of the dataset until it is flushed.
+    The name of a segment records when it was appended and how many rows it has, so that the rows
+    buffered for a dataset are known from a listing of its append log alone.
+    """
+
+    key: str
+    appended_at: float
+    row_count: int
+
+    @classmethod
+    def generate_name(cls, row_count: int) -> str:
+        # The timestamp is padded to a fixed width so that segments are listed in the order they were appended
+        return f"{time.time_ns():020d}-{row_count}-{uuid.uuid4()}.{SEGMENT_EXTENSION}"
+
+    @classmethod
+    def from_key(cls, key: str) -> "AppendLogSegment":
+        timestamp, row_count, _ = key.rsplit("/", 1)[-1].split("-", 2)
+        return cls(key=key, appended_at=int(timestamp) / 1e9, row_count=int(row_count))
+
+    def dataset(self) -> DatasetMetadata:
+        # Keys are of the form append_log/{layer}/{domain}/{dataset}/{version}/{segment}
+        layer, domain, dataset, version = self.key.split("/")[-5:-1]
+        return DatasetMetadata(layer, domain, dataset, int(version))
+
+
+class AppendFlush(BaseModel):
+    """
+    The segments that a flush of the append log writes to the dataset, recorded before they are written
+    so that a flush that fails part way is retried with the same segments under the same identifier,
+    replacing the files that the failed attempt wrote
+    """
+
+    flush_identifier: str
+    segment_keys: List[str]
+
+
+def buffered_rows(segments: List[AppendLogSegment]) -> int:
+    return sum(segment.row_count for segment in segments)
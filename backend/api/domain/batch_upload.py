@@ -0,0 +1,25 @@
+from pathlib import Path
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from api.common.config.constants import BATCH_UPLOAD_MAX_FILES
+from api.domain.presigned_upload import PresignedUploadCompletion
+
+
+class BatchFile(BaseModel):
+    filename: str
+    file_path: Path
+
+
+class LandedFile(PresignedUploadCompletion):
+    upload_id: str
+
+
+class BatchManifest(BaseModel):
+    files: List[LandedFile] = Field(min_length=1, max_length=BATCH_UPLOAD_MAX_FILES)
+
+
+def batch_raw_file_identifiers(batch_identifier: str, file_count: int) -> List[str]:
+    # Fixed width indexes, so that no file's identifier is a prefix of another's
+    return [f"{batch_identifier}-{index:04d}" for index in range(file_count)]
@@ -96,10 +96,21 @@ def is_date_type(type: str) -> bool:
 
 def extract_athena_types(df: DataFrame) -> dict:
     types = {}
-    for column in df.columns:
-        if df[column].dropna().size == 0:
+    non_null_counts = df.count()
+    # Only object columns need their values inspected, the inferred type of any other column
+    # follows from its dtype and is worked out once per dtype
+    dtype_inferred_types = {}
+    for index, (column, series) in enumerate(df.items()):
+        if non_null_counts.iat[index] == 0:
             continue
-        dtype = str(infer_dtype(df[column], skipna=True))
+        if series.dtype == object:
+            dtype = str(infer_dtype(series, skipna=True))
+        else:
+            if series.dtype not in dtype_inferred_types:
+                dtype_inferred_types[series.dtype] = str(
+                    infer_dtype(series, skipna=True)
+                )
+            dtype = dtype_inferred_types[series.dtype]
         try:
             types[column] = PANDAS_TO_ATHENA_CONVERTER[dtype].value
         except KeyError:
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from strenum import StrEnum
+
+# Leases that are no longer held are kept for a day before they expire from the table
+LEASE_ITEM_RETENTION_SECONDS = 24 * 60 * 60
+
+
+class LeaseMode(StrEnum):
+    SHARED = "SHARED"
+    EXCLUSIVE = "EXCLUSIVE"
+
+
+class QueuedLeaseHolder(BaseModel):
+    holder_id: str
+    expiry: int
+
+
+class DatasetLease(BaseModel):
+    """
+    Write lease of a dataset, held by upload jobs while they write to it.
+
+    Any number of jobs can share the lease to append to the dataset, while a job that overwrites
+    the dataset holds the lease exclusively. Jobs waiting for the exclusive lease are queued in
+    arrival order, and jobs that want to share the lease wait behind them so that overwrites are
+    not starved by a stream of appends. Holders and queued jobs that stop renewing their entries
+    expire, so that a lease is never held by a job that has died.
+
+    The version is incremented on every write, and a lease is only stored if its version has not
+    changed since it was read.
+    """
+
+    key: str
+    mode: Optional[LeaseMode] = None
+    holders: Dict[str, int] = {}
+    queue: List[QueuedLeaseHolder] = []
+    version: int = 0
+
+    def acquire(self, holder_id: str, mode: LeaseMode, now: int, expiry: int) -> bool:
+        """Acquires the lease for the holder, or queues an exclusive holder, returning whether it was acquired"""
+        self.expire(now)
+        if holder_id in self.holders:
+            self.holders[holder_id] = expiry
+            return True
+        if mode == LeaseMode.SHARED:
+            if self.mode == LeaseMode.EXCLUSIVE or self.queue:
+                return False
+        else:
+            self._enqueue(holder_id, expiry)
+            if self.holders or self.queue[0].holder_id != holder_id:
+                return False
+            self.queue.pop(0)
+        self.mode = mode
+        self.holders[holder_id] = expiry
+        return True
+
+    def renew(self, holder_id: str, now: int, expiry: int) -> bool:
+        self.expire(now)
+        if holder_id not in self.holders:
+            return False
+        self.holders[holder_id] = expiry
+        return True
+
+    def release(self, holder_id: str) -> None:
+        self.holders.pop(holder_id, None)
+        self.queue = [queued for queued in self.queue if queued.holder_id != holder_id]
+        if not self.holders:
+            self.mode = None
+
+    def expire(self, now: int) -> None:
+        self.holders = {
+            holder_id: expiry
+            for holder_id, expiry in self.holders.items()
+            if expiry > now
+        }
+        self.queue = [queued for queued in self.queue if queued.expiry > now]
+        if not self.holders:
+            self.mode = None
+
+    def expiry_time(self) -> int:
+        return (
+            max(
+                [*self.holders.values(), *(queued.expiry for queued in self.queue)],
+                default=0,
+            )
+            + LEASE_ITEM_RETENTION_SECONDS
+        )
+
+    def _enqueue(self, holder_id: str, expiry: int) -> None:
+        for queued in self.queue:
+            if queued.holder_id == holder_id:
+                queued.expiry = expiry
+                return
+        self.queue.append(QueuedLeaseHolder(holder_id=holder_id, expiry=expiry))
@@ -16,6 +16,9 @@ DOMAIN = "domain"
 DATASET = "dataset"
 VERSION = "version"
 
+APPEND_LOG_PREFIX = "append_log"
+APPEND_FLUSH_PREFIX = "append_flush"
+
 
 class DatasetMetadata(BaseModel):
     layer: Layer
@@ -95,6 +98,23 @@ class DatasetMetadata(BaseModel):
     def raw_data_path(self, filename: str) -> str:
         return f"{self.raw_data_location()}/{filename}"
 
+    def quarantine_path(self, raw_file_identifier: str) -> str:
+        # Kept beside the raw files of the dataset, but outside the location of any of its versions
+        return f"{self.construct_raw_dataset_uploads_location()}/quarantine/{self.version}/{raw_file_identifier}.parquet"
+
+    def landing_path(self, upload_id: str, filename: str) -> str:
+        return f"landing/{self.dataset_identifier(with_version=False)}/{upload_id}/{filename}"
+
+    def append_log_location(self) -> str:
+        return f"{APPEND_LOG_PREFIX}/{self.dataset_identifier()}"
+
+    def append_log_path(self, segment_name: str) -> str:
+        return f"{self.append_log_location()}/{segment_name}"
+
+    def append_flush_path(self) -> str:
+        # Kept outside the append log, so that it is never listed as one of its segments
+        return f"{APPEND_FLUSH_PREFIX}/{self.dataset_identifier()}.json"
+
     def glue_table_prefix(self):
         return f"{self.layer}_{self.domain}_{self.dataset.lower()}_"
 
@@ -0,0 +1,39 @@
+from typing import Optional, Set
+
+from pydantic import BaseModel
+
+
+class DatasetStatistics(BaseModel):
+    """
+    Size of the data of a dataset version, or of the part of it written by a single upload.
+
+    The statistics are counters that every write adds to and every deletion subtracts from, so
+    that they can be read without listing the files of the dataset. The statistics of a dataset
+    version are only complete once they account for every file of it, statistics that were started
+    by a write to a dataset written before statistics were kept are incomplete until rebuilt.
+    """
+
+    size_bytes: int = 0
+    files: int = 0
+    rows: int = 0
+    # Paths of the partitions written to, which only shrink once every upload that wrote to them is removed
+    partitions: Set[str] = set()
+    # The partitions of a dataset version are kept apart from its statistics, which only count them
+    partition_count: int = 0
+    complete: bool = True
+
+    def add(self, other: "DatasetStatistics") -> None:
+        self.size_bytes += other.size_bytes
+        self.files += other.files
+        self.rows += other.rows
+        self.partitions |= other.partitions
+        self.partition_count = len(self.partitions)
+
+    def estimated_result_rows(self, limit: Optional[int] = None) -> int:
+        """
+        :return: The most rows that a query of the dataset can return, which filters and
+        aggregations can only lower
+        """
+        if limit is None:
+            return self.rows
+        return min(self.rows, limit)
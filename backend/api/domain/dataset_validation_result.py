@@ -0,0 +1,9 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class DatasetValidationResult(BaseModel):
+    valid: bool
+    rows_validated: int
+    errors: List[str] = []
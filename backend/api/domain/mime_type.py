@@ -1,5 +1,6 @@
 from strenum import StrEnum
 
+from api.common.config.constants import ARROW_STREAM_MIME_TYPE
 from api.common.custom_exceptions import UserError
 
 
@@ -7,6 +8,8 @@ class MimeType(StrEnum):
     APPLICATION_JSON = "application/json"
     TEXT_CSV = "text/csv"
     BINARY = "application/octet-stream"
+    APPLICATION_NDJSON = "application/x-ndjson"
+    ARROW_STREAM = ARROW_STREAM_MIME_TYPE
 
     @staticmethod
     def to_mimetype(mime_type: str):
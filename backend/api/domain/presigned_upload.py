@@ -0,0 +1,39 @@
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from api.common.config.constants import VALID_FILE_EXTENSIONS
+from api.common.custom_exceptions import InvalidFileUploadError
+from api.common.data_handlers import get_file_type
+
+
+class PresignedUploadRequest(BaseModel):
+    filename: str
+    size: Optional[int] = None
+
+    def get_validated_filename(self) -> str:
+        return validate_landing_filename(self.filename)
+
+
+class UploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class PresignedUploadCompletion(BaseModel):
+    filename: str
+    multipart_upload_id: Optional[str] = None
+    parts: Optional[List[UploadPart]] = None
+
+    def get_validated_filename(self) -> str:
+        return validate_landing_filename(self.filename)
+
+
+def validate_landing_filename(filename: str) -> str:
+    if not re.fullmatch(r"[a-zA-Z0-9_\-][a-zA-Z0-9._\-]{0,254}", filename):
+        raise InvalidFileUploadError(f"Invalid file name [{filename}]")
+    extension, _ = get_file_type(filename)
+    if extension not in VALID_FILE_EXTENSIONS:
+        raise InvalidFileUploadError(f"This file type {extension}, is not supported.")
+    return filename
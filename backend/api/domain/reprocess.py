@@ -0,0 +1,8 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ReprocessRequest(BaseModel):
+    source_version: int = Field(ge=1)
+    raw_files: Optional[List[str]] = Field(default=None, min_length=1)
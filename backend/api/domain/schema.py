@@ -1,22 +1,96 @@
+from datetime import date
 from strenum import StrEnum
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 
 import awswrangler as wr
+import pandas as pd
 from pydantic.main import BaseModel
 import pyarrow as pa
 import pandera
 
+from api.common.config.constants import (
+    PARTITION_PROJECTION_FUTURE_YEARS,
+    PARTITION_PROJECTION_START_DATE,
+)
 from api.domain.schema_metadata import Owner, SchemaMetadata
-from rapid.items.schema import Column, UpdateBehaviour
+from rapid.items.schema import (
+    Column,
+    DerivedPartition,
+    InvalidRows,
+    PartitionGranularity,
+    UpdateBehaviour,
+)
 
 METADATA = "metadata"
 COLUMNS = "columns"
+COLUMN_LOOKUP = "_column_lookup"
+
+# Format of the values of a partition derived from a date column, and the Java date format and
+# interval unit that Athena projects the partition with
+DERIVED_PARTITION_FORMATS = {
+    PartitionGranularity.YEAR: ("%Y", "yyyy", "YEARS"),
+    PartitionGranularity.MONTH: ("%Y-%m", "yyyy-MM", "MONTHS"),
+    PartitionGranularity.DAY: ("%Y-%m-%d", "yyyy-MM-dd", "DAYS"),
+}
+
+
+class ColumnLookup:
+    """
+    Indexes over a list of schema columns, so that schemas with thousands of columns are
+    scanned once rather than on every lookup
+    """
+
+    def __init__(self, columns: List[Column]):
+        self.columns = columns
+        self.column_names = [column.name for column in columns]
+        self.columns_by_name = {column.name: column for column in columns}
+        self.partition_columns = sorted(
+            [column for column in columns if column.partition_index is not None],
+            key=lambda x: x.partition_index,
+        )
+        self.data_types = {column.data_type for column in columns}
+        self._columns_by_type: Dict[type, List[Column]] = {}
+        self._pandera_schema: Optional[pandera.DataFrameSchema] = None
+
+    def __reduce__(self):
+        # The pandera schema can hold checks that cannot be pickled, so the lookup is rebuilt instead
+        return ColumnLookup, (self.columns,)
+
+    def get_columns_by_type(self, d_type: type) -> List[Column]:
+        if d_type not in self._columns_by_type:
+            type_values = {member.value for member in d_type}
+            self._columns_by_type[d_type] = [
+                column for column in self.columns if column.data_type in type_values
+            ]
+        return self._columns_by_type[d_type]
+
+    def get_pandera_schema(self, metadata: SchemaMetadata) -> pandera.DataFrameSchema:
+        if self._pandera_schema is None:
+            # Column presence is validated beforehand, so unconstrained columns are left out
+            self._pandera_schema = pandera.DataFrameSchema(
+                metadata=metadata,
+                columns={
+                    column.name: column.to_pandera_column()
+                    for column in self.columns
+                    if column.checks or column.unique or not column.allow_null
+                },
+            )
+        return self._pandera_schema
 
 
 class Schema(BaseModel):
     metadata: SchemaMetadata
     columns: List[Column]
 
+    def get_column_lookup(self) -> ColumnLookup:
+        # Kept outside of the model fields so that it is not serialised or compared, and rebuilt
+        # whenever the columns are replaced
+        column_lookup = self.__dict__.get(COLUMN_LOOKUP)
+        if column_lookup is None or column_lookup.columns is not self.columns:
+            column_lookup = ColumnLookup(self.columns)
+            self.__dict__[COLUMN_LOOKUP] = column_lookup
+        return column_lookup
+
     def get_layer(self) -> str:
         return self.metadata.get_layer()
 
@@ -44,29 +118,115 @@ class Schema(BaseModel):
     def get_update_behaviour(self) -> str:
         return self.metadata.get_update_behaviour()
 
+    def has_append_behaviour(self) -> bool:
+        return self.get_update_behaviour() == UpdateBehaviour.APPEND
+
     def has_overwrite_behaviour(self) -> bool:
         return self.get_update_behaviour() == UpdateBehaviour.OVERWRITE
 
+    def has_upsert_behaviour(self) -> bool:
+        return self.get_update_behaviour() == UpdateBehaviour.UPSERT
+
+    def get_key_columns(self) -> List[str]:
+        return self.metadata.get_key_columns()
+
+    def get_sort_by(self) -> List[str]:
+        return self.metadata.get_sort_by()
+
+    def get_sort_method(self) -> str:
+        return self.metadata.get_sort_method()
+
+    def get_invalid_rows(self) -> str:
+        return self.metadata.get_invalid_rows()
+
+    def quarantines_invalid_rows(self) -> bool:
+        return self.get_invalid_rows() == InvalidRows.QUARANTINE
+
+    def get_max_partitions(self) -> int:
+        return self.metadata.get_max_partitions()
+
+    def get_partition_overflow(self) -> str:
+        return self.metadata.get_partition_overflow()
+
     def get_column_names(self) -> List[str]:
-        return [column.name for column in self.columns]
+        return list(self.get_column_lookup().column_names)
+
+    def get_column(self, name: str) -> Optional[Column]:
+        return self.get_column_lookup().columns_by_name.get(name)
 
     def get_partitions(self) -> List[str]:
         sorted_cols = self.get_partition_columns()
         return [column.name for column in sorted_cols]
 
+    def get_derived_partition(self) -> Optional[DerivedPartition]:
+        return self.metadata.get_partition_by()
+
+    def get_derived_partition_format(self) -> str:
+        return DERIVED_PARTITION_FORMATS[self.get_derived_partition().granularity][0]
+
+    def get_partition_keys(self) -> List[str]:
+        """
+        The partition columns followed by the partition derived from a date column, as they are
+        written to the paths of the stored files
+        """
+        derived_partition = self.get_derived_partition()
+        if derived_partition is None:
+            return self.get_partitions()
+        return [*self.get_partitions(), derived_partition.partition_name()]
+
+    def has_partition_projection(self) -> bool:
+        # Athena can only project the partitions of the table when every partition is derived
+        return (
+            self.get_derived_partition() is not None
+            and not self.get_partition_columns()
+        )
+
+    def get_partition_projection_range(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        The first date that Athena projects the derived partition for, and the date that the
+        projected partitions extend to for a query run today, which only moves later with time
+        """
+        return (
+            pd.Timestamp(self._get_partition_projection_start()),
+            pd.Timestamp.today().normalize()
+            + pd.DateOffset(years=PARTITION_PROJECTION_FUTURE_YEARS),
+        )
+
+    def get_partition_projection_parameters(self) -> Dict[str, str]:
+        derived_partition = self.get_derived_partition()
+        name = derived_partition.partition_name()
+        _, projection_format, interval_unit = DERIVED_PARTITION_FORMATS[
+            derived_partition.granularity
+        ]
+        start = self._get_partition_projection_start()
+        return {
+            "projection.enabled": "true",
+            f"projection.{name}.type": "date",
+            f"projection.{name}.format": projection_format,
+            f"projection.{name}.range": f"{start},NOW+{PARTITION_PROJECTION_FUTURE_YEARS}YEARS",
+            f"projection.{name}.interval": "1",
+            f"projection.{name}.interval.unit": interval_unit,
+        }
+
+    def _get_partition_projection_start(self) -> str:
+        return date.fromisoformat(PARTITION_PROJECTION_START_DATE).strftime(
+            self.get_derived_partition_format()
+        )
+
     def get_partition_indexes(self) -> List[int]:
         sorted_cols = self.get_partition_columns()
         return [column.partition_index for column in sorted_cols]
 
     def get_data_types(self) -> Set[str]:
-        return {column.data_type for column in self.columns}
+        return set(self.get_column_lookup().data_types)
 
     def get_columns_by_type(self, d_type: StrEnum) -> List[Column]:
-        return [column for column in self.columns if column.is_of_data_type(d_type)]
+        return list(self.get_column_lookup().get_columns_by_type(d_type))
 
     def get_column_names_by_type(self, d_type: StrEnum) -> List[str]:
         return [
-            column.name for column in self.columns if column.is_of_data_type(d_type)
+            column.name
+            for column in self.get_column_lookup().get_columns_by_type(d_type)
         ]
 
     def get_non_partition_columns_for_glue(self) -> List[dict]:
@@ -77,19 +237,22 @@ class Schema(BaseModel):
         ]
 
     def get_partition_columns_for_glue(self) -> List[dict]:
-        return [
+        partition_columns = [
             self.convert_column_to_glue_format(col)
             for col in self.get_partition_columns()
         ]
+        derived_partition = self.get_derived_partition()
+        if derived_partition is not None:
+            partition_columns.append(
+                {"Name": derived_partition.partition_name(), "Type": "string"}
+            )
+        return partition_columns
 
     def convert_column_to_glue_format(self, column: List[Column]):
         return {"Name": column.name, "Type": column.data_type}
 
     def get_partition_columns(self) -> List[Column]:
-        return sorted(
-            [column for column in self.columns if column.partition_index is not None],
-            key=lambda x: x.partition_index,
-        )
+        return list(self.get_column_lookup().partition_columns)
 
     def generate_storage_schema(self) -> pa.schema:
         return pa.schema(
@@ -100,9 +263,5 @@ class Schema(BaseModel):
         )
 
     def pandera_validate(self, df, **kwargs):
-        pandera_columns = {
-            col.name: col.to_pandera_column()
-            for col in self.columns
-        }
-        pandera_schema = pandera.DataFrameSchema(metadata=self.metadata, columns=pandera_columns)
+        pandera_schema = self.get_column_lookup().get_pandera_schema(self.metadata)
         return pandera_schema.validate(df, **kwargs)
@@ -1,7 +1,15 @@
 from typing import Dict, List, Optional
 
+from api.common.config.constants import MAX_PARTITIONS_PER_CHUNK
 from api.domain.dataset_metadata import DatasetMetadata
-from rapid.items.schema import UpdateBehaviour, Owner
+from rapid.items.schema import (
+    DerivedPartition,
+    InvalidRows,
+    PartitionOverflow,
+    SortMethod,
+    UpdateBehaviour,
+    Owner,
+)
 
 SENSITIVITY = "sensitivity"
 DESCRIPTION = "description"
@@ -10,6 +18,13 @@ KEY_ONLY_TAGS = "key_only_tags"
 OWNERS = "owners"
 UPDATE_BEHAVIOUR = "update_behaviour"
 IS_LATEST_VERSION = "is_latest_version"
+MAX_PARTITIONS = "max_partitions"
+PARTITION_OVERFLOW = "partition_overflow"
+KEY_COLUMNS = "key_columns"
+PARTITION_BY = "partition_by"
+SORT_BY = "sort_by"
+SORT_METHOD = "sort_method"
+INVALID_ROWS = "invalid_rows"
 
 
 class SchemaMetadata(DatasetMetadata):
@@ -20,6 +35,13 @@ class SchemaMetadata(DatasetMetadata):
     owners: Optional[List[Owner]] = None
     update_behaviour: str = UpdateBehaviour.APPEND
     is_latest_version: bool = True
+    max_partitions: Optional[int] = None
+    partition_overflow: str = PartitionOverflow.WARN
+    key_columns: Optional[List[str]] = None
+    partition_by: Optional[DerivedPartition] = None
+    sort_by: Optional[List[str]] = None
+    sort_method: str = SortMethod.LINEAR
+    invalid_rows: str = InvalidRows.REJECT
 
     def get_sensitivity(self) -> str:
         return self.sensitivity
@@ -39,6 +61,27 @@ class SchemaMetadata(DatasetMetadata):
     def get_is_latest_version(self) -> bool:
         return self.is_latest_version
 
+    def get_max_partitions(self) -> int:
+        return self.max_partitions or MAX_PARTITIONS_PER_CHUNK
+
+    def get_partition_overflow(self) -> str:
+        return self.partition_overflow
+
+    def get_key_columns(self) -> List[str]:
+        return self.key_columns or []
+
+    def get_partition_by(self) -> Optional[DerivedPartition]:
+        return self.partition_by
+
+    def get_sort_by(self) -> List[str]:
+        return self.sort_by or []
+
+    def get_sort_method(self) -> str:
+        return self.sort_method
+
+    def get_invalid_rows(self) -> str:
+        return self.invalid_rows
+
     def remove_duplicates(self):
         updated_key_only_list = []
 
@@ -1,11 +1,12 @@
-from typing import Tuple, Callable, List
+from typing import Any, Tuple, Callable, List
 
 import pandas as pd
 
 
 class ValidationContext:
     def __init__(self, df: pd.DataFrame):
-        self._error_context: List[str] = list()
+        # Error messages, or failures that are merged with the failures of other chunks
+        self._error_context: List[Any] = list()
         self._df: pd.DataFrame = df
 
     def pipe(
@@ -25,5 +26,5 @@ class ValidationContext:
     def has_errors(self) -> bool:
         return len(self._error_context) > 0
 
-    def errors(self) -> List[str]:
+    def errors(self) -> List[Any]:
         return self._error_context
@@ -24,7 +24,9 @@ from api.common.config.docs import (
     VERSION,
 )
 from api.common.config.constants import BASE_API_PATH
+from api.common.ingest_executor import ingest_executor
 from api.common.logger import AppLogger, init_logger
+from api.common.spool import spool
 from api.common.custom_exceptions import (
     UserError,
     AWSServiceError,
@@ -33,7 +35,7 @@ from api.common.custom_exceptions import (
 from api.common.utilities import strtobool
 from api.controller.auth import auth_router
 from api.controller.client import client_router
-from api.controller.datasets import datasets_router
+from api.controller.datasets import append_buffer_service, datasets_router
 from api.controller.jobs import jobs_router
 from api.controller.layers import layers_router
 from api.controller.permissions import permissions_router
@@ -79,6 +81,14 @@ app.include_router(layers_router)
 @app.on_event("startup")
 async def startup_event():
     init_logger()
+    spool.reap_orphans()
+    append_buffer_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    append_buffer_service.stop()
+    ingest_executor.shutdown()
 
 
 @app.middleware("http")
@@ -47,7 +47,9 @@ def add_exception_handlers(app: FastAPI) -> None:
             )
         else:
             return JSONResponse(
-                content={"details": exc.message}, status_code=exc.status_code
+                content={"details": exc.message},
+                status_code=exc.status_code,
+                headers=getattr(exc, "headers", None),
             )
 
     @app.exception_handler(Exception)
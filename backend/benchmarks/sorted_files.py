@@ -0,0 +1,169 @@
+"""
+Estimates the bytes Athena scans for selective queries on files written unsorted, sorted and
+Z-ordered. Athena only reads the columns a query uses from the row groups whose min/max
+statistics can match its filters, so the estimate is the compressed size of those column chunks.
+
+Run from the backend directory with:
+
+    python -m benchmarks.sorted_files
+"""
+
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from api.application.services.partitioning_service import (
+    encode_partitions,
+    generate_partitioned_data,
+)
+from api.domain.schema import Schema
+from api.domain.schema_metadata import SchemaMetadata
+from rapid.items.schema import Column, Owner
+
+ROW_COUNT = 1_000_000
+QUERY_COUNT = 20
+
+LAYOUTS = {
+    "unsorted": (None, "LINEAR"),
+    "sorted by customer_id": (["customer_id"], "LINEAR"),
+    "z-ordered": (["customer_id", "purchase_time"], "ZORDER"),
+}
+
+# Whether a query can match a row group, given the min/max statistics of each of its columns
+Filter = Callable[[Dict[str, tuple]], bool]
+
+
+def build_schema(sort_by: Optional[List[str]], sort_method: str) -> Schema:
+    return Schema(
+        metadata=SchemaMetadata(
+            layer="raw",
+            domain="benchmark",
+            dataset="purchases",
+            sensitivity="PUBLIC",
+            owners=[Owner(name="owner", email="owner@email.com")],
+            sort_by=sort_by,
+            sort_method=sort_method,
+        ),
+        columns=[
+            Column(
+                name="customer_id",
+                partition_index=None,
+                data_type="bigint",
+                allow_null=False,
+            ),
+            Column(
+                name="purchase_time",
+                partition_index=None,
+                data_type="bigint",
+                allow_null=False,
+            ),
+            Column(
+                name="amount",
+                partition_index=None,
+                data_type="double",
+                allow_null=False,
+            ),
+        ],
+    )
+
+
+def build_chunk() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "customer_id": rng.integers(0, 1_000_000, ROW_COUNT),
+            # Seconds within a year
+            "purchase_time": rng.integers(0, 365 * 24 * 60 * 60, ROW_COUNT),
+            "amount": rng.random(ROW_COUNT) * 100,
+        }
+    )
+
+
+def build_queries() -> Dict[str, List[tuple]]:
+    rng = np.random.default_rng(1)
+    customers = rng.integers(0, 1_000_000, QUERY_COUNT)
+    days = rng.integers(0, 300, QUERY_COUNT)
+
+    def customer_filter(customer: int) -> Filter:
+        return lambda bounds: _overlaps(bounds["customer_id"], customer, customer)
+
+    def customers_in_month_filter(customer: int, day: int) -> Filter:
+        start = int(day) * 24 * 60 * 60
+        return lambda bounds: _overlaps(
+            bounds["customer_id"], customer, customer + 10_000
+        ) and _overlaps(bounds["purchase_time"], start, start + 30 * 24 * 60 * 60)
+
+    def month_filter(day: int) -> Filter:
+        start = int(day) * 24 * 60 * 60
+        return lambda bounds: _overlaps(
+            bounds["purchase_time"], start, start + 30 * 24 * 60 * 60
+        )
+
+    return {
+        "customer_id = x": [
+            (customer_filter(customer), ["customer_id", "amount"])
+            for customer in customers
+        ],
+        "1% of customers in a month": [
+            (
+                customers_in_month_filter(customer, day),
+                ["customer_id", "purchase_time", "amount"],
+            )
+            for customer, day in zip(customers, days)
+        ],
+        "purchases in a month": [
+            (month_filter(day), ["purchase_time", "amount"]) for day in days
+        ],
+    }
+
+
+def _overlaps(bounds: tuple, low: int, high: int) -> bool:
+    return bounds[0] <= high and bounds[1] >= low
+
+
+def bytes_scanned(metadata: pq.FileMetaData, row_filter: Filter, columns) -> int:
+    names = metadata.schema.names
+    scanned = 0
+    for index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(index)
+        bounds = {
+            name: (
+                row_group.column(position).statistics.min,
+                row_group.column(position).statistics.max,
+            )
+            for position, name in enumerate(names)
+        }
+        if row_filter(bounds):
+            scanned += sum(
+                row_group.column(names.index(column)).total_compressed_size
+                for column in columns
+            )
+    return scanned
+
+
+def main():
+    chunk = build_chunk()
+    queries = build_queries()
+    print(f"{'layout':<24} {'query':<28} {'MB scanned':>12} {'of file':>9}")
+    for layout, (sort_by, sort_method) in LAYOUTS.items():
+        schema = build_schema(sort_by, sort_method)
+        partitions = generate_partitioned_data(schema, chunk.copy())
+        content = encode_partitions(schema, partitions)[0].content
+        metadata = pq.read_metadata(BytesIO(content))
+        for query, filters in queries.items():
+            scanned = np.mean(
+                [
+                    bytes_scanned(metadata, row_filter, columns)
+                    for row_filter, columns in filters
+                ]
+            )
+            print(
+                f"{layout:<24} {query:<28} {scanned / 1e6:>12.2f} {scanned / len(content):>9.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Times the validation of a chunk of data against schemas with thousands of columns.
+
+Run from the backend directory with:
+
+    python -m benchmarks.wide_schema
+"""
+
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from api.application.services.dataset_validation import build_validated_dataframe
+from api.domain.data_types import DateType, extract_athena_types
+from api.domain.schema import Schema
+from api.domain.schema_metadata import SchemaMetadata
+from rapid.items.schema import Column, Owner
+
+COLUMN_COUNTS = [1_000, 5_000]
+ROW_COUNT = 1_000
+REPEATS = 3
+
+# Cycle through the common column types of the sensor datasets
+COLUMN_TYPES = ["int", "double", "string", "boolean"]
+
+
+def build_schema(column_count: int) -> Schema:
+    columns = [
+        Column(
+            name="reading_date",
+            partition_index=0,
+            data_type="date",
+            format="%Y-%m-%d",
+            allow_null=False,
+        )
+    ]
+    for index in range(column_count - 1):
+        columns.append(
+            Column(
+                name=f"sensor_{index}",
+                partition_index=None,
+                data_type=COLUMN_TYPES[index % len(COLUMN_TYPES)],
+                allow_null=True,
+            )
+        )
+    return Schema(
+        metadata=SchemaMetadata(
+            layer="raw",
+            domain="benchmark",
+            dataset=f"wide_{column_count}",
+            sensitivity="PUBLIC",
+            owners=[Owner(name="owner", email="owner@email.com")],
+        ),
+        columns=columns,
+    )
+
+
+def build_chunk(schema: Schema) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {"reading_date": ["2024-01-01"] * ROW_COUNT}
+    for column in schema.columns[1:]:
+        if column.data_type == "int":
+            data[column.name] = rng.integers(0, 1_000, ROW_COUNT)
+        elif column.data_type == "double":
+            data[column.name] = rng.random(ROW_COUNT)
+        elif column.data_type == "string":
+            data[column.name] = rng.choice(["low", "medium", "high"], ROW_COUNT)
+        else:
+            data[column.name] = rng.choice([True, False], ROW_COUNT)
+    return pd.DataFrame(data)
+
+
+def best_time(function: Callable[[], object]) -> float:
+    timings: List[float] = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'columns':>8} {'stage':<28} {'seconds':>10}")
+    for column_count in COLUMN_COUNTS:
+        schema = build_schema(column_count)
+        chunk = build_chunk(schema)
+        stages = {
+            "schema lookups": lambda: [
+                (
+                    schema.get_partition_columns(),
+                    schema.get_columns_by_type(DateType),
+                    schema.get_column_names(),
+                )
+                for _ in range(100)
+            ],
+            "extract athena types": lambda: extract_athena_types(chunk),
+            "validate chunk": lambda: build_validated_dataframe(schema, chunk.copy()),
+        }
+        for stage, function in stages.items():
+            print(f"{column_count:>8} {stage:<28} {best_time(function):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
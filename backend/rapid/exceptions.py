@@ -8,6 +8,30 @@ class JobFailedException(Exception):
         self.data = data
 
 
+class JobCancelledException(Exception):
+    def __init__(self, message, data):
+        self.message = message
+        self.data = data
+
+
+class JobCancelFailedException(Exception):
+    def __init__(self, message, data):
+        self.message = message
+        self.data = data
+
+
+class JobRetryFailedException(Exception):
+    def __init__(self, message, data):
+        self.message = message
+        self.data = data
+
+
+class DatasetReprocessFailedException(Exception):
+    def __init__(self, message, data):
+        self.message = message
+        self.data = data
+
+
 class UnableToFetchJobStatusException(Exception):
     def __init__(self, message, data):
         self.message = message
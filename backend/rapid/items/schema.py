@@ -14,6 +14,36 @@ class SensitivityLevel(StrEnum):
 class UpdateBehaviour(StrEnum):
     APPEND = "APPEND"
     OVERWRITE = "OVERWRITE"
+    UPSERT = "UPSERT"
+
+
+class PartitionOverflow(StrEnum):
+    REJECT = "REJECT"
+    WARN = "WARN"
+
+
+class InvalidRows(StrEnum):
+    REJECT = "REJECT"
+    QUARANTINE = "QUARANTINE"
+
+
+class PartitionGranularity(StrEnum):
+    YEAR = "YEAR"
+    MONTH = "MONTH"
+    DAY = "DAY"
+
+
+class SortMethod(StrEnum):
+    LINEAR = "LINEAR"
+    ZORDER = "ZORDER"
+
+
+class DerivedPartition(BaseModel):
+    column: str
+    granularity: str = "DAY"
+
+    def partition_name(self) -> str:
+        return f"{self.column}_{self.granularity.lower()}"
 
 
 class Owner(BaseModel):
@@ -35,6 +65,13 @@ class SchemaMetadata(BaseModel):
     description: Optional[str] = ""
     update_behaviour: Optional[str] = "APPEND"
     is_latest_version: Optional[bool] = True
+    max_partitions: Optional[int] = None
+    partition_overflow: Optional[str] = "WARN"
+    key_columns: Optional[List[str]] = None
+    partition_by: Optional[DerivedPartition] = None
+    sort_by: Optional[List[str]] = None
+    sort_method: Optional[str] = "LINEAR"
+    invalid_rows: Optional[str] = "REJECT"
 
 
 class Column(BaseModel):
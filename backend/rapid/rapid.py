@@ -1,12 +1,15 @@
 import json
+import tempfile
 import time
 import requests
 
 from datetime import datetime
-from typing import Dict, Optional
-from io import StringIO
+from itertools import chain
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+from io import BytesIO, StringIO
 
 import pandas as pd
+import pyarrow as pa
 
 from pandas import DataFrame
 
@@ -17,7 +20,10 @@ from rapid.utils.constants import TIMEOUT_PERIOD
 from rapid.exceptions import (
     DataFrameUploadFailedException,
     DataFrameUploadValidationException,
+    JobCancelFailedException,
+    JobCancelledException,
     JobFailedException,
+    JobRetryFailedException,
     SchemaGenerationFailedException,
     SchemaCreateFailedException,
     SchemaUpdateFailedException,
@@ -25,6 +31,7 @@ from rapid.exceptions import (
     UnableToFetchJobStatusException,
     DatasetInfoFailedException,
     DatasetNotFoundException,
+    DatasetReprocessFailedException,
     InvalidPermissionsException,
     SubjectAlreadyExistsException,
     SubjectNotFoundException,
@@ -98,6 +105,7 @@ class Rapid:
 
         Raises:
             rapid.exceptions.JobFailedException: If the job outcome failed.
+            rapid.exceptions.JobCancelledException: If the job was cancelled.
         """
         while True:
             progress = self.fetch_job_progress(_id)
@@ -106,8 +114,60 @@ class Rapid:
                 return None
             if status == "FAILED":
                 raise JobFailedException("Upload failed", progress)
+            if status == "CANCELLED":
+                raise JobCancelledException("Upload cancelled", progress)
             time.sleep(interval)
 
+    def retry_job(self, _id: str, wait_to_complete: bool = True):
+        """
+        Makes a POST request to the API to resume a failed upload job from the raw file it archived.
+
+        Args:
+            _id (str): The ID of the failed upload job to retry.
+            wait_to_complete (bool, optional): Whether to wait for the retried job to complete. Defaults to True.
+
+        Returns:
+            The ID of the retried job.
+
+        Raises:
+            rapid.exceptions.JobRetryFailedException: If the job cannot be retried.
+            rapid.exceptions.JobFailedException: If the retried job failed.
+        """
+        url = f"{self.auth.url}/jobs/{_id}/retry"
+        response = requests.post(
+            url, headers=self.generate_headers(), timeout=TIMEOUT_PERIOD
+        )
+        data = json.loads(response.content.decode("utf-8"))
+        if response.status_code != 202:
+            raise JobRetryFailedException("Could not retry the job", data)
+        job_id = data["details"]["job_id"]
+        if wait_to_complete:
+            self.wait_for_job_outcome(job_id)
+        return job_id
+
+    def cancel_job(self, _id: str):
+        """
+        Makes a POST request to the API to cancel an upload job in progress. The upload stops at its next
+        chunk of data or step and removes the data it has written.
+
+        Args:
+            _id (str): The ID of the upload job to cancel.
+
+        Returns:
+            The ID of the cancelled job.
+
+        Raises:
+            rapid.exceptions.JobCancelFailedException: If the job cannot be cancelled.
+        """
+        url = f"{self.auth.url}/jobs/{_id}/cancel"
+        response = requests.post(
+            url, headers=self.generate_headers(), timeout=TIMEOUT_PERIOD
+        )
+        data = json.loads(response.content.decode("utf-8"))
+        if response.status_code != 202:
+            raise JobCancelFailedException("Could not cancel the job", data)
+        return data["details"]["job_id"]
+
     def download_dataframe(
         self,
         layer: str,
@@ -187,6 +247,178 @@ class Rapid:
             files=self.convert_dataframe_for_file_upload(df),
             timeout=TIMEOUT_PERIOD,
         )
+        return self._handle_upload_response(
+            response, layer, domain, dataset, wait_to_complete
+        )
+
+    def upload_record_batches(
+        self,
+        layer: str,
+        domain: str,
+        dataset: str,
+        batches: Union[pa.RecordBatchReader, Iterable[pa.RecordBatch]],
+        wait_to_complete: bool = True,
+    ):
+        """
+        Uploads Arrow record batches to a specified dataset in the API as an Arrow IPC stream.
+        Each batch is written to a temporary file as soon as it is produced, so the data is never held in memory
+        as a whole, and the file is sent as the body of the request, which the API reads as it is received.
+
+        Args:
+            layer (str): The layer of the dataset to upload the record batches to.
+            domain (str): The domain of the dataset to upload the record batches to.
+            dataset (str): The name of the dataset to upload the record batches to.
+            batches (RecordBatchReader | Iterable[RecordBatch]): The record batches to upload, all sharing one schema.
+            wait_to_complete (bool, optional): Whether to wait for the upload job to complete before returning. Defaults to True.
+
+        Raises:
+            rapid.exceptions.DataFrameUploadValidationException: If the record batches' schema is incorrect.
+            rapid.exceptions.DataFrameUploadFailedException: If an unexpected error occurs while uploading the record batches.
+            rapid.exceptions.DatasetNotFoundException: If the specified dataset does not exist.
+
+        Returns:
+            If wait_to_complete is True, returns "Success" if the upload is successful.
+            If wait_to_complete is False, returns the ID of the upload job if the upload is accepted.
+        """
+        url = f"{self.auth.url}/datasets/{layer}/{domain}/{dataset}"
+        filename = f"rapid-sdk-{int(datetime.now().timestamp())}.arrows"
+        # Sent from a file rather than as it is generated, as the API needs the length of the body up front
+        with self.write_record_batches_for_file_upload(batches) as body:
+            response = requests.post(
+                url,
+                headers={
+                    **self.generate_headers(is_file=True),
+                    "Content-Type": "application/vnd.apache.arrow.stream",
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                },
+                data=body,
+                timeout=TIMEOUT_PERIOD,
+            )
+        return self._handle_upload_response(
+            response, layer, domain, dataset, wait_to_complete
+        )
+
+    def append_rows(
+        self,
+        layer: str,
+        domain: str,
+        dataset: str,
+        rows: Union[DataFrame, pa.Table, List[Dict]],
+    ) -> int:
+        """
+        Appends a small batch of rows to a specified dataset in the API. The rows are buffered by the API and
+        written to the dataset together with the rows of other appends, so this suits frequent small batches
+        of rows that would otherwise each be uploaded as a file.
+
+        Args:
+            layer (str): The layer of the dataset to append the rows to.
+            domain (str): The domain of the dataset to append the rows to.
+            dataset (str): The name of the dataset to append the rows to.
+            rows (DataFrame | Table | list[dict]): The rows to append, at most 10,000 at once.
+
+        Raises:
+            rapid.exceptions.DataFrameUploadFailedException: If the rows are invalid or an unexpected error occurs while appending them.
+            rapid.exceptions.DatasetNotFoundException: If the specified dataset does not exist.
+
+        Returns:
+            The number of rows buffered for the dataset, including the appended rows.
+        """
+        url = f"{self.auth.url}/datasets/{layer}/{domain}/{dataset}/append"
+        if isinstance(rows, list):
+            response = requests.post(
+                url,
+                headers=self.generate_headers(),
+                data=json.dumps({"rows": rows}, default=str),
+                timeout=TIMEOUT_PERIOD,
+            )
+        else:
+            table = (
+                pa.Table.from_pandas(rows, preserve_index=False)
+                if isinstance(rows, DataFrame)
+                else rows
+            )
+            sink = BytesIO()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            response = requests.post(
+                url,
+                headers={
+                    **self.generate_headers(is_file=True),
+                    "Content-Type": "application/vnd.apache.arrow.stream",
+                },
+                data=sink.getvalue(),
+                timeout=TIMEOUT_PERIOD,
+            )
+        data = json.loads(response.content.decode("utf-8"))
+
+        if response.status_code == 202:
+            return data["details"]["buffered_rows"]
+        elif response.status_code == 404:
+            raise DatasetNotFoundException(
+                f"Could not find dataset: {layer}/{domain}/{dataset}", data
+            )
+        raise DataFrameUploadFailedException(
+            "Encountered an unexpected error, could not append rows",
+            data["details"],
+        )
+
+    def reprocess_dataset(
+        self,
+        layer: str,
+        domain: str,
+        dataset: str,
+        source_version: int,
+        raw_files: Optional[List[str]] = None,
+        version: Optional[int] = None,
+        wait_to_complete: bool = True,
+    ) -> List[str]:
+        """
+        Makes a POST request to the API to process the raw files uploaded to one version of a dataset into
+        another version, e.g.: after a schema update, without uploading the files again.
+
+        Args:
+            layer (str): The layer of the dataset.
+            domain (str): The domain of the dataset.
+            dataset (str): The name of the dataset.
+            source_version (int): The version of the dataset that the files were uploaded to.
+            raw_files (list[str], optional): The raw files to process. Defaults to every file of the source version.
+            version (int, optional): The version to process the files into. Defaults to the latest version.
+            wait_to_complete (bool, optional): Whether to wait for every job to complete. Defaults to True.
+
+        Returns:
+            The IDs of the upload jobs, one for each processed file.
+
+        Raises:
+            rapid.exceptions.DatasetReprocessFailedException: If the files cannot be processed.
+            rapid.exceptions.JobFailedException: If processing one of the files failed.
+        """
+        url = f"{self.auth.url}/datasets/{layer}/{domain}/{dataset}/reprocess"
+        response = requests.post(
+            url,
+            headers=self.generate_headers(),
+            params={"version": version},
+            data=json.dumps({"source_version": source_version, "raw_files": raw_files}),
+            timeout=TIMEOUT_PERIOD,
+        )
+        data = json.loads(response.content.decode("utf-8"))
+        if response.status_code != 202:
+            raise DatasetReprocessFailedException(
+                "Could not reprocess the dataset", data
+            )
+        job_ids = data["details"]["job_ids"]
+        if wait_to_complete:
+            for job_id in job_ids:
+                self.wait_for_job_outcome(job_id)
+        return job_ids
+
+    def _handle_upload_response(
+        self,
+        response: requests.Response,
+        layer: str,
+        domain: str,
+        dataset: str,
+        wait_to_complete: bool,
+    ):
         data = json.loads(response.content.decode("utf-8"))
 
         if response.status_code == 202:
@@ -208,6 +440,57 @@ class Rapid:
                 data["details"],
             )
 
+    def validate_dataframe(
+        self,
+        layer: str,
+        domain: str,
+        dataset: str,
+        df: DataFrame,
+        fail_fast: bool = False,
+        sample_rows: Optional[int] = None,
+    ):
+        """
+        Validates a pandas DataFrame against the schema of a specified dataset in the API without uploading it.
+
+        Args:
+            layer (str): The layer of the dataset to validate the DataFrame against.
+            domain (str): The domain of the dataset to validate the DataFrame against.
+            dataset (str): The name of the dataset to validate the DataFrame against.
+            df (DataFrame): The pandas DataFrame to validate.
+            fail_fast (bool, optional): Whether to stop at the first chunk of the data with errors. Defaults to False.
+            sample_rows (int, optional): Only validate this many rows from the start of the DataFrame. Defaults to None.
+
+        Raises:
+            rapid.exceptions.DataFrameUploadFailedException: If an unexpected error occurs while validating the DataFrame.
+            rapid.exceptions.DatasetNotFoundException: If the specified dataset does not exist.
+
+        Returns:
+            A dictionary of whether the DataFrame is valid, the number of rows validated and any validation errors.
+        """
+        url = f"{self.auth.url}/datasets/{layer}/{domain}/{dataset}/validate"
+        params = {"fail_fast": fail_fast}
+        if sample_rows is not None:
+            params["sample_rows"] = sample_rows
+        response = requests.post(
+            url,
+            headers=self.generate_headers(is_file=True),
+            params=params,
+            files=self.convert_dataframe_for_file_upload(df),
+            timeout=TIMEOUT_PERIOD,
+        )
+        data = json.loads(response.content.decode("utf-8"))
+
+        if response.status_code == 200:
+            return data["details"]
+        elif response.status_code == 404:
+            raise DatasetNotFoundException(
+                f"Could not find dataset: {layer}/{domain}/{dataset}", data
+            )
+        raise DataFrameUploadFailedException(
+            "Encountered an unexpected error, could not validate dataframe",
+            data["details"],
+        )
+
     def fetch_dataset_info(self, layer: str, domain: str, dataset: str):
         """
         Fetches information about the specified dataset in the API.
@@ -260,6 +543,37 @@ class Rapid:
             )
         }
 
+    def write_record_batches_for_file_upload(
+        self, batches: Union[pa.RecordBatchReader, Iterable[pa.RecordBatch]]
+    ) -> BinaryIO:
+        """
+        Writes Arrow record batches to a temporary file as an Arrow IPC stream, one record batch at a time.
+
+        Args:
+            batches (RecordBatchReader | Iterable[RecordBatch]): The record batches to write.
+
+        Returns:
+            The temporary file, positioned at its start, which is removed once it is closed.
+        """
+        schema = getattr(batches, "schema", None)
+        iterator = iter(batches)
+        if schema is None:
+            first_batch = next(iterator, None)
+            if first_batch is None:
+                raise ValueError("At least one record batch must be provided")
+            schema = first_batch.schema
+            iterator = chain([first_batch], iterator)
+        file = tempfile.TemporaryFile()
+        try:
+            with pa.ipc.new_stream(pa.PythonFile(file, mode="w"), schema) as writer:
+                for batch in iterator:
+                    writer.write_batch(batch)
+            file.seek(0)
+        except Exception:
+            file.close()
+            raise
+        return file
+
     def generate_schema(
         self, df: DataFrame, layer: str, domain: str, dataset: str, sensitivity: str
     ) -> Schema:
@@ -135,6 +135,35 @@ class TestQuery:
 
         assert result.equals(query_result_df)
 
+    @patch("api.adapter.athena_adapter.QUERY_RESULT_CHUNK_ROWS", 2)
+    def test_returns_query_result_in_chunks(self):
+        chunks = iter(
+            [pd.DataFrame({"column1": [1, 2]}), pd.DataFrame({"column1": [3]})]
+        )
+        self.mock_athena_read_sql_query.return_value = chunks
+
+        result = self.athena_adapter.query_chunks(
+            DatasetMetadata("layer", "my", "table", 1), Query(limit=3)
+        )
+
+        self.mock_athena_read_sql_query.assert_called_once_with(
+            sql="SELECT * FROM layer_my_table_1 LIMIT 3",
+            database="my_database",
+            ctas_approach=False,
+            workgroup="rapid_athena_workgroup",
+            s3_output="out",
+            chunksize=2,
+        )
+        assert result == chunks
+
+    def test_query_in_chunks_fails(self):
+        self.mock_athena_read_sql_query.side_effect = QueryFailed("Some error")
+
+        with pytest.raises(UserError, match="Query failed to execute: Some error"):
+            self.athena_adapter.query_chunks(
+                DatasetMetadata("layer", "my", "table", 1), Query()
+            )
+
 
 class TestLargeQuery:
     def setup_method(self):
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from unittest.mock import Mock, call, patch
 
 import pytest
@@ -6,15 +7,20 @@ from botocore.exceptions import ClientError
 
 from api.adapter.dynamodb_adapter import DynamoDBAdapter, ExpressionAttribute
 from api.common.config.auth import SubjectType
+from api.common.config.aws import SERVICE_TABLE_NAME
 from api.common.custom_exceptions import (
     AWSServiceError,
+    ConflictError,
+    JobAlreadyExistsError,
     UserError,
 )
 from api.domain.Jobs.Job import JobStatus
 from api.domain.Jobs.QueryJob import QueryJob, QueryStep
 from api.domain.Jobs.UploadJob import UploadJob, UploadStep
 from api.domain.dataset_filters import DatasetFilters
+from api.domain.dataset_lease import DatasetLease, LeaseMode, QueuedLeaseHolder
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_statistics import DatasetStatistics
 from api.domain.permission_item import PermissionItem
 from api.domain.subject_permissions import SubjectPermissions
 from api.domain.schema import Schema
@@ -658,13 +664,38 @@ class TestDynamoDBAdapterServiceTable:
                 "Domain": "domain1",
                 "Dataset": "dataset2",
                 "Version": 4,
+                "RawFilename": None,
+                "CommittedChunks": 0,
+                "CompletedSteps": [],
+                "AcceptedRows": None,
+                "QuarantinedRows": None,
                 "CreatedAt": 1000,
                 "TTL": 7777000,
             },
+            ConditionExpression=Attr("SK").not_exists(),
         )
 
         self.permissions_table.assert_not_called()
 
+    def test_store_upload_job_raises_when_the_job_already_exists(self):
+        self.service_table.put_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "ConditionalCheckFailedException"}},
+            operation_name="PutItem",
+        )
+
+        with pytest.raises(
+            JobAlreadyExistsError, match="The job with id abc-123 already exists"
+        ):
+            self.dynamo_adapter.store_upload_job(
+                UploadJob(
+                    "subject-123",
+                    "abc-123",
+                    "filename.csv",
+                    "111-222-333",
+                    DatasetMetadata("layer", "domain1", "dataset2", 4),
+                )
+            )
+
     @patch("api.domain.Jobs.Job.uuid")
     @patch("api.domain.Jobs.Job.time")
     @patch("api.domain.Jobs.QueryJob.time")
@@ -935,6 +966,159 @@ class TestDynamoDBAdapterServiceTable:
         ):
             self.dynamo_adapter.update_job(job)
 
+    def test_update_upload_job_checkpoint(self):
+        job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file1.csv",
+            "111-222-333",
+            DatasetMetadata("layer", "domain1", "dataset2", 4),
+        )
+        job.set_step(UploadStep.DATA_UPLOAD)
+        job.raw_filename = "111-222-333.csv.gz"
+        job.committed_chunks = 3
+        job.completed_steps = [UploadStep.RAW_DATA_UPLOAD]
+        job.set_row_counts(990, 10)
+
+        self.dynamo_adapter.update_upload_job(job)
+
+        self.service_table.update_item.assert_called_once_with(
+            Key={
+                "PK": "JOB",
+                "SK": "abc-123",
+            },
+            ConditionExpression="SK = :jid",
+            UpdateExpression="set #A = :a, #B = :b, #C = :c, #D = :d, #E = :e, #F = :f, #G = :g, #H = :h",
+            ExpressionAttributeNames={
+                "#A": "Step",
+                "#B": "Status",
+                "#C": "Errors",
+                "#D": "RawFilename",
+                "#E": "CommittedChunks",
+                "#F": "CompletedSteps",
+                "#G": "AcceptedRows",
+                "#H": "QuarantinedRows",
+            },
+            ExpressionAttributeValues={
+                ":a": "DATA_UPLOAD",
+                ":b": "IN PROGRESS",
+                ":c": None,
+                ":d": "111-222-333.csv.gz",
+                ":e": 3,
+                ":f": ["RAW_DATA_UPLOAD"],
+                ":g": 990,
+                ":h": 10,
+                ":jid": "abc-123",
+            },
+        )
+
+    def test_request_job_cancellation(self):
+        self.dynamo_adapter.request_job_cancellation("abc-123")
+
+        self.service_table.update_item.assert_called_once_with(
+            Key={
+                "PK": "JOB",
+                "SK": "abc-123",
+            },
+            ConditionExpression="#B = :b",
+            UpdateExpression="set #A = :a",
+            ExpressionAttributeNames={
+                "#A": "CancelRequested",
+                "#B": "Status",
+            },
+            ExpressionAttributeValues={
+                ":a": True,
+                ":b": "IN PROGRESS",
+            },
+        )
+
+    def test_request_job_cancellation_fails_when_the_job_has_finished(self):
+        self.service_table.update_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "ConditionalCheckFailedException"}},
+            operation_name="UpdateItem",
+        )
+
+        with pytest.raises(
+            UserError,
+            match="The job with id abc-123 has already finished and cannot be cancelled",
+        ):
+            self.dynamo_adapter.request_job_cancellation("abc-123")
+
+    def test_retry_upload_job(self):
+        job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file1.csv",
+            "111-222-333",
+            DatasetMetadata("layer", "domain", "dataset", 1),
+        )
+
+        self.dynamo_adapter.retry_upload_job(job)
+
+        self.service_table.update_item.assert_called_once_with(
+            Key={
+                "PK": "JOB",
+                "SK": "abc-123",
+            },
+            ConditionExpression="#B = :failed",
+            UpdateExpression="set #B = :b, #C = :c remove #D",
+            ExpressionAttributeNames={
+                "#B": "Status",
+                "#C": "Errors",
+                "#D": "CancelRequested",
+            },
+            ExpressionAttributeValues={
+                ":b": "IN PROGRESS",
+                ":c": None,
+                ":failed": "FAILED",
+            },
+        )
+
+    def test_retry_upload_job_fails_when_the_job_is_no_longer_failed(self):
+        self.service_table.update_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "ConditionalCheckFailedException"}},
+            operation_name="UpdateItem",
+        )
+        job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file1.csv",
+            "111-222-333",
+            DatasetMetadata("layer", "domain", "dataset", 1),
+        )
+
+        with pytest.raises(
+            ConflictError,
+            match="The job with id abc-123 is no longer failed and cannot be retried",
+        ):
+            self.dynamo_adapter.retry_upload_job(job)
+
+    def test_get_job_maps_the_upload_checkpoint(self):
+        self.service_table.query.return_value = {
+            "Items": [
+                {
+                    "PK": "JOB",
+                    "SK": "abc-123",
+                    "RawFileIdentifier": "111-222-333",
+                    "RawFilename": "111-222-333.csv.gz",
+                    "CommittedChunks": 3,
+                    "CompletedSteps": ["RAW_DATA_UPLOAD"],
+                    "CancelRequested": True,
+                }
+            ],
+        }
+
+        result = self.dynamo_adapter.get_job("abc-123")
+
+        assert result == {
+            "job_id": "abc-123",
+            "raw_file_identifier": "111-222-333",
+            "raw_filename": "111-222-333.csv.gz",
+            "committed_chunks": 3,
+            "completed_steps": ["RAW_DATA_UPLOAD"],
+            "cancel_requested": True,
+        }
+
     @patch("api.domain.Jobs.Job.uuid")
     def test_update_query_job(self, mock_uuid):
         mock_uuid.uuid4.return_value = "abc-123"
@@ -988,6 +1172,576 @@ class TestDynamoDBAdapterServiceTable:
         ):
             self.dynamo_adapter.update_query_job(job)
 
+    def test_get_dataset_lease(self):
+        self.service_table.get_item.return_value = {
+            "Item": {
+                "PK": "LEASE",
+                "SK": "raw/domain/dataset/1",
+                "Mode": "SHARED",
+                "Holders": {"job-1": Decimal(400)},
+                "Queue": [{"Id": "job-2", "Expiry": Decimal(500)}],
+                "Version": Decimal(3),
+                "TTL": Decimal(86900),
+            }
+        }
+
+        lease = self.dynamo_adapter.get_dataset_lease("raw/domain/dataset/1")
+
+        self.service_table.get_item.assert_called_once_with(
+            Key={"PK": "LEASE", "SK": "raw/domain/dataset/1"}
+        )
+        assert lease == DatasetLease(
+            key="raw/domain/dataset/1",
+            mode=LeaseMode.SHARED,
+            holders={"job-1": 400},
+            queue=[QueuedLeaseHolder(holder_id="job-2", expiry=500)],
+            version=3,
+        )
+
+    def test_get_dataset_lease_when_none_is_stored(self):
+        self.service_table.get_item.return_value = {}
+
+        lease = self.dynamo_adapter.get_dataset_lease("raw/domain/dataset/1")
+
+        assert lease == DatasetLease(key="raw/domain/dataset/1")
+
+    def test_store_new_dataset_lease(self):
+        lease = DatasetLease(key="raw/domain/dataset/1")
+        lease.acquire("job-1", LeaseMode.EXCLUSIVE, 100, 400)
+
+        stored = self.dynamo_adapter.store_dataset_lease(lease)
+
+        assert stored is True
+        assert lease.version == 1
+        self.service_table.put_item.assert_called_once_with(
+            Item={
+                "PK": "LEASE",
+                "SK": "raw/domain/dataset/1",
+                "Mode": "EXCLUSIVE",
+                "Holders": {"job-1": 400},
+                "Queue": [],
+                "Version": 1,
+                "TTL": 400 + 24 * 60 * 60,
+            },
+            ConditionExpression=Attr("SK").not_exists(),
+        )
+
+    def test_store_dataset_lease_conditional_on_version(self):
+        lease = DatasetLease(key="raw/domain/dataset/1", version=3)
+
+        self.dynamo_adapter.store_dataset_lease(lease)
+
+        assert self.service_table.put_item.call_args.kwargs[
+            "ConditionExpression"
+        ] == Attr("Version").eq(3)
+        assert self.service_table.put_item.call_args.kwargs["Item"]["Version"] == 4
+
+    def test_store_dataset_lease_returns_false_when_lease_has_changed(self):
+        lease = DatasetLease(key="raw/domain/dataset/1", version=3)
+        self.service_table.put_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "ConditionalCheckFailedException"}},
+            operation_name="PutItem",
+        )
+
+        stored = self.dynamo_adapter.store_dataset_lease(lease)
+
+        assert stored is False
+        assert lease.version == 3
+
+    def test_store_dataset_lease_raises_error_when_storing_fails(self):
+        lease = DatasetLease(key="raw/domain/dataset/1")
+        self.service_table.put_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "InternalServerError"}},
+            operation_name="PutItem",
+        )
+
+        with pytest.raises(
+            AWSServiceError,
+            match="Error storing the write lease for raw/domain/dataset/1",
+        ):
+            self.dynamo_adapter.store_dataset_lease(lease)
+
+    def test_get_data_version(self):
+        self.service_table.get_item.return_value = {
+            "Item": {"PK": "DATA_VERSION", "SK": "raw/domain/dataset", "Version": 7}
+        }
+
+        data_version = self.dynamo_adapter.get_data_version(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        assert data_version == 7
+        self.service_table.get_item.assert_called_once_with(
+            Key={"PK": "DATA_VERSION", "SK": "raw/domain/dataset"}
+        )
+
+    def test_get_data_version_when_the_data_has_never_changed(self):
+        self.service_table.get_item.return_value = {}
+
+        data_version = self.dynamo_adapter.get_data_version(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        assert data_version == 0
+
+    def test_increment_data_version(self):
+        self.dynamo_adapter.increment_data_version(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        self.service_table.update_item.assert_called_once_with(
+            Key={"PK": "DATA_VERSION", "SK": "raw/domain/dataset"},
+            UpdateExpression="ADD #A :a",
+            ExpressionAttributeNames={"#A": "Version"},
+            ExpressionAttributeValues={":a": 1},
+        )
+
+    def test_increment_data_version_raises_error_when_it_fails(self):
+        self.service_table.update_item.side_effect = ClientError(
+            error_response={"Error": {"Code": "InternalServerError"}},
+            operation_name="UpdateItem",
+        )
+
+        with pytest.raises(
+            AWSServiceError, match="Error incrementing the data version of layer"
+        ):
+            self.dynamo_adapter.increment_data_version(
+                DatasetMetadata("raw", "domain", "dataset", 2)
+            )
+
+    def test_get_dataset_statistics(self):
+        self.service_table.get_item.return_value = {
+            "Item": {
+                "PK": "DATASET_STATISTICS",
+                "SK": "raw/domain/dataset/2",
+                "SizeBytes": Decimal(2048),
+                "Files": Decimal(3),
+                "Rows": Decimal(150),
+                "PartitionCount": Decimal(2),
+                "Complete": True,
+            }
+        }
+
+        statistics = self.dynamo_adapter.get_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        assert statistics == DatasetStatistics(
+            size_bytes=2048, files=3, rows=150, partition_count=2, complete=True
+        )
+        self.service_table.get_item.assert_called_once_with(
+            Key={"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2"}
+        )
+
+    def test_get_dataset_statistics_when_there_are_none(self):
+        self.service_table.get_item.return_value = {}
+
+        statistics = self.dynamo_adapter.get_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        assert statistics is None
+
+    def test_list_upload_statistics(self):
+        self.service_table.query.return_value = {
+            "Items": [
+                {
+                    "PK": "DATASET_STATISTICS",
+                    "SK": "raw/domain/dataset/2/123-456",
+                    "SizeBytes": Decimal(10),
+                    "Files": Decimal(1),
+                    "Rows": Decimal(5),
+                }
+            ]
+        }
+
+        upload_statistics = self.dynamo_adapter.list_upload_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        assert upload_statistics == {
+            "123-456": DatasetStatistics(size_bytes=10, files=1, rows=5, complete=False)
+        }
+        self.service_table.query.assert_called_once_with(
+            KeyConditionExpression=Key("PK").eq("DATASET_STATISTICS")
+            & Key("SK").begins_with("raw/domain/dataset/2/"),
+        )
+
+    def test_add_dataset_statistics_checkpoints_the_job_in_the_same_transaction(
+        self,
+    ):
+        job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file.csv",
+            "123-456",
+            DatasetMetadata("raw", "domain", "dataset", 2),
+        )
+        job.committed_chunks = 3
+        statistics = DatasetStatistics(
+            size_bytes=100, files=2, rows=10, partitions={"year=2020"}
+        )
+
+        self.dynamo_adapter.add_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2), "123-456", statistics, job
+        )
+
+        self.service_table.meta.client.transact_write_items.assert_called_once_with(
+            TransactItems=[
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2",
+                        },
+                        "UpdateExpression": "ADD #A :a, #B :b, #C :c",
+                        "ExpressionAttributeNames": {
+                            "#A": "SizeBytes",
+                            "#B": "Files",
+                            "#C": "Rows",
+                        },
+                        "ExpressionAttributeValues": {":a": 100, ":b": 2, ":c": 10},
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2/123-456",
+                        },
+                        "UpdateExpression": "ADD #A :a, #B :b, #C :c, #D :d",
+                        "ExpressionAttributeNames": {
+                            "#A": "SizeBytes",
+                            "#B": "Files",
+                            "#C": "Rows",
+                            "#D": "Partitions",
+                        },
+                        "ExpressionAttributeValues": {
+                            ":a": 100,
+                            ":b": 2,
+                            ":c": 10,
+                            ":d": {"year=2020"},
+                        },
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {"PK": "JOB", "SK": "abc-123"},
+                        "UpdateExpression": "set #A = :a",
+                        "ExpressionAttributeNames": {"#A": "CommittedChunks"},
+                        "ExpressionAttributeValues": {":a": 3},
+                    }
+                },
+            ]
+        )
+
+    def test_remove_upload_statistics(self):
+        removed = self.dynamo_adapter.remove_upload_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2),
+            "123-456",
+            DatasetStatistics(
+                size_bytes=100, files=2, rows=10, partitions={"year=2020"}
+            ),
+        )
+
+        assert removed is True
+        self.service_table.meta.client.transact_write_items.assert_called_once_with(
+            TransactItems=[
+                {
+                    "Delete": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2/123-456",
+                        },
+                        "ConditionExpression": "attribute_exists(SK)",
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2",
+                        },
+                        "UpdateExpression": "ADD #A :a, #B :b, #C :c",
+                        "ExpressionAttributeNames": {
+                            "#A": "SizeBytes",
+                            "#B": "Files",
+                            "#C": "Rows",
+                        },
+                        "ExpressionAttributeValues": {":a": -100, ":b": -2, ":c": -10},
+                    }
+                },
+            ]
+        )
+
+    @patch("api.adapter.dynamodb_adapter.time.sleep")
+    def test_add_dataset_statistics_retries_transactions_that_conflict(
+        self, mock_sleep
+    ):
+        conflict = ClientError(
+            error_response={
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [
+                    {"Code": "TransactionConflict"},
+                    {"Code": "None"},
+                ],
+            },
+            operation_name="TransactWriteItems",
+        )
+        self.service_table.meta.client.transact_write_items.side_effect = [
+            conflict,
+            conflict,
+            None,
+        ]
+
+        self.dynamo_adapter.add_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2),
+            "123-456",
+            DatasetStatistics(size_bytes=100, files=2, rows=10),
+        )
+
+        assert self.service_table.meta.client.transact_write_items.call_count == 3
+        assert mock_sleep.call_count == 2
+
+    @patch("api.adapter.dynamodb_adapter.DYNAMO_TRANSACTION_ATTEMPTS", 2)
+    @patch("api.adapter.dynamodb_adapter.time.sleep")
+    def test_add_dataset_statistics_fails_when_transactions_keep_conflicting(
+        self, _mock_sleep
+    ):
+        self.service_table.meta.client.transact_write_items.side_effect = ClientError(
+            error_response={
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "TransactionConflict"}],
+            },
+            operation_name="TransactWriteItems",
+        )
+
+        with pytest.raises(
+            AWSServiceError, match="Error updating the statistics of layer"
+        ):
+            self.dynamo_adapter.add_dataset_statistics(
+                DatasetMetadata("raw", "domain", "dataset", 2),
+                "123-456",
+                DatasetStatistics(size_bytes=100, files=2, rows=10),
+            )
+
+        assert self.service_table.meta.client.transact_write_items.call_count == 2
+
+    def test_remove_upload_statistics_that_were_already_removed(self):
+        self.service_table.meta.client.transact_write_items.side_effect = ClientError(
+            error_response={
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [
+                    {"Code": "ConditionalCheckFailed"},
+                    {"Code": "None"},
+                ],
+            },
+            operation_name="TransactWriteItems",
+        )
+
+        removed = self.dynamo_adapter.remove_upload_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2),
+            "123-456",
+            DatasetStatistics(size_bytes=100, files=2, rows=10),
+        )
+
+        assert removed is False
+
+    def test_add_dataset_partitions_counts_the_partitions_it_did_not_have(self):
+        self.service_table.meta.client.batch_get_item.return_value = {
+            "Responses": {
+                SERVICE_TABLE_NAME: [{"SK": "raw/domain/dataset/2#year=2020"}]
+            }
+        }
+
+        self.dynamo_adapter.add_dataset_partitions(
+            DatasetMetadata("raw", "domain", "dataset", 2), {"year=2020", "year=2021"}
+        )
+
+        self.service_table.meta.client.transact_write_items.assert_called_once_with(
+            TransactItems=[
+                {
+                    "Put": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Item": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2#year=2021",
+                        },
+                        "ConditionExpression": "attribute_not_exists(SK)",
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2",
+                        },
+                        "UpdateExpression": "ADD #A :a",
+                        "ExpressionAttributeNames": {"#A": "PartitionCount"},
+                        "ExpressionAttributeValues": {":a": 1},
+                    }
+                },
+            ]
+        )
+
+    def test_add_dataset_partitions_added_by_a_concurrent_upload(self):
+        self.service_table.meta.client.batch_get_item.return_value = {
+            "Responses": {SERVICE_TABLE_NAME: []}
+        }
+        self.service_table.meta.client.transact_write_items.side_effect = ClientError(
+            error_response={
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [
+                    {"Code": "ConditionalCheckFailed"},
+                    {"Code": "None"},
+                ],
+            },
+            operation_name="TransactWriteItems",
+        )
+
+        self.dynamo_adapter.add_dataset_partitions(
+            DatasetMetadata("raw", "domain", "dataset", 2), {"year=2020"}
+        )
+
+        self.service_table.meta.client.transact_write_items.assert_called_once()
+
+    def test_remove_dataset_partitions(self):
+        self.dynamo_adapter.remove_dataset_partitions(
+            DatasetMetadata("raw", "domain", "dataset", 2), {"year=2020"}
+        )
+
+        self.service_table.meta.client.transact_write_items.assert_called_once_with(
+            TransactItems=[
+                {
+                    "Delete": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2#year=2020",
+                        },
+                        "ConditionExpression": "attribute_exists(SK)",
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": SERVICE_TABLE_NAME,
+                        "Key": {
+                            "PK": "DATASET_STATISTICS",
+                            "SK": "raw/domain/dataset/2",
+                        },
+                        "UpdateExpression": "ADD #A :a",
+                        "ExpressionAttributeNames": {"#A": "PartitionCount"},
+                        "ExpressionAttributeValues": {":a": -1},
+                    }
+                },
+            ]
+        )
+
+    def test_store_dataset_statistics_replaces_the_statistics_of_the_uploads(self):
+        self.service_table.query.side_effect = [
+            {
+                "Items": [
+                    {"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2/old"},
+                    {"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2/123-456"},
+                ]
+            },
+            {
+                "Items": [
+                    {
+                        "PK": "DATASET_STATISTICS",
+                        "SK": "raw/domain/dataset/2#year=2020",
+                    },
+                    {
+                        "PK": "DATASET_STATISTICS",
+                        "SK": "raw/domain/dataset/2#year=2021",
+                    },
+                ]
+            },
+        ]
+        batch = Mock()
+        batch.__enter__ = Mock(return_value=batch)
+        batch.__exit__ = Mock(return_value=None)
+        self.service_table.batch_writer.return_value = batch
+
+        self.dynamo_adapter.store_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2),
+            DatasetStatistics(size_bytes=10, files=1, rows=5, partitions={"year=2021"}),
+            {
+                "123-456": DatasetStatistics(
+                    size_bytes=10, files=1, rows=5, partitions={"year=2021"}
+                )
+            },
+        )
+
+        assert batch.delete_item.call_args_list == [
+            call(Key={"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2/old"}),
+            call(
+                Key={"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2#year=2020"}
+            ),
+        ]
+        assert batch.put_item.call_args_list == [
+            call(
+                Item={
+                    "PK": "DATASET_STATISTICS",
+                    "SK": "raw/domain/dataset/2/123-456",
+                    "SizeBytes": 10,
+                    "Files": 1,
+                    "Rows": 5,
+                    "Partitions": {"year=2021"},
+                }
+            ),
+            call(
+                Item={
+                    "PK": "DATASET_STATISTICS",
+                    "SK": "raw/domain/dataset/2#year=2021",
+                }
+            ),
+            call(
+                Item={
+                    "PK": "DATASET_STATISTICS",
+                    "SK": "raw/domain/dataset/2",
+                    "SizeBytes": 10,
+                    "Files": 1,
+                    "Rows": 5,
+                    "PartitionCount": 1,
+                    "Complete": True,
+                }
+            ),
+        ]
+
+    def test_delete_dataset_statistics_of_every_version(self):
+        self.service_table.query.return_value = {
+            "Items": [
+                {"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/1"},
+                {"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2/123-456"},
+            ]
+        }
+        batch = Mock()
+        batch.__enter__ = Mock(return_value=batch)
+        batch.__exit__ = Mock(return_value=None)
+        self.service_table.batch_writer.return_value = batch
+
+        self.dynamo_adapter.delete_dataset_statistics(
+            DatasetMetadata("raw", "domain", "dataset", 2)
+        )
+
+        self.service_table.query.assert_called_once_with(
+            KeyConditionExpression=Key("PK").eq("DATASET_STATISTICS")
+            & Key("SK").begins_with("raw/domain/dataset/"),
+        )
+        assert batch.delete_item.call_args_list == [
+            call(Key={"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/1"}),
+            call(
+                Key={"PK": "DATASET_STATISTICS", "SK": "raw/domain/dataset/2/123-456"}
+            ),
+        ]
+
 
 class TestDynamoDBAdapterSchemaTable:
     def setup_method(self):
@@ -1052,6 +1806,13 @@ class TestDynamoDBAdapterSchemaTable:
                 "key_only_tags": ["key"],
                 "owners": [{"name": "owner", "email": "owner@email.com"}],
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
                 "columns": [
                     {
                         "name": "colname1",
@@ -16,7 +16,7 @@ from api.common.custom_exceptions import (
 )
 from api.domain.dataset_metadata import DatasetMetadata
 from api.domain.schema import Schema
-from rapid.items.schema import Column
+from rapid.items.schema import Column, DerivedPartition
 from api.domain.schema_metadata import SchemaMetadata
 
 
@@ -93,6 +93,46 @@ class TestGlueAdapterTableMethods:
             ],
         )
 
+    def test_create_table_with_projected_derived_partition(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="layer",
+                domain="domain",
+                dataset="dataset",
+                version=1,
+                sensitivity="PUBLIC",
+                partition_by=DerivedPartition(column="event_date", granularity="YEAR"),
+            ),
+            columns=[
+                Column(
+                    name="event_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+        self.glue_adapter.create_table(schema)
+
+        _, kwargs = self.glue_boto_client.create_table.call_args
+        table_input = kwargs["TableInput"]
+        assert table_input["PartitionKeys"] == [
+            {"Name": "event_date_year", "Type": "string"}
+        ]
+        assert table_input["Parameters"] == {
+            "classification": "parquet",
+            "typeOfData": "file",
+            "compressionType": "none",
+            "EXTERNAL": "TRUE",
+            "projection.enabled": "true",
+            "projection.event_date_year.type": "date",
+            "projection.event_date_year.format": "yyyy",
+            "projection.event_date_year.range": "2000,NOW+10YEARS",
+            "projection.event_date_year.interval": "1",
+            "projection.event_date_year.interval.unit": "YEARS",
+        }
+
     def test_create_table_already_exists_error(self):
         self.glue_boto_client.create_table.side_effect = ClientError(
             error_response={"Error": {"Code": "AlreadyExistsException"}},
@@ -0,0 +1,42 @@
+from api.adapter.in_memory_lease_adapter import InMemoryLeaseAdapter
+from api.domain.dataset_lease import DatasetLease, LeaseMode
+
+
+class TestInMemoryLeaseAdapter:
+    def setup_method(self):
+        self.adapter = InMemoryLeaseAdapter()
+
+    def test_get_dataset_lease_returns_new_lease_when_none_is_stored(self):
+        assert self.adapter.get_dataset_lease("raw/domain/dataset/1") == DatasetLease(
+            key="raw/domain/dataset/1"
+        )
+
+    def test_store_dataset_lease_increments_the_version(self):
+        lease = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        lease.acquire("job-1", LeaseMode.SHARED, 100, 400)
+
+        assert self.adapter.store_dataset_lease(lease) is True
+
+        stored_lease = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        assert stored_lease.version == 1
+        assert stored_lease.holders == {"job-1": 400}
+
+    def test_store_dataset_lease_fails_when_changed_since_it_was_read(self):
+        first = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        second = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        first.acquire("job-1", LeaseMode.EXCLUSIVE, 100, 400)
+        second.acquire("job-2", LeaseMode.EXCLUSIVE, 100, 400)
+
+        assert self.adapter.store_dataset_lease(first) is True
+        assert self.adapter.store_dataset_lease(second) is False
+
+        stored_lease = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        assert stored_lease.holders == {"job-1": 400}
+
+    def test_stored_lease_is_not_changed_through_returned_copies(self):
+        lease = self.adapter.get_dataset_lease("raw/domain/dataset/1")
+        self.adapter.store_dataset_lease(lease)
+
+        self.adapter.get_dataset_lease("raw/domain/dataset/1").holders["job-1"] = 400
+
+        assert self.adapter.get_dataset_lease("raw/domain/dataset/1").holders == {}
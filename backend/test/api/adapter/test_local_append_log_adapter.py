@@ -0,0 +1,65 @@
+from api.adapter.local_append_log_adapter import LocalAppendLogAdapter
+
+
+class TestLocalAppendLogAdapter:
+    location = "append_log/raw/domain/dataset/1"
+
+    def test_stored_segments_are_listed_in_order(self, tmp_path):
+        adapter = LocalAppendLogAdapter(tmp_path.as_posix())
+
+        adapter.store_append_log_segment(f"{self.location}/2-1-b.arrows", b"second")
+        adapter.store_append_log_segment(f"{self.location}/1-1-a.arrows", b"first")
+        adapter.store_append_log_segment(
+            "append_log/raw/domain/other/1/3-1-c.arrows", b"other"
+        )
+
+        assert adapter.list_append_log_segments(self.location) == [
+            f"{self.location}/1-1-a.arrows",
+            f"{self.location}/2-1-b.arrows",
+        ]
+        assert (
+            adapter.retrieve_append_log_segment(f"{self.location}/1-1-a.arrows")
+            == b"first"
+        )
+
+    def test_list_segments_of_a_dataset_without_an_append_log(self, tmp_path):
+        adapter = LocalAppendLogAdapter(tmp_path.as_posix())
+
+        assert adapter.list_append_log_segments(self.location) == []
+
+    def test_partially_written_segments_are_not_listed(self, tmp_path):
+        adapter = LocalAppendLogAdapter(tmp_path.as_posix())
+        adapter.store_append_log_segment(f"{self.location}/1-1-a.arrows", b"first")
+        (tmp_path / self.location / ".2-1-b.arrows.tmp").write_bytes(b"partial")
+
+        assert adapter.list_append_log_segments(self.location) == [
+            f"{self.location}/1-1-a.arrows"
+        ]
+
+    def test_delete_segments(self, tmp_path):
+        adapter = LocalAppendLogAdapter(tmp_path.as_posix())
+        adapter.store_append_log_segment(f"{self.location}/1-1-a.arrows", b"first")
+        adapter.store_append_log_segment(f"{self.location}/2-1-b.arrows", b"second")
+
+        adapter.delete_append_log_segments(
+            [f"{self.location}/1-1-a.arrows", f"{self.location}/9-1-z.arrows"]
+        )
+
+        assert adapter.list_append_log_segments(self.location) == [
+            f"{self.location}/2-1-b.arrows"
+        ]
+
+    def test_store_retrieve_and_delete_a_flush(self, tmp_path):
+        adapter = LocalAppendLogAdapter(tmp_path.as_posix())
+        key = "append_flush/raw/domain/dataset/1.json"
+
+        assert adapter.retrieve_append_flush(key) is None
+
+        adapter.store_append_flush(key, b"flush")
+
+        assert adapter.retrieve_append_flush(key) == b"flush"
+        assert adapter.list_append_log_segments(self.location) == []
+
+        adapter.delete_append_flush(key)
+
+        assert adapter.retrieve_append_flush(key) is None
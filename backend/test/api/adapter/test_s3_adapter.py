@@ -1,19 +1,27 @@
+import io
+import tempfile
+from datetime import datetime
 from pathlib import Path
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
+import boto3
 from botocore.exceptions import ClientError
+from moto import mock_aws
 import pandas as pd
 import pytest
+import requests
+import zstandard
 
 from api.adapter.s3_adapter import S3Adapter
 from api.application.services.partitioning_service import Partition
 from api.common.config.auth import Sensitivity
-from api.common.config.aws import OUTPUT_QUERY_BUCKET
+from api.common.config.aws import AWS_REGION, OUTPUT_QUERY_BUCKET
 from api.common.custom_exceptions import (
     UserError,
     AWSServiceError,
 )
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.presigned_upload import UploadPart
 from api.domain.schema_metadata import SchemaMetadata
 from api.domain.schema import Schema
 from rapid.items.schema import Column
@@ -140,7 +148,7 @@ class TestS3AdapterUpload:
 
         self.mock_s3_client.put_object.assert_has_calls(calls)
 
-    def test_raw_data_upload(self):
+    def test_raw_data_upload_compresses_csv(self, tmp_path):
         schema_metadata = SchemaMetadata(
             layer="raw",
             domain="some",
@@ -148,17 +156,68 @@ class TestS3AdapterUpload:
             sensitivity="PUBLIC",
             version=2,
         )
+        file_path = tmp_path / "filename.csv"
+        file_path.write_bytes(b"colname1,colname2\n1,a\n2,b\n")
+        uploaded = {}
+
+        def read_upload(Fileobj, Bucket, Key):
+            uploaded[Key] = Fileobj.read()
+
+        self.mock_s3_client.upload_fileobj.side_effect = read_upload
 
         self.persistence_adapter.upload_raw_data(
             schema_metadata,
-            file_path=Path("filename.csv"),
+            file_path=file_path,
+            raw_file_identifier="123-456-789",
+        )
+
+        self.mock_s3_client.upload_file.assert_not_called()
+        raw_data_path = "raw_data/raw/some/values/2/123-456-789.csv.zst"
+        assert (
+            zstandard.ZstdDecompressor().decompress(uploaded[raw_data_path])
+            == b"colname1,colname2\n1,a\n2,b\n"
+        )
+
+    def test_parquet_raw_data_upload_keeps_format(self):
+        schema_metadata = SchemaMetadata(
+            layer="raw",
+            domain="some",
+            dataset="values",
+            sensitivity="PUBLIC",
+            version=2,
+        )
+
+        self.persistence_adapter.upload_raw_data(
+            schema_metadata,
+            file_path=Path("filename.parquet"),
             raw_file_identifier="123-456-789",
         )
 
         self.mock_s3_client.upload_file.assert_called_with(
-            Filename="filename.csv",
+            Filename="filename.parquet",
             Bucket="dataset",
-            Key="raw_data/raw/some/values/2/123-456-789.csv",
+            Key="raw_data/raw/some/values/2/123-456-789.parquet",
+        )
+
+    def test_compressed_raw_data_upload(self):
+        schema_metadata = SchemaMetadata(
+            layer="raw",
+            domain="some",
+            dataset="values",
+            sensitivity="PUBLIC",
+            version=2,
+        )
+
+        self.persistence_adapter.upload_raw_data(
+            schema_metadata,
+            file_path=Path("filename.csv.zst"),
+            raw_file_identifier="123-456-789",
+        )
+
+        self.mock_s3_client.upload_file.assert_called_with(
+            Filename="filename.csv.zst",
+            Bucket="dataset",
+            Key="raw_data/raw/some/values/2/123-456-789.csv.zst",
         )
 
 
@@ -177,6 +236,48 @@ class TestS3AdapterDataRetrieval:
         self.persistence_adapter.retrieve_data(key="an_s3_object")
         self.mock_s3_client.get_object.assert_called_once()
 
+    def _mock_ranged_get_object(self, content: bytes):
+        def get_object(Bucket, Key, Range):
+            byte_count = int(Range.removeprefix("bytes=-"))
+            return {"Body": io.BytesIO(content[-byte_count:])}
+
+        self.mock_s3_client.get_object.side_effect = get_object
+
+    def test_retrieve_parquet_metadata_reads_the_footer_with_one_request(self):
+        content = pd.DataFrame({"colname1": range(10000)}).to_parquet(index=False)
+        self._mock_ranged_get_object(content)
+
+        metadata = self.persistence_adapter.retrieve_parquet_metadata(
+            "data/file.parquet"
+        )
+
+        assert metadata.num_rows == 10000
+        statistics = metadata.row_group(0).column(0).statistics
+        assert (statistics.min, statistics.max) == (0, 9999)
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket=self.s3_bucket, Key="data/file.parquet", Range="bytes=-65536"
+        )
+
+    def test_retrieve_parquet_metadata_reads_again_when_the_footer_is_larger(self):
+        content = pd.DataFrame({"colname1": range(10)}).to_parquet(index=False)
+        self._mock_ranged_get_object(content)
+        footer_length = int.from_bytes(content[-8:-4], "little") + 8
+
+        with patch("api.adapter.s3_adapter.PARQUET_FOOTER_READ_BYTES", 16):
+            metadata = self.persistence_adapter.retrieve_parquet_metadata(
+                "data/file.parquet"
+            )
+
+        assert metadata.num_rows == 10
+        assert self.mock_s3_client.get_object.call_args_list == [
+            call(Bucket=self.s3_bucket, Key="data/file.parquet", Range="bytes=-16"),
+            call(
+                Bucket=self.s3_bucket,
+                Key="data/file.parquet",
+                Range=f"bytes=-{footer_length}",
+            ),
+        ]
+
     def test_find_raw_file_when_file_exists(self):
         self.persistence_adapter.find_raw_file(
             DatasetMetadata("raw", "domain", "dataset", 1), "filename.csv"
@@ -242,6 +343,35 @@ class TestS3AdapterDataRetrieval:
             Bucket=self.s3_bucket, Prefix="path"
         )
 
+    def test_list_dataset_file_sizes(self):
+        self.mock_s3_client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Contents": [
+                    {
+                        "Key": "data/layer/domain/dataset/1/a=1/123_000000.parquet",
+                        "Size": 10,
+                    },
+                    {
+                        "Key": "data/layer/domain/dataset/1/a=2/123_000000.parquet",
+                        "Size": 20,
+                    },
+                ]
+            },
+            {"KeyCount": 0},
+        ]
+
+        res = self.persistence_adapter.list_dataset_file_sizes(
+            DatasetMetadata("layer", "domain", "dataset", 1)
+        )
+
+        assert res == {
+            "data/layer/domain/dataset/1/a=1/123_000000.parquet": 10,
+            "data/layer/domain/dataset/1/a=2/123_000000.parquet": 20,
+        }
+        self.mock_s3_client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket=self.s3_bucket, Prefix="data/layer/domain/dataset/1/"
+        )
+
     def test_get_last_updated_time_when_empty(self):
         self.mock_s3_client.get_paginator.return_value.paginate.return_value = [
             {
@@ -525,6 +655,24 @@ class TestS3Deletion:
         )
         self.persistence_adapter._delete_data.assert_has_calls(expected_calls)
 
+    def test_list_previous_dataset_files(self):
+        self.persistence_adapter.list_files_from_path = Mock(
+            return_value=[
+                "data/layer/domain/dataset/1/col=a/abc-def.parquet",
+                "data/layer/domain/dataset/1/col=a/123-456_1.parquet",
+                "data/layer/domain/dataset/1/col=b/789-123.parquet",
+            ]
+        )
+
+        result = self.persistence_adapter.list_previous_dataset_files(
+            DatasetMetadata("layer", "domain", "dataset", 1), "123-456"
+        )
+
+        assert result == [
+            "data/layer/domain/dataset/1/col=a/abc-def.parquet",
+            "data/layer/domain/dataset/1/col=b/789-123.parquet",
+        ]
+
     def test_delete_previous_dataset_files_when_none_exist(self):
         self.persistence_adapter.list_files_from_path = Mock(
             return_value=[
@@ -542,6 +690,38 @@ class TestS3Deletion:
         )
         self.persistence_adapter._delete_data.assert_not_called()
 
+    def test_delete_append_log_segments_in_requests_of_at_most_1000_keys(self):
+        keys = [
+            f"append_log/layer/domain/dataset/1/{index}.arrows" for index in range(1500)
+        ]
+        self.mock_s3_client.delete_objects.return_value = {"Deleted": []}
+
+        self.persistence_adapter.delete_append_log_segments(keys)
+
+        assert self.mock_s3_client.delete_objects.call_args_list == [
+            call(
+                Bucket="data-bucket",
+                Delete={"Objects": [{"Key": key} for key in keys[:1000]]},
+            ),
+            call(
+                Bucket="data-bucket",
+                Delete={"Objects": [{"Key": key} for key in keys[1000:]]},
+            ),
+        ]
+
+    def test_retrieve_append_flush_that_does_not_exist(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "NoSuchKey"}},
+            operation_name="GetObject",
+        )
+
+        assert (
+            self.persistence_adapter.retrieve_append_flush(
+                "append_flush/layer/domain/dataset/1.json"
+            )
+            is None
+        )
+
 
 class TestS3FileList:
     mock_s3_client = None
@@ -611,6 +791,44 @@ class TestS3FileList:
             Bucket="my-bucket", Prefix="raw_data/layer/my_domain/my_dataset/2"
         )
 
+    def test_list_raw_files_in_upload_order(self):
+        self.mock_s3_client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Contents": [
+                    {
+                        "Key": "raw_data/layer/my_domain/my_dataset/1/def-456_file2.csv",
+                        "LastModified": datetime(2020, 6, 1),
+                    },
+                    {
+                        "Key": "raw_data/layer/my_domain/my_dataset/1/abc-123_file1.csv",
+                        "LastModified": datetime(2020, 1, 1),
+                    },
+                ],
+            },
+            {
+                "Contents": [
+                    {
+                        "Key": "raw_data/layer/my_domain/my_dataset/1/ghi-789_file3.csv",
+                        "LastModified": datetime(2020, 11, 15),
+                    },
+                ],
+            },
+            {},
+        ]
+
+        raw_files = self.persistence_adapter.list_raw_files_in_upload_order(
+            DatasetMetadata("layer", "my_domain", "my_dataset", 1)
+        )
+
+        assert raw_files == [
+            "abc-123_file1.csv",
+            "def-456_file2.csv",
+            "ghi-789_file3.csv",
+        ]
+        self.mock_s3_client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket="my-bucket", Prefix="raw_data/layer/my_domain/my_dataset/1/"
+        )
+
     def test_list_raw_files_when_empty_response(self):
         self.mock_s3_client.get_paginator.return_value.paginate.return_value = {}
 
@@ -762,6 +980,108 @@ class TestGenerateS3PreSignedUrl:
             )
 
 
+class TestS3AdapterLandingUploads:
+    # Runs against an in-process S3 stand-in, so that the presigned URLs can be used
+    key = "landing/raw/domain/dataset/abc-123/data.csv"
+
+    def setup_method(self):
+        self.mock_aws = mock_aws()
+        self.mock_aws.start()
+        s3_client = boto3.client("s3", region_name=AWS_REGION)
+        s3_client.create_bucket(
+            Bucket="landing-bucket",
+            CreateBucketConfiguration={"LocationConstraint": AWS_REGION},
+        )
+        self.s3_client = s3_client
+        self.persistence_adapter = S3Adapter(
+            s3_client=s3_client, s3_bucket="landing-bucket"
+        )
+
+    def teardown_method(self):
+        self.mock_aws.stop()
+
+    def test_single_presigned_upload(self):
+        urls = self.persistence_adapter.generate_landing_upload_urls(self.key, 100)
+
+        response = requests.put(urls["url"], data=b"col1,col2\n1,2\n")
+
+        assert response.status_code == 200
+        assert self.persistence_adapter.get_landing_file_size(self.key) == 14
+
+    @patch("api.adapter.s3_adapter.PRESIGNED_UPLOAD_PART_SIZE", 5 * 1024 * 1024)
+    def test_multipart_presigned_upload(self):
+        part_size = 5 * 1024 * 1024
+        content = b"a" * part_size + b"b" * 10
+
+        urls = self.persistence_adapter.generate_landing_upload_urls(
+            self.key, len(content)
+        )
+        parts = []
+        for part in urls["parts"]:
+            start = (part["part_number"] - 1) * part_size
+            end = start + part_size
+            response = requests.put(part["url"], data=content[start:end])
+            parts.append(
+                UploadPart(
+                    part_number=part["part_number"], etag=response.headers["ETag"]
+                )
+            )
+        self.persistence_adapter.complete_landing_multipart_upload(
+            self.key, urls["multipart_upload_id"], parts
+        )
+
+        assert urls["part_size"] == part_size
+        assert len(urls["parts"]) == 2
+        file_path = Path(tempfile.mkdtemp()) / "data.csv"
+        self.persistence_adapter.download_landing_file(self.key, file_path)
+        assert file_path.read_bytes() == content
+
+    @patch("api.adapter.s3_adapter.PRESIGNED_UPLOAD_MAX_PARTS", 2)
+    def test_presigned_upload_fails_when_file_is_too_large(self):
+        with pytest.raises(UserError, match="The file is too large"):
+            self.persistence_adapter.generate_landing_upload_urls(
+                self.key, 1024 * 1024 * 1024
+            )
+
+    def test_get_landing_file_size_fails_when_file_was_not_uploaded(self):
+        with pytest.raises(
+            UserError, match="The file \\[data.csv\\] has not been uploaded"
+        ):
+            self.persistence_adapter.get_landing_file_size(self.key)
+
+    def test_delete_landing_file(self):
+        self.s3_client.put_object(Bucket="landing-bucket", Key=self.key, Body=b"data")
+
+        self.persistence_adapter.delete_landing_file(self.key)
+
+        assert "Contents" not in self.s3_client.list_objects_v2(
+            Bucket="landing-bucket", Prefix="landing/"
+        )
+
+    def test_download_raw_file(self):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 1)
+        self.s3_client.put_object(
+            Bucket="landing-bucket",
+            Key=dataset.raw_data_path("123-456.csv"),
+            Body=b"col1\n1\n",
+        )
+        file_path = Path(tempfile.mkdtemp()) / "123-456.csv"
+
+        size = self.persistence_adapter.get_raw_file_size(dataset, "123-456.csv")
+        self.persistence_adapter.download_raw_file(dataset, "123-456.csv", file_path)
+
+        assert size == 7
+        assert file_path.read_bytes() == b"col1\n1\n"
+
+    def test_get_raw_file_size_fails_when_file_does_not_exist(self):
+        with pytest.raises(
+            UserError, match="The file \\[123-456.csv\\] does not exist"
+        ):
+            self.persistence_adapter.get_raw_file_size(
+                DatasetMetadata("raw", "domain", "dataset", 1), "123-456.csv"
+            )
+
+
 class TestS3AdapterFunctions:
     mock_s3_client = None
     persistence_adapter = None
@@ -0,0 +1,327 @@
+import time
+from unittest.mock import ANY, Mock, call, patch
+
+import pyarrow as pa
+import pytest
+
+from api.adapter.in_memory_lease_adapter import InMemoryLeaseAdapter
+from api.adapter.local_append_log_adapter import LocalAppendLogAdapter
+from api.application.services.append_buffer_service import (
+    AppendBufferService,
+    encode_segment,
+    get_append_log_adapter,
+)
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.common.custom_exceptions import DatasetValidationError, UserError
+from api.common.spool import Spool
+from api.domain.append_log import AppendFlush
+from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.schema import Schema
+from api.domain.schema_metadata import Owner, SchemaMetadata
+from rapid.items.schema import Column
+
+
+def rows(values) -> pa.Table:
+    return pa.table(
+        {"colname1": values, "colname2": pa.array([None] * len(values), pa.int64())}
+    )
+
+
+def test_keeps_the_append_log_on_local_disk_when_a_directory_is_configured(tmp_path):
+    adapter = get_append_log_adapter(tmp_path.as_posix())
+
+    assert isinstance(adapter, LocalAppendLogAdapter)
+    assert adapter.directory == tmp_path
+
+
+@patch("api.application.services.append_buffer_service.S3Adapter")
+def test_keeps_the_append_log_in_s3_by_default(mock_s3_adapter):
+    assert get_append_log_adapter(None) == mock_s3_adapter.return_value
+
+
+class TestAppendBufferService:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.dataset = DatasetMetadata("raw", "some", "other", 1)
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                version=1,
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=True,
+                ),
+            ],
+        )
+        self.append_log_adapter = LocalAppendLogAdapter(
+            (tmp_path / "append_log").as_posix()
+        )
+        self.s3_adapter = Mock()
+        self.schema_service = Mock()
+        self.schema_service.get_schema.return_value = self.schema
+        self.job_service = Mock()
+        self.data_service = Mock()
+        self.dataset_statistics_service = Mock()
+        self.append_buffer_service = AppendBufferService(
+            self.append_log_adapter,
+            self.s3_adapter,
+            self.schema_service,
+            self.job_service,
+            self.data_service,
+            DatasetLeaseService(InMemoryLeaseAdapter(), poll_seconds=0.01),
+            self.dataset_statistics_service,
+            flush_rows=5,
+            flush_seconds=60,
+        )
+        self.spool = Spool((tmp_path / "spool").as_posix())
+        with patch("api.application.services.append_buffer_service.spool", self.spool):
+            yield
+
+    def _segment_keys(self):
+        return self.append_log_adapter.list_append_log_segments(
+            self.dataset.append_log_location()
+        )
+
+    def test_append_buffers_the_rows_in_the_append_log(self):
+        table = pa.table({"colname1": ["a", "b"], "colname2": [1, None]})
+
+        buffered_rows = self.append_buffer_service.append(self.dataset, table)
+
+        assert buffered_rows == 2
+        segment_keys = self._segment_keys()
+        assert len(segment_keys) == 1
+        assert segment_keys[0].startswith("append_log/raw/some/other/1/")
+        stored_table = pa.ipc.open_stream(
+            self.append_log_adapter.retrieve_append_log_segment(segment_keys[0])
+        ).read_all()
+        assert stored_table.equals(table)
+
+    def test_append_returns_the_rows_buffered_by_every_append(self):
+        self.append_buffer_service.append(self.dataset, rows(["a"]))
+
+        buffered_rows = self.append_buffer_service.append(
+            self.dataset, rows(["b", "c"])
+        )
+
+        assert buffered_rows == 3
+
+    def test_append_rejects_rows_that_do_not_match_the_schema(self):
+        table = pa.table({"colname1": ["a"], "colname2": ["not a number"]})
+
+        with pytest.raises(DatasetValidationError):
+            self.append_buffer_service.append(self.dataset, table)
+
+        assert self._segment_keys() == []
+
+    def test_append_rejects_datasets_without_append_behaviour(self):
+        self.schema.metadata.update_behaviour = "OVERWRITE"
+
+        with pytest.raises(
+            UserError,
+            match="Rows can only be appended to datasets with the APPEND update behaviour",
+        ):
+            self.append_buffer_service.append(self.dataset, rows(["a"]))
+
+    @patch("api.application.services.append_buffer_service.APPEND_MAX_ROWS", 2)
+    def test_append_rejects_large_batches(self):
+        with pytest.raises(UserError, match="At most 2 rows can be appended at once"):
+            self.append_buffer_service.append(self.dataset, rows(["a", "b", "c"]))
+
+    @patch("api.application.services.append_buffer_service.Thread")
+    def test_append_starts_a_flush_once_enough_rows_are_buffered(self, mock_thread):
+        self.append_buffer_service.append(self.dataset, rows(["a", "b", "c"]))
+        mock_thread.assert_not_called()
+
+        self.append_buffer_service.append(self.dataset, rows(["d", "e"]))
+
+        mock_thread.assert_called_once_with(
+            target=self.append_buffer_service.flush,
+            args=(self.dataset,),
+            name="raw/some/other/1-append-flush",
+        )
+        mock_thread.return_value.start.assert_called_once()
+
+    def test_flush_uploads_the_buffered_rows_as_a_single_file(self):
+        self.append_buffer_service.append(
+            self.dataset, pa.table({"colname1": ["a"], "colname2": [None]})
+        )
+        self.append_buffer_service.append(
+            self.dataset, pa.table({"colname1": ["b"], "colname2": [2]})
+        )
+        flushed_tables = []
+
+        def process_upload(job, schema, file_path, raw_file_identifier):
+            flushed_tables.append(pa.ipc.open_stream(file_path.read_bytes()).read_all())
+
+        self.data_service.process_upload.side_effect = process_upload
+
+        self.append_buffer_service.flush(self.dataset)
+
+        job = self.job_service.create_upload_job.return_value
+        flush_identifier = self.job_service.create_upload_job.call_args.args[3]
+        self.job_service.create_upload_job.assert_called_once_with(
+            "append-buffer", ANY, f"{flush_identifier}.arrows", ANY, self.dataset
+        )
+        self.s3_adapter.delete_dataset_files.assert_called_once_with(
+            self.dataset, flush_identifier
+        )
+        self.dataset_statistics_service.remove_uploads.assert_called_once_with(
+            self.dataset, flush_identifier
+        )
+        self.data_service.process_upload.assert_called_once_with(
+            job, self.schema, ANY, flush_identifier
+        )
+        assert flushed_tables[0].to_pylist() == [
+            {"colname1": "a", "colname2": None},
+            {"colname1": "b", "colname2": 2},
+        ]
+        assert self._segment_keys() == []
+
+    def test_failed_flush_keeps_the_rows_buffered_to_retry_with_the_same_identifier(
+        self,
+    ):
+        self.append_buffer_service.append(self.dataset, rows(["a"]))
+        self.data_service.process_upload.side_effect = [ValueError("Failed"), None]
+
+        self.append_buffer_service.flush(self.dataset)
+
+        assert len(self._segment_keys()) == 1
+
+        self.append_buffer_service.flush(self.dataset)
+
+        first_attempt, second_attempt = self.data_service.process_upload.call_args_list
+        assert first_attempt.args[3] == second_attempt.args[3]
+        assert self._segment_keys() == []
+
+    def test_failed_flush_is_retried_with_its_own_segments_before_later_appends(
+        self,
+    ):
+        self.append_buffer_service.append(self.dataset, rows(["a"]))
+        flushed_rows = []
+
+        def process_upload(job, schema, file_path, raw_file_identifier):
+            flushed_rows.append(
+                (
+                    raw_file_identifier,
+                    pa.ipc.open_stream(file_path.read_bytes())
+                    .read_all()
+                    .column("colname1")
+                    .to_pylist(),
+                )
+            )
+            if len(flushed_rows) == 1:
+                raise ValueError("Failed")
+
+        self.data_service.process_upload.side_effect = process_upload
+        self.append_buffer_service.flush(self.dataset)
+        self.append_buffer_service.append(self.dataset, rows(["b"]))
+
+        self.append_buffer_service.flush(self.dataset)
+
+        (failed_identifier, _), retried, later = flushed_rows
+        assert retried == (failed_identifier, ["a"])
+        assert later[0] != failed_identifier
+        assert later[1] == ["b"]
+        assert self._segment_keys() == []
+        assert (
+            self.append_log_adapter.retrieve_append_flush(
+                self.dataset.append_flush_path()
+            )
+            is None
+        )
+
+    def test_flush_completes_the_removal_of_segments_that_were_already_written(self):
+        self.append_buffer_service.append(self.dataset, rows(["a"]))
+        self.append_buffer_service.append(self.dataset, rows(["b"]))
+        written_key, remaining_key = self._segment_keys()
+        self.append_log_adapter.store_append_flush(
+            self.dataset.append_flush_path(),
+            AppendFlush(
+                flush_identifier="123",
+                segment_keys=[written_key, remaining_key],
+            )
+            .model_dump_json()
+            .encode(),
+        )
+        self.append_log_adapter.delete_append_log_segments([written_key])
+
+        self.append_buffer_service.flush(self.dataset)
+
+        self.data_service.process_upload.assert_not_called()
+        assert self._segment_keys() == []
+        assert (
+            self.append_log_adapter.retrieve_append_flush(
+                self.dataset.append_flush_path()
+            )
+            is None
+        )
+
+    def test_flush_without_buffered_rows(self):
+        self.append_buffer_service.flush(self.dataset)
+
+        self.data_service.process_upload.assert_not_called()
+
+    @patch("api.application.services.append_buffer_service.Thread")
+    def test_datasets_due_for_flush(self, _mock_thread):
+        other_dataset = DatasetMetadata("raw", "some", "another", 2)
+        old_segment = f"{int((time.time() - 120) * 1e9):020d}-1-abc.arrows"
+        self.append_log_adapter.store_append_log_segment(
+            other_dataset.append_log_path(old_segment), b""
+        )
+        self.append_buffer_service.append(self.dataset, rows(["a"]))
+
+        assert self.append_buffer_service.datasets_due_for_flush() == [other_dataset]
+
+        self.append_buffer_service.append(self.dataset, rows(["b", "c", "d", "e"]))
+
+        assert sorted(self.append_buffer_service.datasets_due_for_flush()) == [
+            other_dataset,
+            self.dataset,
+        ]
+
+    @patch("api.application.services.append_buffer_service.Thread")
+    def test_flush_due_datasets_flushes_each_dataset_in_its_own_thread(
+        self, mock_thread
+    ):
+        other_dataset = DatasetMetadata("raw", "some", "another", 2)
+        self.append_buffer_service.datasets_due_for_flush = Mock(
+            return_value=[self.dataset, other_dataset]
+        )
+
+        self.append_buffer_service.flush_due_datasets()
+
+        assert mock_thread.call_args_list == [
+            call(
+                target=self.append_buffer_service.flush,
+                args=(self.dataset,),
+                name="raw/some/other/1-append-flush",
+                daemon=True,
+            ),
+            call(
+                target=self.append_buffer_service.flush,
+                args=(other_dataset,),
+                name="raw/some/another/2-append-flush",
+                daemon=True,
+            ),
+        ]
+        assert mock_thread.return_value.start.call_count == 2
+
+
+def test_encode_segment_as_an_arrow_stream():
+    table = rows(["a", "b"])
+
+    assert pa.ipc.open_stream(encode_segment(table)).read_all().equals(table)
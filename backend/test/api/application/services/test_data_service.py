@@ -1,27 +1,51 @@
+import os
 import re
+from threading import Event
+from io import BytesIO
 from pathlib import Path
 from typing import List
-from unittest.mock import Mock, patch, MagicMock, call
+from unittest.mock import ANY, Mock, patch, MagicMock, call
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
+from api.adapter.in_memory_lease_adapter import InMemoryLeaseAdapter
 from api.application.services.data_service import (
     DataService,
 )
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.application.services.partitioning_service import EncodedPartition
 from api.common.custom_exceptions import (
     UserError,
     AWSServiceError,
     UnprocessableDatasetError,
     DatasetValidationError,
     QueryExecutionError,
+    InvalidFileUploadError,
+    JobCancelledError,
+    JobAlreadyExistsError,
+    DatasetLeaseLostError,
 )
+from api.common.ingest_executor import IngestExecutor
+from api.common.spool import Spool
+from api.domain.Jobs.Job import JobStatus
 from api.domain.Jobs.QueryJob import QueryStep
-from api.domain.Jobs.UploadJob import UploadStep
+from api.domain.Jobs.UploadJob import UploadJob, UploadStep
+from api.domain.batch_upload import BatchFile, BatchManifest, LandedFile
+from api.domain.dataset_lease import LeaseMode
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_statistics import DatasetStatistics
+from api.domain.presigned_upload import (
+    PresignedUploadCompletion,
+    PresignedUploadRequest,
+    UploadPart,
+)
 from api.domain.schema import Schema, Column
 from api.domain.schema_metadata import Owner, SchemaMetadata
 from rapid.items.query import Query
+from rapid.items.schema import DerivedPartition
 
 
 class TestUploadDataset:
@@ -29,8 +53,12 @@ class TestUploadDataset:
         self.s3_adapter = Mock()
         self.athena_adapter = Mock()
         self.job_service = Mock()
+        self.job_service.is_cancellation_requested.return_value = False
         self.schema_service = Mock()
         self.subject_service = Mock()
+        self.dataset_lease_service = DatasetLeaseService(InMemoryLeaseAdapter())
+        self.query_cache_service = Mock()
+        self.dataset_statistics_service = Mock()
         self.data_service = DataService(
             self.s3_adapter,
             None,
@@ -38,6 +66,10 @@ class TestUploadDataset:
             self.job_service,
             self.schema_service,
             self.subject_service,
+            IngestExecutor(max_workers=0),
+            self.dataset_lease_service,
+            self.query_cache_service,
+            self.dataset_statistics_service,
         )
         self.valid_schema = Schema(
             metadata=SchemaMetadata(
@@ -119,24 +151,482 @@ class TestUploadDataset:
         self.data_service.generate_raw_file_identifier.assert_called_once()
         mock_thread.assert_called_once_with(
             target=mock_process_upload,
-            args=(mock_job, schema, Path("data.csv"), "123-456-789"),
+            args=(mock_job, schema, Path("data.csv"), "123-456-789", None),
+            name="abc-123",
+        )
+        assert uploaded_raw_file == ("123-456-789.csv.zst", 1, "abc-123")
+
+    # Presigned Upload ---------------------------------------
+    def test_generate_landing_upload(self):
+        self.s3_adapter.generate_landing_upload_urls.return_value = {
+            "url": "https://some-url"
+        }
+
+        result = self.data_service.generate_landing_upload(
+            "abc-123",
+            DatasetMetadata("raw", "some", "other", 1),
+            PresignedUploadRequest(filename="data.csv.gz", size=100),
+        )
+
+        self.s3_adapter.generate_landing_upload_urls.assert_called_once_with(
+            "landing/raw/some/other/abc-123/data.csv.gz", 100
+        )
+        assert result == {
+            "upload_id": "abc-123",
+            "filename": "data.csv.gz",
+            "url": "https://some-url",
+        }
+
+    def test_generate_landing_upload_fails_for_invalid_filename(self):
+        with pytest.raises(InvalidFileUploadError):
+            self.data_service.generate_landing_upload(
+                "abc-123",
+                DatasetMetadata("raw", "some", "other", 1),
+                PresignedUploadRequest(filename="../data.csv"),
+            )
+
+        self.s3_adapter.generate_landing_upload_urls.assert_not_called()
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_dataset")
+    def test_upload_landed_dataset_completes_multipart_upload_and_starts_job(
+        self, mock_upload_dataset, mock_spool
+    ):
+        dataset = DatasetMetadata("raw", "some", "other", 1)
+        parts = [UploadPart(part_number=1, etag="etag-1")]
+        mock_spool.path_for.return_value = Path("spool/abc-123-data.csv")
+        self.job_service.find_upload_job.return_value = None
+        self.s3_adapter.get_landing_file_size.return_value = 1000
+        mock_upload_dataset.return_value = ("123-456-789.csv", 1, "abc-123")
+
+        result = self.data_service.upload_landed_dataset(
+            "subject-123",
+            "abc-123",
+            dataset,
+            PresignedUploadCompletion(
+                filename="data.csv", multipart_upload_id="xyz-789", parts=parts
+            ),
+        )
+
+        landing_key = "landing/raw/some/other/abc-123/data.csv"
+        self.s3_adapter.complete_landing_multipart_upload.assert_called_once_with(
+            landing_key, "xyz-789", parts
+        )
+        mock_spool.path_for.assert_called_once_with("abc-123-data.csv")
+        mock_spool.reserve.assert_called_once_with(Path("spool/abc-123-data.csv"), 1000)
+        mock_upload_dataset.assert_called_once_with(
+            "subject-123",
+            "abc-123",
+            dataset,
+            Path("spool/abc-123-data.csv"),
+            landing_key=landing_key,
+        )
+        assert result == ("123-456-789.csv", 1, "abc-123")
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_dataset")
+    def test_upload_landed_dataset_releases_spool_when_job_is_not_started(
+        self, mock_upload_dataset, mock_spool
+    ):
+        mock_spool.path_for.return_value = Path("spool/abc-123-data.csv")
+        self.job_service.find_upload_job.return_value = None
+        mock_upload_dataset.side_effect = UserError("some error")
+
+        with pytest.raises(UserError):
+            self.data_service.upload_landed_dataset(
+                "subject-123",
+                "abc-123",
+                DatasetMetadata("raw", "some", "other", 1),
+                PresignedUploadCompletion(filename="data.csv"),
+            )
+
+        self.s3_adapter.complete_landing_multipart_upload.assert_not_called()
+        mock_spool.release.assert_called_once_with(Path("spool/abc-123-data.csv"))
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_dataset")
+    def test_upload_landed_dataset_returns_the_job_of_an_upload_completed_before(
+        self, mock_upload_dataset, mock_spool
+    ):
+        mock_spool.path_for.return_value = Path("spool/abc-123-data.csv")
+        self.job_service.find_upload_job.return_value = UploadJob(
+            "subject-123",
+            "abc-123",
+            "abc-123-data.csv",
+            "123-456-789",
+            DatasetMetadata("raw", "some", "other", 1),
+        )
+
+        result = self.data_service.upload_landed_dataset(
+            "subject-123",
+            "abc-123",
+            DatasetMetadata("raw", "some", "other", 1),
+            PresignedUploadCompletion(
+                filename="data.csv", multipart_upload_id="xyz-789", parts=[]
+            ),
+        )
+
+        assert result == ("123-456-789.csv.zst", 1, "abc-123")
+        self.job_service.find_upload_job.assert_called_once_with("abc-123")
+        self.s3_adapter.complete_landing_multipart_upload.assert_not_called()
+        mock_spool.reserve.assert_not_called()
+        mock_upload_dataset.assert_not_called()
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_dataset")
+    def test_upload_landed_dataset_returns_the_job_of_a_concurrent_completion(
+        self, mock_upload_dataset, mock_spool
+    ):
+        mock_spool.path_for.return_value = Path("spool/abc-123-data.csv")
+        self.job_service.find_upload_job.return_value = None
+        mock_upload_dataset.side_effect = JobAlreadyExistsError(
+            "The job with id abc-123 already exists"
+        )
+        self.job_service.get_upload_job.return_value = UploadJob(
+            "subject-123",
+            "abc-123",
+            "abc-123-data.csv",
+            "123-456-789",
+            DatasetMetadata("raw", "some", "other", 1),
+        )
+
+        result = self.data_service.upload_landed_dataset(
+            "subject-123",
+            "abc-123",
+            DatasetMetadata("raw", "some", "other", 1),
+            PresignedUploadCompletion(filename="data.csv"),
+        )
+
+        assert result == ("123-456-789.csv.zst", 1, "abc-123")
+        self.job_service.get_upload_job.assert_called_once_with("abc-123")
+        # The reservation belongs to the job of the concurrent completion
+        mock_spool.release.assert_not_called()
+
+    # Upload Batch  -----------------------------------------
+    @patch("api.application.services.data_service.Thread")
+    @patch.object(DataService, "process_batch_upload")
+    def test_upload_batch_triggers_process_batch_upload_and_returns_raw_filenames(
+        self, mock_process_batch_upload, mock_thread
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        self.schema_service.get_schema.return_value = schema
+        self.data_service.generate_raw_file_identifier = Mock(
+            return_value="123-456-789"
+        )
+        mock_job = Mock()
+        mock_job.job_id = "abc-123"
+        self.job_service.create_upload_job.return_value = mock_job
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("abc-123-0000.csv")),
+            BatchFile(filename="second.csv.gz", file_path=Path("abc-123-0001.csv.gz")),
+        ]
+
+        # WHEN
+        result = self.data_service.upload_batch(
+            "subject-123",
+            "abc-123",
+            DatasetMetadata("raw", "some", "other", 1),
+            files,
+        )
+
+        # THEN
+        self.job_service.create_upload_job.assert_called_once_with(
+            "subject-123",
+            "abc-123",
+            "first.csv, second.csv.gz",
+            "123-456-789",
+            DatasetMetadata("raw", "some", "other", 1),
+        )
+        mock_thread.assert_called_once_with(
+            target=mock_process_batch_upload,
+            args=(mock_job, schema, files, "123-456-789", None),
             name="abc-123",
         )
-        assert uploaded_raw_file == ("123-456-789.csv", 1, "abc-123")
+        assert result == (
+            ["123-456-789-0000.csv.zst", "123-456-789-0001.csv.gz"],
+            1,
+            "abc-123",
+        )
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_batch")
+    def test_upload_landed_batch_reserves_spool_for_each_file(
+        self, mock_upload_batch, mock_spool
+    ):
+        # GIVEN
+        dataset = DatasetMetadata("raw", "some", "other", 1)
+        parts = [UploadPart(part_number=1, etag="etag-1")]
+        mock_spool.path_for.side_effect = lambda filename: Path(f"spool/{filename}")
+        self.s3_adapter.get_landing_file_size.side_effect = [1000, 2000]
+        mock_upload_batch.return_value = (["123-0000.csv", "123-0001.csv"], 1, "job")
+        manifest = BatchManifest(
+            files=[
+                LandedFile(upload_id="upload-1", filename="first.csv"),
+                LandedFile(
+                    upload_id="upload-2",
+                    filename="second.csv",
+                    multipart_upload_id="xyz-789",
+                    parts=parts,
+                ),
+            ]
+        )
+
+        # WHEN
+        result = self.data_service.upload_landed_batch(
+            "subject-123", "job", dataset, manifest
+        )
+
+        # THEN
+        self.s3_adapter.complete_landing_multipart_upload.assert_called_once_with(
+            "landing/raw/some/other/upload-2/second.csv", "xyz-789", parts
+        )
+        mock_spool.reserve.assert_has_calls(
+            [
+                call(Path("spool/job-0000-first.csv"), 1000),
+                call(Path("spool/job-0001-second.csv"), 2000),
+            ]
+        )
+        mock_upload_batch.assert_called_once_with(
+            "subject-123",
+            "job",
+            dataset,
+            [
+                BatchFile(
+                    filename="first.csv", file_path=Path("spool/job-0000-first.csv")
+                ),
+                BatchFile(
+                    filename="second.csv", file_path=Path("spool/job-0001-second.csv")
+                ),
+            ],
+            [
+                "landing/raw/some/other/upload-1/first.csv",
+                "landing/raw/some/other/upload-2/second.csv",
+            ],
+        )
+        assert result == (["123-0000.csv", "123-0001.csv"], 1, "job")
+
+    @patch("api.application.services.data_service.spool")
+    @patch.object(DataService, "upload_batch")
+    def test_upload_landed_batch_releases_spool_when_job_is_not_started(
+        self, mock_upload_batch, mock_spool
+    ):
+        # GIVEN
+        mock_spool.path_for.side_effect = lambda filename: Path(f"spool/{filename}")
+        self.s3_adapter.get_landing_file_size.side_effect = [1000, AWSServiceError("")]
+        manifest = BatchManifest(
+            files=[
+                LandedFile(upload_id="upload-1", filename="first.csv"),
+                LandedFile(upload_id="upload-2", filename="second.csv"),
+            ]
+        )
+
+        # WHEN/THEN
+        with pytest.raises(AWSServiceError):
+            self.data_service.upload_landed_batch(
+                "subject-123",
+                "job",
+                DatasetMetadata("raw", "some", "other", 1),
+                manifest,
+            )
+
+        mock_upload_batch.assert_not_called()
+        mock_spool.release.assert_called_once_with(Path("spool/job-0000-first.csv"))
+
+    @patch.object(DataService, "validate_incoming_batch")
+    @patch.object(DataService, "upload_chunks")
+    @patch.object(DataService, "remove_existing_data")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_process_batch_upload_loads_partitions_once_for_the_batch(
+        self,
+        mock_load_partitions,
+        mock_delete_incoming_raw_file,
+        mock_remove_existing_data,
+        mock_upload_chunks,
+        mock_validate_incoming_batch,
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.update_behaviour = "OVERWRITE"
+        upload_job = Mock()
+        upload_job.job_id = "abc-123"
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+        ]
+
+        # WHEN
+        self.data_service.process_batch_upload(upload_job, schema, files, "123-456-789")
+
+        # THEN
+        mock_validate_incoming_batch.assert_called_once_with(
+            upload_job, schema, files, ["123-456-789-0000", "123-456-789-0001"]
+        )
+        self.s3_adapter.upload_raw_data.assert_has_calls(
+            [
+                call(schema.metadata, Path("first.csv"), "123-456-789-0000"),
+                call(schema.metadata, Path("second.csv"), "123-456-789-0001"),
+            ]
+        )
+        mock_upload_chunks.assert_has_calls(
+            [
+                call(schema, Path("first.csv"), "123-456-789-0000", lease_lost=ANY),
+                call(schema, Path("second.csv"), "123-456-789-0001", lease_lost=ANY),
+            ]
+        )
+        mock_remove_existing_data.assert_called_once_with(schema, "123-456-789")
+        mock_load_partitions.assert_called_once_with(schema)
+        self.query_cache_service.invalidate.assert_called_once_with(schema.metadata)
+        assert mock_delete_incoming_raw_file.call_count == 2
+        self.job_service.succeed.assert_called_once_with(upload_job)
+
+    @patch.object(DataService, "validate_incoming_batch")
+    @patch.object(DataService, "upload_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    def test_process_batch_upload_fails_job_and_stores_nothing_when_a_file_is_invalid(
+        self,
+        mock_delete_incoming_raw_file,
+        mock_upload_chunks,
+        mock_validate_incoming_batch,
+    ):
+        # GIVEN
+        upload_job = Mock()
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+        ]
+        mock_validate_incoming_batch.side_effect = DatasetValidationError(
+            ["second.csv: some error"]
+        )
+
+        # WHEN
+        with pytest.raises(DatasetValidationError):
+            self.data_service.process_batch_upload(
+                upload_job, self.valid_schema, files, "123-456-789"
+            )
+
+        # THEN
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        mock_upload_chunks.assert_not_called()
+        assert mock_delete_incoming_raw_file.call_count == 2
+        self.job_service.fail.assert_called_once_with(
+            upload_job, ["second.csv: some error"]
+        )
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_incoming_batch_reports_errors_against_each_file(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        mock_construct_chunked_dataframe.side_effect = [
+            [
+                pd.DataFrame({"colname1": [1234], "colname2": ["Carlos"]}),
+                pd.DataFrame({"colname1": ["s2134"], "colname2": ["Ada"]}),
+            ],
+            [pd.DataFrame({"colname1": [4567], "colname2": ["Ada"]})],
+            [pd.DataFrame({"colname1": [4567], "colname2": [None]})],
+        ]
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+            BatchFile(filename="third.csv", file_path=Path("third.csv")),
+        ]
+
+        # WHEN
+        with pytest.raises(DatasetValidationError) as error:
+            self.data_service.validate_incoming_batch(
+                Mock(), self.valid_schema, files, ["abc-0000", "abc-0001", "abc-0002"]
+            )
+
+        # THEN
+        assert all(
+            message.startswith("first.csv: ") or message.startswith("third.csv: ")
+            for message in error.value.message
+        )
+        assert any(message.startswith("first.csv: ") for message in error.value.message)
+        assert any(message.startswith("third.csv: ") for message in error.value.message)
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_incoming_batch_quarantines_the_invalid_rows_of_each_file(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        upload_job = Mock()
+        mock_construct_chunked_dataframe.side_effect = [
+            [
+                pd.DataFrame({"colname1": [1, "two"], "colname2": ["a", "b"]}),
+                pd.DataFrame({"colname1": [3], "colname2": [None]}),
+            ],
+            [pd.DataFrame({"colname1": [4, 5], "colname2": ["d", "e"]})],
+            [pd.DataFrame({"colname1": [6, "seven"], "colname2": ["f", "g"]})],
+        ]
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+            BatchFile(filename="third.csv", file_path=Path("third.csv")),
+        ]
+
+        # WHEN
+        self.data_service.validate_incoming_batch(
+            upload_job, schema, files, ["abc-0000", "abc-0001", "abc-0002"]
+        )
+
+        # THEN
+        self.s3_adapter.store_data.assert_has_calls(
+            [
+                call("raw_data/raw/some/other/quarantine/2/abc-0000.parquet", ANY),
+                call("raw_data/raw/some/other/quarantine/2/abc-0002.parquet", ANY),
+            ]
+        )
+        assert self.s3_adapter.store_data.call_count == 2
+        first_quarantined_rows = pd.read_parquet(
+            BytesIO(self.s3_adapter.store_data.call_args_list[0].args[1])
+        )
+        assert first_quarantined_rows["colname1"].to_list() == ["two", "3"]
+        self.job_service.set_row_counts.assert_called_once_with(upload_job, 4, 3)
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_incoming_batch_fails_when_every_row_of_a_file_is_invalid(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        mock_construct_chunked_dataframe.side_effect = [
+            [pd.DataFrame({"colname1": [1, "two"], "colname2": ["a", "b"]})],
+            [pd.DataFrame({"colname1": ["three"], "colname2": ["c"]})],
+        ]
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+        ]
+
+        # WHEN
+        with pytest.raises(DatasetValidationError) as error:
+            self.data_service.validate_incoming_batch(
+                Mock(), schema, files, ["abc-0000", "abc-0001"]
+            )
+
+        # THEN
+        assert error.value.message == [
+            "second.csv: Every row failed validation, Column [colname1] is not of type int in 1 row"
+        ]
+        self.s3_adapter.store_data.assert_not_called()
+        self.job_service.set_row_counts.assert_not_called()
 
     # Generate Permanent Filename ----------------------------
-    @patch("api.application.services.data_service.uuid")
-    def test_generates_permanent_filename(self, mock_uuid):
+    def test_generates_permanent_filename(self):
         # Given
         raw_file_identifier = "123-456-789"
 
-        mock_uuid.uuid4.return_value = "111-222-333"
-
         # When
-        result = self.data_service.generate_permanent_filename(raw_file_identifier)
+        result = self.data_service.generate_permanent_filename(raw_file_identifier, 12)
 
         # Then
-        assert result == "123-456-789_111-222-333.parquet"
+        assert result == "123-456-789_000012.parquet"
 
     # Process Upload
     @patch.object(DataService, "validate_incoming_data")
@@ -153,10 +643,12 @@ class TestUploadDataset:
         # GIVEN
         schema = self.valid_schema
         upload_job = Mock()
+        upload_job.job_id = "abc-123"
 
         expected_update_step_calls = [
             call(upload_job, UploadStep.VALIDATION),
             call(upload_job, UploadStep.RAW_DATA_UPLOAD),
+            call(upload_job, UploadStep.WAITING_FOR_LEASE),
             call(upload_job, UploadStep.DATA_UPLOAD),
             call(upload_job, UploadStep.LOAD_PARTITIONS),
             call(upload_job, UploadStep.CLEAN_UP),
@@ -170,61 +662,207 @@ class TestUploadDataset:
 
         # THEN
         mock_validate_incoming_data.assert_called_once_with(
-            schema, Path("data.csv"), "123-456-789"
+            schema, Path("data.csv"), "123-456-789", upload_job
         )
         self.s3_adapter.upload_raw_data.assert_called_once_with(
             schema.metadata, Path("data.csv"), "123-456-789"
         )
         mock_process_chunks.assert_called_once_with(
-            schema, Path("data.csv"), "123-456-789"
+            schema, Path("data.csv"), "123-456-789", upload_job, 0, ANY
         )
         mock_delete_incoming_raw_file.assert_called_once_with(
             schema, Path("data.csv"), "123-456-789"
         )
         mock_load_partitions.assert_called_once_with(schema)
+        self.query_cache_service.invalidate.assert_called_once_with(schema.metadata)
 
         self.job_service.update_step.assert_has_calls(expected_update_step_calls)
+        self.job_service.checkpoint_raw_file.assert_called_once_with(
+            upload_job, "123-456-789.csv.zst"
+        )
+        self.job_service.checkpoint_step.assert_called_once_with(
+            upload_job, UploadStep.DATA_UPLOAD
+        )
         self.job_service.succeed.assert_called_once_with(upload_job)
-
-    @patch("api.application.services.data_service.delete_incoming_raw_file")
+        lease = self.dataset_lease_service.db_adapter.get_dataset_lease(
+            "raw/some/other/2"
+        )
+        assert lease.holders == {}
+
+    @pytest.mark.parametrize(
+        "update_behaviour, expected_mode",
+        [
+            ("APPEND", LeaseMode.SHARED),
+            ("OVERWRITE", LeaseMode.EXCLUSIVE),
+            ("UPSERT", LeaseMode.EXCLUSIVE),
+        ],
+    )
+    @patch.object(DataService, "replace_existing_rows")
     @patch.object(DataService, "validate_incoming_data")
-    def test_deletes_incoming_file_from_disk_and_fails_job_if_any_error_during_processing(
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_process_upload_writes_data_while_holding_the_dataset_lease(
         self,
-        mock_validate_incoming_data,
-        mock_delete_incoming_raw_file,
+        mock_load_partitions,
+        _mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        _mock_validate_incoming_data,
+        _mock_replace_existing_rows,
+        update_behaviour,
+        expected_mode,
     ):
-        # Given
+        # GIVEN
         schema = self.valid_schema
+        schema.metadata.update_behaviour = update_behaviour
         upload_job = Mock()
+        upload_job.job_id = "abc-123"
+        held_modes = []
 
-        mock_validate_incoming_data.side_effect = DatasetValidationError("some message")
-
-        # When/Then
-        with pytest.raises(DatasetValidationError, match="some message"):
-            self.data_service.process_upload(
-                upload_job, schema, Path("data.csv"), "123-456-789"
+        def record_held_mode(*_args):
+            lease = self.dataset_lease_service.db_adapter.get_dataset_lease(
+                "raw/some/other/2"
             )
+            held_modes.append((lease.mode, list(lease.holders)))
 
-        mock_delete_incoming_raw_file.assert_called_once_with(
-            schema, Path("data.csv"), "123-456-789"
+        mock_process_chunks.side_effect = record_held_mode
+        mock_load_partitions.side_effect = record_held_mode
+
+        # WHEN
+        self.data_service.process_upload(
+            upload_job, schema, Path("data.csv"), "123-456-789"
         )
-        self.job_service.fail.assert_called_once_with(upload_job, ["some message"])
 
-    # Validate dataset ---------------------------------------
-    @patch("api.application.services.data_service.build_validated_dataframe")
-    @patch("api.application.services.data_service.construct_chunked_dataframe")
-    def test_process_upload_validates_each_chunk_of_the_dataset(
-        self,
-        mock_construct_chunked_dataframe,
-        mock_build_validated_dataframe,
-    ):
-        # Given
+        # THEN
+        assert held_modes == [
+            (expected_mode, ["abc-123"]),
+            (expected_mode, ["abc-123"]),
+        ]
+
+    def test_hold_write_lease_stops_waiting_when_the_job_is_cancelled(self):
+        # GIVEN
         schema = self.valid_schema
-        self.schema_service.get_schema.return_value = schema
+        upload_job = Mock(job_id="abc-123")
+        self.dataset_lease_service.acquire(
+            "raw/some/other/2", "other-job", LeaseMode.EXCLUSIVE
+        )
+        self.job_service.is_cancellation_requested.return_value = True
 
-        chunk1 = pd.DataFrame({})
-        chunk2 = pd.DataFrame({})
-        chunk3 = pd.DataFrame({})
+        # WHEN
+        with pytest.raises(JobCancelledError):
+            with self.data_service.hold_write_lease(upload_job, schema):
+                pass
+
+        # THEN
+        self.job_service.is_cancellation_requested.assert_called_with(upload_job)
+        lease = self.dataset_lease_service.db_adapter.get_dataset_lease(
+            "raw/some/other/2"
+        )
+        assert lease.queue == []
+        assert lease.holders.keys() == {"other-job"}
+
+    @patch.object(DataService, "validate_incoming_data")
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_process_upload_releases_the_dataset_lease_when_writing_fails(
+        self,
+        _mock_load_partitions,
+        _mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        _mock_validate_incoming_data,
+    ):
+        # GIVEN
+        upload_job = Mock()
+        upload_job.job_id = "abc-123"
+        mock_process_chunks.side_effect = AWSServiceError("Failed to upload")
+
+        # WHEN
+        with pytest.raises(AWSServiceError):
+            self.data_service.process_upload(
+                upload_job, self.valid_schema, Path("data.csv"), "123-456-789"
+            )
+
+        # THEN
+        lease = self.dataset_lease_service.db_adapter.get_dataset_lease(
+            "raw/some/other/2"
+        )
+        assert lease.holders == {}
+        self.job_service.fail.assert_called_once_with(upload_job, ["Failed to upload"])
+
+    @patch.object(DataService, "validate_incoming_data")
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_process_upload_downloads_and_deletes_landed_file(
+        self,
+        mock_load_partitions,
+        mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        mock_validate_incoming_data,
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        upload_job = Mock()
+        landing_key = "landing/raw/some/other/abc-123/data.csv"
+
+        # WHEN
+        self.data_service.process_upload(
+            upload_job, schema, Path("data.csv"), "123-456-789", landing_key
+        )
+
+        # THEN
+        assert self.job_service.update_step.call_args_list[0] == call(
+            upload_job, UploadStep.LANDED_DATA_DOWNLOAD
+        )
+        self.s3_adapter.download_landing_file.assert_called_once_with(
+            landing_key, Path("data.csv")
+        )
+        mock_validate_incoming_data.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789", upload_job
+        )
+        self.s3_adapter.delete_landing_file.assert_called_once_with(landing_key)
+        self.job_service.succeed.assert_called_once_with(upload_job)
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "validate_incoming_data")
+    def test_deletes_incoming_file_from_disk_and_fails_job_if_any_error_during_processing(
+        self,
+        mock_validate_incoming_data,
+        mock_delete_incoming_raw_file,
+    ):
+        # Given
+        schema = self.valid_schema
+        upload_job = Mock()
+
+        mock_validate_incoming_data.side_effect = DatasetValidationError("some message")
+
+        # When/Then
+        with pytest.raises(DatasetValidationError, match="some message"):
+            self.data_service.process_upload(
+                upload_job, schema, Path("data.csv"), "123-456-789"
+            )
+
+        mock_delete_incoming_raw_file.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789"
+        )
+        self.job_service.fail.assert_called_once_with(upload_job, ["some message"])
+
+    # Validate dataset ---------------------------------------
+    @patch("api.application.services.ingest_tasks.build_validated_dataframe")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_process_upload_validates_each_chunk_of_the_dataset(
+        self,
+        mock_construct_chunked_dataframe,
+        mock_build_validated_dataframe,
+    ):
+        # Given
+        schema = self.valid_schema
+        self.schema_service.get_schema.return_value = schema
+
+        chunk1 = pd.DataFrame({})
+        chunk2 = pd.DataFrame({})
+        chunk3 = pd.DataFrame({})
 
         mock_construct_chunked_dataframe.return_value = [
             chunk1,
@@ -341,146 +979,1161 @@ class TestUploadDataset:
                 "Failed to convert column [colname1] to type [integer]",
             }.issubset(error.message)
 
-    # Process Chunks -----------------------------------------
-    @patch("api.application.services.data_service.construct_chunked_dataframe")
-    def test_processes_each_dataset_chunk_with_append_behaviour(
-        self, mock_construct_chunked_dataframe
+    # Retry Upload -------------------------------------------
+    def _failed_upload_job(self, completed_steps: List[UploadStep]) -> UploadJob:
+        job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "data.csv",
+            "123-456-789",
+            DatasetMetadata("raw", "some", "other", 2),
+        )
+        job.set_status(JobStatus.FAILED)
+        job.raw_filename = "123-456-789.csv.zst"
+        job.committed_chunks = 2
+        job.completed_steps = completed_steps
+        return job
+
+    @patch("api.application.services.data_service.Thread")
+    def test_retry_upload_resumes_the_failed_job(self, mock_thread):
+        # GIVEN
+        job = self._failed_upload_job([UploadStep.RAW_DATA_UPLOAD])
+        self.job_service.get_upload_job.return_value = job
+        self.schema_service.get_schema.return_value = self.valid_schema
+
+        # WHEN
+        result = self.data_service.retry_upload("subject-123", "abc-123")
+
+        # THEN
+        assert result == "abc-123"
+        self.schema_service.get_schema.assert_called_once_with(
+            DatasetMetadata("raw", "some", "other", 2)
+        )
+        self.job_service.retry.assert_called_once_with(job)
+        mock_thread.assert_called_once_with(
+            target=self.data_service.resume_upload,
+            args=(job, self.valid_schema),
+            name="abc-123",
+        )
+        mock_thread.return_value.start.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "subject_id, status, completed_steps, message",
+        [
+            (
+                "subject-456",
+                JobStatus.FAILED,
+                [UploadStep.RAW_DATA_UPLOAD],
+                "can only be retried by the subject that started it",
+            ),
+            (
+                "subject-123",
+                JobStatus.IN_PROGRESS,
+                [UploadStep.RAW_DATA_UPLOAD],
+                "Only failed jobs can be retried",
+            ),
+            (
+                "subject-123",
+                JobStatus.FAILED,
+                [],
+                "failed before its file was archived, upload the file again",
+            ),
+        ],
+    )
+    def test_retry_upload_rejects_jobs_that_cannot_be_resumed(
+        self, subject_id, status, completed_steps, message
     ):
-        # Given
+        job = self._failed_upload_job(completed_steps)
+        job.set_status(status)
+        self.job_service.get_upload_job.return_value = job
+
+        with pytest.raises(UserError, match=message):
+            self.data_service.retry_upload(subject_id, "abc-123")
+
+        self.job_service.retry.assert_not_called()
+
+    @patch.object(DataService, "validate_incoming_data")
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_resume_upload_continues_from_the_committed_chunks(
+        self,
+        mock_load_partitions,
+        mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        mock_validate_incoming_data,
+        tmp_path,
+    ):
+        # GIVEN
         schema = self.valid_schema
+        job = self._failed_upload_job([UploadStep.RAW_DATA_UPLOAD])
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        file_path = tmp_path / "abc-123-123-456-789.csv.zst"
 
-        def dataset_chunk():
-            return pd.DataFrame(
-                {
-                    "col1": ["one", "two", "three"],
-                    "col2": [1, 2, 3],
-                }
-            )
+        # WHEN
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            self.data_service.resume_upload(job, schema)
 
-        chunk1 = dataset_chunk()
-        chunk2 = dataset_chunk()
+        # THEN
+        self.s3_adapter.download_raw_file.assert_called_once_with(
+            schema.metadata, "123-456-789.csv.zst", file_path
+        )
+        mock_validate_incoming_data.assert_not_called()
+        mock_process_chunks.assert_called_once_with(
+            schema, file_path, "123-456-789", job, 2, ANY
+        )
+        mock_load_partitions.assert_called_once_with(schema)
+        mock_delete_incoming_raw_file.assert_called_once_with(
+            schema, file_path, "123-456-789"
+        )
+        self.job_service.checkpoint_step.assert_called_once_with(
+            job, UploadStep.DATA_UPLOAD
+        )
+        self.job_service.succeed.assert_called_once_with(job)
 
-        mock_construct_chunked_dataframe.return_value = [
-            chunk1,
-            chunk2,
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_resume_upload_skips_the_data_upload_once_it_completed(
+        self,
+        mock_load_partitions,
+        _mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        tmp_path,
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        job = self._failed_upload_job(
+            [UploadStep.RAW_DATA_UPLOAD, UploadStep.DATA_UPLOAD]
+        )
+        self.s3_adapter.get_raw_file_size.return_value = 10
+
+        # WHEN
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            self.data_service.resume_upload(job, schema)
+
+        # THEN
+        mock_process_chunks.assert_not_called()
+        mock_load_partitions.assert_called_once_with(schema)
+        self.job_service.succeed.assert_called_once_with(job)
+
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    def test_resume_upload_fails_the_job_when_it_fails_again(
+        self,
+        mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        tmp_path,
+    ):
+        # GIVEN
+        job = self._failed_upload_job([UploadStep.RAW_DATA_UPLOAD])
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        mock_process_chunks.side_effect = AWSServiceError("Failed to upload")
+
+        # WHEN
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            self.data_service.resume_upload(job, self.valid_schema)
+
+        # THEN
+        mock_delete_incoming_raw_file.assert_called_once()
+        self.job_service.fail.assert_called_once_with(job, ["Failed to upload"])
+        self.job_service.succeed.assert_not_called()
+
+    # Reprocess ---------------------------------------------
+    @patch("api.application.services.data_service.Thread")
+    @patch("api.application.services.data_service.generate_uuid")
+    @patch.object(DataService, "generate_raw_file_identifier")
+    def test_reprocess_raw_files_creates_a_job_for_each_file(
+        self, mock_generate_raw_file_identifier, mock_generate_uuid, mock_thread
+    ):
+        # GIVEN
+        dataset = DatasetMetadata("raw", "some", "other", 2)
+        source = DatasetMetadata("raw", "some", "other", 1)
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.s3_adapter.list_raw_files_in_upload_order.return_value = [
+            "abc-123.csv",
+            "def-456.csv",
         ]
+        mock_generate_uuid.side_effect = ["job-1", "job-2"]
+        mock_generate_raw_file_identifier.side_effect = ["raw-1", "raw-2"]
+        first_job, second_job = Mock(job_id="job-1"), Mock(job_id="job-2")
+        self.job_service.create_upload_job.side_effect = [first_job, second_job]
 
-        self.data_service.process_chunk = Mock()
+        # WHEN
+        job_ids = self.data_service.reprocess_raw_files("subject-123", dataset, 1)
 
-        # When
-        self.data_service.process_chunks(schema, Path("data.csv"), "123-456-789")
+        # THEN
+        assert job_ids == ["job-1", "job-2"]
+        self.s3_adapter.list_raw_files_in_upload_order.assert_called_once_with(source)
+        self.job_service.create_upload_job.assert_has_calls(
+            [
+                call("subject-123", "job-1", "abc-123.csv", "raw-1", dataset),
+                call("subject-123", "job-2", "def-456.csv", "raw-2", dataset),
+            ]
+        )
+        self.job_service.update_step.assert_has_calls(
+            [call(first_job, UploadStep.QUEUED), call(second_job, UploadStep.QUEUED)]
+        )
+        mock_thread.assert_called_once_with(
+            target=self.data_service.process_reprocessing,
+            args=(
+                self.valid_schema,
+                source,
+                [(first_job, "abc-123.csv"), (second_job, "def-456.csv")],
+            ),
+            name="raw/some/other/2-reprocess",
+        )
+        mock_thread.return_value.start.assert_called_once()
 
-        # Then
-        expected_calls = [
-            call(schema, "123-456-789", chunk1),
-            call(schema, "123-456-789", chunk2),
+    @patch("api.application.services.data_service.Thread")
+    def test_reprocess_raw_files_keeps_the_upload_order_of_the_selected_files(
+        self, mock_thread
+    ):
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.s3_adapter.list_raw_files_in_upload_order.return_value = [
+            "abc-123.csv",
+            "def-456.csv",
+            "ghi-789.csv",
         ]
-        self.data_service.process_chunk.assert_has_calls(expected_calls)
-        self.s3_adapter.list_raw_files.assert_not_called()
-        self.s3_adapter.delete_dataset_files.assert_not_called()
+        self.job_service.create_upload_job.side_effect = lambda *args: Mock(
+            job_id=args[1]
+        )
 
-    @patch("api.application.services.data_service.construct_chunked_dataframe")
-    def test_processes_each_dataset_chunk_with_overwrite_behaviour(
-        self, mock_construct_chunked_dataframe
+        self.data_service.reprocess_raw_files(
+            "subject-123",
+            DatasetMetadata("raw", "some", "other", 2),
+            1,
+            ["ghi-789.csv", "abc-123.csv"],
+        )
+
+        reprocessed_files = [
+            filename for _, filename in mock_thread.call_args.kwargs["args"][2]
+        ]
+        assert reprocessed_files == ["abc-123.csv", "ghi-789.csv"]
+
+    @patch("api.application.services.data_service.Thread")
+    def test_reprocess_raw_files_only_reprocesses_the_latest_file_for_overwrite(
+        self, mock_thread
     ):
-        # Given
-        schema = Schema(
-            metadata=SchemaMetadata(
-                layer="raw",
-                domain="some",
-                dataset="other",
-                sensitivity="PUBLIC",
-                version=4,
-                owners=[Owner(name="owner", email="owner@email.com")],
-                update_behaviour="OVERWRITE",
+        self.valid_schema.metadata.update_behaviour = "OVERWRITE"
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.s3_adapter.list_raw_files_in_upload_order.return_value = [
+            "abc-123.csv",
+            "def-456.csv",
+        ]
+
+        job_ids = self.data_service.reprocess_raw_files(
+            "subject-123", DatasetMetadata("raw", "some", "other", 2), 1
+        )
+
+        assert len(job_ids) == 1
+        self.job_service.create_upload_job.assert_called_once_with(
+            "subject-123", ANY, "def-456.csv", ANY, ANY
+        )
+
+    @pytest.mark.parametrize(
+        "source_version, archived_files, raw_files, message",
+        [
+            (2, ["abc-123.csv"], None, "cannot be reprocessed into the same version"),
+            (
+                1,
+                ["abc-123.csv"],
+                ["abc-123.csv", "def-456.csv"],
+                r"The files \['def-456.csv'\] were not uploaded to the layer \[raw\]",
             ),
-            columns=[
-                Column(
-                    name="colname1",
-                    partition_index=0,
-                    data_type="int",
-                    allow_null=True,
-                ),
-                Column(
-                    name="colname2",
-                    partition_index=None,
-                    data_type="string",
-                    allow_null=False,
-                ),
+            (1, [], None, "There are no uploaded files for the layer"),
+        ],
+    )
+    @patch("api.application.services.data_service.Thread")
+    def test_reprocess_raw_files_rejects_invalid_requests(
+        self, mock_thread, source_version, archived_files, raw_files, message
+    ):
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.s3_adapter.list_raw_files_in_upload_order.return_value = archived_files
+
+        with pytest.raises(UserError, match=message):
+            self.data_service.reprocess_raw_files(
+                "subject-123",
+                DatasetMetadata("raw", "some", "other", 2),
+                source_version,
+                raw_files,
+            )
+
+        self.job_service.create_upload_job.assert_not_called()
+        mock_thread.assert_not_called()
+
+    @patch.object(DataService, "reprocess_raw_file")
+    def test_process_reprocessing_reprocesses_every_file_for_append(
+        self, mock_reprocess_raw_file
+    ):
+        source = DatasetMetadata("raw", "some", "other", 1)
+        first_job, second_job = Mock(), Mock()
+        mock_reprocess_raw_file.side_effect = [False, True]
+
+        self.data_service.process_reprocessing(
+            self.valid_schema,
+            source,
+            [(first_job, "abc-123.csv"), (second_job, "def-456.csv")],
+        )
+
+        mock_reprocess_raw_file.assert_has_calls(
+            [
+                call(first_job, self.valid_schema, source, "abc-123.csv"),
+                call(second_job, self.valid_schema, source, "def-456.csv"),
+            ],
+            any_order=True,
+        )
+        self.job_service.fail.assert_not_called()
+
+    @patch.object(DataService, "reprocess_raw_file")
+    def test_process_reprocessing_stops_after_a_failed_file_for_upsert(
+        self, mock_reprocess_raw_file
+    ):
+        self.valid_schema.metadata.update_behaviour = "UPSERT"
+        source = DatasetMetadata("raw", "some", "other", 1)
+        first_job, second_job, third_job = Mock(), Mock(), Mock()
+        mock_reprocess_raw_file.side_effect = [True, False]
+
+        self.data_service.process_reprocessing(
+            self.valid_schema,
+            source,
+            [
+                (first_job, "abc-123.csv"),
+                (second_job, "def-456.csv"),
+                (third_job, "ghi-789.csv"),
             ],
         )
 
-        def dataset_chunk():
-            return pd.DataFrame(
-                {
-                    "col1": ["one", "two", "three"],
-                    "col2": [1, 2, 3],
-                }
-            )
+        assert mock_reprocess_raw_file.call_args_list == [
+            call(first_job, self.valid_schema, source, "abc-123.csv"),
+            call(second_job, self.valid_schema, source, "def-456.csv"),
+        ]
+        self.job_service.fail.assert_called_once_with(
+            third_job,
+            ["Not reprocessed, as reprocessing the earlier file [def-456.csv] failed"],
+        )
+
+    @patch.object(DataService, "process_upload")
+    def test_reprocess_raw_file_processes_the_downloaded_file_as_an_upload(
+        self, mock_process_upload, tmp_path
+    ):
+        # GIVEN
+        source = DatasetMetadata("raw", "some", "other", 1)
+        job = Mock(job_id="job-1", raw_file_identifier="raw-1")
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        self.s3_adapter.download_raw_file.side_effect = (
+            lambda dataset, filename, file_path: file_path.write_bytes(b"a,b\n1,2\n")
+        )
+        file_path = tmp_path / "job-1-abc-123.csv"
+
+        # WHEN
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            result = self.data_service.reprocess_raw_file(
+                job, self.valid_schema, source, "abc-123.csv"
+            )
+
+        # THEN
+        assert result is True
+        self.job_service.update_step.assert_called_once_with(
+            job, UploadStep.RAW_DATA_DOWNLOAD
+        )
+        self.s3_adapter.download_raw_file.assert_called_once_with(
+            source, "abc-123.csv", file_path
+        )
+        mock_process_upload.assert_called_once_with(
+            job, self.valid_schema, file_path, "raw-1"
+        )
+
+    @patch.object(DataService, "process_upload")
+    def test_reprocess_raw_file_reads_parquet_archived_as_csv_as_parquet(
+        self, mock_process_upload, tmp_path
+    ):
+        # GIVEN
+        job = Mock(job_id="job-1", raw_file_identifier="raw-1")
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        self.s3_adapter.download_raw_file.side_effect = (
+            lambda dataset, filename, file_path: pd.DataFrame({"a": [1]}).to_parquet(
+                file_path
+            )
+        )
+        spool = Spool(tmp_path.as_posix())
+
+        # WHEN
+        with patch("api.application.services.data_service.spool", spool), patch(
+            "api.common.data_handlers.spool", spool
+        ):
+            result = self.data_service.reprocess_raw_file(
+                job,
+                self.valid_schema,
+                DatasetMetadata("raw", "some", "other", 1),
+                "abc-123.csv",
+            )
+
+        # THEN
+        assert result is True
+        file_path = tmp_path / "job-1-abc-123.parquet"
+        mock_process_upload.assert_called_once_with(
+            job, self.valid_schema, file_path, "raw-1"
+        )
+        assert file_path.exists()
+        assert not (tmp_path / "job-1-abc-123.csv").exists()
+        assert spool.reserved_bytes() == os.path.getsize(file_path)
+
+    @patch.object(DataService, "process_upload")
+    def test_reprocess_raw_file_fails_the_job_when_the_download_fails(
+        self, mock_process_upload, tmp_path
+    ):
+        job = Mock(job_id="job-1", raw_file_identifier="raw-1")
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        self.s3_adapter.download_raw_file.side_effect = AWSServiceError(
+            "Failed to download"
+        )
+
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            result = self.data_service.reprocess_raw_file(
+                job,
+                self.valid_schema,
+                DatasetMetadata("raw", "some", "other", 1),
+                "abc-123.csv",
+            )
+
+        assert result is False
+        self.job_service.fail.assert_called_once_with(job, ["Failed to download"])
+        mock_process_upload.assert_not_called()
+
+    @patch.object(DataService, "process_upload")
+    def test_reprocess_raw_file_reports_a_failed_upload(
+        self, mock_process_upload, tmp_path
+    ):
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        self.s3_adapter.download_raw_file.side_effect = (
+            lambda dataset, filename, file_path: file_path.write_bytes(b"a,b\n1,2\n")
+        )
+        mock_process_upload.side_effect = DatasetValidationError(["Invalid"])
+
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            result = self.data_service.reprocess_raw_file(
+                Mock(job_id="job-1", raw_file_identifier="raw-1"),
+                self.valid_schema,
+                DatasetMetadata("raw", "some", "other", 1),
+                "abc-123.csv",
+            )
+
+        assert result is False
+        self.job_service.fail.assert_not_called()
+
+    # Cancel -------------------------------------------------
+    @patch.object(DataService, "cancel_upload")
+    @patch.object(DataService, "validate_incoming_data")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    def test_process_upload_stops_when_the_job_is_cancelled(
+        self,
+        mock_delete_incoming_raw_file,
+        _mock_validate_incoming_data,
+        mock_cancel_upload,
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        upload_job = Mock(job_id="abc-123", raw_filename=None)
+        self.job_service.is_cancellation_requested.side_effect = [False, True]
+
+        # WHEN
+        with pytest.raises(JobCancelledError):
+            self.data_service.process_upload(
+                upload_job, schema, Path("data.csv"), "123-456-789"
+            )
+
+        # THEN
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        mock_delete_incoming_raw_file.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789"
+        )
+        mock_cancel_upload.assert_called_once_with(
+            upload_job, schema, "123-456-789", [], []
+        )
+        self.job_service.fail.assert_not_called()
+
+    @patch("api.application.services.data_service.encode_chunk")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_upload_chunks_stops_between_chunks_when_the_job_is_cancelled(
+        self, mock_construct_chunked_dataframe, mock_encode_chunk
+    ):
+        # GIVEN
+        upload_job = Mock(job_id="abc-123")
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [pd.DataFrame({"colname1": [1]}), pd.DataFrame({"colname1": [2]})],
+        )
+        self.job_service.is_cancellation_requested.side_effect = [False, True]
+
+        # WHEN
+        with pytest.raises(JobCancelledError):
+            self.data_service.upload_chunks(
+                self.valid_schema, Path("data.csv"), "123-456-789", upload_job
+            )
+
+        # THEN
+        mock_encode_chunk.assert_called_once()
+        self.s3_adapter.upload_encoded_partitions.assert_called_once()
+        self.dataset_statistics_service.record_chunk.assert_called_once_with(
+            self.valid_schema.metadata, "123-456-789", ANY, upload_job, 1
+        )
+
+    @patch("api.application.services.data_service.encode_chunk")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_upload_chunks_stops_when_the_write_lease_is_lost(
+        self, mock_construct_chunked_dataframe, mock_encode_chunk
+    ):
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe, [pd.DataFrame({"colname1": [1]})]
+        )
+        lease_lost = Event()
+        lease_lost.set()
+
+        with pytest.raises(DatasetLeaseLostError):
+            self.data_service.upload_chunks(
+                self.valid_schema,
+                Path("data.csv"),
+                "123-456-789",
+                lease_lost=lease_lost,
+            )
+
+        self.s3_adapter.upload_encoded_partitions.assert_not_called()
+        self.dataset_statistics_service.record_chunk.assert_not_called()
+
+    @patch.object(DataService, "remove_existing_data")
+    @patch.object(DataService, "upload_chunks")
+    def test_process_chunks_does_not_overwrite_once_the_write_lease_is_lost(
+        self, _mock_upload_chunks, mock_remove_existing_data
+    ):
+        schema = self.valid_schema.model_copy(deep=True)
+        schema.metadata.update_behaviour = "OVERWRITE"
+        lease_lost = Event()
+        lease_lost.set()
+
+        with pytest.raises(DatasetLeaseLostError):
+            self.data_service.process_chunks(
+                schema, Path("data.csv"), "123-456-789", lease_lost=lease_lost
+            )
+
+        mock_remove_existing_data.assert_not_called()
+
+    @patch.object(DataService, "cancel_upload")
+    @patch.object(DataService, "validate_incoming_batch")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    def test_process_batch_upload_stops_when_the_job_is_cancelled(
+        self,
+        mock_delete_incoming_raw_file,
+        _mock_validate_incoming_batch,
+        mock_cancel_upload,
+    ):
+        schema = self.valid_schema
+        upload_job = Mock(job_id="abc-123")
+        files = [
+            BatchFile(filename="first.csv", file_path=Path("first.csv")),
+            BatchFile(filename="second.csv", file_path=Path("second.csv")),
+        ]
+        self.job_service.is_cancellation_requested.side_effect = [False, True]
+
+        with pytest.raises(JobCancelledError):
+            self.data_service.process_batch_upload(
+                upload_job, schema, files, "123-456-789", ["landing/first.csv"]
+            )
+
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        assert mock_delete_incoming_raw_file.call_count == 2
+        mock_cancel_upload.assert_called_once_with(
+            upload_job,
+            schema,
+            "123-456-789",
+            ["123-456-789-0000.csv.zst", "123-456-789-0001.csv.zst"],
+            ["landing/first.csv"],
+            quarantine_identifiers=["123-456-789-0000", "123-456-789-0001"],
+        )
+
+    @patch.object(DataService, "cancel_upload")
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    def test_resume_upload_stops_when_the_job_is_cancelled(
+        self,
+        _mock_delete_incoming_raw_file,
+        mock_process_chunks,
+        mock_cancel_upload,
+        tmp_path,
+    ):
+        job = self._failed_upload_job([UploadStep.RAW_DATA_UPLOAD])
+        self.s3_adapter.get_raw_file_size.return_value = 10
+        self.job_service.is_cancellation_requested.return_value = True
+
+        with patch(
+            "api.application.services.data_service.spool", Spool(tmp_path.as_posix())
+        ):
+            self.data_service.resume_upload(job, self.valid_schema)
+
+        mock_process_chunks.assert_not_called()
+        mock_cancel_upload.assert_called_once_with(
+            job, self.valid_schema, "123-456-789", ["123-456-789.csv.zst"]
+        )
+        self.job_service.fail.assert_not_called()
+
+    def test_reprocess_raw_file_does_not_download_cancelled_jobs(self):
+        job = Mock(job_id="job-1", raw_file_identifier="raw-1")
+        self.job_service.is_cancellation_requested.return_value = True
+
+        result = self.data_service.reprocess_raw_file(
+            job,
+            self.valid_schema,
+            DatasetMetadata("raw", "some", "other", 1),
+            "abc-123.csv",
+        )
+
+        assert result is False
+        self.s3_adapter.download_raw_file.assert_not_called()
+        self.job_service.cancel.assert_called_once_with(job)
+
+    def test_cancel_upload_removes_the_data_written_by_the_upload(self):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        upload_job = Mock(job_id="abc-123")
+
+        # WHEN
+        self.data_service.cancel_upload(
+            upload_job,
+            schema,
+            "123-456-789",
+            ["123-456-789.csv.zst"],
+            ["landing/data.csv"],
+        )
+
+        # THEN
+        self.s3_adapter.delete_dataset_files.assert_called_once_with(
+            schema.metadata, "123-456-789"
+        )
+        self.dataset_statistics_service.remove_uploads.assert_called_once_with(
+            schema.metadata, "123-456-789"
+        )
+        self.s3_adapter.delete_dataset_files_using_key.assert_called_once_with(
+            ["raw_data/raw/some/other/quarantine/2/123-456-789.parquet"],
+            "123-456-789",
+        )
+        self.s3_adapter.delete_raw_dataset_files.assert_called_once_with(
+            schema.metadata, "123-456-789.csv.zst"
+        )
+        self.s3_adapter.delete_landing_file.assert_called_once_with("landing/data.csv")
+        self.query_cache_service.invalidate.assert_called_once_with(schema.metadata)
+        self.job_service.cancel.assert_called_once_with(upload_job)
+
+    def test_cancel_upload_fails_the_job_when_its_data_cannot_be_removed(self):
+        upload_job = Mock(job_id="abc-123")
+        self.s3_adapter.delete_dataset_files.side_effect = AWSServiceError(
+            "Failed to delete"
+        )
+
+        self.data_service.cancel_upload(
+            upload_job, self.valid_schema, "123-456-789", []
+        )
+
+        self.job_service.fail.assert_called_once_with(
+            upload_job,
+            [
+                "The upload was cancelled, but the data it had written could not be removed"
+            ],
+        )
+        self.query_cache_service.invalidate.assert_called_once_with(
+            self.valid_schema.metadata
+        )
+        self.job_service.cancel.assert_not_called()
+
+    # Process Chunks -----------------------------------------
+    @patch("api.application.services.data_service.encode_chunk")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_processes_each_dataset_chunk_with_append_behaviour(
+        self, mock_construct_chunked_dataframe, mock_encode_chunk
+    ):
+        # Given
+        schema = self.valid_schema
+
+        def dataset_chunk():
+            return pd.DataFrame(
+                {
+                    "col1": ["one", "two", "three"],
+                    "col2": [1, 2, 3],
+                }
+            )
+
+        chunk1 = dataset_chunk()
+        chunk2 = dataset_chunk()
+
+        mock_construct_chunked_dataframe.return_value = [
+            chunk1,
+            chunk2,
+        ]
+        encoded1 = [EncodedPartition(path="col1=one", content=b"one")]
+        encoded2 = [EncodedPartition(path="col1=two", content=b"two")]
+        mock_encode_chunk.side_effect = [encoded1, encoded2]
+
+        self.data_service.process_chunk = Mock()
+
+        # When
+        self.data_service.process_chunks(schema, Path("data.csv"), "123-456-789")
+
+        # Then
+        mock_encode_chunk.assert_has_calls([call(schema, chunk1), call(schema, chunk2)])
+        expected_calls = [
+            call(schema, "123-456-789", 0, encoded1, None),
+            call(schema, "123-456-789", 1, encoded2, None),
+        ]
+        self.data_service.process_chunk.assert_has_calls(expected_calls)
+        self.s3_adapter.list_raw_files.assert_not_called()
+        self.s3_adapter.delete_dataset_files.assert_not_called()
+
+    @patch("api.application.services.data_service.encode_chunk")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_processes_each_dataset_chunk_with_overwrite_behaviour(
+        self, mock_construct_chunked_dataframe, mock_encode_chunk
+    ):
+        # Given
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                version=4,
+                owners=[Owner(name="owner", email="owner@email.com")],
+                update_behaviour="OVERWRITE",
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="int",
+                    allow_null=True,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+        def dataset_chunk():
+            return pd.DataFrame(
+                {
+                    "col1": ["one", "two", "three"],
+                    "col2": [1, 2, 3],
+                }
+            )
+
+        chunk1 = dataset_chunk()
+        chunk2 = dataset_chunk()
+
+        mock_construct_chunked_dataframe.return_value = [
+            chunk1,
+            chunk2,
+        ]
+        encoded1 = [EncodedPartition(path="col1=one", content=b"one")]
+        encoded2 = [EncodedPartition(path="col1=two", content=b"two")]
+        mock_encode_chunk.side_effect = [encoded1, encoded2]
+
+        self.data_service.process_chunk = Mock()
+
+        # When
+        self.data_service.process_chunks(schema, Path("data.csv"), "123-456-789")
+
+        # Then
+        mock_encode_chunk.assert_has_calls([call(schema, chunk1), call(schema, chunk2)])
+        expected_calls = [
+            call(schema, "123-456-789", 0, encoded1, None),
+            call(schema, "123-456-789", 1, encoded2, None),
+        ]
+        self.data_service.process_chunk.assert_has_calls(expected_calls)
+
+        self.s3_adapter.delete_previous_dataset_files.assert_called_once_with(
+            schema.metadata, "123-456-789"
+        )
+        self.dataset_statistics_service.remove_previous_uploads.assert_called_once_with(
+            schema.metadata, "123-456-789"
+        )
+
+    @patch("api.application.services.data_service.encode_chunk")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_upload_chunks_resumes_after_the_committed_chunks(
+        self, mock_construct_chunked_dataframe, mock_encode_chunk
+    ):
+        # Given
+        schema = self.valid_schema
+        chunks = [pd.DataFrame({"col1": [index]}) for index in range(3)]
+        mock_construct_chunked_dataframe.return_value = chunks
+        encoded = [EncodedPartition(path="col1=2", content=b"two")]
+        mock_encode_chunk.return_value = encoded
+        upload_job = Mock()
+        self.data_service.process_chunk = Mock()
+
+        # When
+        self.data_service.upload_chunks(
+            schema, Path("data.csv"), "123-456-789", upload_job, 2
+        )
+
+        # Then
+        mock_encode_chunk.assert_called_once_with(schema, chunks[2])
+        self.data_service.process_chunk.assert_called_once_with(
+            schema, "123-456-789", 2, encoded, upload_job
+        )
+
+    # Upsert -------------------------------------------------
+    def _upsert_schema(self) -> Schema:
+        schema = self.valid_schema
+        schema.metadata.update_behaviour = "UPSERT"
+        schema.metadata.key_columns = ["colname1", "colname2"]
+        return schema
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_incoming_data_returns_the_keys_of_an_upsert(
+        self, mock_construct_chunked_dataframe, _mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self._upsert_schema()
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+            pd.DataFrame({"colname1": [1], "colname2": ["c"]}),
+        ]
+
+        # WHEN
+        keys = self.data_service.validate_incoming_data(
+            schema, Path("data.csv"), "123-456-789"
+        )
+
+        # THEN
+        assert keys.to_dict("list") == {
+            "colname1": ["1", "2", "1"],
+            "colname2": ["a", "b", "c"],
+        }
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_incoming_data_rejects_keys_repeated_across_chunks(
+        self, mock_construct_chunked_dataframe, mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self._upsert_schema()
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+            pd.DataFrame({"colname1": [2], "colname2": ["b"]}),
+        ]
+
+        # WHEN
+        with pytest.raises(DatasetValidationError) as error:
+            self.data_service.validate_incoming_data(
+                schema, Path("data.csv"), "123-456-789"
+            )
+
+        # THEN
+        assert error.value.message == [
+            "Key columns ['colname1', 'colname2'] have the same values in 2 rows, each key can only be uploaded once"
+        ]
+        mock_delete_incoming_raw_file.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789"
+        )
+
+    def test_validate_incoming_data_reads_csv_files_as_the_types_of_the_schema(
+        self, tmp_path
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        file_path = tmp_path / "data.csv"
+        # The values of the string column would otherwise be read as integers
+        file_path.write_text("colname1,colname2\n1,001\n2,002\n")
+
+        # WHEN
+        keys = self.data_service.validate_incoming_data(
+            schema, file_path, "123-456-789"
+        )
+
+        # THEN
+        assert keys is None
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_quarantine_incoming_data_stores_the_invalid_rows(
+        self, mock_construct_chunked_dataframe, mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        upload_job = Mock()
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": [1, "two"], "colname2": ["a", "b"]}),
+            pd.DataFrame({"colname1": [3, 4], "colname2": ["c", None]}),
+        ]
+
+        # WHEN
+        keys = self.data_service.quarantine_incoming_data(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
+
+        # THEN
+        assert keys is None
+        self.s3_adapter.store_data.assert_called_once_with(
+            "raw_data/raw/some/other/quarantine/2/123-456-789.parquet", ANY
+        )
+        quarantined_rows = pd.read_parquet(
+            BytesIO(self.s3_adapter.store_data.call_args.args[1])
+        )
+        assert quarantined_rows.to_dict("list") == {
+            "colname1": ["two", "4"],
+            "colname2": ["b", None],
+            "quarantine_reason": [
+                "Column [colname1] is not of type int",
+                "Column [colname2] failed the check not_nullable",
+            ],
+        }
+        self.job_service.set_row_counts.assert_called_once_with(upload_job, 2, 2)
+        mock_delete_incoming_raw_file.assert_not_called()
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_quarantine_incoming_data_without_invalid_rows(
+        self, mock_construct_chunked_dataframe, _mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        upload_job = Mock()
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+        ]
+
+        # WHEN
+        self.data_service.quarantine_incoming_data(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
+
+        # THEN
+        self.s3_adapter.store_data.assert_not_called()
+        self.job_service.set_row_counts.assert_called_once_with(upload_job, 2, 0)
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_quarantine_incoming_data_fails_when_every_row_is_invalid(
+        self, mock_construct_chunked_dataframe, mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.invalid_rows = "QUARANTINE"
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": ["one", "two"], "colname2": ["a", "b"]}),
+        ]
+
+        # WHEN
+        with pytest.raises(DatasetValidationError) as error:
+            self.data_service.quarantine_incoming_data(
+                Mock(), schema, Path("data.csv"), "123-456-789"
+            )
+
+        # THEN
+        assert error.value.message == [
+            "Every row failed validation, Column [colname1] is not of type int in 2 rows"
+        ]
+        self.s3_adapter.store_data.assert_not_called()
+        mock_delete_incoming_raw_file.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789"
+        )
+
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_quarantine_incoming_data_rejects_keys_repeated_across_chunks(
+        self, mock_construct_chunked_dataframe, _mock_delete_incoming_raw_file
+    ):
+        # GIVEN
+        schema = self._upsert_schema()
+        schema.metadata.invalid_rows = "QUARANTINE"
+        mock_construct_chunked_dataframe.return_value = [
+            pd.DataFrame({"colname1": [1, "x"], "colname2": ["a", "b"]}),
+            pd.DataFrame({"colname1": [1], "colname2": ["a"]}),
+        ]
+
+        # WHEN
+        with pytest.raises(DatasetValidationError) as error:
+            self.data_service.quarantine_incoming_data(
+                Mock(), schema, Path("data.csv"), "123-456-789"
+            )
+
+        # THEN
+        assert error.value.message == [
+            "Key columns ['colname1', 'colname2'] have the same values in 2 rows, each key can only be uploaded once"
+        ]
+
+    @patch.object(DataService, "quarantine_incoming_data")
+    @patch.object(DataService, "validate_incoming_data")
+    def test_validate_upload_quarantines_invalid_rows_when_the_schema_does(
+        self, mock_validate_incoming_data, mock_quarantine_incoming_data
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        upload_job = Mock()
+
+        # WHEN
+        self.data_service.validate_upload(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
+        schema.metadata.invalid_rows = "QUARANTINE"
+        self.data_service.validate_upload(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
+
+        # THEN
+        mock_validate_incoming_data.assert_called_once_with(
+            schema, Path("data.csv"), "123-456-789", upload_job
+        )
+        mock_quarantine_incoming_data.assert_called_once_with(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
 
-        chunk1 = dataset_chunk()
-        chunk2 = dataset_chunk()
+    @patch.object(DataService, "replace_existing_rows")
+    @patch.object(DataService, "validate_incoming_data")
+    @patch.object(DataService, "process_chunks")
+    @patch("api.application.services.data_service.delete_incoming_raw_file")
+    @patch.object(DataService, "load_partitions")
+    def test_process_upload_replaces_existing_rows_of_an_upsert(
+        self,
+        _mock_load_partitions,
+        _mock_delete_incoming_raw_file,
+        _mock_process_chunks,
+        mock_validate_incoming_data,
+        mock_replace_existing_rows,
+    ):
+        # GIVEN
+        schema = self._upsert_schema()
+        upload_job = Mock()
+        upload_job.job_id = "abc-123"
+        incoming_keys = pd.DataFrame({"colname1": ["1"], "colname2": ["a"]})
+        mock_validate_incoming_data.return_value = incoming_keys
 
-        mock_construct_chunked_dataframe.return_value = [
-            chunk1,
-            chunk2,
-        ]
+        # WHEN
+        self.data_service.process_upload(
+            upload_job, schema, Path("data.csv"), "123-456-789"
+        )
 
-        self.data_service.process_chunk = Mock()
+        # THEN
+        mock_replace_existing_rows.assert_called_once_with(
+            schema, "123-456-789", incoming_keys
+        )
 
-        # When
-        self.data_service.process_chunks(schema, Path("data.csv"), "123-456-789")
+    def test_replace_existing_rows_only_rewrites_files_holding_the_keys(self):
+        # GIVEN
+        schema = self._upsert_schema()
+        incoming_keys = pd.DataFrame({"colname1": ["1"], "colname2": ["b"]})
+        location = "data/raw/some/other/2"
+        files = {
+            f"{location}/colname1=2/old_1.parquet": ["b"],
+            f"{location}/colname1=1/old_2.parquet": ["x", "y"],
+            f"{location}/colname1=1/old_3.parquet": ["a", "b", "c"],
+            f"{location}/colname1=1/old_4.parquet": ["b"],
+        }
+        contents = {}
+        for key, values in files.items():
+            buffer = BytesIO()
+            pq.write_table(pa.table({"colname2": values}), buffer)
+            contents[key] = buffer.getvalue()
+        self.s3_adapter.list_previous_dataset_files.return_value = list(files)
+        self.s3_adapter.retrieve_parquet_metadata.side_effect = (
+            lambda key: pq.read_metadata(BytesIO(contents[key]))
+        )
+        self.s3_adapter.retrieve_data.side_effect = lambda key: BytesIO(contents[key])
 
-        # Then
-        expected_calls = [
-            call(schema, "123-456-789", chunk1),
-            call(schema, "123-456-789", chunk2),
-        ]
-        self.data_service.process_chunk.assert_has_calls(expected_calls)
+        # WHEN
+        self.data_service.replace_existing_rows(schema, "123-456-789", incoming_keys)
 
-        self.s3_adapter.delete_previous_dataset_files.assert_called_once_with(
+        # THEN
+        self.s3_adapter.list_previous_dataset_files.assert_called_once_with(
             schema.metadata, "123-456-789"
         )
+        assert self.s3_adapter.retrieve_parquet_metadata.call_args_list == [
+            call(f"{location}/colname1=1/old_2.parquet"),
+            call(f"{location}/colname1=1/old_3.parquet"),
+            call(f"{location}/colname1=1/old_4.parquet"),
+        ]
+        assert self.s3_adapter.retrieve_data.call_args_list == [
+            call(f"{location}/colname1=1/old_3.parquet"),
+            call(f"{location}/colname1=1/old_4.parquet"),
+        ]
+        stored_key, stored_content = self.s3_adapter.store_data.call_args.args
+        assert stored_key == f"{location}/colname1=1/old_3.parquet"
+        assert pq.read_table(BytesIO(stored_content)).to_pydict() == {
+            "colname2": ["a", "c"]
+        }
+        self.s3_adapter.delete_dataset_files_using_key.assert_called_once_with(
+            [f"{location}/colname1=1/old_4.parquet"], "old_4.parquet"
+        )
+        assert self.dataset_statistics_service.record_rewrite.call_args_list == [
+            call(
+                schema.metadata,
+                f"{location}/colname1=1/old_3.parquet",
+                len(contents[f"{location}/colname1=1/old_3.parquet"]),
+                3,
+                len(stored_content),
+                2,
+            ),
+            call(
+                schema.metadata,
+                f"{location}/colname1=1/old_4.parquet",
+                len(contents[f"{location}/colname1=1/old_4.parquet"]),
+                1,
+                0,
+                0,
+            ),
+        ]
 
     # Process Chunks -----------------------------------------
-    @patch("api.application.services.data_service.build_validated_dataframe")
-    def test_validates_and_uploads_chunk(self, mock_build_validated_dataframe):
+    def test_uploads_encoded_partitions_of_chunk(self):
         # Given
         schema = self.valid_schema
-
-        chunk = pd.DataFrame({})
-        chunk2 = pd.DataFrame({})
-
-        mock_build_validated_dataframe.return_value = chunk2
-        self.data_service.upload_data = Mock()
-        self.data_service.generate_permanent_filename = Mock(
-            return_value="123-456-789_111-222-333.parquet"
-        )
+        encoded_partitions = [EncodedPartition(path="some/path", content=b"data")]
 
         # When
-        self.data_service.process_chunk(schema, "123-456-789", chunk)
+        self.data_service.process_chunk(schema, "123-456-789", 3, encoded_partitions)
 
         # Then
-        self.data_service.upload_data.assert_called_once_with(
-            schema, chunk2, "123-456-789_111-222-333.parquet"
+        self.s3_adapter.upload_encoded_partitions.assert_called_once_with(
+            schema, "123-456-789_000003.parquet", encoded_partitions
+        )
+        self.dataset_statistics_service.record_chunk.assert_called_once_with(
+            schema.metadata, "123-456-789", encoded_partitions, None, 4
         )
 
-    @patch("api.application.services.data_service.build_validated_dataframe")
+    @patch("api.application.services.ingest_tasks.build_validated_dataframe")
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
     def test_raises_validation_error_when_validation_fails(
-        self, mock_build_validated_dataframe
+        self, mock_construct_chunked_dataframe, mock_build_validated_dataframe
     ):
         # Given
         schema = self.valid_schema
-
-        chunk = pd.DataFrame({})
-
+        mock_construct_chunked_dataframe.return_value = [pd.DataFrame({})]
         mock_build_validated_dataframe.side_effect = DatasetValidationError(
             "some error"
         )
 
         # When/Then
         with pytest.raises(DatasetValidationError, match="some error"):
-            self.data_service.process_chunk(schema, "123-456-789", chunk)
+            self.data_service.process_chunks(schema, Path("data.csv"), "123-456-789")
+        self.s3_adapter.upload_encoded_partitions.assert_not_called()
 
     # Upload Data --------------------------------------------
     @patch("api.application.services.data_service.generate_partitioned_data")
@@ -517,6 +2170,190 @@ class TestUploadDataset:
             "query_id"
         )
 
+    def test_load_partitions_is_skipped_for_projected_partitions(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                version="2",
+                sensitivity="PUBLIC",
+                partition_by=DerivedPartition(column="colname1"),
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%Y-%m-%d",
+                ),
+            ],
+        )
+
+        self.data_service.load_partitions(schema)
+
+        self.athena_adapter.query_sql_async.assert_not_called()
+
+    # Validate Dataset  -------------------------------------
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_returns_valid_result_without_storing_data(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [
+                pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+                pd.DataFrame({"colname1": [3], "colname2": ["c"]}),
+            ],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2), Path("data.csv")
+        )
+
+        # THEN
+        assert result.valid is True
+        assert result.rows_validated == 3
+        assert result.errors == []
+        assert self.s3_adapter.method_calls == []
+        assert self.athena_adapter.method_calls == []
+        assert self.job_service.method_calls == []
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_returns_errors_of_every_chunk(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [
+                pd.DataFrame({"colname1": [1, 2], "colname2": ["a", None]}),
+                pd.DataFrame({"colname1": [3], "colname2": ["c"]}, index=[2]),
+                pd.DataFrame({"colname1": [4], "colname2": [None]}, index=[3]),
+            ],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2), Path("data.csv")
+        )
+
+        # THEN
+        assert result.valid is False
+        assert result.rows_validated == 4
+        # The failures of the same check are reported once for the whole file
+        assert result.errors == [
+            "non-nullable series 'colname2' contains null values in 2 rows: row 1, row 3"
+        ]
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_with_fail_fast_stops_at_first_invalid_chunk(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [
+                pd.DataFrame({"colname1": [1, 2], "colname2": ["a", None]}),
+                pd.DataFrame({"colname1": [3], "colname2": [None]}),
+            ],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2),
+            Path("data.csv"),
+            fail_fast=True,
+        )
+
+        # THEN
+        assert result.valid is False
+        assert result.rows_validated == 2
+        assert len(result.errors) == 1
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_with_sample_rows_only_validates_the_sample(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [
+                pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+                pd.DataFrame({"colname1": [3, 4], "colname2": ["c", None]}),
+                pd.DataFrame({"colname1": [5], "colname2": [None]}),
+            ],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2),
+            Path("data.csv"),
+            sample_rows=3,
+        )
+
+        # THEN
+        assert result.valid is True
+        assert result.rows_validated == 3
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_reports_unprocessable_dataset(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        self.schema_service.get_schema.return_value = self.valid_schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [pd.DataFrame({"colname1": [1], "colname2": ["a"], "extra": [2]})],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2), Path("data.csv")
+        )
+
+        # THEN
+        assert result.valid is False
+        assert result.rows_validated == 0
+        assert len(result.errors) == 1
+
+    @patch("api.application.services.data_service.construct_chunked_dataframe")
+    def test_validate_dataset_reports_keys_repeated_across_chunks(
+        self, mock_construct_chunked_dataframe
+    ):
+        # GIVEN
+        schema = self.valid_schema
+        schema.metadata.update_behaviour = "UPSERT"
+        schema.metadata.key_columns = ["colname1", "colname2"]
+        self.schema_service.get_schema.return_value = schema
+        self.chunked_dataframe_values(
+            mock_construct_chunked_dataframe,
+            [
+                pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]}),
+                pd.DataFrame({"colname1": [2], "colname2": ["b"]}, index=[2]),
+            ],
+        )
+
+        # WHEN
+        result = self.data_service.validate_dataset(
+            DatasetMetadata("raw", "some", "other", 2), Path("data.csv")
+        )
+
+        # THEN
+        assert result.valid is False
+        assert result.rows_validated == 3
+        assert result.errors == [
+            "Key columns ['colname1', 'colname2'] have the same values in 2 rows, each key can only be uploaded once"
+        ]
+
 
 class TestListRawFiles:
     def setup_method(self):
@@ -636,7 +2473,9 @@ class TestDatasetInfoRetrieval:
         last_uploader = self.data_service.get_last_uploader(dataset_metadata)
 
         assert last_uploader == "test_user"
-        self.subject_service.get_subject_name_by_id.assert_called_once_with("subject-123")
+        self.subject_service.get_subject_name_by_id.assert_called_once_with(
+            "subject-123"
+        )
 
     def test_get_last_uploader_returns_unknown_when_no_job(self):
         dataset_metadata = DatasetMetadata("raw", "some", "other", 2)
@@ -652,7 +2491,9 @@ class TestDatasetInfoRetrieval:
         self.job_service.db_adapter.get_latest_successful_upload_job.return_value = {
             "sk2": "subject-123"
         }
-        self.subject_service.get_subject_name_by_id.side_effect = Exception("Subject not found")
+        self.subject_service.get_subject_name_by_id.side_effect = Exception(
+            "Subject not found"
+        )
 
         last_uploader = self.data_service.get_last_uploader(dataset_metadata)
 
@@ -669,12 +2510,17 @@ class TestQueryDataset:
         self.s3_adapter = Mock()
         self.athena_adapter = Mock()
         self.job_service = Mock()
+        self.query_cache_service = Mock()
+        self.query_cache_service.get_result.return_value = None
+        self.dataset_statistics_service = Mock()
         self.data_service = DataService(
             self.s3_adapter,
             None,
             self.athena_adapter,
             None,
             self.job_service,
+            query_cache_service=self.query_cache_service,
+            dataset_statistics_service=self.dataset_statistics_service,
         )
 
     def test_is_query_too_large_with_limit_under(self):
@@ -685,8 +2531,71 @@ class TestQueryDataset:
         )
         assert response is False
 
+    def test_is_query_too_large_with_dataset_rows_under(self):
+        query = Query()
+        self.dataset_statistics_service.get_statistics.return_value = DatasetStatistics(
+            size_bytes=1_000_000_000, files=10, rows=100_000
+        )
+
+        dataset = DatasetMetadata("raw", "domain1", "dataset1", 2)
+        response = self.data_service.is_query_too_large(dataset, query)
+        assert response is False
+        self.dataset_statistics_service.get_statistics.assert_called_once_with(dataset)
+        self.s3_adapter.get_folder_size.assert_not_called()
+
+    def test_is_query_too_large_with_dataset_rows_over_and_dataset_size_under(self):
+        query = Query()
+        self.dataset_statistics_service.get_statistics.return_value = DatasetStatistics(
+            size_bytes=5_000_000, files=1, rows=150_000
+        )
+
+        response = self.data_service.is_query_too_large(
+            DatasetMetadata("raw", "domain1", "dataset1", 2), query
+        )
+        assert response is False
+
+    def test_is_query_too_large_with_dataset_rows_and_dataset_size_over(self):
+        query = Query(select_columns=["count(*)"])
+        self.dataset_statistics_service.get_statistics.return_value = DatasetStatistics(
+            size_bytes=1_000_000_000, files=10, rows=10_000_000
+        )
+
+        response = self.data_service.is_query_too_large(
+            DatasetMetadata("raw", "domain1", "dataset1", 2), query
+        )
+        assert response is True
+
+    def test_is_query_too_large_is_the_same_before_and_after_the_rebuild(self):
+        query = Query(
+            filter={"conditions": [{"column": "colname1", "operator": "=", "value": 1}]}
+        )
+        dataset = DatasetMetadata("raw", "domain1", "dataset1", 2)
+        self.s3_adapter.get_folder_size.return_value = 5_000_000
+
+        self.dataset_statistics_service.get_statistics.return_value = None
+        before_rebuild = self.data_service.is_query_too_large(dataset, query)
+        self.dataset_statistics_service.get_statistics.return_value = DatasetStatistics(
+            size_bytes=5_000_000, files=1, rows=150_000
+        )
+        after_rebuild = self.data_service.is_query_too_large(dataset, query)
+
+        assert before_rebuild is False
+        assert after_rebuild is False
+
+    def test_is_query_too_large_with_limit_over_and_dataset_rows_under(self):
+        query = Query(limit=1_000_000)
+        self.dataset_statistics_service.get_statistics.return_value = DatasetStatistics(
+            size_bytes=1_000_000_000, files=10, rows=50_000
+        )
+
+        response = self.data_service.is_query_too_large(
+            DatasetMetadata("raw", "domain1", "dataset1", 2), query
+        )
+        assert response is False
+
     def test_is_query_too_large_with_dataset_size_under(self):
         query = Query()
+        self.dataset_statistics_service.get_statistics.return_value = None
         self.s3_adapter.get_folder_size.return_value = 100
 
         dataset = DatasetMetadata("raw", "domain1", "dataset1", 2)
@@ -695,9 +2604,13 @@ class TestQueryDataset:
         self.s3_adapter.get_folder_size.assert_called_once_with(
             dataset.s3_file_location()
         )
+        self.dataset_statistics_service.rebuild_in_background.assert_called_once_with(
+            dataset
+        )
 
     def test_is_query_too_large_with_dataset_size_over(self):
         query = Query()
+        self.dataset_statistics_service.get_statistics.return_value = None
         self.s3_adapter.get_folder_size.return_value = 1_000_000_000
 
         dataset = DatasetMetadata("raw", "domain1", "dataset1", 2)
@@ -709,19 +2622,53 @@ class TestQueryDataset:
 
     def test_query_data_success(self):
         query = Query()
-        expected_response = pd.DataFrame().empty
+        chunks = iter([pd.DataFrame()])
         self.data_service.is_query_too_large = Mock(return_value=False)
-        self.athena_adapter.query.return_value = expected_response
+        self.athena_adapter.query_chunks.return_value = chunks
         dataset_metadata = DatasetMetadata("raw", "domain1", "dataset1", 2)
 
         response = self.data_service.query_data(dataset_metadata, query)
-        assert response == expected_response
+        assert response == self.query_cache_service.cache_result.return_value
 
-        self.athena_adapter.query.assert_called_once_with(dataset_metadata, query)
+        cache_key = self.query_cache_service.cache_key.return_value
+        self.query_cache_service.cache_key.assert_called_once_with(
+            dataset_metadata, query
+        )
+        self.query_cache_service.get_result.assert_called_once_with(cache_key)
+        self.query_cache_service.cache_result.assert_called_once_with(cache_key, chunks)
+        self.athena_adapter.query_chunks.assert_called_once_with(
+            dataset_metadata, query
+        )
         self.data_service.is_query_too_large.assert_called_once_with(
             dataset_metadata, query
         )
 
+    def test_get_query_column_types(self):
+        schema = Mock()
+        self.data_service.schema_service = Mock()
+        self.data_service.schema_service.get_schema.return_value = schema
+        dataset_metadata = DatasetMetadata("raw", "domain1", "dataset1", 2)
+
+        column_types = self.data_service.get_query_column_types(dataset_metadata)
+
+        assert column_types == schema.generate_storage_schema.return_value
+        self.data_service.schema_service.get_schema.assert_called_once_with(
+            dataset_metadata
+        )
+
+    def test_query_data_serves_the_cached_result(self):
+        query = Query()
+        cached_chunk = pd.DataFrame({"column": [1]})
+        self.query_cache_service.get_result.return_value = [cached_chunk]
+        self.data_service.is_query_too_large = Mock()
+        dataset_metadata = DatasetMetadata("raw", "domain1", "dataset1", 2)
+
+        response = self.data_service.query_data(dataset_metadata, query)
+
+        assert list(response) == [cached_chunk]
+        self.data_service.is_query_too_large.assert_not_called()
+        self.athena_adapter.query_chunks.assert_not_called()
+
     def test_query_data_for_query_too_large(self):
         query = Query()
         self.data_service.is_query_too_large = Mock(return_value=True)
@@ -733,7 +2680,7 @@ class TestQueryDataset:
         self.data_service.is_query_too_large.assert_called_once_with(
             dataset_metadata, query
         )
-        self.athena_adapter.query.assert_not_called()
+        self.athena_adapter.query_chunks.assert_not_called()
 
 
 class TestQueryLargeDataset:
@@ -741,12 +2688,15 @@ class TestQueryLargeDataset:
         self.s3_adapter = Mock()
         self.athena_adapter = Mock()
         self.job_service = Mock()
+        self.query_cache_service = Mock()
+        self.query_cache_service.get_large_query_execution.return_value = None
         self.data_service = DataService(
             self.s3_adapter,
             None,
             self.athena_adapter,
             self.job_service,
             self.job_service,
+            query_cache_service=self.query_cache_service,
         )
 
     @patch("api.application.services.data_service.Thread")
@@ -775,9 +2725,42 @@ class TestQueryLargeDataset:
             args=(
                 query_job,
                 query_execution_id,
+                self.query_cache_service.cache_key.return_value,
             ),
         )
 
+    @patch("api.application.services.data_service.Thread")
+    def test_query_large_reuses_a_finished_identical_query(self, mock_thread):
+        dataset_metadata = DatasetMetadata("raw", "domain1", "dataset1", 4)
+        query = Query()
+        query_job = Mock()
+        self.job_service.create_query_job.return_value = query_job
+        self.query_cache_service.get_large_query_execution.return_value = "111-222"
+
+        self.data_service.query_large_data("subject-123", dataset_metadata, query)
+
+        cache_key = self.query_cache_service.cache_key.return_value
+        self.query_cache_service.cache_key.assert_called_once_with(
+            dataset_metadata, query
+        )
+        self.athena_adapter.query_async.assert_not_called()
+        mock_thread.assert_called_once_with(
+            target=self.data_service.generate_results_download_url_async,
+            args=(query_job, "111-222", cache_key),
+        )
+
+    def test_caches_the_finished_query_execution(self):
+        query_job = Mock()
+        cache_key = ("table", "SELECT * FROM table", 1)
+
+        self.data_service.generate_results_download_url_async(
+            query_job, "111-222-333", cache_key
+        )
+
+        self.query_cache_service.cache_large_query_execution.assert_called_once_with(
+            cache_key, "111-222-333"
+        )
+
     def test_updates_query_job_with_presigned_s3_url_when_querying_is_complete(self):
         # GIVEN
         query_job = Mock()
@@ -826,6 +2809,7 @@ class TestQueryLargeDataset:
             query_execution_id
         )
         self.s3_adapter.generate_query_result_download_url.assert_not_called()
+        self.query_cache_service.cache_large_query_execution.assert_not_called()
 
         self.job_service.set_results_url.assert_not_called()
         self.job_service.fail.assert_called_once_with(query_job, ["the error message"])
@@ -0,0 +1,189 @@
+import time
+from threading import Event, Thread
+from typing import Callable
+from unittest.mock import Mock, patch
+
+import pytest
+
+from api.adapter.in_memory_lease_adapter import InMemoryLeaseAdapter
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.common.custom_exceptions import (
+    DatasetLeaseLostError,
+    DatasetLeaseTimeoutError,
+    JobCancelledError,
+)
+from api.domain.dataset_lease import DatasetLease, LeaseMode
+from api.domain.dataset_metadata import DatasetMetadata
+
+
+class TestDatasetLeaseService:
+    def setup_method(self):
+        self.db_adapter = InMemoryLeaseAdapter()
+        self.dataset_lease_service = DatasetLeaseService(
+            self.db_adapter, lease_seconds=60, poll_seconds=0.01, wait_seconds=5
+        )
+        self.dataset = DatasetMetadata("raw", "domain", "dataset", 1)
+
+    def _lease(self) -> DatasetLease:
+        return self.db_adapter.get_dataset_lease("raw/domain/dataset/1")
+
+    def _wait_until(self, condition: Callable[[], bool]) -> None:
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_hold_acquires_and_releases_the_lease(self):
+        with self.dataset_lease_service.hold(self.dataset, "job-1", LeaseMode.SHARED):
+            assert self._lease().holders.keys() == {"job-1"}
+            assert self._lease().mode == LeaseMode.SHARED
+
+        assert self._lease().holders == {}
+        assert self._lease().mode is None
+
+    def test_hold_releases_the_lease_when_the_block_fails(self):
+        with pytest.raises(ValueError):
+            with self.dataset_lease_service.hold(
+                self.dataset, "job-1", LeaseMode.EXCLUSIVE
+            ):
+                raise ValueError("Failed to write")
+
+        assert self._lease().holders == {}
+
+    def test_appends_hold_the_lease_concurrently(self):
+        with self.dataset_lease_service.hold(self.dataset, "job-1", LeaseMode.SHARED):
+            with self.dataset_lease_service.hold(
+                self.dataset, "job-2", LeaseMode.SHARED
+            ):
+                assert self._lease().holders.keys() == {"job-1", "job-2"}
+
+    def test_uploads_to_different_datasets_do_not_wait(self):
+        other_dataset = DatasetMetadata("raw", "domain", "other", 1)
+
+        with self.dataset_lease_service.hold(
+            self.dataset, "job-1", LeaseMode.EXCLUSIVE
+        ):
+            with self.dataset_lease_service.hold(
+                other_dataset, "job-2", LeaseMode.EXCLUSIVE
+            ):
+                assert self._lease().holders.keys() == {"job-1"}
+
+    def test_overwrite_waits_for_appends_to_complete(self):
+        events = []
+        append_holding = Event()
+        overwrite_queued = Event()
+
+        def append():
+            with self.dataset_lease_service.hold(
+                self.dataset, "append", LeaseMode.SHARED
+            ):
+                append_holding.set()
+                overwrite_queued.wait(5)
+                events.append("append written")
+
+        def overwrite():
+            append_holding.wait(5)
+            with self.dataset_lease_service.hold(
+                self.dataset, "overwrite", LeaseMode.EXCLUSIVE
+            ):
+                events.append("overwrite written")
+
+        threads = [Thread(target=append), Thread(target=overwrite)]
+        for thread in threads:
+            thread.start()
+        self._wait_until(lambda: self._lease().queue)
+        overwrite_queued.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert events == ["append written", "overwrite written"]
+        assert self._lease().holders == {}
+
+    def test_acquire_times_out_and_leaves_the_queue(self):
+        self.dataset_lease_service.wait_seconds = 0.05
+        self.dataset_lease_service.acquire(
+            "raw/domain/dataset/1", "append", LeaseMode.SHARED
+        )
+
+        with pytest.raises(
+            DatasetLeaseTimeoutError,
+            match="Timed out waiting to write to the dataset raw/domain/dataset/1",
+        ):
+            self.dataset_lease_service.acquire(
+                "raw/domain/dataset/1", "overwrite", LeaseMode.EXCLUSIVE
+            )
+
+        assert self._lease().queue == []
+        assert self._lease().holders.keys() == {"append"}
+
+    def test_acquire_stops_waiting_and_leaves_the_queue_when_cancelled(self):
+        self.dataset_lease_service.acquire(
+            "raw/domain/dataset/1", "append", LeaseMode.SHARED
+        )
+        raise_if_cancelled = Mock(side_effect=[None, JobCancelledError("Cancelled")])
+
+        with pytest.raises(JobCancelledError):
+            self.dataset_lease_service.acquire(
+                "raw/domain/dataset/1",
+                "overwrite",
+                LeaseMode.EXCLUSIVE,
+                raise_if_cancelled,
+            )
+
+        assert raise_if_cancelled.call_count == 2
+        assert self._lease().queue == []
+        assert self._lease().holders.keys() == {"append"}
+
+    def test_update_retries_when_the_lease_was_changed_by_another_writer(self):
+        db_adapter = Mock()
+        db_adapter.get_dataset_lease.side_effect = [
+            DatasetLease(key="raw/domain/dataset/1", version=1),
+            DatasetLease(key="raw/domain/dataset/1", version=2),
+        ]
+        db_adapter.store_dataset_lease.side_effect = [False, True]
+        dataset_lease_service = DatasetLeaseService(db_adapter, poll_seconds=0)
+
+        dataset_lease_service.acquire("raw/domain/dataset/1", "job-1", LeaseMode.SHARED)
+
+        assert db_adapter.store_dataset_lease.call_count == 2
+        stored_lease = db_adapter.store_dataset_lease.call_args.args[0]
+        assert stored_lease.version == 2
+        assert stored_lease.holders.keys() == {"job-1"}
+
+    @patch("api.application.services.dataset_lease_service.time.sleep")
+    def test_update_fails_when_the_lease_keeps_being_changed(self, mock_sleep):
+        db_adapter = Mock()
+        db_adapter.get_dataset_lease.return_value = DatasetLease(
+            key="raw/domain/dataset/1", version=1
+        )
+        db_adapter.store_dataset_lease.return_value = False
+        dataset_lease_service = DatasetLeaseService(db_adapter, poll_seconds=0)
+
+        with pytest.raises(
+            DatasetLeaseTimeoutError, match="other uploads kept changing it"
+        ):
+            dataset_lease_service.release("raw/domain/dataset/1", "job-1")
+
+        assert db_adapter.store_dataset_lease.call_count == 8
+        assert mock_sleep.call_count == 7
+
+    def test_lost_lease_is_recorded(self):
+        self.dataset_lease_service.lease_seconds = 1
+
+        with self.dataset_lease_service.hold(
+            self.dataset, "job-1", LeaseMode.EXCLUSIVE
+        ) as lost:
+            self.dataset_lease_service.release("raw/domain/dataset/1", "job-1")
+            lost.wait(5)
+
+            assert lost.is_set()
+            with pytest.raises(DatasetLeaseLostError):
+                self.dataset_lease_service.raise_if_lost(lost, "raw/domain/dataset/1")
+
+    def test_held_lease_is_renewed(self):
+        self.dataset_lease_service.lease_seconds = 3
+
+        with self.dataset_lease_service.hold(self.dataset, "job-1", LeaseMode.SHARED):
+            expiry = self._lease().holders["job-1"]
+            self._wait_until(lambda: self._lease().holders["job-1"] > expiry)
+
+            assert self._lease().holders["job-1"] > expiry
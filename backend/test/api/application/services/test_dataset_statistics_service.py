@@ -0,0 +1,281 @@
+from io import BytesIO
+from unittest.mock import Mock, call
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from api.adapter.in_memory_lease_adapter import InMemoryLeaseAdapter
+from api.application.services.dataset_lease_service import DatasetLeaseService
+from api.application.services.dataset_statistics_service import (
+    DatasetStatisticsService,
+    get_partition_path,
+    get_raw_file_identifier,
+)
+from api.application.services.partitioning_service import EncodedPartition
+from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_statistics import DatasetStatistics
+
+
+def parquet_metadata(rows: int) -> pq.FileMetaData:
+    buffer = BytesIO()
+    pq.write_table(pa.table({"column": list(range(rows))}), buffer)
+    return pq.read_metadata(BytesIO(buffer.getvalue()))
+
+
+class TestDatasetStatisticsService:
+    def setup_method(self):
+        self.db_adapter = Mock()
+        self.s3_adapter = Mock()
+        self.dataset_lease_service = DatasetLeaseService(InMemoryLeaseAdapter())
+        self.dataset_statistics_service = DatasetStatisticsService(
+            self.db_adapter, self.s3_adapter, self.dataset_lease_service
+        )
+        self.dataset = DatasetMetadata("raw", "domain", "dataset", 1)
+
+    def test_get_statistics(self):
+        statistics = DatasetStatistics(size_bytes=10, files=1, rows=5, complete=True)
+        self.db_adapter.get_dataset_statistics.return_value = statistics
+
+        assert (
+            self.dataset_statistics_service.get_statistics(self.dataset) == statistics
+        )
+        self.db_adapter.get_dataset_statistics.assert_called_once_with(self.dataset)
+
+    def test_get_statistics_ignores_incomplete_statistics(self):
+        self.db_adapter.get_dataset_statistics.return_value = DatasetStatistics(
+            size_bytes=10, files=1, rows=5, complete=False
+        )
+
+        assert self.dataset_statistics_service.get_statistics(self.dataset) is None
+
+    def test_create_statistics(self):
+        self.dataset_statistics_service.create_statistics(self.dataset)
+
+        self.db_adapter.store_dataset_statistics.assert_called_once_with(
+            self.dataset, DatasetStatistics(), {}
+        )
+
+    def test_record_chunk_checkpoints_the_job(self):
+        job = Mock()
+        encoded_partitions = [
+            EncodedPartition(path="year=2020", content=b"abc", rows=2),
+            EncodedPartition(path="year=2021", content=b"abcde", rows=3),
+        ]
+
+        self.dataset_statistics_service.record_chunk(
+            self.dataset, "123-456", encoded_partitions, job, 4
+        )
+
+        assert job.committed_chunks == 4
+        self.db_adapter.add_dataset_partitions.assert_called_once_with(
+            self.dataset, {"year=2020", "year=2021"}
+        )
+        self.db_adapter.add_dataset_statistics.assert_called_once_with(
+            self.dataset,
+            "123-456",
+            DatasetStatistics(
+                size_bytes=8, files=2, rows=5, partitions={"year=2020", "year=2021"}
+            ),
+            job,
+        )
+
+    def test_record_chunk_of_a_dataset_without_partitions(self):
+        self.dataset_statistics_service.record_chunk(
+            self.dataset, "123-456", [EncodedPartition(content=b"abc", rows=2)]
+        )
+
+        self.db_adapter.add_dataset_statistics.assert_called_once_with(
+            self.dataset,
+            "123-456",
+            DatasetStatistics(size_bytes=3, files=1, rows=2),
+            None,
+        )
+        self.db_adapter.add_dataset_partitions.assert_not_called()
+
+    def test_record_rewrite(self):
+        self.dataset_statistics_service.record_rewrite(
+            self.dataset,
+            "data/raw/domain/dataset/1/123-456_000002.parquet",
+            100,
+            10,
+            80,
+            7,
+        )
+        self.dataset_statistics_service.record_rewrite(
+            self.dataset, "data/raw/domain/dataset/1/789_000000.parquet", 50, 4, 0, 0
+        )
+
+        assert self.db_adapter.add_dataset_statistics.call_args_list == [
+            call(
+                self.dataset,
+                "123-456",
+                DatasetStatistics(size_bytes=-20, files=0, rows=-3),
+            ),
+            call(
+                self.dataset,
+                "789",
+                DatasetStatistics(size_bytes=-50, files=-1, rows=-4),
+            ),
+        ]
+
+    def test_remove_uploads(self):
+        self.db_adapter.list_upload_statistics.return_value = {
+            "batch-0000": DatasetStatistics(
+                size_bytes=10, files=1, rows=5, partitions={"year=2020", "year=2021"}
+            ),
+            "batch-0001": DatasetStatistics(
+                size_bytes=20, files=1, rows=6, partitions={"year=2021"}
+            ),
+            "other": DatasetStatistics(
+                size_bytes=30, files=1, rows=7, partitions={"year=2021"}
+            ),
+        }
+
+        self.dataset_statistics_service.remove_uploads(self.dataset, "batch")
+
+        assert self.db_adapter.remove_upload_statistics.call_args_list == [
+            call(
+                self.dataset,
+                "batch-0000",
+                DatasetStatistics(
+                    size_bytes=10,
+                    files=1,
+                    rows=5,
+                    partitions={"year=2020", "year=2021"},
+                ),
+            ),
+            call(
+                self.dataset,
+                "batch-0001",
+                DatasetStatistics(
+                    size_bytes=20, files=1, rows=6, partitions={"year=2021"}
+                ),
+            ),
+        ]
+        self.db_adapter.remove_dataset_partitions.assert_called_once_with(
+            self.dataset, {"year=2020"}
+        )
+
+    def test_remove_uploads_keeps_the_partitions_of_uploads_already_removed(self):
+        self.db_adapter.list_upload_statistics.return_value = {
+            "batch-0000": DatasetStatistics(
+                size_bytes=10, files=1, rows=5, partitions={"year=2020"}
+            ),
+        }
+        self.db_adapter.remove_upload_statistics.return_value = False
+
+        self.dataset_statistics_service.remove_uploads(self.dataset, "batch")
+
+        self.db_adapter.remove_dataset_partitions.assert_not_called()
+
+    def test_remove_previous_uploads(self):
+        self.db_adapter.list_upload_statistics.return_value = {
+            "previous": DatasetStatistics(
+                size_bytes=10, files=1, rows=5, partitions={"year=2020"}
+            ),
+            "123-456": DatasetStatistics(
+                size_bytes=20, files=1, rows=6, partitions={"year=2021"}
+            ),
+        }
+
+        self.dataset_statistics_service.remove_previous_uploads(self.dataset, "123-456")
+
+        self.db_adapter.remove_upload_statistics.assert_called_once_with(
+            self.dataset,
+            "previous",
+            DatasetStatistics(size_bytes=10, files=1, rows=5, partitions={"year=2020"}),
+        )
+        self.db_adapter.remove_dataset_partitions.assert_called_once_with(
+            self.dataset, {"year=2020"}
+        )
+
+    def test_delete_statistics(self):
+        self.dataset_statistics_service.delete_statistics(self.dataset)
+
+        self.db_adapter.delete_dataset_statistics.assert_called_once_with(self.dataset)
+
+    def test_rebuild_from_the_files_of_the_dataset(self):
+        location = "data/raw/domain/dataset/1"
+        self.s3_adapter.list_dataset_file_sizes.return_value = {
+            f"{location}/year=2020/123-456_000000.parquet": 100,
+            f"{location}/year=2021/123-456_000000.parquet": 200,
+            f"{location}/year=2021/789_000000.parquet": 300,
+        }
+        rows = {
+            f"{location}/year=2020/123-456_000000.parquet": 1,
+            f"{location}/year=2021/123-456_000000.parquet": 2,
+            f"{location}/year=2021/789_000000.parquet": 3,
+        }
+        self.s3_adapter.retrieve_parquet_metadata.side_effect = (
+            lambda key: parquet_metadata(rows[key])
+        )
+
+        self.dataset_statistics_service.rebuild(self.dataset)
+
+        self.db_adapter.store_dataset_statistics.assert_called_once_with(
+            self.dataset,
+            DatasetStatistics(
+                size_bytes=600,
+                files=3,
+                rows=6,
+                partitions={"year=2020", "year=2021"},
+                partition_count=2,
+            ),
+            {
+                "123-456": DatasetStatistics(
+                    size_bytes=300,
+                    files=2,
+                    rows=3,
+                    partitions={"year=2020", "year=2021"},
+                    partition_count=2,
+                ),
+                "789": DatasetStatistics(
+                    size_bytes=300,
+                    files=1,
+                    rows=3,
+                    partitions={"year=2021"},
+                    partition_count=1,
+                ),
+            },
+        )
+        # The write lease is released once the statistics are rebuilt
+        assert (
+            self.dataset_lease_service.db_adapter.get_dataset_lease(
+                self.dataset.dataset_identifier()
+            ).holders
+            == {}
+        )
+
+    def test_rebuild_in_background_is_not_started_while_a_rebuild_is_running(self):
+        self.dataset_statistics_service._rebuilding.add(
+            self.dataset.dataset_identifier()
+        )
+        self.dataset_statistics_service.rebuild = Mock()
+
+        self.dataset_statistics_service.rebuild_in_background(self.dataset)
+
+        self.dataset_statistics_service.rebuild.assert_not_called()
+
+
+def test_get_raw_file_identifier():
+    assert (
+        get_raw_file_identifier(
+            "data/raw/domain/dataset/1/a=1/batch-0001_000003.parquet"
+        )
+        == "batch-0001"
+    )
+
+
+def test_get_partition_path():
+    dataset = DatasetMetadata("raw", "domain", "dataset", 1)
+
+    assert (
+        get_partition_path(
+            dataset, "data/raw/domain/dataset/1/a=1/b=2/123_000000.parquet"
+        )
+        == "a=1/b=2"
+    )
+    assert (
+        get_partition_path(dataset, "data/raw/domain/dataset/1/123_000000.parquet")
+        == ""
+    )
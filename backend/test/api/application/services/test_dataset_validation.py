@@ -6,6 +6,8 @@ import pandas as pd
 import pytest
 
 from api.application.services.dataset_validation import (
+    PanderaFailure,
+    add_derived_partition,
     build_validated_dataframe,
     convert_date_columns,
     remove_empty_rows,
@@ -13,7 +15,12 @@ from api.application.services.dataset_validation import (
     dataset_has_correct_columns,
     dataset_has_correct_data_types,
     dataset_has_no_illegal_characters_in_partition_columns,
+    dataset_has_partition_count_within_limit,
     dataset_has_rows,
+    dataset_has_unique_keys,
+    split_invalid_rows,
+    summarise_quarantined_rows,
+    summarise_validation_errors,
     validate_with_pandera
 )
 from api.common.custom_exceptions import (
@@ -22,7 +29,7 @@ from api.common.custom_exceptions import (
     UnprocessableDatasetError,
 )
 from api.domain.schema import Schema
-from rapid.items.schema import Column, Owner
+from rapid.items.schema import Column, DerivedPartition, Owner
 from api.domain.schema_metadata import SchemaMetadata
 
 
@@ -196,6 +203,153 @@ class TestDatasetValidation:
         except DatasetValidationError:
             pytest.fail("An unexpected InvalidDatasetError was thrown")
 
+    def test_invalid_when_partition_count_exceeds_limit_and_overflow_is_rejected(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                max_partitions=2,
+                partition_overflow="REJECT",
+            ),
+            columns=[
+                Column(name="colname1", partition_index=0, data_type="int", allow_null=False),
+                Column(name="colname2", partition_index=None, data_type="string", allow_null=False),
+            ],
+        )
+        dataframe = pd.DataFrame(
+            {"colname1": [1, 2, 3, 3], "colname2": ["a", "b", "c", "d"]}
+        )
+
+        _, errors = dataset_has_partition_count_within_limit(dataframe, schema)
+
+        assert errors == [
+            "Partition columns ['colname1'] have more than 2 distinct values in a single chunk of the data"
+        ]
+
+    def test_valid_when_partition_count_exceeds_limit_and_overflow_is_warned(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                max_partitions=2,
+            ),
+            columns=[
+                Column(name="colname1", partition_index=0, data_type="int", allow_null=False),
+                Column(name="colname2", partition_index=None, data_type="string", allow_null=False),
+            ],
+        )
+        dataframe = pd.DataFrame(
+            {"colname1": [1, 2, 3, 3], "colname2": ["a", "b", "c", "d"]}
+        )
+
+        _, errors = dataset_has_partition_count_within_limit(dataframe, schema)
+
+        assert errors == []
+
+    def test_adds_partition_derived_from_date_column(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                partition_by=DerivedPartition(column="event_date", granularity="DAY"),
+            ),
+            columns=[
+                Column(name="event_date", partition_index=None, data_type="date", allow_null=False, format="%Y-%m-%d"),
+            ],
+        )
+        dataframe = pd.DataFrame(
+            {"event_date": pd.to_datetime(["2024-01-05", "2024-02-20"])}
+        )
+
+        dataframe, errors = add_derived_partition(dataframe, schema)
+
+        assert errors == []
+        assert list(dataframe["event_date_day"]) == ["2024-01-05", "2024-02-20"]
+
+    def test_derived_partition_dates_outside_the_projected_range_are_invalid(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                partition_by=DerivedPartition(column="event_date", granularity="YEAR"),
+            ),
+            columns=[
+                Column(name="event_date", partition_index=None, data_type="date", allow_null=False, format="%Y-%m-%d"),
+            ],
+        )
+        end = pd.Timestamp.today().normalize() + pd.DateOffset(years=10)
+        dataframe = pd.DataFrame(
+            {
+                "event_date": pd.to_datetime(
+                    ["1999-12-31", "2000-01-01", "2024-02-20", end.strftime("%Y-%m-%d")]
+                )
+            }
+        )
+
+        _, errors = add_derived_partition(dataframe, schema)
+
+        assert errors == [
+            "Column [event_date] has 2 dates outside the range of the partitions that can be queried, "
+            f"from 2000-01-01 to before {end.date()}"
+        ]
+
+    def test_invalid_when_keys_of_an_upsert_are_repeated(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                update_behaviour="UPSERT",
+                key_columns=["colname1", "colname2"],
+            ),
+            columns=[
+                Column(name="colname1", partition_index=None, data_type="int", allow_null=False),
+                Column(name="colname2", partition_index=None, data_type="string", allow_null=False),
+            ],
+        )
+        dataframe = pd.DataFrame(
+            {"colname1": [1, 1, 2, 1], "colname2": ["a", "b", "a", "a"]}
+        )
+
+        _, errors = dataset_has_unique_keys(dataframe, schema)
+
+        assert errors == [
+            "Key columns ['colname1', 'colname2'] have the same values in 2 rows, each key can only be uploaded once"
+        ]
+
+    def test_valid_when_values_are_repeated_without_upsert(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(name="colname1", partition_index=None, data_type="int", allow_null=False),
+            ],
+        )
+        dataframe = pd.DataFrame({"colname1": [1, 1]})
+
+        _, errors = dataset_has_unique_keys(dataframe, schema)
+
+        assert errors == []
+
     def test_invalid_when_strings_in_numeric_column(self):
         dataframe = pd.DataFrame(
             {
@@ -462,12 +616,11 @@ class TestDatasetValidation:
         )
 
         data_frame, error_list = validate_with_pandera(df, schema)
-        assert error_list == [
-            "series 'col1' contains duplicate values",
-            "series 'col2' contains duplicate values",
-            "series 'col3' contains duplicate values",
-            "non-nullable series 'col2' contains null values",
-            "non-nullable series 'col3' contains null values",
+        assert summarise_validation_errors(error_list) == [
+            "series 'col1' contains duplicate values in 2 rows: a (row 1), a (row 3)",
+            "non-nullable series 'col2' contains null values in 2 rows: row 0, row 2",
+            "non-nullable series 'col3' contains null values in 1 row: row 2",
+            "series 'col3' contains duplicate values in 2 rows: b (row 1), b (row 3)",
         ]
 
     def test_return_error_message_when_not_correct_datatypes(self):
@@ -649,7 +802,7 @@ class TestDatasetValidation:
                 "Column [col5] has an incorrect data type. Expected int, received string",
                 "Partition column [col1] has values with illegal characters '/'",
                 "Partition column [col2] has values with illegal characters '/'",
-                "non-nullable series 'col3' contains null values",
+                "non-nullable series 'col3' contains null values in 1 row: row 2",
             ]
 
 
@@ -881,8 +1034,8 @@ class TestDatasetTransformation:
         )
 
         data_frame, error_list = validate_with_pandera(df, schema)
-        assert error_list == [
-            "[in_range(2000, 2030)] Column 'colname1' failed element-wise validator number 0: in_range(2000, 2030) failure cases: 1999, 2031"
+        assert summarise_validation_errors(error_list) == [
+            "[in_range(2000, 2030)] Column 'colname1' failed element-wise validator number 0: in_range(2000, 2030) failure cases in 2 rows: 1999 (row 0), 2031 (row 2)"
         ]
 
     def test_validate_with_pandera_isin_check_valid(self):
@@ -931,8 +1084,8 @@ class TestDatasetTransformation:
         )
 
         data_frame, error_list = validate_with_pandera(df, schema)
-        assert error_list == [
-            "[isin(['Carlos', 'Ada'])] Column 'colname1' failed element-wise validator number 0: isin(['Carlos', 'Ada']) failure cases: invalid"
+        assert summarise_validation_errors(error_list) == [
+            "[isin(['Carlos', 'Ada'])] Column 'colname1' failed element-wise validator number 0: isin(['Carlos', 'Ada']) failure cases in 1 row: invalid (row 2)"
         ]
 
     def test_validate_with_pandera_multiple_checks_on_column(self):
@@ -987,6 +1140,35 @@ class TestDatasetTransformation:
         data_frame, error_list = validate_with_pandera(df, schema)
         assert error_list == []
 
+    def test_validate_with_pandera_caps_failure_cases_of_each_check(self):
+        df = pd.DataFrame({"colname1": list(range(100))})
+        schema = Schema(
+            metadata=self.schema_metadata,
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=False,
+                    checks={
+                        "small": {
+                            "check_type": "less_than",
+                            "parameters": {"max_value": 10},
+                        }
+                    },
+                ),
+            ],
+        )
+
+        data_frame, failures = validate_with_pandera(df, schema)
+        error_list = summarise_validation_errors(failures)
+        assert len(error_list) == 1
+        assert error_list[0].startswith(
+            "[less_than(10)] Column 'colname1' failed element-wise validator number 0: less_than(10) failure cases in 90 rows: "
+        )
+        assert error_list[0].count("(row ") == 5
+        assert error_list[0].endswith(", and 85 more")
+
     def test_validate_with_pandera_multiple_checks_on_column_invalid(self):
         df = pd.DataFrame(
             {
@@ -1037,9 +1219,200 @@ class TestDatasetTransformation:
         )
 
         data_frame, error_list = validate_with_pandera(df, schema)
-        assert error_list == [
-            "[str_length(5, 20)] Column 'colname1' failed element-wise validator number 0: str_length(5, 20) failure cases: ab, carlosabcdefghijklmnop",
-            "[str_matches('^[a-z]+\\\\d+$')] Column 'colname1' failed element-wise validator number 1: str_matches('^[a-z]+\\\\d+$') failure cases: ab, BOB456, carlosabcdefghijklmnop",
-            "[greater_than(18)] Column 'colname2' failed element-wise validator number 0: greater_than(18) failure cases: 15",
-            "[less_than(100)] Column 'colname2' failed element-wise validator number 1: less_than(100) failure cases: 105",
+        assert summarise_validation_errors(error_list) == [
+            "[str_length(5, 20)] Column 'colname1' failed element-wise validator number 0: str_length(5, 20) failure cases in 2 rows: ab (row 0), carlosabcdefghijklmnop (row 2)",
+            "[str_matches('^[a-z]+\\d+$')] Column 'colname1' failed element-wise validator number 1: str_matches('^[a-z]+\\d+$') failure cases in 3 rows: ab (row 0), BOB456 (row 1), carlosabcdefghijklmnop (row 2)",
+            "[greater_than(18)] Column 'colname2' failed element-wise validator number 0: greater_than(18) failure cases in 1 row: 15 (row 0)",
+            "[less_than(100)] Column 'colname2' failed element-wise validator number 1: less_than(100) failure cases in 1 row: 105 (row 2)",
         ]
+
+
+class TestSplitInvalidRows:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                invalid_rows="QUARANTINE",
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="string",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=True,
+                    checks={
+                        "positive": {
+                            "check_type": "greater_than",
+                            "parameters": {"min_value": 0},
+                        }
+                    },
+                ),
+                Column(
+                    name="colname3",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=True,
+                    format="%d/%m/%Y",
+                ),
+            ],
+        )
+
+    def test_split_invalid_rows_returns_every_row_when_all_are_valid(self):
+        data = pd.DataFrame(
+            {
+                "colname1": ["a", "b"],
+                "colname2": [1, 2],
+                "colname3": ["01/02/2024", "02/02/2024"],
+            }
+        )
+
+        validated, quarantined = split_invalid_rows(self.schema, data)
+
+        assert list(validated["colname1"]) == ["a", "b"]
+        assert list(validated["colname3"]) == [
+            pd.Timestamp("2024-02-01"),
+            pd.Timestamp("2024-02-02"),
+        ]
+        assert quarantined.empty
+
+    def test_split_invalid_rows_splits_off_the_rows_that_fail_validation(self):
+        data = pd.DataFrame(
+            {
+                "colname1": ["a", "b/c", "d", "e", "f", None],
+                "colname2": ["1", "2", "three", "4", "-5", "6"],
+                "colname3": [
+                    "01/02/2024",
+                    None,
+                    None,
+                    "2024-02-04",
+                    "05/02/2024",
+                    None,
+                ],
+            }
+        )
+
+        validated, quarantined = split_invalid_rows(self.schema, data)
+
+        assert list(validated["colname1"]) == ["a"]
+        assert list(validated["colname2"]) == [1]
+        assert quarantined.to_dict("list") == {
+            "colname1": ["b/c", "d", "e", "f", None],
+            "colname2": ["2", "three", "4", "-5", "6"],
+            "colname3": [None, None, "2024-02-04", "05/02/2024", None],
+            "quarantine_reason": [
+                "Partition column [colname1] has values with illegal characters '/'",
+                "Column [colname2] is not of type int",
+                "Column [colname3] does not match specified date format",
+                "Column [colname2] failed the check greater_than(0)",
+                "Column [colname1] failed the check not_nullable",
+            ],
+        }
+
+    def test_split_invalid_rows_checks_partition_values_read_as_strings(self):
+        data = pd.DataFrame(
+            {
+                "colname1": pd.Series(["a", "b/c", None], dtype="string[pyarrow]"),
+                "colname2": [1, 2, 3],
+                "colname3": [None, None, None],
+            }
+        )
+
+        validated, quarantined = split_invalid_rows(self.schema, data)
+
+        assert list(validated["colname1"]) == ["a"]
+        assert list(quarantined["quarantine_reason"]) == [
+            "Partition column [colname1] has values with illegal characters '/'",
+            "Column [colname1] failed the check not_nullable",
+        ]
+
+    def test_split_invalid_rows_splits_off_dates_outside_the_projected_range(self):
+        self.schema.metadata.partition_by = DerivedPartition(
+            column="colname3", granularity="MONTH"
+        )
+        self.schema.columns[0].partition_index = None
+        self.schema.columns[2].allow_null = False
+        end = pd.Timestamp.today().normalize() + pd.DateOffset(years=10)
+        data = pd.DataFrame(
+            {
+                "colname1": ["a", "b", "c"],
+                "colname2": [1, 2, 3],
+                "colname3": ["31/12/1999", "01/02/2024", end.strftime("%d/%m/%Y")],
+            }
+        )
+
+        validated, quarantined = split_invalid_rows(self.schema, data)
+
+        assert list(validated["colname1"]) == ["b"]
+        assert list(validated["colname3_month"]) == ["2024-02"]
+        assert list(quarantined["colname1"]) == ["a", "c"]
+        assert list(quarantined["quarantine_reason"]) == [
+            "Column [colname3] has a date outside the range of the partitions that can be queried, "
+            f"from 2000-01-01 to before {end.date()}"
+        ] * 2
+
+    def test_split_invalid_rows_returns_no_valid_rows_when_every_row_fails(self):
+        data = pd.DataFrame(
+            {"colname1": ["a"], "colname2": ["one"], "colname3": [None]}
+        )
+
+        validated, quarantined = split_invalid_rows(self.schema, data)
+
+        assert validated is None
+        assert list(quarantined["quarantine_reason"]) == [
+            "Column [colname2] is not of type int"
+        ]
+
+    def test_split_invalid_rows_raises_error_for_failures_of_the_whole_dataset(self):
+        data = pd.DataFrame({"colname1": ["a"], "colname2": [1]})
+
+        with pytest.raises(UnprocessableDatasetError):
+            split_invalid_rows(self.schema, data)
+
+    def test_summarise_quarantined_rows(self):
+        quarantined = pd.DataFrame(
+            {
+                "quarantine_reason": [
+                    "Column [colname2] is not of type int",
+                    "Column [colname2] is not of type int; Column [colname1] failed the check not_nullable",
+                ]
+            }
+        )
+
+        assert summarise_quarantined_rows(quarantined) == [
+            "Every row failed validation, Column [colname2] is not of type int in 2 rows",
+            "Every row failed validation, Column [colname1] failed the check not_nullable in 1 row",
+        ]
+
+
+def test_summarise_validation_errors_merges_failures_of_the_same_check():
+    errors = [
+        "Column [colname1] has an incorrect data type",
+        PanderaFailure(
+            "colname2", "not_nullable", None, 7, [(None, index) for index in range(4)]
+        ),
+        PanderaFailure("colname2", "greater_than(18)", 0, 1, [(15, 2)]),
+        "Column [colname1] has an incorrect data type",
+        PanderaFailure(
+            "colname2", "not_nullable", None, 2, [(None, 200_000), (None, 200_001)]
+        ),
+    ]
+
+    summary = summarise_validation_errors(errors)
+
+    assert summary == [
+        "Column [colname1] has an incorrect data type",
+        "non-nullable series 'colname2' contains null values in 9 rows: row 0, row 1, row 2, row 3, row 200000, and 4 more",
+        "[greater_than(18)] Column 'colname2' failed element-wise validator number 0: greater_than(18) failure cases in 1 row: 15 (row 2)",
+    ]
+    # The failures of the chunks are left as they were
+    assert errors[1].count == 7
@@ -15,8 +15,14 @@ class TestDeleteService:
         self.s3_adapter = Mock()
         self.glue_adapter = Mock()
         self.schema_service = Mock()
+        self.query_cache_service = Mock()
+        self.dataset_statistics_service = Mock()
         self.delete_service = DeleteService(
-            self.s3_adapter, self.glue_adapter, self.schema_service
+            self.s3_adapter,
+            self.glue_adapter,
+            self.schema_service,
+            self.query_cache_service,
+            self.dataset_statistics_service,
         )
 
     def test_delete_file(self):
@@ -34,6 +40,37 @@ class TestDeleteService:
             dataset_metadata,
             "2022-01-01T00:00:00-file.csv",
         )
+        self.dataset_statistics_service.remove_uploads.assert_called_once_with(
+            dataset_metadata, "2022-01-01T00:00:00-file"
+        )
+        self.query_cache_service.invalidate.assert_called_once_with(dataset_metadata)
+
+    def test_delete_compressed_file(self):
+        dataset_metadata = DatasetMetadata("layer", "domain", "dataset", 1)
+        self.delete_service.delete_dataset_file(
+            dataset_metadata,
+            "123-456-789.csv.gz",
+        )
+
+        self.s3_adapter.delete_dataset_files.assert_called_once_with(
+            dataset_metadata,
+            "123-456-789.csv.gz",
+        )
+        self.dataset_statistics_service.remove_uploads.assert_called_once_with(
+            dataset_metadata, "123-456-789"
+        )
+
+    def test_delete_parquet_file(self):
+        dataset_metadata = DatasetMetadata("layer", "domain", "dataset", 1)
+        self.delete_service.delete_dataset_file(
+            dataset_metadata,
+            "123-456-789.parquet",
+        )
+
+        self.s3_adapter.delete_dataset_files.assert_called_once_with(
+            dataset_metadata,
+            "123-456-789.parquet",
+        )
 
     def test_delete_file_when_file_does_not_exist(self):
         self.s3_adapter.find_raw_file.side_effect = UserError("Some message")
@@ -47,6 +84,7 @@ class TestDeleteService:
             dataset_metadata,
             "2022-01-01T00:00:00-file.csv",
         )
+        self.query_cache_service.invalidate.assert_not_called()
 
     @pytest.mark.parametrize(
         "filename",
@@ -58,6 +96,8 @@ class TestDeleteService:
             "../..",
             "..file",
             "hello/../domain",
+            "123-456-789.json",
+            "123-456-789.parquet.zst",
             "2022-01-01T00:00:00-fiLe0192/../tf.csv",
             "2022-01-01T00:00:00-fiLe.csv/../tf.csv",
             "2022-01-01T00:00:00-fiLe.csv/..",
@@ -98,6 +138,10 @@ class TestDeleteService:
         )
         self.glue_adapter.delete_tables.assert_called_once_with(tables)
         self.schema_service.delete_schemas.assert_called_once_with(dataset_metadata)
+        self.dataset_statistics_service.delete_statistics.assert_called_once_with(
+            dataset_metadata
+        )
+        self.query_cache_service.invalidate.assert_called_once_with(dataset_metadata)
 
     def test_delete_schema_upload_success(self):
         dataset_metadata = DatasetMetadata("layer", "domain", "dataset", 1)
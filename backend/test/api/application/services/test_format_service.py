@@ -1,5 +1,10 @@
 import csv
+import json
+from io import BytesIO
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from api.application.services.format_service import FormatService
 from api.domain.mime_type import MimeType
@@ -14,14 +19,109 @@ class TestFormatService:
                 "area": ["area_1", "area_2"],
             }
         )
+        self.chunks = [self.df.iloc[:1], self.df.iloc[1:]]
+
+    def _format(self, mime_type: MimeType):
+        return list(FormatService.from_chunks_to_mimetype(iter(self.chunks), mime_type))
 
     def test_format_to_csv(self):
-        output = FormatService.from_df_to_mimetype(self.df, MimeType.TEXT_CSV)
-        assert output == self.df.to_csv(quoting=csv.QUOTE_NONNUMERIC, index=False)
+        output = self._format(MimeType.TEXT_CSV)
+
+        assert len(output) == 2
+        assert "".join(output) == self.df.astype("string").to_csv(
+            quoting=csv.QUOTE_NONNUMERIC, index=False
+        )
 
     def test_format_to_json(self):
-        output = FormatService.from_df_to_mimetype(self.df, MimeType.APPLICATION_JSON)
-        assert output == {
-            0: {"area": "area_1", "column1": 1, "column2": "item1"},
-            1: {"area": "area_2", "column1": 2, "column2": "item2"},
+        output = self._format(MimeType.APPLICATION_JSON)
+
+        assert json.loads("".join(output)) == {
+            "0": {"area": "area_1", "column1": "1", "column2": "item1"},
+            "1": {"area": "area_2", "column1": "2", "column2": "item2"},
         }
+
+    def test_format_to_json_without_rows(self):
+        output = FormatService.from_chunks_to_mimetype(
+            iter([self.df.iloc[:0]]), MimeType.APPLICATION_JSON
+        )
+
+        assert "".join(output) == "{}"
+
+    def test_format_to_ndjson(self):
+        output = self._format(MimeType.APPLICATION_NDJSON)
+
+        assert output == [
+            '{"column1":"1","column2":"item1","area":"area_1"}\n',
+            '{"column1":"2","column2":"item2","area":"area_2"}\n',
+        ]
+
+    def test_format_to_typed_arrow_stream(self):
+        output = self._format(MimeType.ARROW_STREAM)
+
+        table = pa.ipc.open_stream(b"".join(output)).read_all()
+        assert table.schema.field("column1").type == pa.int64()
+        assert table.to_pandas().equals(self.df)
+
+    def test_format_to_typed_parquet_with_a_row_group_for_each_chunk(self):
+        output = self._format(MimeType.BINARY)
+
+        parquet_file = pq.ParquetFile(BytesIO(b"".join(output)))
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.schema_arrow.field("column1").type == pa.int64()
+        assert parquet_file.read().to_pandas().equals(self.df)
+
+    def test_typed_formats_use_the_types_of_the_dataset_columns(self):
+        column_types = pa.schema(
+            [("column1", pa.int32()), ("column2", pa.string()), ("other", pa.date32())]
+        )
+        chunks = [
+            pd.DataFrame(
+                {
+                    "column1": pd.array([1, None], dtype="Int64"),
+                    "column2": [None, None],
+                    "count": [3, 4],
+                }
+            )
+        ]
+
+        output = FormatService.from_chunks_to_mimetype(
+            iter(chunks), MimeType.ARROW_STREAM, column_types
+        )
+
+        table = pa.ipc.open_stream(b"".join(output)).read_all()
+        assert table.schema.remove_metadata() == pa.schema(
+            [("column1", pa.int32()), ("column2", pa.string()), ("count", pa.int64())]
+        )
+        assert table.to_pylist() == [
+            {"column1": 1, "column2": None, "count": 3},
+            {"column1": None, "column2": None, "count": 4},
+        ]
+
+    def test_typed_formats_keep_the_types_of_aggregations_aliased_as_dataset_columns(
+        self,
+    ):
+        column_types = pa.schema(
+            [
+                ("column1", pa.int32()),
+                ("column2", pa.string()),
+                ("column3", pa.timestamp("ns")),
+            ]
+        )
+        chunks = [
+            pd.DataFrame({"column1": [1.5, 2.5], "column2": [3, 4], "column3": [5, 6]}),
+            pd.DataFrame({"column1": [3.5], "column2": [7], "column3": [8]}),
+        ]
+
+        output = FormatService.from_chunks_to_mimetype(
+            iter(chunks), MimeType.ARROW_STREAM, column_types
+        )
+
+        table = pa.ipc.open_stream(b"".join(output)).read_all()
+        assert table.schema.remove_metadata() == pa.schema(
+            [
+                ("column1", pa.float64()),
+                ("column2", pa.int64()),
+                ("column3", pa.int64()),
+            ]
+        )
+        assert table.column("column2").to_pylist() == [3, 4, 7]
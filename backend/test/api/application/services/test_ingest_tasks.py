@@ -0,0 +1,171 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pandas as pd
+
+from api.application.services.dataset_validation import PanderaFailure
+from api.application.services.ingest_tasks import (
+    encode_chunk,
+    quarantine_chunk,
+    validate_chunk,
+    validate_chunk_keys,
+)
+from api.common.custom_exceptions import DatasetValidationError
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import Owner, SchemaMetadata
+from rapid.items.schema import DerivedPartition
+
+
+class TestIngestTasks:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="int",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+    def test_validate_chunk_returns_no_errors_for_valid_chunk(self):
+        chunk = pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]})
+
+        assert validate_chunk(self.schema, chunk) == []
+
+    @patch("api.application.services.ingest_tasks.build_validated_dataframe")
+    def test_validate_chunk_returns_validation_errors(
+        self, mock_build_validated_dataframe
+    ):
+        chunk = pd.DataFrame({})
+        mock_build_validated_dataframe.side_effect = DatasetValidationError(
+            ["error one", "error two"]
+        )
+
+        assert validate_chunk(self.schema, chunk) == ["error one", "error two"]
+
+    def test_validate_chunk_returns_pandera_failures_to_be_merged_across_chunks(
+        self,
+    ):
+        chunk = pd.DataFrame({"colname1": [1, 2], "colname2": ["a", None]})
+
+        assert validate_chunk(self.schema, chunk) == [
+            PanderaFailure("colname2", "not_nullable", None, 1, [(None, 1)])
+        ]
+
+    def test_validate_chunk_keys_returns_the_keys_of_the_chunk(self):
+        self.schema.metadata.update_behaviour = "UPSERT"
+        self.schema.metadata.key_columns = ["colname1", "colname2"]
+        chunk = pd.DataFrame({"colname1": [1, 2], "colname2": ["a", "b"]})
+
+        errors, keys = validate_chunk_keys(self.schema, chunk)
+
+        assert errors == []
+        assert keys.to_dict("list") == {"colname1": ["1", "2"], "colname2": ["a", "b"]}
+
+    @patch("api.application.services.ingest_tasks.build_validated_dataframe")
+    def test_validate_chunk_keys_returns_validation_errors(
+        self, mock_build_validated_dataframe
+    ):
+        chunk = pd.DataFrame({})
+        mock_build_validated_dataframe.side_effect = DatasetValidationError(
+            ["error one"]
+        )
+
+        assert validate_chunk_keys(self.schema, chunk) == (["error one"], None)
+
+    def test_encode_chunk_returns_parquet_per_partition(self):
+        chunk = pd.DataFrame({"colname1": [1, 2, 1], "colname2": ["a", "b", "c"]})
+
+        result = encode_chunk(self.schema, chunk)
+
+        assert [partition.path for partition in result] == [
+            "colname1=1",
+            "colname1=2",
+        ]
+        first_partition = pd.read_parquet(BytesIO(result[0].content))
+        assert list(first_partition["colname2"]) == ["a", "c"]
+
+    def test_encode_chunk_partitions_by_derived_date_partition(self):
+        self.schema.columns.append(
+            Column(
+                name="event_date",
+                partition_index=None,
+                data_type="date",
+                allow_null=False,
+                format="%d/%m/%Y",
+            )
+        )
+        self.schema.metadata.partition_by = DerivedPartition(
+            column="event_date", granularity="MONTH"
+        )
+        chunk = pd.DataFrame(
+            {
+                "colname1": [1, 1, 1],
+                "colname2": ["a", "b", "c"],
+                "event_date": ["05/01/2024", "20/02/2024", "31/01/2024"],
+            }
+        )
+
+        result = encode_chunk(self.schema, chunk)
+
+        assert [partition.path for partition in result] == [
+            "colname1=1/event_date_month=2024-01",
+            "colname1=1/event_date_month=2024-02",
+        ]
+        first_partition = pd.read_parquet(BytesIO(result[0].content))
+        assert list(first_partition.columns) == ["colname2", "event_date"]
+        assert list(first_partition["colname2"]) == ["a", "c"]
+
+    def test_quarantine_chunk_returns_the_invalid_rows_of_the_chunk(self):
+        self.schema.metadata.invalid_rows = "QUARANTINE"
+        self.schema.metadata.update_behaviour = "UPSERT"
+        self.schema.metadata.key_columns = ["colname1"]
+        chunk = pd.DataFrame({"colname1": [1, "two", 3], "colname2": ["a", "b", "c"]})
+
+        errors, keys, accepted_rows, quarantined_rows = quarantine_chunk(
+            self.schema, chunk
+        )
+
+        assert errors == []
+        assert keys.to_dict("list") == {"colname1": ["1", "3"]}
+        assert accepted_rows == 2
+        assert list(quarantined_rows["colname1"]) == ["two"]
+        assert list(quarantined_rows["quarantine_reason"]) == [
+            "Column [colname1] is not of type int"
+        ]
+
+    @patch("api.application.services.ingest_tasks.split_invalid_rows")
+    def test_quarantine_chunk_returns_validation_errors(self, mock_split_invalid_rows):
+        chunk = pd.DataFrame({})
+        mock_split_invalid_rows.side_effect = DatasetValidationError(["error one"])
+
+        assert quarantine_chunk(self.schema, chunk) == (["error one"], None, 0, None)
+
+    def test_encode_chunk_leaves_out_invalid_rows_when_quarantining(self):
+        self.schema.metadata.invalid_rows = "QUARANTINE"
+        chunk = pd.DataFrame({"colname1": [1, "two"], "colname2": ["a", "b"]})
+
+        result = encode_chunk(self.schema, chunk)
+
+        assert [partition.path for partition in result] == ["colname1=1"]
+
+    def test_encode_chunk_returns_no_partitions_when_every_row_is_quarantined(self):
+        self.schema.metadata.invalid_rows = "QUARANTINE"
+        chunk = pd.DataFrame({"colname1": ["one"], "colname2": ["a"]})
+
+        assert encode_chunk(self.schema, chunk) == []
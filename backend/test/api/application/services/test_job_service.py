@@ -1,7 +1,10 @@
 from unittest.mock import patch
 
+import pytest
+
 from api.adapter.dynamodb_adapter import DynamoDBAdapter
 from api.application.services.job_service import JobService
+from api.common.custom_exceptions import UserError
 from api.domain.Jobs.Job import JobStatus
 from api.domain.Jobs.QueryJob import QueryStep, QueryJob
 from api.domain.Jobs.UploadJob import UploadStep, UploadJob
@@ -73,6 +76,61 @@ class TestGetJob:
         mock_get_job.assert_called_once_with("abc-123")
 
 
+class TestGetUploadJob:
+    def setup_method(self):
+        self.job_service = JobService()
+
+    @patch.object(DynamoDBAdapter, "get_job")
+    def test_get_upload_job(self, mock_get_job):
+        # GIVEN
+        mock_get_job.return_value = {
+            "type": "UPLOAD",
+            "job_id": "abc-123",
+            "sk2": "subject-123",
+            "status": "FAILED",
+            "step": "DATA_UPLOAD",
+            "errors": {"error1"},
+            "filename": "file1.csv",
+            "raw_file_identifier": "111-222-333",
+            "layer": "layer",
+            "domain": "domain1",
+            "dataset": "dataset2",
+            "version": 4,
+            "raw_filename": "111-222-333.csv.gz",
+            "committed_chunks": 2,
+            "completed_steps": ["RAW_DATA_UPLOAD"],
+            "createdat": 1000,
+            "ttl": 2000,
+        }
+
+        # WHEN
+        job = self.job_service.get_upload_job("abc-123")
+
+        # THEN
+        assert job.job_id == "abc-123"
+        assert job.subject_id == "subject-123"
+        assert job.status == JobStatus.FAILED
+        assert job.committed_chunks == 2
+        mock_get_job.assert_called_once_with("abc-123")
+
+    @patch.object(DynamoDBAdapter, "get_job")
+    def test_get_upload_job_fails_for_other_jobs(self, mock_get_job):
+        mock_get_job.return_value = {"type": "QUERY", "job_id": "abc-123"}
+
+        with pytest.raises(
+            UserError, match="The job with id abc-123 is not an upload job"
+        ):
+            self.job_service.get_upload_job("abc-123")
+
+    @patch.object(DynamoDBAdapter, "get_job")
+    def test_find_upload_job_returns_none_when_the_job_does_not_exist(
+        self, mock_get_job
+    ):
+        mock_get_job.side_effect = UserError("Could not find job with id abc-123")
+
+        assert self.job_service.find_upload_job("abc-123") is None
+
+
 class TestCreateUploadJob:
     def setup_method(self):
         self.job_service = JobService()
@@ -254,3 +312,133 @@ class TestFailsJob:
         assert job.status == JobStatus.FAILED
         assert job.errors == {"error1", "error2"}
         mock_update_job.assert_called_once_with(job)
+
+
+class TestCheckpointUploadJob:
+    def setup_method(self):
+        self.job_service = JobService()
+        self.job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file1.csv",
+            "111-222-333",
+            DatasetMetadata("layer", "domain1", "dataset2", 4),
+        )
+
+    @patch.object(DynamoDBAdapter, "update_upload_job")
+    def test_checkpoint_raw_file(self, mock_update_upload_job):
+        self.job_service.checkpoint_raw_file(self.job, "111-222-333.csv.gz")
+
+        assert self.job.raw_filename == "111-222-333.csv.gz"
+        assert self.job.completed_steps == [UploadStep.RAW_DATA_UPLOAD]
+        mock_update_upload_job.assert_called_once_with(self.job)
+
+    @patch.object(DynamoDBAdapter, "update_upload_job")
+    def test_checkpoint_step(self, mock_update_upload_job):
+        self.job_service.checkpoint_step(self.job, UploadStep.DATA_UPLOAD)
+
+        assert self.job.has_completed(UploadStep.DATA_UPLOAD)
+        mock_update_upload_job.assert_called_once_with(self.job)
+
+    @patch.object(DynamoDBAdapter, "update_upload_job")
+    def test_set_row_counts(self, mock_update_upload_job):
+        self.job_service.set_row_counts(self.job, 990, 10)
+
+        assert self.job.accepted_rows == 990
+        assert self.job.quarantined_rows == 10
+        mock_update_upload_job.assert_called_once_with(self.job)
+
+    @patch.object(DynamoDBAdapter, "retry_upload_job")
+    def test_retry(self, mock_retry_upload_job):
+        self.job.set_status(JobStatus.FAILED)
+        self.job.set_errors({"error1"})
+
+        self.job_service.retry(self.job)
+
+        assert self.job.status == JobStatus.IN_PROGRESS
+        assert self.job.errors == set()
+        mock_retry_upload_job.assert_called_once_with(self.job)
+
+
+class TestCancelUploadJob:
+    def setup_method(self):
+        self.job_service = JobService()
+        self.job = UploadJob(
+            "subject-123",
+            "abc-123",
+            "file1.csv",
+            "111-222-333",
+            DatasetMetadata("layer", "domain1", "dataset2", 4),
+        )
+
+    @patch.object(DynamoDBAdapter, "request_job_cancellation")
+    @patch.object(JobService, "get_upload_job")
+    def test_request_cancellation(
+        self, mock_get_upload_job, mock_request_job_cancellation
+    ):
+        mock_get_upload_job.return_value = self.job
+
+        result = self.job_service.request_cancellation("subject-123", "abc-123")
+
+        assert result == "abc-123"
+        mock_get_upload_job.assert_called_once_with("abc-123")
+        mock_request_job_cancellation.assert_called_once_with("abc-123")
+
+    @pytest.mark.parametrize(
+        "subject_id, status, message",
+        [
+            (
+                "subject-456",
+                JobStatus.IN_PROGRESS,
+                "can only be cancelled by the subject that started it",
+            ),
+            (
+                "subject-123",
+                JobStatus.SUCCESS,
+                "Only jobs in progress can be cancelled",
+            ),
+            (
+                "subject-123",
+                JobStatus.CANCELLED,
+                "Only jobs in progress can be cancelled",
+            ),
+        ],
+    )
+    @patch.object(DynamoDBAdapter, "request_job_cancellation")
+    @patch.object(JobService, "get_upload_job")
+    def test_request_cancellation_rejects_jobs_that_cannot_be_cancelled(
+        self,
+        mock_get_upload_job,
+        mock_request_job_cancellation,
+        subject_id,
+        status,
+        message,
+    ):
+        self.job.set_status(status)
+        mock_get_upload_job.return_value = self.job
+
+        with pytest.raises(UserError, match=message):
+            self.job_service.request_cancellation(subject_id, "abc-123")
+
+        mock_request_job_cancellation.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "item, expected",
+        [({"cancel_requested": True}, True), ({}, False)],
+    )
+    @patch.object(DynamoDBAdapter, "get_job")
+    def test_is_cancellation_requested(self, mock_get_job, item, expected):
+        mock_get_job.return_value = {"job_id": "abc-123", **item}
+
+        assert self.job_service.is_cancellation_requested(self.job) is expected
+        mock_get_job.assert_called_once_with("abc-123")
+
+    @patch.object(DynamoDBAdapter, "update_job")
+    def test_cancel(self, mock_update_job):
+        self.job.set_step(UploadStep.DATA_UPLOAD)
+
+        self.job_service.cancel(self.job)
+
+        assert self.job.status == JobStatus.CANCELLED
+        assert self.job.step == UploadStep.NONE
+        mock_update_job.assert_called_once_with(self.job)
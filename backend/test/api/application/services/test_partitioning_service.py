@@ -1,12 +1,18 @@
+from io import BytesIO
 from typing import List
+from unittest.mock import patch
 
 import pandas as pd
+import pyarrow.parquet as pq
 
 from api.application.services.partitioning_service import (
     Partition,
+    encode_partitions,
     generate_path,
     drop_columns,
     generate_partitioned_data,
+    sort_rows,
+    z_order,
 )
 from api.domain.schema import Schema
 from rapid.items.schema import Column
@@ -194,3 +200,112 @@ class TestPartitioning:
             assert actual_partition.df.to_dict() == expected_partition.df.to_dict()
             assert actual_partition.path == expected_partition.path
             assert actual_partition.keys == expected_partition.keys
+
+
+class TestSorting:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                sort_by=["col2", "col3"],
+            ),
+            columns=[
+                Column(
+                    name="col1", partition_index=0, data_type="int", allow_null=False
+                ),
+                Column(
+                    name="col2", partition_index=None, data_type="int", allow_null=True
+                ),
+                Column(
+                    name="col3",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+    def test_sorts_rows_by_the_sort_columns(self):
+        df = pd.DataFrame(
+            {
+                "col1": [1, 1, 1, 1],
+                "col2": pd.Series([2, None, 1, 2], dtype="Int64"),
+                "col3": ["b", "a", "c", "a"],
+            }
+        )
+
+        result = sort_rows(self.schema, df)
+
+        assert result.to_dict("list") == {
+            "col1": [1, 1, 1, 1],
+            "col2": [1, 2, 2, None],
+            "col3": ["c", "a", "b", "a"],
+        }
+
+    def test_rows_are_left_in_place_without_sort_columns(self):
+        self.schema.metadata.sort_by = None
+        df = pd.DataFrame({"col1": [1, 1], "col2": [2, 1], "col3": ["b", "a"]})
+
+        assert sort_rows(self.schema, df) is df
+
+    def test_z_order_interleaves_the_ranks_of_the_columns(self):
+        df = pd.DataFrame(
+            {
+                "col2": [3, 0, 1, 2, 0, 1, 2, 3],
+                "col3": ["a", "a", "b", "a", "b", "a", "b", "b"],
+            }
+        )
+
+        order = z_order(df, ["col2", "col3"])
+
+        assert list(zip(df["col2"][order], df["col3"][order])) == [
+            (0, "a"),
+            (1, "a"),
+            (0, "b"),
+            (1, "b"),
+            (2, "a"),
+            (3, "a"),
+            (2, "b"),
+            (3, "b"),
+        ]
+
+    def test_z_order_buckets_columns_with_more_ranks_than_bits(self):
+        df = pd.DataFrame({f"col{index}": range(1000) for index in range(32)})
+
+        order = z_order(df, list(df.columns))
+
+        assert list(order) == list(range(1000))
+
+    def test_partitions_are_written_in_the_sort_order(self):
+        self.schema.metadata.sort_method = "ZORDER"
+        df = pd.DataFrame(
+            {
+                "col1": [1, 2, 1, 1, 1],
+                "col2": [1, 5, 0, 1, 0],
+                "col3": ["b", "z", "b", "a", "a"],
+            }
+        )
+
+        partitions = generate_partitioned_data(self.schema, df)
+
+        assert partitions[0].df.to_dict("list") == {
+            "col2": [0, 1, 0, 1],
+            "col3": ["a", "a", "b", "b"],
+        }
+        assert partitions[1].df.to_dict("list") == {"col2": [5], "col3": ["z"]}
+
+    @patch("api.application.services.partitioning_service.SORTED_ROW_GROUP_SIZE", 2)
+    def test_sorted_partitions_are_encoded_in_row_groups(self):
+        df = pd.DataFrame({"col2": [1, 2, 3, 4, 5], "col3": ["a", "b", "c", "d", "e"]})
+
+        encoded = encode_partitions(self.schema, [Partition(path="col1=1", df=df)])
+
+        metadata = pq.read_metadata(BytesIO(encoded[0].content))
+        assert encoded[0].rows == metadata.num_rows == 5
+        assert metadata.num_row_groups == 3
+        statistics = metadata.row_group(1).column(0).statistics
+        assert (statistics.min, statistics.max) == (3, 4)
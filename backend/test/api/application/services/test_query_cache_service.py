@@ -0,0 +1,90 @@
+from unittest.mock import Mock
+
+import pandas as pd
+
+from api.application.services.query_cache_service import QueryCacheService
+from api.domain.dataset_metadata import DatasetMetadata
+from rapid.items.query import Query
+
+
+class TestQueryCacheService:
+    def setup_method(self):
+        self.db_adapter = Mock()
+        self.db_adapter.get_data_version.return_value = 3
+        self.now = 1000.0
+        self.query_cache_service = QueryCacheService(
+            self.db_adapter,
+            max_bytes=1000,
+            max_result_bytes=500,
+            ttl_seconds=60,
+            large_query_ttl_seconds=600,
+            clock=lambda: self.now,
+        )
+        self.dataset = DatasetMetadata("raw", "domain", "dataset", 1)
+
+    def _cache(self, key, chunks):
+        return list(self.query_cache_service.cache_result(key, iter(chunks)))
+
+    def test_cache_key(self):
+        key = self.query_cache_service.cache_key(self.dataset, Query(limit=5))
+
+        assert key == (
+            "raw_domain_dataset_1",
+            "SELECT * FROM raw_domain_dataset_1 LIMIT 5",
+            3,
+        )
+        self.db_adapter.get_data_version.assert_called_once_with(self.dataset)
+
+    def test_cache_key_changes_with_the_data_version(self):
+        first_key = self.query_cache_service.cache_key(self.dataset, Query())
+        self.db_adapter.get_data_version.return_value = 4
+
+        assert self.query_cache_service.cache_key(self.dataset, Query()) != first_key
+
+    def test_invalidate_increments_the_data_version(self):
+        self.query_cache_service.invalidate(self.dataset)
+
+        self.db_adapter.increment_data_version.assert_called_once_with(self.dataset)
+
+    def test_caches_the_result_once_every_chunk_has_been_read(self):
+        chunks = [pd.DataFrame({"column": [1, 2]}), pd.DataFrame({"column": [3]})]
+        result = self.query_cache_service.cache_result("key", iter(chunks))
+
+        assert next(result) is chunks[0]
+        assert self.query_cache_service.get_result("key") is None
+        assert list(result) == [chunks[1]]
+        assert self.query_cache_service.get_result("key") == chunks
+
+    def test_does_not_cache_results_larger_than_the_maximum(self):
+        chunks = [pd.DataFrame({"column": range(100)})]
+
+        assert self._cache("key", chunks) == chunks
+        assert self.query_cache_service.get_result("key") is None
+
+    def test_results_expire_after_the_ttl(self):
+        self._cache("key", [pd.DataFrame({"column": [1]})])
+
+        self.now += 61
+
+        assert self.query_cache_service.get_result("key") is None
+
+    def test_evicts_the_least_recently_used_results(self):
+        # Each result takes up 412 bytes, so only two of them fit in the cache
+        for key in ["first", "second"]:
+            self._cache(key, [pd.DataFrame({"column": range(35)})])
+        self.query_cache_service.get_result("first")
+
+        self._cache("third", [pd.DataFrame({"column": range(35)})])
+
+        assert self.query_cache_service.get_result("first") is not None
+        assert self.query_cache_service.get_result("second") is None
+        assert self.query_cache_service.get_result("third") is not None
+
+    def test_large_query_executions_expire_after_their_ttl(self):
+        self.query_cache_service.cache_large_query_execution("key", "111-222")
+
+        assert self.query_cache_service.get_large_query_execution("key") == "111-222"
+
+        self.now += 601
+
+        assert self.query_cache_service.get_large_query_execution("key") is None
@@ -25,10 +25,12 @@ class TestUploadSchema:
         self.dynamodb_adapter = Mock()
         self.glue_adapter = Mock()
         self.protected_domain_service = Mock()
+        self.dataset_statistics_service = Mock()
         self.schema_service = SchemaService(
             self.dynamodb_adapter,
             self.glue_adapter,
             self.protected_domain_service,
+            self.dataset_statistics_service,
         )
         self.valid_schema = Schema(
             metadata=SchemaMetadata(
@@ -62,6 +64,9 @@ class TestUploadSchema:
         self.dynamodb_adapter.store_schema.assert_called_once_with(self.valid_schema)
         self.glue_adapter.create_table.assert_called_once_with(self.valid_schema)
         assert result == self.valid_schema.metadata.glue_table_name()
+        self.dataset_statistics_service.create_statistics.assert_called_once_with(
+            self.valid_schema.metadata
+        )
 
     def test_upload_schema_uppercase_domain(self):
         self.schema_service.get_schema = Mock(return_value=None)
@@ -85,6 +90,7 @@ class TestUploadSchema:
             self.schema_service.upload_schema(self.valid_schema)
 
         self.dynamodb_adapter.store_schema.assert_not_called()
+        self.dataset_statistics_service.create_statistics.assert_not_called()
 
     def test_check_for_protected_domain_success(self):
         schema = Schema(
@@ -177,10 +183,12 @@ class TestUpdateSchema:
         self.dynamodb_adapter = Mock()
         self.glue_adapter = Mock()
         self.protected_domain_service = Mock()
+        self.dataset_statistics_service = Mock()
         self.schema_service = SchemaService(
             self.dynamodb_adapter,
             self.glue_adapter,
             self.protected_domain_service,
+            self.dataset_statistics_service,
         )
         self.valid_schema = Schema(
             metadata=SchemaMetadata(
@@ -295,6 +303,9 @@ class TestUpdateSchema:
             original_schema.metadata
         )
         assert result == "raw/testdomain/testdataset/3"
+        self.dataset_statistics_service.create_statistics.assert_called_once_with(
+            expected_schema.metadata
+        )
 
     def test_update_schema_enforces_sensitivity_consistency(self):
         original_schema = self.valid_schema
@@ -339,10 +350,12 @@ class TestGetSchema:
         self.dynamodb_adapter = Mock()
         self.glue_adapter = Mock()
         self.protected_domain_service = Mock()
+        self.dataset_statistics_service = Mock()
         self.schema_service = SchemaService(
             self.dynamodb_adapter,
             self.glue_adapter,
             self.protected_domain_service,
+            self.dataset_statistics_service,
         )
         self.metadata = SchemaMetadata(
             layer="raw",
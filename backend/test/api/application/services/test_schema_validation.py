@@ -1,4 +1,4 @@
-from typing import List, Any
+from typing import List, Any, Optional
 
 import pytest
 from pydantic import ValidationError
@@ -7,13 +7,15 @@ from api.application.services.schema_validation import validate_schema
 from api.application.services.schema_validation import (
     validate_schema_for_upload,
     schema_has_valid_tag_set,
+    schema_has_valid_partition_count,
+    expected_partition_count,
 )
 from api.common.config.auth import Sensitivity
 from api.common.config.aws import MAX_TAG_COUNT
 from api.common.custom_exceptions import SchemaValidationError
 from api.domain.schema import Schema
 from api.domain.schema_metadata import SchemaMetadata
-from rapid.items.schema import UpdateBehaviour, Owner, Column
+from rapid.items.schema import UpdateBehaviour, Owner, Column, DerivedPartition
 
 
 class TestSchemaValidation:
@@ -688,13 +690,18 @@ class TestSchemaValidation:
                 sensitivity="PUBLIC",
                 update_behaviour=provided_update_behaviour,
                 owners=[Owner(name="owner", email="owner@email.com")],
+                key_columns=(
+                    ["colname1"]
+                    if provided_update_behaviour == UpdateBehaviour.UPSERT
+                    else None
+                ),
             ),
             columns=[
                 Column(
                     name="colname1",
                     partition_index=None,
                     data_type="string",
-                    allow_null=True,
+                    allow_null=False,
                 ),
             ],
         )
@@ -741,7 +748,7 @@ class TestSchemaValidation:
 
         self._assert_validate_schema_raises_error(
             invalid_schema,
-            r"You must specify a valid update behaviour. Accepted values: \['APPEND', 'OVERWRITE'\]",
+            r"You must specify a valid update behaviour. Accepted values: \['APPEND', 'OVERWRITE', 'UPSERT'\]",
         )
 
     def test_valid_schema_when_all_tags_are_set(self):
@@ -972,6 +979,13 @@ class TestSchemaValidation:
             "owners": [{"name": "owner", "email": "owner@email.com"}],
             "update_behaviour": "APPEND",
             "is_latest_version": True,
+            "max_partitions": None,
+            "partition_overflow": "WARN",
+            "key_columns": None,
+            "partition_by": None,
+            "sort_by": None,
+            "sort_method": "LINEAR",
+            "invalid_rows": "REJECT",
         }
 
         schema_has_valid_tag_set(valid_schema)
@@ -1197,3 +1211,359 @@ class TestSchemaValidation:
             invalid_upload_schema,
             r"Schema with APPEND update behaviour cannot force unique values in columns",
         )
+
+    def test_is_valid_when_dataset_is_upsert_with_key_columns(self):
+        valid_schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                update_behaviour="UPSERT",
+                key_columns=["colname1", "colname2"],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="int",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname3",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        try:
+            validate_schema(valid_schema)
+        except SchemaValidationError:
+            pytest.fail("Unexpected SchemaValidationError was thrown")
+
+    @pytest.mark.parametrize(
+        "update_behaviour, key_columns, message",
+        [
+            (
+                "UPSERT",
+                None,
+                r"Schema with UPSERT update behaviour must set the key columns that identify its rows",
+            ),
+            (
+                "APPEND",
+                ["colname1"],
+                r"Key columns can only be set for a schema with UPSERT update behaviour",
+            ),
+            (
+                "UPSERT",
+                ["colname1", "colname1"],
+                r"You can not have duplicated key columns",
+            ),
+            (
+                "UPSERT",
+                ["colname1", "missing"],
+                r"Key columns \['missing'\] are not columns of the schema",
+            ),
+            (
+                "UPSERT",
+                ["colname2"],
+                r"Key columns cannot allow null values",
+            ),
+        ],
+    )
+    def test_is_invalid_when_key_columns_are_invalid(
+        self, update_behaviour: str, key_columns: Optional[List[str]], message: str
+    ):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                update_behaviour=update_behaviour,
+                key_columns=key_columns,
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(invalid_schema, message)
+
+    @pytest.mark.parametrize(
+        "partition_by, message",
+        [
+            (
+                DerivedPartition(column="event_date", granularity="WEEK"),
+                r"You must specify a valid partition granularity. Accepted values: \['YEAR', 'MONTH', 'DAY'\]",
+            ),
+            (
+                DerivedPartition(column="missing"),
+                r"The column \[missing\] to partition by must be a date column of the schema",
+            ),
+            (
+                DerivedPartition(column="name"),
+                r"The column \[name\] to partition by must be a date column of the schema",
+            ),
+            (
+                DerivedPartition(column="optional_date"),
+                r"The column \[optional_date\] to partition by cannot allow null values",
+            ),
+            (
+                DerivedPartition(column="event_date", granularity="YEAR"),
+                r"The derived partition \[event_date_year\] has the same name as a column of the schema",
+            ),
+        ],
+    )
+    def test_is_invalid_when_derived_partition_is_invalid(
+        self, partition_by: DerivedPartition, message: str
+    ):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                partition_by=partition_by,
+            ),
+            columns=[
+                Column(
+                    name="event_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%Y-%m-%d",
+                ),
+                Column(
+                    name="optional_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=True,
+                    format="%Y-%m-%d",
+                ),
+                Column(
+                    name="event_date_year",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=True,
+                ),
+                Column(
+                    name="name",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(invalid_schema, message)
+
+    @pytest.mark.parametrize(
+        "sort_by, sort_method, message",
+        [
+            (
+                ["colname2"],
+                "RANDOM",
+                r"You must specify a valid sort method. Accepted values: \['LINEAR', 'ZORDER'\]",
+            ),
+            (
+                ["colname2", "colname2"],
+                "LINEAR",
+                r"You can not have duplicated sort columns",
+            ),
+            (
+                ["colname2", "missing"],
+                "ZORDER",
+                r"Sort columns \['missing'\] are not columns of the schema",
+            ),
+            (
+                ["colname1", "colname2"],
+                "ZORDER",
+                r"Partition columns cannot be sort columns, they have a single value in each file",
+            ),
+        ],
+    )
+    def test_is_invalid_when_sort_columns_are_invalid(
+        self, sort_by: List[str], sort_method: str, message: str
+    ):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                sort_by=sort_by,
+                sort_method=sort_method,
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="int",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(invalid_schema, message)
+
+    def test_is_valid_when_partitioned_by_a_date_column(self):
+        valid_schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                partition_by=DerivedPartition(column="event_date", granularity="DAY"),
+            ),
+            columns=[
+                Column(
+                    name="event_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%Y-%m-%d",
+                ),
+                Column(
+                    name="name",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        try:
+            validate_schema(valid_schema)
+        except SchemaValidationError:
+            pytest.fail("Unexpected SchemaValidationError was thrown")
+
+    @pytest.mark.parametrize(
+        "partition_overflow, max_partitions, message",
+        [
+            (
+                "IGNORE",
+                None,
+                r"You must specify a valid partition overflow. Accepted values: \['REJECT', 'WARN'\]",
+            ),
+            ("WARN", 0, r"The maximum number of partitions must be a positive integer"),
+        ],
+    )
+    def test_is_invalid_when_partition_limit_is_unsupported(
+        self, partition_overflow: str, max_partitions: int, message: str
+    ):
+        self.valid_schema.metadata.partition_overflow = partition_overflow
+        self.valid_schema.metadata.max_partitions = max_partitions
+
+        self._assert_validate_schema_raises_error(self.valid_schema, message)
+
+    def test_is_invalid_when_invalid_rows_handling_is_unsupported(self):
+        self.valid_schema.metadata.invalid_rows = "IGNORE"
+
+        self._assert_validate_schema_raises_error(
+            self.valid_schema,
+            r"You must specify a valid handling of invalid rows. Accepted values: \['REJECT', 'QUARANTINE'\]",
+        )
+
+    def _schema_partitioned_by_boolean_and_region(self, **metadata) -> Schema:
+        return Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                **metadata,
+            ),
+            columns=[
+                Column(
+                    name="is_active",
+                    partition_index=0,
+                    data_type="boolean",
+                    allow_null=False,
+                ),
+                Column(
+                    name="region",
+                    partition_index=1,
+                    data_type="string",
+                    allow_null=False,
+                    checks={
+                        "region_check": {
+                            "check_type": "isin",
+                            "parameters": {
+                                "allowed_values": ["north", "south", "east"]
+                            },
+                        }
+                    },
+                ),
+                Column(
+                    name="value",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+    def test_expected_partition_count_when_all_partition_values_are_known(self):
+        schema = self._schema_partitioned_by_boolean_and_region()
+
+        assert expected_partition_count(schema) == 6
+
+    def test_expected_partition_count_is_unknown_when_a_partition_column_is_unbounded(
+        self,
+    ):
+        assert expected_partition_count(self.valid_schema) is None
+
+    def test_is_invalid_when_expected_partitions_exceed_limit_and_overflow_is_rejected(
+        self,
+    ):
+        schema = self._schema_partitioned_by_boolean_and_region(
+            max_partitions=4, partition_overflow="REJECT"
+        )
+
+        with pytest.raises(
+            SchemaValidationError,
+            match=r"The partition columns \['is_active', 'region'\] can have up to 6 distinct values, which is more than the limit of 4 partitions in a single chunk",
+        ):
+            schema_has_valid_partition_count(schema)
+
+    def test_is_valid_when_expected_partitions_exceed_limit_and_overflow_is_warned(
+        self,
+    ):
+        schema = self._schema_partitioned_by_boolean_and_region(max_partitions=4)
+
+        try:
+            schema_has_valid_partition_count(schema)
+        except SchemaValidationError:
+            pytest.fail("Unexpected SchemaValidationError was thrown")
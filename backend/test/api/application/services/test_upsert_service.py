@@ -0,0 +1,150 @@
+import datetime
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from api.application.services.upsert_service import (
+    extract_keys,
+    file_may_contain_keys,
+    get_partition_values,
+    partition_may_contain_keys,
+    remove_rows_with_keys,
+)
+from api.domain.schema import Schema
+from api.domain.schema_metadata import Owner, SchemaMetadata
+from rapid.items.schema import Column
+
+
+def parquet_content(table: pa.Table, **kwargs) -> bytes:
+    buffer = BytesIO()
+    pq.write_table(table, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+class TestUpsertService:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                version=1,
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+                update_behaviour="UPSERT",
+                key_columns=["region", "id", "day"],
+            ),
+            columns=[
+                Column(
+                    name="region",
+                    partition_index=0,
+                    data_type="string",
+                    allow_null=False,
+                ),
+                Column(
+                    name="id", partition_index=None, data_type="int", allow_null=False
+                ),
+                Column(
+                    name="day",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%Y-%m-%d",
+                ),
+                Column(
+                    name="value",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+        self.keys = pd.DataFrame(
+            {
+                "region": ["north", "south"],
+                "id": [5, 7],
+                "day": [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)],
+            }
+        )
+
+    def test_extract_keys_uses_the_stored_values_of_the_key_columns(self):
+        validated_dataframe = pd.DataFrame(
+            {
+                "region": ["north", "south"],
+                "id": pd.Series([5, 7], dtype="Int64"),
+                "day": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+                "value": ["a", "b"],
+            }
+        )
+
+        keys = extract_keys(self.schema, validated_dataframe)
+
+        pd.testing.assert_frame_equal(keys, self.keys.astype({"id": "int32"}))
+
+    def test_get_partition_values_from_the_file_key(self):
+        assert get_partition_values(
+            self.schema, "data/raw/some/other/1/region=north/abc.parquet"
+        ) == {"region": "north"}
+
+    def test_partition_may_contain_keys(self):
+        assert partition_may_contain_keys(self.keys, {"region": "north"}) is True
+        assert partition_may_contain_keys(self.keys, {"region": "east"}) is False
+
+    def test_file_may_contain_keys_within_the_statistics_of_the_file(self):
+        metadata = pq.read_metadata(
+            BytesIO(parquet_content(pa.table({"id": [1, 6], "day": [1, 2]})))
+        )
+        outside_metadata = pq.read_metadata(
+            BytesIO(parquet_content(pa.table({"id": [6, 9], "day": [1, 2]})))
+        )
+
+        assert file_may_contain_keys(self.keys, {"region": "north"}, metadata) is True
+        assert (
+            file_may_contain_keys(self.keys, {"region": "north"}, outside_metadata)
+            is False
+        )
+
+    def test_file_may_contain_keys_when_the_file_has_no_statistics(self):
+        content = parquet_content(
+            pa.table({"id": [100], "day": [datetime.date(2023, 1, 1)]}),
+            write_statistics=False,
+        )
+
+        assert (
+            file_may_contain_keys(
+                self.keys, {"region": "north"}, pq.read_metadata(BytesIO(content))
+            )
+            is True
+        )
+
+    def test_remove_rows_with_keys(self):
+        content = parquet_content(
+            pa.table(
+                {
+                    "id": [5, 5, 6],
+                    "day": [
+                        datetime.date(2024, 1, 1),
+                        datetime.date(2024, 1, 2),
+                        datetime.date(2024, 1, 1),
+                    ],
+                    "value": ["replaced", "kept", "kept"],
+                }
+            )
+        )
+
+        remaining_rows = remove_rows_with_keys(self.keys, {"region": "north"}, content)
+
+        assert remaining_rows.to_pydict() == {
+            "id": [5, 6],
+            "day": [datetime.date(2024, 1, 2), datetime.date(2024, 1, 1)],
+            "value": ["kept", "kept"],
+        }
+
+    def test_remove_rows_with_keys_when_no_row_has_a_key(self):
+        content = parquet_content(
+            pa.table({"id": [5], "day": [datetime.date(2024, 1, 1)], "value": ["a"]})
+        )
+
+        assert remove_rows_with_keys(self.keys, {"region": "south"}, content) is None
@@ -1,23 +1,56 @@
+import gzip
 import os
 import tempfile
 from pathlib import Path
 
+import zstandard
+from io import BytesIO
 from fastapi import UploadFile
+from starlette.datastructures import Headers
 from unittest.mock import patch, Mock
 from pandas.testing import assert_frame_equal
 
 import pandas as pd
+import pyarrow as pa
 
-from api.common.config.constants import CONTENT_ENCODING
+import pytest
+
+from api.common.config.constants import CHUNK_SIZE_MB, CONTENT_ENCODING
+from api.common.spool import Spool
+from api.common.custom_exceptions import (
+    InvalidFileUploadError,
+    SpoolCapacityExceededError,
+)
 from api.common.data_handlers import (
     CHUNK_SIZE,
     construct_chunked_dataframe,
+    delete_incoming_raw_file,
+    get_dataframe_from_chunk_type,
+    get_file_type,
+    get_raw_filename,
+    get_upload_file_type,
+    restore_raw_file_format,
+    store_arrow_stream_file_to_disk,
+    store_decompressed_csv_file_to_disk,
     store_file_to_disk,
     store_csv_file_to_disk,
 )
+from api.domain.schema import Schema
+from api.domain.schema_metadata import Owner, SchemaMetadata
+from rapid.items.schema import Column
 
 
 class TestStoreFileToDisk:
+    def setup_method(self):
+        self.spool_patcher = patch("api.common.data_handlers.spool")
+        self.mock_spool = self.spool_patcher.start()
+        self.mock_spool.path_for.side_effect = lambda filename: Path(
+            f"spool/{filename}"
+        )
+
+    def teardown_method(self):
+        self.spool_patcher.stop()
+
     @patch("api.common.data_handlers.store_csv_file_to_disk")
     def test_store_file_to_disk_csv_file(self, mock_store_csv_file_to_disk):
         mock_file = UploadFile(filename="test.csv", file=None)
@@ -25,8 +58,9 @@ class TestStoreFileToDisk:
         id = "xxx-yyy"
         store_file_to_disk(extension, id, mock_file)
 
-        path = Path("xxx-yyy-test.csv")
+        path = Path("spool/xxx-yyy-test.csv")
         mock_store_csv_file_to_disk.assert_called_once_with(path, False, mock_file)
+        self.mock_spool.reserve.assert_called_once_with(path, None, held_by=None)
 
     @patch("api.common.data_handlers.store_csv_file_to_disk")
     def test_store_file_to_disk_csv_file_chunked(self, mock_store_csv_file_to_disk):
@@ -36,7 +70,7 @@ class TestStoreFileToDisk:
         to_chunk = True
         store_file_to_disk(extension, id, mock_file, to_chunk)
 
-        path = Path("xxx-yyy-test.csv")
+        path = Path("spool/xxx-yyy-test.csv")
         mock_store_csv_file_to_disk.assert_called_once_with(path, True, mock_file)
 
     @patch("api.common.data_handlers.store_parquet_file_to_disk")
@@ -46,7 +80,7 @@ class TestStoreFileToDisk:
         id = "xxx-yyy"
         store_file_to_disk(extension, id, mock_file)
 
-        path = Path("xxx-yyy-test.parquet")
+        path = Path("spool/xxx-yyy-test.parquet")
         mock_store_parquet_file_to_disk.assert_called_once_with(path, False, mock_file)
 
     @patch("api.common.data_handlers.store_parquet_file_to_disk")
@@ -57,9 +91,312 @@ class TestStoreFileToDisk:
         to_chunk = True
         store_file_to_disk(extension, id, mock_file, to_chunk)
 
-        path = Path("xxx-yyy-test.parquet")
+        path = Path("spool/xxx-yyy-test.parquet")
         mock_store_parquet_file_to_disk.assert_called_once_with(path, True, mock_file)
 
+    @patch("api.common.data_handlers.store_csv_file_to_disk")
+    def test_store_file_to_disk_reserves_expected_size(
+        self, _mock_store_csv_file_to_disk
+    ):
+        mock_file = UploadFile(filename="test.csv", file=None)
+        store_file_to_disk("csv", "xxx-yyy", mock_file, expected_size=1234)
+
+        self.mock_spool.reserve.assert_called_once_with(
+            Path("spool/xxx-yyy-test.csv"), 1234, held_by=None
+        )
+
+    @patch("api.common.data_handlers.store_csv_file_to_disk")
+    def test_store_file_to_disk_reserves_from_the_request_reservation(
+        self, _mock_store_csv_file_to_disk
+    ):
+        mock_file = UploadFile(filename="test.csv", file=None)
+        reservation = Path("spool/.request-abc")
+        store_file_to_disk(
+            "csv", "xxx-yyy", mock_file, expected_size=1234, reservation=reservation
+        )
+
+        self.mock_spool.reserve.assert_called_once_with(
+            Path("spool/xxx-yyy-test.csv"), 1234, held_by=reservation
+        )
+
+    @patch("api.common.data_handlers.store_csv_file_to_disk")
+    def test_store_file_to_disk_caps_reservation_when_chunked(
+        self, _mock_store_csv_file_to_disk
+    ):
+        mock_file = UploadFile(filename="test.csv", file=None)
+        store_file_to_disk(
+            "csv", "xxx-yyy", mock_file, to_chunk=True, expected_size=CHUNK_SIZE_MB * 4
+        )
+
+        self.mock_spool.reserve.assert_called_once_with(
+            Path("spool/xxx-yyy-test.csv"), CHUNK_SIZE_MB, held_by=None
+        )
+
+    @patch("api.common.data_handlers.store_csv_file_to_disk")
+    def test_store_file_to_disk_does_not_write_when_capacity_is_exceeded(
+        self, mock_store_csv_file_to_disk
+    ):
+        mock_file = UploadFile(filename="test.csv", file=None)
+        self.mock_spool.reserve.side_effect = SpoolCapacityExceededError(
+            "At capacity", retry_after=30
+        )
+
+        with pytest.raises(SpoolCapacityExceededError):
+            store_file_to_disk("csv", "xxx-yyy", mock_file, expected_size=1234)
+
+        mock_store_csv_file_to_disk.assert_not_called()
+
+    @patch("api.common.data_handlers.os")
+    @patch("api.common.data_handlers.store_csv_file_to_disk")
+    def test_store_file_to_disk_releases_reservation_when_write_fails(
+        self, mock_store_csv_file_to_disk, mock_os
+    ):
+        mock_file = UploadFile(filename="test.csv", file=None)
+        mock_store_csv_file_to_disk.side_effect = OSError("No space left on device")
+
+        with pytest.raises(OSError):
+            store_file_to_disk("csv", "xxx-yyy", mock_file, expected_size=1234)
+
+        path = Path("spool/xxx-yyy-test.csv")
+        self.mock_spool.release.assert_called_once_with(path)
+        mock_os.remove.assert_called_once_with(path)
+
+
+class TestDeleteIncomingRawFile:
+    @patch("api.common.data_handlers.os")
+    @patch("api.common.data_handlers.spool")
+    def test_deletes_file_and_releases_reservation(self, mock_spool, mock_os):
+        path = Path("spool/xxx-yyy-test.csv")
+
+        delete_incoming_raw_file(Mock(), path, "123-456")
+
+        mock_spool.release.assert_called_once_with(path)
+        mock_os.remove.assert_called_once_with(path)
+
+
+class TestFileTypes:
+    @pytest.mark.parametrize(
+        "filename, expected",
+        [
+            ("data.csv", ("csv", None)),
+            ("data.parquet", ("parquet", None)),
+            ("data.csv.gz", ("csv", "gzip")),
+            ("DATA.CSV.ZST", ("csv", "zstd")),
+            ("data.gz", ("gz", None)),
+        ],
+    )
+    def test_get_file_type(self, filename, expected):
+        assert get_file_type(filename) == expected
+
+    def test_get_upload_file_type_from_arrow_stream_content_type(self):
+        file = UploadFile(
+            filename="data",
+            file=None,
+            headers=Headers({"Content-Type": "application/vnd.apache.arrow.stream"}),
+        )
+
+        assert get_upload_file_type(file) == ("arrows", None)
+
+    def test_get_upload_file_type_from_content_encoding(self):
+        file = UploadFile(
+            filename="data.csv",
+            file=None,
+            headers=Headers({"Content-Encoding": "gzip"}),
+        )
+
+        assert get_upload_file_type(file) == ("csv", "gzip")
+
+    def test_get_upload_file_type_fails_for_unsupported_content_encoding(self):
+        file = UploadFile(
+            filename="data.csv", file=None, headers=Headers({"Content-Encoding": "br"})
+        )
+
+        with pytest.raises(
+            InvalidFileUploadError, match="The content encoding br, is not supported."
+        ):
+            get_upload_file_type(file)
+
+    def test_get_upload_file_type_fails_for_compressed_parquet(self):
+        file = UploadFile(filename="data.parquet.zst", file=None)
+
+        with pytest.raises(InvalidFileUploadError):
+            get_upload_file_type(file)
+
+    @pytest.mark.parametrize(
+        "file_path, expected",
+        [
+            (Path("spool/abc-data.csv"), "123-456.csv.zst"),
+            (Path("spool/abc-data.parquet"), "123-456.parquet"),
+            (Path("spool/abc-data.arrows"), "123-456.arrows"),
+            (Path("spool/abc-data.csv.gz"), "123-456.csv.gz"),
+            (Path("spool/abc-data.csv.zst"), "123-456.csv.zst"),
+        ],
+    )
+    def test_get_raw_filename(self, file_path, expected):
+        assert get_raw_filename("123-456", file_path) == expected
+
+
+class TestRestoreRawFileFormat:
+    @pytest.mark.parametrize(
+        "write, expected_name",
+        [
+            (
+                lambda path: pd.DataFrame({"a": [1]}).to_parquet(path),
+                "abc-data.parquet",
+            ),
+            (
+                lambda path: pa.ipc.new_stream(path.as_posix(), pa.schema([])).close(),
+                "abc-data.arrows",
+            ),
+            (lambda path: path.write_bytes(b"a,b\n1,2\n"), "abc-data.csv"),
+        ],
+    )
+    def test_restore_raw_file_format_from_the_content(
+        self, write, expected_name, tmp_path
+    ):
+        spool = Spool(tmp_path.as_posix())
+        file_path = spool.path_for("abc-data.csv")
+        write(file_path)
+        spool.reserve(file_path, os.path.getsize(file_path))
+
+        with patch("api.common.data_handlers.spool", spool):
+            restored_path = restore_raw_file_format(file_path)
+
+        assert restored_path == tmp_path / expected_name
+        assert [path.name for path in tmp_path.iterdir()] == [expected_name]
+        assert spool.reserved_bytes() == os.path.getsize(restored_path)
+
+    def test_restore_raw_file_format_leaves_compressed_files(self):
+        file_path = Path("spool/abc-data.csv.zst")
+
+        assert restore_raw_file_format(file_path) == file_path
+
+
+class TestStoreCompressedFileToDisk:
+    def setup_method(self):
+        self.spool_patcher = patch("api.common.data_handlers.spool")
+        self.mock_spool = self.spool_patcher.start()
+        self.directory = tempfile.mkdtemp()
+        self.mock_spool.path_for.side_effect = (
+            lambda filename: Path(self.directory) / filename
+        )
+        self.content = b"colname1,colname2\nsomething,123\notherthing,456\n"
+
+    def teardown_method(self):
+        self.spool_patcher.stop()
+
+    def test_stores_compressed_csv_file_as_uploaded(self):
+        compressed = gzip.compress(self.content)
+        file = UploadFile(filename="test.csv.gz", file=BytesIO(compressed))
+
+        path = store_file_to_disk("csv", "xxx-yyy", file, compression="gzip")
+
+        assert path.name == "xxx-yyy-test.csv.gz"
+        assert path.read_bytes() == compressed
+
+    def test_adds_compression_suffix_when_declared_by_content_encoding(self):
+        compressed = zstandard.ZstdCompressor().compress(self.content)
+        file = UploadFile(filename="test.csv", file=BytesIO(compressed))
+
+        path = store_file_to_disk("csv", "xxx-yyy", file, compression="zstd")
+
+        assert path.name == "xxx-yyy-test.csv.zst"
+        chunks = list(construct_chunked_dataframe(path))
+        assert list(chunks[0]["colname2"]) == [123, 456]
+
+    @pytest.mark.parametrize(
+        "compression, compress",
+        [
+            ("gzip", gzip.compress),
+            ("zstd", zstandard.ZstdCompressor().compress),
+        ],
+    )
+    def test_decompresses_csv_file_when_chunked(self, compression, compress):
+        file = UploadFile(filename="test.csv", file=BytesIO(compress(self.content)))
+
+        path = store_file_to_disk(
+            "csv", "xxx-yyy", file, to_chunk=True, compression=compression
+        )
+
+        assert path.name == "xxx-yyy-test.csv"
+        assert path.read_bytes() == self.content
+
+    def test_store_decompressed_csv_file_to_disk_fails_for_invalid_data(self):
+        file = UploadFile(filename="test.csv.gz", file=BytesIO(b"not compressed"))
+
+        with pytest.raises(InvalidFileUploadError):
+            store_decompressed_csv_file_to_disk(
+                Path(self.directory) / "test.csv", "gzip", file
+            )
+
+
+class TestStoreArrowStreamFileToDisk:
+    def setup_method(self):
+        self.directory = tempfile.mkdtemp()
+        self.batches = [
+            pa.record_batch({"col1": [1, 2], "col2": ["a", "b"]}),
+            pa.record_batch({"col1": [3], "col2": ["c"]}),
+        ]
+
+    def _stream(self) -> BytesIO:
+        sink = BytesIO()
+        with pa.ipc.new_stream(sink, self.batches[0].schema) as writer:
+            for batch in self.batches:
+                writer.write_batch(batch)
+        sink.seek(0)
+        return sink
+
+    def test_store_arrow_stream_file_to_disk(self):
+        file = UploadFile(filename="test.arrows", file=self._stream())
+        path = Path(self.directory) / "test.arrows"
+
+        store_arrow_stream_file_to_disk(path, False, file)
+
+        with pa.ipc.open_stream(path.as_posix()) as reader:
+            assert reader.read_all().num_rows == 3
+
+    @patch("api.common.data_handlers.PARQUET_CHUNK_SIZE", 2)
+    def test_store_arrow_stream_file_to_disk_chunked(self):
+        file = UploadFile(filename="test.arrows", file=self._stream())
+        path = Path(self.directory) / "test.arrows"
+
+        store_arrow_stream_file_to_disk(path, True, file)
+
+        with pa.ipc.open_stream(path.as_posix()) as reader:
+            assert reader.read_all().num_rows == 2
+
+    def test_store_arrow_stream_file_to_disk_fails_for_invalid_stream(self):
+        file = UploadFile(filename="test.arrows", file=BytesIO(b"not arrow"))
+
+        with pytest.raises(InvalidFileUploadError):
+            store_arrow_stream_file_to_disk(
+                Path(self.directory) / "test.arrows", False, file
+            )
+
+    @patch("api.common.data_handlers.spool")
+    def test_store_file_to_disk_adds_extension_for_arrow_stream(self, mock_spool):
+        mock_spool.path_for.side_effect = lambda filename: (
+            Path(self.directory) / filename
+        )
+        file = UploadFile(filename="data", file=self._stream())
+
+        path = store_file_to_disk("arrows", "xxx-yyy", file)
+
+        assert path.name == "xxx-yyy-data.arrows"
+
+    @patch("api.common.data_handlers.CHUNK_SIZE", 2)
+    def test_construct_chunked_dataframe_combines_record_batches(self):
+        self.batches = [pa.record_batch({"col1": [value]}) for value in range(5)]
+        path = Path(self.directory) / "test.arrows"
+        path.write_bytes(self._stream().getvalue())
+
+        chunks = [
+            get_dataframe_from_chunk_type(chunk)
+            for chunk in construct_chunked_dataframe(path)
+        ]
+
+        assert [list(chunk["col1"]) for chunk in chunks] == [[0, 1], [2, 3], [4]]
+
 
 class TestStoreCSVFileToDisk:
     def test_store_csv_file_to_disk(self):
@@ -100,7 +437,11 @@ class TestConstructChunkedDataframe:
 
         construct_chunked_dataframe(path)
         mock_pd.read_csv.assert_called_once_with(
-            path, encoding=CONTENT_ENCODING, sep=",", chunksize=CHUNK_SIZE
+            path,
+            encoding=CONTENT_ENCODING,
+            sep=",",
+            chunksize=CHUNK_SIZE,
+            compression=None,
         )
 
     @patch("api.common.data_handlers.pq")
@@ -112,3 +453,91 @@ class TestConstructChunkedDataframe:
         construct_chunked_dataframe(path)
         mock_pq.ParquetFile.assert_called_once_with("file/path.parquet")
         mock_parquet_file.iter_batches.assert_called_once_with(batch_size=CHUNK_SIZE)
+
+    def test_construct_chunked_dataframe_csv_reads_the_types_of_the_schema(
+        self, tmp_path
+    ):
+        path = tmp_path / "data.csv.gz"
+        path.write_bytes(
+            gzip.compress(
+                b"Code,Event Date,amount,other\n007,05/01/2024,1,x\n,31/01/2024,,y\n"
+            )
+        )
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="code",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+                Column(
+                    name="event_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%d/%m/%Y",
+                ),
+                Column(
+                    name="amount",
+                    partition_index=None,
+                    data_type="int",
+                    allow_null=True,
+                ),
+                Column(
+                    name="missing",
+                    partition_index=None,
+                    data_type="string",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        chunk = next(iter(construct_chunked_dataframe(path, schema)))
+
+        assert chunk.dtypes.to_dict() == {
+            "Code": "string[pyarrow]",
+            "Event Date": "datetime64[ns]",
+            "amount": "float64",
+            "other": "object",
+        }
+        assert list(chunk["Code"]) == ["007", pd.NA]
+        assert list(chunk["Event Date"]) == [
+            pd.Timestamp("2024-01-05"),
+            pd.Timestamp("2024-01-31"),
+        ]
+
+    def test_construct_chunked_dataframe_csv_leaves_dates_that_do_not_match_as_text(
+        self, tmp_path
+    ):
+        path = tmp_path / "data.csv"
+        path.write_text("event_date\n05/01/2024\n2024-01-31\n")
+        schema = Schema(
+            metadata=SchemaMetadata(
+                layer="raw",
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="event_date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=False,
+                    format="%d/%m/%Y",
+                ),
+            ],
+        )
+
+        chunk = next(iter(construct_chunked_dataframe(path, schema)))
+
+        assert list(chunk["event_date"]) == ["05/01/2024", "2024-01-31"]
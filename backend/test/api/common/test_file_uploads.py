@@ -0,0 +1,132 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from starlette.requests import Request
+
+from api.common.custom_exceptions import (
+    LengthRequiredError,
+    SpoolCapacityExceededError,
+    UserError,
+)
+from api.common.file_uploads import admit_file_upload, get_body_file, get_form_files
+from api.common.spool import Spool
+from api.controller.datasets import datasets_router, upload_batch, upload_data
+
+BOUNDARY = "abc"
+BODY = (
+    f"--{BOUNDARY}\r\n"
+    'Content-Disposition: form-data; name="file"; filename="data.csv"\r\n'
+    "Content-Type: text/csv\r\n\r\n"
+    "colname1,colname2\r\n1,a\r\n"
+    f"--{BOUNDARY}--\r\n"
+).encode()
+
+
+def request(body: bytes = BODY, content_length: bool = True) -> Request:
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(
+        {"type": "http", "method": "POST", "headers": headers, "path": "/"}, receive
+    )
+
+
+class TestAdmitFileUpload:
+    def setup_method(self):
+        self.disk_usage = Mock()
+        self.disk_usage.return_value.free = 1024 * 1024
+        self.spool = Spool(
+            directory=tempfile.mkdtemp(),
+            quota_bytes=0,
+            headroom_bytes=0,
+            retry_after_seconds=15,
+            disk_usage=self.disk_usage,
+        )
+
+    def _admit(self, upload_request: Request, admitted: Mock) -> None:
+        async def admit():
+            async for form in admit_file_upload(upload_request):
+                admitted(form, self.spool.reserved_bytes())
+
+        with patch("api.common.file_uploads.spool", self.spool):
+            asyncio.run(admit())
+
+    def test_reserves_the_length_of_the_body_while_the_request_is_handled(self):
+        admitted = Mock()
+        upload_request = request()
+
+        self._admit(upload_request, admitted)
+
+        form, reserved_bytes = admitted.call_args.args
+        assert get_form_files(form, "file")[0].filename == "data.csv"
+        assert reserved_bytes == len(BODY)
+        assert self.spool.reserved_bytes() == 0
+        assert upload_request.state.spool_reservation.parent == self.spool.directory
+
+    def test_buffers_the_files_in_the_spool_directory(self):
+        with patch(
+            "api.common.file_uploads.SpooledTemporaryFile",
+            wraps=tempfile.SpooledTemporaryFile,
+        ) as mock_spooled_temporary_file:
+            self._admit(request(), Mock())
+
+        mock_spooled_temporary_file.assert_called_once_with(
+            max_size=1024 * 1024, dir=Path(self.spool.directory)
+        )
+
+    def test_requires_the_length_of_the_body(self):
+        admitted = Mock()
+
+        with pytest.raises(LengthRequiredError) as error:
+            self._admit(request(content_length=False), admitted)
+
+        assert error.value.status_code == 411
+        admitted.assert_not_called()
+
+    def test_rejects_the_upload_before_the_body_is_read(self):
+        self.disk_usage.return_value.free = 10
+        admitted = Mock()
+        upload_request = request()
+
+        with pytest.raises(SpoolCapacityExceededError):
+            self._admit(upload_request, admitted)
+
+        admitted.assert_not_called()
+        assert upload_request._stream_consumed is False
+
+    def test_requires_a_file(self):
+        admitted = Mock()
+
+        self._admit(request(body=f"--{BOUNDARY}--\r\n".encode()), admitted)
+
+        form, _ = admitted.call_args.args
+        with pytest.raises(UserError, match="with the key 'file'"):
+            get_form_files(form, "file")
+
+
+def test_names_the_body_file_by_its_content_disposition():
+    upload_request = request()
+    upload_request.scope["headers"].append(
+        (b"content-disposition", b'attachment; filename="data.arrows"')
+    )
+
+    assert get_body_file(upload_request, "dataset.arrows").filename == "data.arrows"
+    assert get_body_file(request(), "dataset.arrows").filename == "dataset.arrows"
+
+
+@pytest.mark.parametrize("endpoint", [upload_data, upload_batch])
+def test_uploads_are_admitted_after_the_request_is_authorised(endpoint):
+    route = next(
+        route for route in datasets_router.routes if route.endpoint is endpoint
+    )
+    dependencies = [dependency.call for dependency in route.dependant.dependencies]
+
+    assert dependencies.index(admit_file_upload) > 0
+    assert dependencies[0].__name__ == "secure_dataset_endpoint"
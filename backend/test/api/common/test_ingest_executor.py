@@ -0,0 +1,63 @@
+import operator
+from unittest.mock import Mock
+
+import pytest
+
+from api.common.ingest_executor import IngestExecutor
+
+
+class TestIngestExecutor:
+    def test_submit_runs_inline_without_worker_processes(self):
+        executor = IngestExecutor(max_workers=0)
+        task = Mock(return_value="result")
+
+        future = executor.submit(task, "schema", "chunk")
+
+        task.assert_called_once_with("schema", "chunk")
+        assert future.result() == "result"
+
+    def test_submit_inline_captures_errors_on_the_future(self):
+        executor = IngestExecutor(max_workers=0)
+        task = Mock(side_effect=ValueError("some error"))
+
+        future = executor.submit(task, "schema", "chunk")
+
+        with pytest.raises(ValueError, match="some error"):
+            future.result()
+
+    def test_map_yields_results_in_order(self):
+        executor = IngestExecutor(max_workers=0)
+
+        result = list(executor.map(operator.add, 10, [1, 2, 3]))
+
+        assert result == [11, 12, 13]
+
+    def test_map_bounds_the_items_in_flight(self):
+        executor = IngestExecutor(max_workers=0)
+        consumed = []
+
+        def items():
+            for item in range(5):
+                consumed.append(item)
+                yield item
+
+        results = executor.map(operator.add, 0, items())
+
+        assert next(results) == 0
+        assert consumed == [0]
+
+    def test_map_raises_task_errors(self):
+        executor = IngestExecutor(max_workers=0)
+
+        with pytest.raises(TypeError):
+            list(executor.map(operator.add, "a", [1]))
+
+    def test_map_runs_in_worker_processes(self):
+        executor = IngestExecutor(max_workers=2, max_in_flight_per_process=2)
+
+        try:
+            result = list(executor.map(operator.mul, 3, range(10)))
+        finally:
+            executor.shutdown()
+
+        assert result == [item * 3 for item in range(10)]
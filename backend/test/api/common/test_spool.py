@@ -0,0 +1,138 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from api.common.custom_exceptions import SpoolCapacityExceededError
+from api.common.spool import Spool
+
+GB = 1024 * 1024 * 1024
+
+
+class TestSpool:
+    def setup_method(self):
+        self.directory = tempfile.mkdtemp()
+        self.disk_usage = Mock()
+        self.disk_usage.return_value.free = 10 * GB
+
+    def _spool(self, quota_bytes: int = 0, headroom_bytes: int = 0) -> Spool:
+        return Spool(
+            directory=self.directory,
+            quota_bytes=quota_bytes,
+            headroom_bytes=headroom_bytes,
+            retry_after_seconds=15,
+            disk_usage=self.disk_usage,
+        )
+
+    def test_path_for_places_file_in_spool_directory(self):
+        spool = self._spool()
+
+        assert spool.path_for("abc-file.csv") == Path(self.directory) / "abc-file.csv"
+
+    def test_reserve_tracks_reserved_bytes(self):
+        spool = self._spool()
+
+        spool.reserve(spool.path_for("one.csv"), 2 * GB)
+        spool.reserve(spool.path_for("two.csv"), 3 * GB)
+
+        assert spool.reserved_bytes() == 5 * GB
+        assert spool.available_bytes() == 5 * GB
+
+    def test_release_frees_reservation(self):
+        spool = self._spool()
+        path = spool.path_for("one.csv")
+        spool.reserve(path, 2 * GB)
+
+        spool.release(path)
+
+        assert spool.reserved_bytes() == 0
+
+    def test_release_of_unknown_file_is_ignored(self):
+        spool = self._spool()
+
+        spool.release(spool.path_for("unknown.csv"))
+
+        assert spool.reserved_bytes() == 0
+
+    def test_reserve_raises_when_disk_space_is_exhausted(self):
+        spool = self._spool(headroom_bytes=1 * GB)
+        spool.reserve(spool.path_for("one.csv"), 6 * GB)
+
+        with pytest.raises(SpoolCapacityExceededError) as error:
+            spool.reserve(spool.path_for("two.csv"), 4 * GB)
+
+        assert error.value.status_code == 429
+        assert error.value.headers == {"Retry-After": "15"}
+        assert spool.reserved_bytes() == 6 * GB
+
+    def test_reserve_raises_when_quota_is_exhausted(self):
+        spool = self._spool(quota_bytes=4 * GB)
+        spool.reserve(spool.path_for("one.csv"), 3 * GB)
+
+        with pytest.raises(SpoolCapacityExceededError):
+            spool.reserve(spool.path_for("two.csv"), 2 * GB)
+
+    def test_reserve_without_size_is_admitted(self):
+        spool = self._spool()
+
+        spool.reserve(spool.path_for("one.csv"), None)
+
+        assert spool.reserved_bytes() == 0
+
+    def test_reserve_request_holds_reservation_until_released(self):
+        spool = self._spool()
+
+        reservation = spool.reserve_request(2 * GB)
+
+        assert spool.reserved_bytes() == 2 * GB
+        spool.release(reservation)
+        assert spool.reserved_bytes() == 0
+
+    def test_reserve_request_raises_when_disk_space_is_exhausted(self):
+        spool = self._spool(quota_bytes=1 * GB)
+
+        with pytest.raises(SpoolCapacityExceededError):
+            spool.reserve_request(2 * GB)
+
+        assert spool.reserved_bytes() == 0
+
+    def test_reserve_takes_bytes_from_the_reservation_it_is_held_by(self):
+        spool = self._spool(quota_bytes=4 * GB)
+        reservation = spool.reserve_request(3 * GB)
+
+        spool.reserve(spool.path_for("one.csv"), 2 * GB, held_by=reservation)
+        spool.reserve(spool.path_for("two.csv"), 2 * GB, held_by=reservation)
+
+        assert spool.reserved_bytes() == 4 * GB
+        spool.release(reservation)
+        assert spool.reserved_bytes() == 4 * GB
+
+    def test_written_bytes_are_not_counted_twice(self):
+        spool = self._spool()
+        path = spool.path_for("one.csv")
+        spool.reserve(path, 1000)
+        with open(path, "wb") as file:
+            file.write(b"x" * 400)
+        # The disk reports the written bytes as used
+        self.disk_usage.return_value.free = 10 * GB - 400
+
+        assert spool.available_bytes() == 10 * GB - 1000
+
+    def test_reap_orphans_removes_unreserved_files(self):
+        spool = self._spool()
+        orphan = spool.path_for("orphan.csv")
+        orphan.write_bytes(b"some,content")
+        in_flight = spool.path_for("in_flight.csv")
+        in_flight.write_bytes(b"some,content")
+        spool.reserve(in_flight, 100)
+
+        spool.reap_orphans()
+
+        assert not orphan.exists()
+        assert in_flight.exists()
+
+    def test_reap_orphans_when_directory_does_not_exist(self):
+        spool = Spool(directory=f"{self.directory}/missing", disk_usage=self.disk_usage)
+
+        spool.reap_orphans()
@@ -1,13 +1,17 @@
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import patch, ANY
+from unittest.mock import patch, ANY, call
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from api.adapter.s3_adapter import S3Adapter
 from api.application.services.authorisation.dataset_access_evaluator import (
     DatasetAccessEvaluator,
 )
+from api.application.services.append_buffer_service import AppendBufferService
 from api.application.services.data_service import DataService
 from api.application.services.delete_service import DeleteService
 from api.application.services.search_service import SearchService
@@ -15,11 +19,19 @@ from api.common.custom_exceptions import (
     UserError,
     DatasetValidationError,
     SchemaNotFoundError,
+    SpoolCapacityExceededError,
 )
 from api.common.config.auth import Action
 from api.common.config.constants import BASE_API_PATH
+from api.domain.batch_upload import BatchFile, BatchManifest, LandedFile
 from api.domain.dataset_filters import DatasetFilters
 from api.domain.dataset_metadata import DatasetMetadata
+from api.domain.dataset_validation_result import DatasetValidationResult
+from api.domain.presigned_upload import (
+    PresignedUploadCompletion,
+    PresignedUploadRequest,
+    UploadPart,
+)
 from api.domain.schema import Schema
 from rapid.items.schema import Column, Owner
 from api.domain.schema_metadata import SchemaMetadata
@@ -58,7 +70,9 @@ class TestDataUpload(BaseClientTest):
             headers={"Authorization": "Bearer test-token"},
         )
 
-        mock_store_file_to_disk.assert_called_once_with("csv", job_id, ANY)
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv", job_id, ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
         mock_upload_dataset.assert_called_once_with(
             subject_id,
             job_id,
@@ -110,7 +124,9 @@ class TestDataUpload(BaseClientTest):
             headers={"Authorization": "Bearer test-token"},
         )
 
-        mock_store_file_to_disk.assert_called_once_with("csv", job_id, ANY)
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv", job_id, ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
         mock_upload_dataset.assert_called_once_with(
             subject_id,
             job_id,
@@ -169,7 +185,9 @@ class TestDataUpload(BaseClientTest):
             headers={"Authorization": "Bearer test-token"},
         )
 
-        mock_store_file_to_disk.assert_called_once_with("parquet", job_id, ANY)
+        mock_store_file_to_disk.assert_called_once_with(
+            "parquet", job_id, ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
         mock_upload_dataset.assert_called_once_with(
             subject_id,
             job_id,
@@ -217,7 +235,9 @@ class TestDataUpload(BaseClientTest):
             headers={"Authorization": "Bearer test-token"},
         )
 
-        mock_store_file_to_disk.assert_called_once_with("csv", job_id, ANY)
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv", job_id, ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
         mock_upload_dataset.assert_called_once_with(
             subject_id,
             job_id,
@@ -271,7 +291,9 @@ class TestDataUpload(BaseClientTest):
             headers={"Authorization": "Bearer test-token"},
         )
 
-        mock_store_file_to_disk.assert_called_once_with("parquet", job_id, ANY)
+        mock_store_file_to_disk.assert_called_once_with(
+            "parquet", job_id, ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
         mock_upload_dataset.assert_called_once_with(
             subject_id,
             job_id,
@@ -318,6 +340,610 @@ class TestDataUpload(BaseClientTest):
         assert response.status_code == 400
         assert response.json() == {"details": "This file type txt, is not supported."}
 
+    @patch.object(DataService, "upload_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_data_upload_service_with_compressed_csv_file(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+    ):
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_store_file_to_disk.return_value = Path("abc-123-filename.csv.gz")
+        mock_upload_dataset.return_value = "123-456-789.csv.gz", 2, "abc-123"
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset?version=2",
+            files={"file": ("filename.csv.gz", b"compressed", "application/gzip")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv",
+            "abc-123",
+            ANY,
+            expected_size=ANY,
+            compression="gzip",
+            reservation=ANY,
+        )
+        assert response.status_code == 202
+        assert response.json()["details"]["raw_filename"] == "123-456-789.csv.gz"
+
+    @patch.object(DataService, "upload_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_data_upload_service_with_content_encoded_csv_file(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+    ):
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_store_file_to_disk.return_value = Path("abc-123-filename.csv.zst")
+        mock_upload_dataset.return_value = "123-456-789.csv.zst", 2, "abc-123"
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset?version=2",
+            files={
+                "file": (
+                    "filename.csv",
+                    b"compressed",
+                    "text/csv",
+                    {"Content-Encoding": "zstd"},
+                )
+            },
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv",
+            "abc-123",
+            ANY,
+            expected_size=ANY,
+            compression="zstd",
+            reservation=ANY,
+        )
+        assert response.status_code == 202
+
+    @patch.object(DataService, "upload_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_data_upload_service_with_arrow_stream(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+    ):
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_store_file_to_disk.return_value = Path("abc-123-data.arrows")
+        mock_upload_dataset.return_value = "123-456-789.csv", 2, "abc-123"
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset?version=2",
+            files={"file": ("data", b"stream", "application/vnd.apache.arrow.stream")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_store_file_to_disk.assert_called_once_with(
+            "arrows",
+            "abc-123",
+            ANY,
+            expected_size=ANY,
+            compression=None,
+            reservation=ANY,
+        )
+        assert response.status_code == 202
+
+    @patch.object(DataService, "upload_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_data_upload_service_with_an_arrow_stream_body(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+    ):
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_upload_dataset.return_value = "123-456-789.csv", 2, "abc-123"
+        sink = pa.BufferOutputStream()
+        table = pa.table({"colname1": ["a", "b"]})
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        received = []
+
+        def store_file_to_disk(extension, job_id, file, **_kwargs):
+            received.append((file.filename, pa.ipc.open_stream(file.file).read_all()))
+            return Path("abc-123-data.arrows")
+
+        mock_store_file_to_disk.side_effect = store_file_to_disk
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset?version=2",
+            content=sink.getvalue().to_pybytes(),
+            headers={
+                "Authorization": "Bearer test-token",
+                "Content-Type": "application/vnd.apache.arrow.stream",
+                "Content-Disposition": 'attachment; filename="data.arrows"',
+            },
+        )
+
+        mock_store_file_to_disk.assert_called_once_with(
+            "arrows",
+            "abc-123",
+            ANY,
+            expected_size=ANY,
+            compression=None,
+            reservation=ANY,
+        )
+        assert received[0][0] == "data.arrows"
+        assert received[0][1].equals(table)
+        assert response.status_code == 202
+
+    @patch.object(DataService, "generate_landing_upload")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_generates_presigned_upload(
+        self,
+        mock_generate_uuid,
+        mock_construct_dataset_metadata,
+        mock_generate_landing_upload,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 2)
+        mock_generate_uuid.return_value = "abc-123"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_generate_landing_upload.return_value = {
+            "upload_id": "abc-123",
+            "filename": "data.csv",
+            "url": "https://some-url",
+        }
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/presigned-upload",
+            json={"filename": "data.csv", "size": 100},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_generate_landing_upload.assert_called_once_with(
+            "abc-123", dataset, PresignedUploadRequest(filename="data.csv", size=100)
+        )
+        assert response.status_code == 201
+        assert response.json() == {
+            "details": {
+                "upload_id": "abc-123",
+                "filename": "data.csv",
+                "url": "https://some-url",
+            }
+        }
+
+    @patch.object(DataService, "upload_landed_dataset")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.get_subject_id")
+    def test_completes_presigned_upload(
+        self,
+        mock_get_subject_id,
+        mock_construct_dataset_metadata,
+        mock_upload_landed_dataset,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 2)
+        mock_get_subject_id.return_value = "subject_id"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_upload_landed_dataset.return_value = ("123-456-789.csv", 2, "abc-123")
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/presigned-upload/abc-123/complete",
+            json={
+                "filename": "data.csv",
+                "multipart_upload_id": "xyz-789",
+                "parts": [{"part_number": 1, "etag": "etag-1"}],
+            },
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_landed_dataset.assert_called_once_with(
+            "subject_id",
+            "abc-123",
+            dataset,
+            PresignedUploadCompletion(
+                filename="data.csv",
+                multipart_upload_id="xyz-789",
+                parts=[UploadPart(part_number=1, etag="etag-1")],
+            ),
+        )
+        assert response.status_code == 202
+        assert response.json() == {
+            "details": {
+                "original_filename": "data.csv",
+                "raw_filename": "123-456-789.csv",
+                "dataset_version": 2,
+                "status": "Data processing",
+                "job_id": "abc-123",
+            }
+        }
+
+    @patch.object(DataService, "validate_dataset")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.remove_spool_file")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_validate_service_and_removes_stored_file(
+        self,
+        mock_generate_uuid,
+        mock_store_file_to_disk,
+        mock_remove_spool_file,
+        mock_construct_dataset_metadata,
+        mock_validate_dataset,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 2)
+        mock_generate_uuid.return_value = "abc-123"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_store_file_to_disk.return_value = Path("abc-123-filename.csv")
+        mock_validate_dataset.return_value = DatasetValidationResult(
+            valid=False, rows_validated=100, errors=["some error"]
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/validate?version=2&fail_fast=true&sample_rows=100",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_store_file_to_disk.assert_called_once_with(
+            "csv", "abc-123", ANY, expected_size=ANY, compression=None, reservation=ANY
+        )
+        mock_validate_dataset.assert_called_once_with(
+            dataset, Path("abc-123-filename.csv"), True, 100
+        )
+        mock_remove_spool_file.assert_called_once_with(Path("abc-123-filename.csv"))
+        assert response.status_code == 200
+        assert response.json() == {
+            "details": {"valid": False, "rows_validated": 100, "errors": ["some error"]}
+        }
+
+    @patch.object(DataService, "validate_dataset")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.remove_spool_file")
+    @patch("api.controller.datasets.store_file_to_disk")
+    def test_validate_removes_stored_file_when_schema_is_not_found(
+        self,
+        mock_store_file_to_disk,
+        mock_remove_spool_file,
+        _mock_construct_dataset_metadata,
+        mock_validate_dataset,
+    ):
+        mock_store_file_to_disk.return_value = Path("abc-123-filename.csv")
+        mock_validate_dataset.side_effect = SchemaNotFoundError("Schema not found")
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/validate",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Schema not found"}
+        mock_remove_spool_file.assert_called_once_with(Path("abc-123-filename.csv"))
+
+    @patch.object(DataService, "validate_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    def test_validate_rejects_non_positive_sample_rows(
+        self, mock_store_file_to_disk, mock_validate_dataset
+    ):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/validate?sample_rows=0",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            "details": "The number of sample rows must be greater than zero"
+        }
+        mock_store_file_to_disk.assert_not_called()
+        mock_validate_dataset.assert_not_called()
+
+    @patch.object(DataService, "upload_batch")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_batch_upload_service_successfully(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_construct_dataset_metadata,
+        mock_upload_batch,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 2)
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_store_file_to_disk.side_effect = [
+            Path("abc-123-0000-first.csv"),
+            Path("abc-123-0001-second.csv.gz"),
+        ]
+        mock_upload_batch.return_value = (
+            ["123-456-789-0000.csv", "123-456-789-0001.csv.gz"],
+            2,
+            "abc-123",
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/batch?version=2",
+            files=[
+                ("files", ("first.csv", b"some,content", "text/csv")),
+                ("files", ("second.csv.gz", b"compressed", "application/gzip")),
+            ],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_store_file_to_disk.assert_has_calls(
+            [
+                call(
+                    "csv",
+                    "abc-123-0000",
+                    ANY,
+                    expected_size=ANY,
+                    compression=None,
+                    reservation=ANY,
+                ),
+                call(
+                    "csv",
+                    "abc-123-0001",
+                    ANY,
+                    expected_size=ANY,
+                    compression="gzip",
+                    reservation=ANY,
+                ),
+            ]
+        )
+        mock_upload_batch.assert_called_once_with(
+            "subject_id",
+            "abc-123",
+            dataset,
+            [
+                BatchFile(
+                    filename="first.csv", file_path=Path("abc-123-0000-first.csv")
+                ),
+                BatchFile(
+                    filename="second.csv.gz",
+                    file_path=Path("abc-123-0001-second.csv.gz"),
+                ),
+            ],
+        )
+        assert response.status_code == 202
+        assert response.json() == {
+            "details": {
+                "original_filenames": ["first.csv", "second.csv.gz"],
+                "raw_filenames": ["123-456-789-0000.csv", "123-456-789-0001.csv.gz"],
+                "dataset_version": 2,
+                "status": "Data processing",
+                "job_id": "abc-123",
+            }
+        }
+
+    @patch.object(DataService, "upload_batch")
+    @patch("api.controller.datasets.store_file_to_disk")
+    def test_batch_upload_fails_before_storing_when_a_filetype_is_invalid(
+        self, mock_store_file_to_disk, mock_upload_batch
+    ):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/batch",
+            files=[
+                ("files", ("first.csv", b"some,content", "text/csv")),
+                ("files", ("second.txt", b"some content", "text/plain")),
+            ],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "This file type txt, is not supported."}
+        mock_store_file_to_disk.assert_not_called()
+        mock_upload_batch.assert_not_called()
+
+    @patch.object(DataService, "upload_batch")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.remove_spool_file")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    def test_batch_upload_removes_stored_files_when_schema_is_not_found(
+        self,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_remove_spool_file,
+        _mock_construct_dataset_metadata,
+        mock_upload_batch,
+    ):
+        mock_get_subject_id.return_value = "subject_id"
+        mock_store_file_to_disk.side_effect = [
+            Path("abc-123-0000-first.csv"),
+            Path("abc-123-0001-second.csv"),
+        ]
+        mock_upload_batch.side_effect = SchemaNotFoundError("Schema not found")
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/batch",
+            files=[
+                ("files", ("first.csv", b"some,content", "text/csv")),
+                ("files", ("second.csv", b"some,content", "text/csv")),
+            ],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Schema not found"}
+        mock_remove_spool_file.assert_has_calls(
+            [
+                call(Path("abc-123-0000-first.csv")),
+                call(Path("abc-123-0001-second.csv")),
+            ]
+        )
+
+    @patch.object(DataService, "upload_landed_batch")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_calls_landed_batch_upload_service_with_manifest(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_construct_dataset_metadata,
+        mock_upload_landed_batch,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 2)
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_upload_landed_batch.return_value = (
+            ["123-456-789-0000.csv", "123-456-789-0001.csv"],
+            2,
+            "abc-123",
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/batch/manifest",
+            json={
+                "files": [
+                    {"upload_id": "upload-1", "filename": "first.csv"},
+                    {
+                        "upload_id": "upload-2",
+                        "filename": "second.csv",
+                        "multipart_upload_id": "xyz-789",
+                        "parts": [{"part_number": 1, "etag": "etag-1"}],
+                    },
+                ]
+            },
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_landed_batch.assert_called_once_with(
+            "subject_id",
+            "abc-123",
+            dataset,
+            BatchManifest(
+                files=[
+                    LandedFile(upload_id="upload-1", filename="first.csv"),
+                    LandedFile(
+                        upload_id="upload-2",
+                        filename="second.csv",
+                        multipart_upload_id="xyz-789",
+                        parts=[UploadPart(part_number=1, etag="etag-1")],
+                    ),
+                ]
+            ),
+        )
+        assert response.status_code == 202
+        assert response.json()["details"]["original_filenames"] == [
+            "first.csv",
+            "second.csv",
+        ]
+
+    def test_batch_manifest_fails_when_empty(self):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/batch/manifest",
+            json={"files": []},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+
+    @patch.object(DataService, "reprocess_raw_files")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.get_subject_id")
+    def test_calls_reprocess_service(
+        self,
+        mock_get_subject_id,
+        mock_construct_dataset_metadata,
+        mock_reprocess_raw_files,
+    ):
+        dataset = DatasetMetadata("raw", "domain", "dataset", 3)
+        mock_get_subject_id.return_value = "subject_id"
+        mock_construct_dataset_metadata.return_value = dataset
+        mock_reprocess_raw_files.return_value = ["abc-123", "def-456"]
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/reprocess?version=3",
+            json={
+                "source_version": 2,
+                "raw_files": ["first.csv.zst", "second.csv.zst"],
+            },
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_construct_dataset_metadata.assert_called_once_with(
+            "raw", "domain", "dataset", 3
+        )
+        mock_reprocess_raw_files.assert_called_once_with(
+            "subject_id", dataset, 2, ["first.csv.zst", "second.csv.zst"]
+        )
+        assert response.status_code == 202
+        assert response.json() == {
+            "details": {
+                "dataset_version": 3,
+                "status": "Data processing",
+                "job_ids": ["abc-123", "def-456"],
+            }
+        }
+
+    @patch.object(DataService, "reprocess_raw_files")
+    @patch("api.controller.datasets.construct_dataset_metadata")
+    @patch("api.controller.datasets.get_subject_id")
+    def test_reprocess_fails_when_schema_does_not_exist(
+        self,
+        _mock_get_subject_id,
+        mock_construct_dataset_metadata,
+        mock_reprocess_raw_files,
+    ):
+        mock_construct_dataset_metadata.return_value = DatasetMetadata(
+            "raw", "domain", "dataset", 3
+        )
+        mock_reprocess_raw_files.side_effect = SchemaNotFoundError("Schema not found")
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/reprocess",
+            json={"source_version": 2},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Schema not found"}
+
+    def test_reprocess_fails_without_a_valid_source_version(self):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset/reprocess",
+            json={"source_version": 0},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+
+    def test_calls_data_upload_service_fails_when_compressed_filetype_is_invalid(
+        self,
+    ):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/raw/domain/dataset",
+            files={"file": ("filename.parquet.gz", b"compressed", "application/gzip")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            "details": "Compressed uploads are not supported for the file type parquet."
+        }
+
     @patch.object(DataService, "upload_dataset")
     @patch("api.controller.datasets.store_file_to_disk")
     @patch("api.controller.datasets.get_subject_id")
@@ -358,6 +984,37 @@ class TestDataUpload(BaseClientTest):
         assert response.status_code == 400
         assert response.json() == {"details": "Expected 3 columns, received 4"}
 
+    @patch.object(DataService, "upload_dataset")
+    @patch("api.controller.datasets.store_file_to_disk")
+    @patch("api.controller.datasets.get_subject_id")
+    @patch("api.controller.datasets.generate_uuid")
+    def test_returns_429_with_retry_after_when_spool_is_at_capacity(
+        self,
+        mock_generate_uuid,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+    ):
+        mock_generate_uuid.return_value = "abc-123"
+        mock_get_subject_id.return_value = "subject_id"
+        mock_store_file_to_disk.side_effect = SpoolCapacityExceededError(
+            "The service is currently at capacity for uploads, please retry later",
+            retry_after=30,
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset?version=1",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_dataset.assert_not_called()
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+        assert response.json() == {
+            "details": "The service is currently at capacity for uploads, please retry later"
+        }
+
     def test_calls_data_fails_with_missing_path(self):
         file_content = b"some,content"
         file_name = "filename.csv"
@@ -377,11 +1034,16 @@ class TestDataUpload(BaseClientTest):
         )
         assert response.status_code == 400
 
+    @patch("api.controller.datasets.remove_spool_file")
     @patch.object(DataService, "upload_dataset")
     @patch("api.controller.datasets.store_file_to_disk")
     @patch("api.controller.datasets.get_subject_id")
     def test_raises_error_when_schema_does_not_exist(
-        self, mock_get_subject_id, mock_store_file_to_disk, mock_upload_dataset
+        self,
+        mock_get_subject_id,
+        mock_store_file_to_disk,
+        mock_upload_dataset,
+        mock_remove_spool_file,
     ):
         file_content = b"some,content"
         incoming_file_path = Path("filename.csv")
@@ -389,7 +1051,7 @@ class TestDataUpload(BaseClientTest):
         subject_id = "subject_id"
 
         mock_get_subject_id.return_value = subject_id
-        mock_store_file_to_disk.return_value = (incoming_file_path, incoming_file_name)
+        mock_store_file_to_disk.return_value = incoming_file_path
         mock_upload_dataset.side_effect = SchemaNotFoundError("Error message")
 
         response = self.client.post(
@@ -399,6 +1061,83 @@ class TestDataUpload(BaseClientTest):
         )
 
         assert response.status_code == 400
+        mock_remove_spool_file.assert_called_once_with(incoming_file_path)
+
+
+class TestAppendData(BaseClientTest):
+    @patch.object(AppendBufferService, "append")
+    def test_appends_json_rows(self, mock_append):
+        mock_append.return_value = 1200
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset/append?version=2",
+            json={"rows": [{"colname1": "a", "colname2": 1}, {"colname1": "b"}]},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        dataset, table = mock_append.call_args.args
+        assert dataset == DatasetMetadata("layer", "domain", "dataset", 2)
+        assert table.to_pylist() == [
+            {"colname1": "a", "colname2": 1},
+            {"colname1": "b", "colname2": None},
+        ]
+        assert response.status_code == 202
+        assert response.json() == {
+            "details": {
+                "dataset_version": 2,
+                "buffered_rows": 1200,
+                "status": "Rows buffered",
+            }
+        }
+
+    @patch.object(AppendBufferService, "append")
+    def test_appends_an_arrow_stream(self, mock_append):
+        mock_append.return_value = 2
+        sink = pa.BufferOutputStream()
+        table = pa.table({"colname1": ["a", "b"]})
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset/append?version=2",
+            content=sink.getvalue().to_pybytes(),
+            headers={
+                "Authorization": "Bearer test-token",
+                "Content-Type": "application/vnd.apache.arrow.stream",
+            },
+        )
+
+        assert mock_append.call_args.args[1].equals(table)
+        assert response.status_code == 202
+
+    @patch.object(AppendBufferService, "append")
+    def test_rejects_rows_that_cannot_be_read(self, mock_append):
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset/append?version=2",
+            json={"rows": "not rows"},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_append.assert_not_called()
+        assert response.status_code == 400
+        assert response.json()["details"].startswith("The rows could not be read")
+
+    @patch.object(AppendBufferService, "append")
+    def test_returns_the_validation_errors_of_the_rows(self, mock_append):
+        mock_append.side_effect = DatasetValidationError(
+            ["Column [colname2] has an incorrect data type"]
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/datasets/layer/domain/dataset/append?version=2",
+            json={"rows": [{"colname1": "a", "colname2": "b"}]},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            "details": ["Column [colname2] has an incorrect data type"]
+        }
 
 
 class TestListDatasets(BaseClientTest):
@@ -444,6 +1183,13 @@ class TestListDatasets(BaseClientTest):
                 "owners": None,
                 "update_behaviour": "APPEND",
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
             },
             {
                 "layer": "layer",
@@ -457,6 +1203,13 @@ class TestListDatasets(BaseClientTest):
                 "update_behaviour": "APPEND",
                 "owners": None,
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
             },
         ]
 
@@ -518,6 +1271,13 @@ class TestListDatasets(BaseClientTest):
                 "description": "",
                 "owners": None,
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
                 "update_behaviour": "APPEND",
             },
             {
@@ -530,6 +1290,13 @@ class TestListDatasets(BaseClientTest):
                 "key_only_tags": [],
                 "description": "some test description",
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
                 "owners": None,
                 "update_behaviour": "APPEND",
             },
@@ -598,6 +1365,13 @@ class TestListDatasets(BaseClientTest):
                 "dataset": "dataset1",
                 "version": 1,
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
                 "sensitivity": "PUBLIC",
                 "key_value_tags": {"sensitivity": "PUBLIC", "tag1": "value1"},
                 "key_only_tags": [],
@@ -611,6 +1385,13 @@ class TestListDatasets(BaseClientTest):
                 "domain": "domain2",
                 "dataset": "dataset2",
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
                 "key_value_tags": {"sensitivity": "PUBLIC"},
                 "key_only_tags": [],
                 "sensitivity": "PUBLIC",
@@ -823,6 +1604,7 @@ class TestQuery(BaseClientTest):
     def test_call_service_with_only_domain_dataset_when_no_json_provided(
         self, mock_query_method
     ):
+        mock_query_method.return_value = iter([pd.DataFrame({"column1": [1]})])
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=1"
 
         res = self.client.post(
@@ -893,12 +1675,16 @@ class TestQuery(BaseClientTest):
 
     @patch.object(DataService, "query_data")
     def test_returns_formatted_json_from_query_result(self, mock_query_method):
-        mock_query_method.return_value = pd.DataFrame(
-            {
-                "column1": [1, 2],
-                "column2": ["item1", "item2"],
-                "area": ["area_1", "area_2"],
-            }
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame(
+                    {
+                        "column1": [1, 2],
+                        "column2": ["item1", "item2"],
+                        "area": ["area_1", "area_2"],
+                    }
+                )
+            ]
         )
 
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=3"
@@ -920,12 +1706,16 @@ class TestQuery(BaseClientTest):
 
     @patch.object(DataService, "query_data")
     def test_request_query_in_csv_is_successful(self, mock_query_method):
-        mock_query_method.return_value = pd.DataFrame(
-            {
-                "column1": [1, 2],
-                "column2": ["item1", "item2"],
-                "area": ["area_1", "area_2"],
-            }
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame(
+                    {
+                        "column1": [1, 2],
+                        "column2": ["item1", "item2"],
+                        "area": ["area_1", "area_2"],
+                    }
+                )
+            ]
         )
 
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
@@ -941,12 +1731,16 @@ class TestQuery(BaseClientTest):
     def test_returns_formatted_json_from_query_if_format_is_not_provided(
         self, mock_query_method
     ):
-        mock_query_method.return_value = pd.DataFrame(
-            {
-                "column1": [1, 2],
-                "column2": ["item1", "item2"],
-                "area": ["area_1", "area_2"],
-            }
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame(
+                    {
+                        "column1": [1, 2],
+                        "column2": ["item1", "item2"],
+                        "area": ["area_1", "area_2"],
+                    }
+                )
+            ]
         )
 
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=6"
@@ -963,12 +1757,16 @@ class TestQuery(BaseClientTest):
 
     @patch.object(DataService, "query_data")
     def test_returns_204_if_dataframe_is_empty(self, mock_query_method):
-        mock_query_method.return_value = pd.DataFrame(
-            {
-                "column1": [],
-                "column2": [],
-                "area": [],
-            }
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame(
+                    {
+                        "column1": [],
+                        "column2": [],
+                        "area": [],
+                    }
+                )
+            ]
         )
 
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=6"
@@ -983,16 +1781,154 @@ class TestQuery(BaseClientTest):
             == "No rows were returned. Either there is no data or the query is too limiting."
         )
 
+    @patch.object(DataService, "query_data")
+    def test_returns_204_if_no_chunk_has_rows(self, mock_query_method):
+        mock_query_method.return_value = iter(
+            [pd.DataFrame({"column1": []}), pd.DataFrame({"column1": []})]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=6"
+
+        response = self.client.post(
+            query_url, headers={"Authorization": "Bearer test-token"}
+        )
+
+        assert response.status_code == 204
+
+    @patch.object(DataService, "query_data")
+    def test_streams_every_chunk_of_the_query_result_as_json(self, mock_query_method):
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame({"column1": [1, 2]}),
+                pd.DataFrame({"column1": []}),
+                pd.DataFrame({"column1": [3]}),
+            ]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=6"
+
+        response = self.client.post(
+            query_url, headers={"Authorization": "Bearer test-token"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "0": {"column1": "1"},
+            "1": {"column1": "2"},
+            "2": {"column1": "3"},
+        }
+
+    @patch.object(DataService, "query_data")
+    def test_streams_the_query_result_as_csv(self, mock_query_method):
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame({"column1": [1], "column2": ["item1"]}),
+                pd.DataFrame({"column1": [2], "column2": ["item2"]}),
+            ]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
+
+        response = self.client.post(
+            query_url,
+            headers={"Authorization": "Bearer test-token", "Accept": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text == ('"column1","column2"\n"1","item1"\n"2","item2"\n')
+
+    @patch.object(DataService, "query_data")
+    def test_streams_the_query_result_as_ndjson(self, mock_query_method):
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame({"column1": [1], "column2": ["item1"]}),
+                pd.DataFrame({"column1": [2], "column2": [None]}),
+            ]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
+
+        response = self.client.post(
+            query_url,
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/x-ndjson",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.text == (
+            '{"column1":"1","column2":"item1"}\n{"column1":"2","column2":null}\n'
+        )
+
+    @patch.object(DataService, "get_query_column_types")
+    @patch.object(DataService, "query_data")
+    def test_streams_the_typed_query_result_as_an_arrow_stream(
+        self, mock_query_method, mock_get_query_column_types
+    ):
+        mock_get_query_column_types.return_value = pa.schema([("column1", pa.int32())])
+        mock_query_method.return_value = iter(
+            [pd.DataFrame({"column1": [1, 2]}), pd.DataFrame({"column1": [3]})]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
+
+        response = self.client.post(
+            query_url,
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/vnd.apache.arrow.stream",
+            },
+        )
+
+        assert response.status_code == 200
+        mock_get_query_column_types.assert_called_once_with(
+            DatasetMetadata("raw", "mydomain", "mydataset", 12)
+        )
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.schema.field("column1").type == pa.int32()
+        assert table.column("column1").to_pylist() == [1, 2, 3]
+
+    @patch.object(DataService, "get_query_column_types")
+    @patch.object(DataService, "query_data")
+    def test_streams_the_typed_query_result_as_parquet(
+        self, mock_query_method, mock_get_query_column_types
+    ):
+        mock_get_query_column_types.return_value = pa.schema([("column1", pa.int32())])
+        mock_query_method.return_value = iter(
+            [pd.DataFrame({"column1": [1, 2]}), pd.DataFrame({"column1": [3]})]
+        )
+
+        query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
+
+        response = self.client.post(
+            query_url,
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/octet-stream",
+            },
+        )
+
+        assert response.status_code == 200
+        table = pq.read_table(BytesIO(response.content))
+        assert table.schema.field("column1").type == pa.int32()
+        assert table.column("column1").to_pylist() == [1, 2, 3]
+
     @patch.object(DataService, "query_data")
     def test_returns_error_from_query_request_when_format_is_unsupported(
         self, mock_query_method
     ):
-        mock_query_method.return_value = pd.DataFrame(
-            {
-                "column1": [1, 2],
-                "column2": ["item1", "item2"],
-                "area": ["area_1", "area_2"],
-            }
+        mock_query_method.return_value = iter(
+            [
+                pd.DataFrame(
+                    {
+                        "column1": [1, 2],
+                        "column2": ["item1", "item2"],
+                        "area": ["area_1", "area_2"],
+                    }
+                )
+            ]
         )
 
         query_url = f"{BASE_API_PATH}/datasets/raw/mydomain/mydataset/query?version=12"
@@ -1004,7 +1940,7 @@ class TestQuery(BaseClientTest):
 
         assert response.status_code == 400
         assert response.json() == {
-            "details": "Provided value for Accept header parameter [text/plain] is not supported. Supported formats: application/json, text/csv, application/octet-stream"
+            "details": "Provided value for Accept header parameter [text/plain] is not supported. Supported formats: application/json, text/csv, application/octet-stream, application/x-ndjson, application/vnd.apache.arrow.stream"
         }
 
     @pytest.mark.parametrize(
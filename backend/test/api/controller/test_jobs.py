@@ -1,6 +1,8 @@
 from unittest.mock import patch
 
+from api.application.services.data_service import DataService
 from api.application.services.job_service import JobService
+from api.common.custom_exceptions import UserError
 from api.common.config.constants import BASE_API_PATH
 from test.api.common.controller_test_utils import BaseClientTest
 
@@ -67,3 +69,75 @@ class TestGetJob(BaseClientTest):
 
         assert response.status_code == 200
         assert response.json() == expected_response
+
+
+class TestRetryJob(BaseClientTest):
+    @patch.object(DataService, "retry_upload")
+    @patch("api.controller.jobs.get_subject_id")
+    def test_retries_a_failed_upload_job(self, mock_get_subject_id, mock_retry_upload):
+        mock_get_subject_id.return_value = "111222333"
+        mock_retry_upload.return_value = "abc-123"
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/jobs/abc-123/retry",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_retry_upload.assert_called_once_with("111222333", "abc-123")
+
+        assert response.status_code == 202
+        assert response.json() == {"details": {"job_id": "abc-123"}}
+
+    @patch.object(DataService, "retry_upload")
+    @patch("api.controller.jobs.get_subject_id")
+    def test_returns_error_when_the_job_cannot_be_retried(
+        self, mock_get_subject_id, mock_retry_upload
+    ):
+        mock_get_subject_id.return_value = "111222333"
+        mock_retry_upload.side_effect = UserError("Only failed jobs can be retried")
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/jobs/abc-123/retry",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Only failed jobs can be retried"}
+
+
+class TestCancelJob(BaseClientTest):
+    @patch.object(JobService, "request_cancellation")
+    @patch("api.controller.jobs.get_subject_id")
+    def test_cancels_an_upload_job(
+        self, mock_get_subject_id, mock_request_cancellation
+    ):
+        mock_get_subject_id.return_value = "111222333"
+        mock_request_cancellation.return_value = "abc-123"
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/jobs/abc-123/cancel",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_request_cancellation.assert_called_once_with("111222333", "abc-123")
+
+        assert response.status_code == 202
+        assert response.json() == {"details": {"job_id": "abc-123"}}
+
+    @patch.object(JobService, "request_cancellation")
+    @patch("api.controller.jobs.get_subject_id")
+    def test_returns_error_when_the_job_cannot_be_cancelled(
+        self, mock_get_subject_id, mock_request_cancellation
+    ):
+        mock_get_subject_id.return_value = "111222333"
+        mock_request_cancellation.side_effect = UserError(
+            "Only jobs in progress can be cancelled"
+        )
+
+        response = self.client.post(
+            f"{BASE_API_PATH}/jobs/abc-123/cancel",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Only jobs in progress can be cancelled"}
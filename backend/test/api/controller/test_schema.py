@@ -409,7 +409,13 @@ class TestSchemaGeneration(BaseClientTest):
             "raw", "mydomain", "mydataset", "PUBLIC", incoming_file_path
         )
         mock_store_file_to_disk.assert_called_once_with(
-            "csv", job_id, ANY, to_chunk=True
+            "csv",
+            job_id,
+            ANY,
+            to_chunk=True,
+            expected_size=ANY,
+            compression=None,
+            reservation=ANY,
         )
 
         assert response.status_code == 200
@@ -463,7 +469,13 @@ class TestSchemaGeneration(BaseClientTest):
             "raw", "mydomain", "mydataset", "PUBLIC", incoming_file_path
         )
         mock_store_file_to_disk.assert_called_once_with(
-            "parquet", job_id, ANY, to_chunk=True
+            "parquet",
+            job_id,
+            ANY,
+            to_chunk=True,
+            expected_size=ANY,
+            compression=None,
+            reservation=ANY,
         )
 
         assert response.status_code == 200
@@ -506,7 +518,13 @@ class TestSchemaGeneration(BaseClientTest):
             "raw", "mydomain", "mydataset", "PUBLIC", incoming_file_path
         )
         mock_store_file_to_disk.assert_called_once_with(
-            "csv", job_id, ANY, to_chunk=True
+            "csv",
+            job_id,
+            ANY,
+            to_chunk=True,
+            expected_size=ANY,
+            compression=None,
+            reservation=ANY,
         )
 
         assert response.status_code == 400
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from unittest.mock import patch
 
 from api.domain.Jobs.Job import JobType, JobStatus
@@ -30,3 +31,47 @@ def test_initialise_upload_job(mock_time):
     assert job.layer == "raw"
     assert job.version == 12
     assert job.expiry_time == 7777000
+    assert job.raw_filename is None
+    assert job.committed_chunks == 0
+    assert job.completed_steps == []
+
+
+def test_upload_job_from_item():
+    job = UploadJob.from_item(
+        {
+            "job_id": "abc-123",
+            "sk2": "subject-123",
+            "type": "UPLOAD",
+            "status": "FAILED",
+            "step": "DATA_UPLOAD",
+            "errors": {"Failed to upload"},
+            "filename": "some-filename.csv",
+            "raw_file_identifier": "111-222-333",
+            "layer": "raw",
+            "domain": "domain1",
+            "dataset": "dataset2",
+            "version": Decimal(12),
+            "raw_filename": "111-222-333.csv.gz",
+            "committed_chunks": Decimal(3),
+            "completed_steps": ["RAW_DATA_UPLOAD"],
+            "accepted_rows": Decimal(990),
+            "quarantined_rows": Decimal(10),
+            "createdat": Decimal(1000),
+            "ttl": Decimal(7777000),
+        }
+    )
+
+    assert job.job_id == "abc-123"
+    assert job.subject_id == "subject-123"
+    assert job.status == JobStatus.FAILED
+    assert job.step == UploadStep.DATA_UPLOAD
+    assert job.errors == {"Failed to upload"}
+    assert job.version == 12
+    assert job.raw_filename == "111-222-333.csv.gz"
+    assert job.committed_chunks == 3
+    assert job.has_completed(UploadStep.RAW_DATA_UPLOAD)
+    assert not job.has_completed(UploadStep.DATA_UPLOAD)
+    assert job.accepted_rows == 990
+    assert job.quarantined_rows == 10
+    assert job.created_at == 1000
+    assert job.expiry_time == 7777000
@@ -0,0 +1,28 @@
+from api.domain.append_log import AppendLogSegment, buffered_rows
+from api.domain.dataset_metadata import DatasetMetadata
+
+
+class TestAppendLogSegment:
+    def test_segment_from_key(self):
+        segment = AppendLogSegment.from_key(
+            "append_log/raw/domain/dataset/2/01700000000000000000-25-abc-123.arrows"
+        )
+
+        assert segment.appended_at == 1700000000.0
+        assert segment.row_count == 25
+        assert segment.dataset() == DatasetMetadata("raw", "domain", "dataset", 2)
+
+    def test_generated_names_are_ordered_by_the_time_they_were_appended(self):
+        first = AppendLogSegment.generate_name(100)
+        second = AppendLogSegment.generate_name(1)
+
+        assert first < second
+        assert AppendLogSegment.from_key(first).row_count == 100
+
+    def test_buffered_rows(self):
+        segments = [
+            AppendLogSegment.from_key("00000000000000000001-25-abc.arrows"),
+            AppendLogSegment.from_key("00000000000000000002-5-def.arrows"),
+        ]
+
+        assert buffered_rows(segments) == 30
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from api.common.custom_exceptions import UnsupportedTypeError
+from api.domain.data_types import extract_athena_types
+
+
+class TestExtractAthenaTypes:
+    def test_extracts_types_of_columns(self):
+        df = pd.DataFrame(
+            {
+                "first_int": [1, 2],
+                "second_int": [3, 4],
+                "double": [1.5, None],
+                "boolean": [True, False],
+                "string": ["a", None],
+                "mixed": ["a", 1],
+                "date": pd.to_datetime(["2020-01-01", "2020-01-02"]),
+            }
+        )
+
+        assert extract_athena_types(df) == {
+            "first_int": "int",
+            "second_int": "int",
+            "double": "double",
+            "boolean": "boolean",
+            "string": "string",
+            "mixed": "string",
+            "date": "date",
+        }
+
+    def test_skips_columns_without_values(self):
+        df = pd.DataFrame({"empty": [None, None], "value": [1, 2]})
+
+        assert extract_athena_types(df) == {"value": "int"}
+
+    def test_raises_error_for_unsupported_types(self):
+        df = pd.DataFrame({"duration": pd.to_timedelta([1, 2], unit="s")})
+
+        with pytest.raises(UnsupportedTypeError):
+            extract_athena_types(df)
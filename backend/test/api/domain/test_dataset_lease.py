@@ -0,0 +1,98 @@
+from api.domain.dataset_lease import DatasetLease, LeaseMode, QueuedLeaseHolder
+
+
+class TestDatasetLease:
+    def setup_method(self):
+        self.lease = DatasetLease(key="raw/domain/dataset/1")
+
+    def test_shared_lease_is_held_by_many_holders(self):
+        assert self.lease.acquire("first", LeaseMode.SHARED, 100, 400) is True
+        assert self.lease.acquire("second", LeaseMode.SHARED, 100, 400) is True
+
+        assert self.lease.mode == LeaseMode.SHARED
+        assert self.lease.holders == {"first": 400, "second": 400}
+
+    def test_exclusive_lease_waits_for_shared_holders(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+
+        assert self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 100, 400) is False
+        assert self.lease.queue == [
+            QueuedLeaseHolder(holder_id="overwrite", expiry=400)
+        ]
+
+        self.lease.release("append")
+
+        assert self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 110, 410) is True
+        assert self.lease.mode == LeaseMode.EXCLUSIVE
+        assert self.lease.holders == {"overwrite": 410}
+        assert self.lease.queue == []
+
+    def test_shared_lease_waits_behind_queued_exclusive_holder(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+        self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 100, 400)
+
+        assert self.lease.acquire("another_append", LeaseMode.SHARED, 100, 400) is False
+        assert "another_append" not in self.lease.holders
+
+    def test_exclusive_holders_are_served_in_arrival_order(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+        self.lease.acquire("first", LeaseMode.EXCLUSIVE, 100, 400)
+        self.lease.acquire("second", LeaseMode.EXCLUSIVE, 100, 400)
+        self.lease.release("append")
+
+        assert self.lease.acquire("second", LeaseMode.EXCLUSIVE, 110, 410) is False
+        assert self.lease.acquire("first", LeaseMode.EXCLUSIVE, 110, 410) is True
+        assert self.lease.acquire("second", LeaseMode.EXCLUSIVE, 120, 420) is False
+
+        self.lease.release("first")
+
+        assert self.lease.acquire("second", LeaseMode.EXCLUSIVE, 130, 430) is True
+
+    def test_expired_holders_no_longer_hold_the_lease(self):
+        self.lease.acquire("dead", LeaseMode.EXCLUSIVE, 100, 400)
+
+        assert self.lease.acquire("append", LeaseMode.SHARED, 300, 600) is False
+        assert self.lease.acquire("append", LeaseMode.SHARED, 400, 700) is True
+        assert self.lease.holders == {"append": 700}
+
+    def test_expired_queued_holders_are_removed(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+        self.lease.acquire("dead", LeaseMode.EXCLUSIVE, 100, 200)
+
+        assert self.lease.acquire("another_append", LeaseMode.SHARED, 200, 500) is True
+        assert self.lease.queue == []
+
+    def test_renew_extends_expiry_of_holder(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+
+        assert self.lease.renew("append", 200, 500) is True
+        assert self.lease.holders == {"append": 500}
+
+    def test_renew_fails_when_lease_has_expired(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+
+        assert self.lease.renew("append", 400, 700) is False
+        assert self.lease.holders == {}
+
+    def test_release_of_queued_holder_leaves_the_queue(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+        self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 100, 400)
+
+        self.lease.release("overwrite")
+
+        assert self.lease.queue == []
+        assert self.lease.mode == LeaseMode.SHARED
+
+    def test_release_of_last_holder_clears_the_mode(self):
+        self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 100, 400)
+
+        self.lease.release("overwrite")
+
+        assert self.lease.mode is None
+        assert self.lease.holders == {}
+
+    def test_expiry_time_is_after_the_latest_entry(self):
+        self.lease.acquire("append", LeaseMode.SHARED, 100, 400)
+        self.lease.acquire("overwrite", LeaseMode.EXCLUSIVE, 100, 500)
+
+        assert self.lease.expiry_time() == 500 + 24 * 60 * 60
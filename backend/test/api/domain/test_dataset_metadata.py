@@ -36,6 +36,12 @@ class TestDatasetMetadata:
             == "raw_data/layer/domain/dataset/3"
         )
 
+    def test_append_log_path(self):
+        assert (
+            self.dataset_metadata.append_log_path("segment.arrows")
+            == "append_log/layer/domain/dataset/3/segment.arrows"
+        )
+
     def test_glue_table_prefix(self):
         assert self.dataset_metadata.glue_table_prefix() == "layer_domain_dataset_"
 
@@ -60,6 +66,12 @@ class TestDatasetMetadata:
             == "raw_data/layer/domain/dataset"
         )
 
+    def test_quarantine_path(self):
+        assert (
+            self.dataset_metadata.quarantine_path("123-456")
+            == "raw_data/layer/domain/dataset/quarantine/3/123-456.parquet"
+        )
+
     def test_set_version_when_version_not_present(self):
         dataset_metadata = DatasetMetadata("layer", "domain", "dataset")
         schema_service = SchemaService()
@@ -0,0 +1,27 @@
+from api.domain.dataset_statistics import DatasetStatistics
+
+
+class TestDatasetStatistics:
+    def test_add(self):
+        statistics = DatasetStatistics(
+            size_bytes=10, files=1, rows=5, partitions={"year=2020"}
+        )
+
+        statistics.add(
+            DatasetStatistics(size_bytes=20, files=2, rows=6, partitions={"year=2021"})
+        )
+
+        assert statistics == DatasetStatistics(
+            size_bytes=30,
+            files=3,
+            rows=11,
+            partitions={"year=2020", "year=2021"},
+            partition_count=2,
+        )
+
+    def test_estimated_result_rows(self):
+        statistics = DatasetStatistics(size_bytes=10, files=1, rows=500)
+
+        assert statistics.estimated_result_rows() == 500
+        assert statistics.estimated_result_rows(100) == 100
+        assert statistics.estimated_result_rows(1000) == 500
@@ -1,3 +1,4 @@
+import pickle
 from unittest.mock import Mock
 
 import pyarrow as pa
@@ -5,7 +6,7 @@ import pytest
 
 from api.adapter.s3_adapter import S3Adapter
 from api.domain.schema import Schema
-from rapid.items.schema import Column, Owner
+from rapid.items.schema import Column, DerivedPartition, Owner
 from api.domain.schema_metadata import SchemaMetadata
 from api.domain.data_types import BooleanType, NumericType, StringType
 
@@ -49,6 +50,31 @@ class TestSchema:
 
         assert actual_column_names == expected_column_names
 
+    def test_gets_column_by_name(self):
+        assert self.schema.get_column("colname3") == self.schema.columns[2]
+        assert self.schema.get_column("missing") is None
+
+    def test_column_lookups_are_rebuilt_when_columns_are_replaced(self):
+        assert self.schema.get_partitions() == ["colname2", "colname1"]
+
+        self.schema.columns = [
+            Column(name="other", partition_index=0, data_type="int", allow_null=False)
+        ]
+
+        assert self.schema.get_column_names() == ["other"]
+        assert self.schema.get_partitions() == ["other"]
+
+    def test_column_lookups_are_not_serialised_or_compared(self):
+        other_schema = self.schema.model_copy(deep=True)
+        self.schema.get_partition_columns()
+
+        assert self.schema == other_schema
+        assert self.schema.model_dump() == other_schema.model_dump()
+        assert pickle.loads(pickle.dumps(self.schema)).get_partitions() == [
+            "colname2",
+            "colname1",
+        ]
+
     def test_gets_partitions(self):
         expected_columns = ["colname2", "colname1"]
 
@@ -102,6 +128,38 @@ class TestSchema:
 
         assert res == expected
 
+    def test_get_partition_keys_and_glue_columns_with_derived_partition(self):
+        self.schema.metadata.partition_by = DerivedPartition(
+            column="colname3", granularity="MONTH"
+        )
+
+        assert self.schema.get_partition_keys() == [
+            "colname2",
+            "colname1",
+            "colname3_month",
+        ]
+        assert self.schema.get_partition_columns_for_glue()[-1] == {
+            "Name": "colname3_month",
+            "Type": "string",
+        }
+        assert self.schema.has_partition_projection() is False
+
+    def test_get_partition_projection_parameters(self):
+        self.schema.columns = [
+            Column(name="day", partition_index=None, data_type="date", allow_null=False)
+        ]
+        self.schema.metadata.partition_by = DerivedPartition(column="day")
+
+        assert self.schema.has_partition_projection() is True
+        assert self.schema.get_partition_projection_parameters() == {
+            "projection.enabled": "true",
+            "projection.day_day.type": "date",
+            "projection.day_day.format": "yyyy-MM-dd",
+            "projection.day_day.range": "2000-01-01,NOW+10YEARS",
+            "projection.day_day.interval": "1",
+            "projection.day_day.interval.unit": "DAYS",
+        }
+
     def test_get_non_partition_columns_for_glue(self):
         res = self.schema.get_non_partition_columns_for_glue()
         expected = [
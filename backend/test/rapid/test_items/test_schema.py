@@ -74,6 +74,13 @@ class TestSchemaMetadata:
             "description": "test",
             "update_behaviour": "OVERWRITE",
             "is_latest_version": True,
+            "max_partitions": None,
+            "partition_overflow": "WARN",
+            "key_columns": None,
+            "partition_by": None,
+            "sort_by": None,
+            "sort_method": "LINEAR",
+            "invalid_rows": "REJECT",
         }
 
         schema_metadata = SchemaMetadata(**_schema_metadata)
@@ -297,6 +304,13 @@ class TestSchema:
                 "description": "test",
                 "update_behaviour": "OVERWRITE",
                 "is_latest_version": True,
+                "max_partitions": None,
+                "partition_overflow": "WARN",
+                "key_columns": None,
+                "partition_by": None,
+                "sort_by": None,
+                "sort_method": "LINEAR",
+                "invalid_rows": "REJECT",
             },
             "columns": [
                 {
@@ -2,13 +2,17 @@ from mock import Mock, call
 import pytest
 import io
 import pandas as pd
+import pyarrow as pa
 from requests_mock import Mocker
 
 from rapid import Rapid
 from rapid.items.schema import Schema
 from rapid.exceptions import (
     DataFrameUploadFailedException,
+    JobCancelFailedException,
+    JobCancelledException,
     JobFailedException,
+    JobRetryFailedException,
     SchemaGenerationFailedException,
     SchemaAlreadyExistsException,
     SchemaCreateFailedException,
@@ -19,6 +23,7 @@ from rapid.exceptions import (
     SubjectNotFoundException,
     SubjectAlreadyExistsException,
     DatasetNotFoundException,
+    DatasetReprocessFailedException,
     InvalidDomainNameException,
     DomainConflictException,
     ClientDoesNotHaveUserAdminPermissionsException,
@@ -94,6 +99,98 @@ class TestRapid:
         with pytest.raises(UnableToFetchJobStatusException):
             rapid.fetch_job_progress(job_id)
 
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_retry_job_success(self, requests_mock: Mocker, rapid: Rapid):
+        job_id = "abc-123"
+        requests_mock.post(
+            f"{RAPID_URL}/jobs/{job_id}/retry",
+            json={"details": {"job_id": job_id}},
+            status_code=202,
+        )
+        rapid.wait_for_job_outcome = Mock()
+
+        res = rapid.retry_job(job_id)
+
+        assert res == job_id
+        rapid.wait_for_job_outcome.assert_called_once_with(job_id)
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_retry_job_fail(self, requests_mock: Mocker, rapid: Rapid):
+        job_id = "abc-123"
+        requests_mock.post(
+            f"{RAPID_URL}/jobs/{job_id}/retry",
+            json={"details": "Only failed jobs can be retried"},
+            status_code=400,
+        )
+
+        with pytest.raises(JobRetryFailedException):
+            rapid.retry_job(job_id)
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_cancel_job_success(self, requests_mock: Mocker, rapid: Rapid):
+        job_id = "abc-123"
+        requests_mock.post(
+            f"{RAPID_URL}/jobs/{job_id}/cancel",
+            json={"details": {"job_id": job_id}},
+            status_code=202,
+        )
+
+        res = rapid.cancel_job(job_id)
+
+        assert res == job_id
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_cancel_job_fail(self, requests_mock: Mocker, rapid: Rapid):
+        job_id = "abc-123"
+        requests_mock.post(
+            f"{RAPID_URL}/jobs/{job_id}/cancel",
+            json={"details": "Only jobs in progress can be cancelled"},
+            status_code=400,
+        )
+
+        with pytest.raises(JobCancelFailedException):
+            rapid.cancel_job(job_id)
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_reprocess_dataset_success(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/reprocess?version=2",
+            json={"details": {"job_ids": ["abc-123", "def-456"]}},
+            status_code=202,
+        )
+        rapid.wait_for_job_outcome = Mock()
+
+        res = rapid.reprocess_dataset(
+            layer, domain, dataset, source_version=1, raw_files=["a.csv"], version=2
+        )
+
+        assert res == ["abc-123", "def-456"]
+        assert requests_mock.last_request.json() == {
+            "source_version": 1,
+            "raw_files": ["a.csv"],
+        }
+        assert rapid.wait_for_job_outcome.call_args_list == [
+            call("abc-123"),
+            call("def-456"),
+        ]
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_reprocess_dataset_fail(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/reprocess",
+            json={"details": "There are no uploaded files for the dataset"},
+            status_code=400,
+        )
+
+        with pytest.raises(DatasetReprocessFailedException):
+            rapid.reprocess_dataset(layer, domain, dataset, source_version=1)
+
     @pytest.mark.usefixtures("rapid")
     def test_wait_for_job_outcome_success(self, rapid: Rapid):
         rapid.fetch_job_progress = Mock(
@@ -118,6 +215,17 @@ class TestRapid:
             expected_calls = [call(job_id), call(job_id)]
             assert rapid.fetch_job_progress.call_args_list == expected_calls
 
+    @pytest.mark.usefixtures("rapid")
+    def test_wait_for_job_outcome_cancelled(self, rapid: Rapid):
+        rapid.fetch_job_progress = Mock(
+            side_effect=[{"status": "IN PROGRESS"}, {"status": "CANCELLED"}]
+        )
+
+        with pytest.raises(JobCancelledException):
+            rapid.wait_for_job_outcome(1234, interval=0.01)
+
+        assert rapid.fetch_job_progress.call_count == 2
+
     @pytest.mark.usefixtures("requests_mock", "rapid")
     def test_download_dataframe_success(self, requests_mock: Mocker, rapid: Rapid):
         layer = "raw"
@@ -199,6 +307,144 @@ class TestRapid:
         assert res == job_id
         rapid.convert_dataframe_for_file_upload.assert_called_once_with(df)
 
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_upload_record_batches_success_no_waiting(
+        self, requests_mock: Mocker, rapid: Rapid
+    ):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        job_id = 1234
+        batches = [
+            pa.record_batch({"col1": [1, 2]}),
+            pa.record_batch({"col1": [3]}),
+        ]
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}",
+            json={"details": {"job_id": job_id}},
+            status_code=202,
+        )
+
+        res = rapid.upload_record_batches(
+            layer, domain, dataset, batches, wait_to_complete=False
+        )
+
+        assert res == job_id
+        request = requests_mock.last_request
+        assert request.headers["Content-Type"] == "application/vnd.apache.arrow.stream"
+        assert request.headers["Content-Disposition"].endswith('.arrows"')
+        assert int(request.headers["Content-Length"]) > 0
+
+    def test_write_record_batches_for_file_upload(self, rapid: Rapid):
+        batches = [
+            pa.record_batch({"col1": [1, 2]}),
+            pa.record_batch({"col1": [3]}),
+        ]
+
+        with rapid.write_record_batches_for_file_upload(batches) as file:
+            table = pa.ipc.open_stream(file.read()).read_all()
+
+        assert table.column("col1").to_pylist() == [1, 2, 3]
+
+    def test_write_record_batches_for_file_upload_requires_a_batch(self, rapid: Rapid):
+        with pytest.raises(ValueError):
+            rapid.write_record_batches_for_file_upload([])
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_append_rows_as_json(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/append",
+            json={"details": {"buffered_rows": 12}},
+            status_code=202,
+        )
+
+        res = rapid.append_rows(layer, domain, dataset, [{"col1": 1}, {"col1": 2}])
+
+        assert res == 12
+        assert requests_mock.last_request.json() == {"rows": [{"col1": 1}, {"col1": 2}]}
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_append_rows_of_a_dataframe_as_an_arrow_stream(
+        self, requests_mock: Mocker, rapid: Rapid
+    ):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/append",
+            json={"details": {"buffered_rows": 3}},
+            status_code=202,
+        )
+
+        res = rapid.append_rows(
+            layer, domain, dataset, pd.DataFrame({"col1": [1, 2, 3]})
+        )
+
+        assert res == 3
+        assert (
+            requests_mock.last_request.headers["Content-Type"]
+            == "application/vnd.apache.arrow.stream"
+        )
+        table = pa.ipc.open_stream(requests_mock.last_request.body).read_all()
+        assert table.column("col1").to_pylist() == [1, 2, 3]
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_append_rows_failure(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/append",
+            json={"details": ["Column [col1] has an incorrect data type"]},
+            status_code=400,
+        )
+
+        with pytest.raises(DataFrameUploadFailedException):
+            rapid.append_rows(layer, domain, dataset, [{"col1": "a"}])
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_validate_dataframe_success(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        df = pd.DataFrame()
+        expected = {"valid": False, "rows_validated": 10, "errors": ["some error"]}
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/validate",
+            json={"details": expected},
+            status_code=200,
+        )
+        rapid.convert_dataframe_for_file_upload = Mock(return_value={})
+
+        res = rapid.validate_dataframe(
+            layer, domain, dataset, df, fail_fast=True, sample_rows=10
+        )
+        assert res == expected
+        assert requests_mock.last_request.qs == {
+            "fail_fast": ["true"],
+            "sample_rows": ["10"],
+        }
+        rapid.convert_dataframe_for_file_upload.assert_called_once_with(df)
+
+    @pytest.mark.usefixtures("requests_mock", "rapid")
+    def test_validate_dataframe_failure(self, requests_mock: Mocker, rapid: Rapid):
+        layer = "raw"
+        domain = "test_domain"
+        dataset = "test_dataset"
+        df = pd.DataFrame()
+        requests_mock.post(
+            f"{RAPID_URL}/datasets/{layer}/{domain}/{dataset}/validate",
+            json={"details": "Schema not found"},
+            status_code=400,
+        )
+        rapid.convert_dataframe_for_file_upload = Mock(return_value={})
+
+        with pytest.raises(DataFrameUploadFailedException):
+            rapid.validate_dataframe(layer, domain, dataset, df)
+
     @pytest.mark.usefixtures("requests_mock", "rapid")
     def test_upload_dataframe_failure(self, requests_mock: Mocker, rapid: Rapid):
         layer = "raw"
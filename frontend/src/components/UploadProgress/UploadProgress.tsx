@@ -8,7 +8,8 @@ import Row from '../Row'
 enum UploadStatus {
   Failed = 'FAILED',
   Success = 'SUCCESS',
-  InProgress = 'IN PROGRESS'
+  InProgress = 'IN PROGRESS',
+  Cancelled = 'CANCELLED'
 }
 
 const statusConverter = {
@@ -26,6 +27,11 @@ const statusConverter = {
     severity: 'info',
     message: 'Data processing',
     link: 'See progress details'
+  },
+  [UploadStatus.Cancelled]: {
+    severity: 'warning',
+    message: 'Data upload cancelled',
+    link: 'See upload details'
   }
 }
 
@@ -44,6 +50,7 @@ const UploadProgress = ({
       switch (data.status) {
         case UploadStatus.Success:
         case UploadStatus.Failed:
+        case UploadStatus.Cancelled:
           setStop(true)
           setStatus(data.status)
           setDisableUpload(false)
@@ -11,6 +11,7 @@ function getStatusSymbol(status: string) {
   if (status === 'SUCCESS') return <CheckCircleOutlineIcon color="success" />
   else if (status === 'IN PROGRESS') return <QueryBuilderIcon />
   else if (status === 'FAILED') return <CancelIcon color="error" />
+  else if (status === 'CANCELLED') return <CancelIcon color="disabled" />
 }
 
 function StatusPage() {